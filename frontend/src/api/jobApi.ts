@@ -87,7 +87,14 @@ export interface StatsResponse {
   };
 }
 
-export interface GraphSearchRequest {
+// 传入 page_size / cursor / fields 任一项时按页返回（默认不含 jd_text，详情走 getJob）
+export interface PageParams {
+  page_size?: number;
+  cursor?: string;
+  fields?: string[];
+}
+
+export interface GraphSearchRequest extends PageParams {
   query: string;
   top_k?: number;
   city?: string;
@@ -107,6 +114,8 @@ export interface GraphSearchResponse {
       source: 'graph' | 'vector';
     }>;
     count: number;
+    total?: number;
+    next_cursor?: string | null;
     query: string;
     matched_skills: string[];
     graph_hits: number;
@@ -114,7 +123,7 @@ export interface GraphSearchResponse {
   };
 }
 
-export interface GraphRecommendRequest {
+export interface GraphRecommendRequest extends PageParams {
   user_skills: string[];
   top_k?: number;
   city?: string;
@@ -134,12 +143,33 @@ export interface GraphRecommendResponse {
       match_type: 'precise' | 'expanded';
     }>;
     count: number;
+    total?: number;
+    next_cursor?: string | null;
     precise_count: number;
     expanded_count: number;
     related_skills: string[];
   };
 }
 
+// /api/job/{job_id}：单个岗位详情（含 JD 全文与全部技能）
+export interface JobDetailResponse {
+  success: boolean;
+  data: {
+    job_id: string;
+    title: string;
+    city: string;
+    company: string;
+    salary_min: number;
+    salary_max: number;
+    salary_range: string;
+    experience: string;
+    education: string;
+    jd_text: string;
+    publish_date: string;
+    skills: string[];
+  };
+}
+
 export interface GraphGapAnalysisRequest {
   user_skills: string[];
   target_position: string;
@@ -237,6 +267,11 @@ export const jobApi = {
     return apiClient.post<GraphRecommendResponse>('/api/recommend', params);
   },
 
+  // 岗位详情（含 JD 全文）
+  getJob: (jobId: string) => {
+    return apiClient.get<JobDetailResponse>(`/api/job/${encodeURIComponent(jobId)}`);
+  },
+
   // 图谱增强技能差距分析（基于Neo4j）
   graphGapAnalysis: (params: GraphGapAnalysisRequest) => {
     return apiClient.post<GraphGapAnalysisResponse>('/api/gap-analysis', params);
@@ -0,0 +1,179 @@
+"""
+岗位导入吞吐基准：串行 vs 按 job_id 分区的并行导入
+每轮先清掉上一轮写入的基准数据，再以指定 worker 数调用 Neo4jImporter.import_jobs，
+记录总耗时、岗位/秒、相对串行的加速比以及各 worker 的吞吐，结果写入 reports/import_benchmark.json。
+
+基准岗位的 job_id / 公司名带 bench_ 前缀，只清理这部分数据，可在已有图谱上运行（技能节点复用图谱中已有的）。
+
+用法：
+    python scripts/benchmark_import.py --jobs 50000 --workers 1 2 4 8
+    python scripts/benchmark_import.py --data data/enhanced/xxx.json --workers 1 4
+"""
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+# 添加项目根目录到path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.graph_builder.neo4j_importer import Neo4jImporter
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+DEFAULT_REPORT = project_root / 'reports' / 'import_benchmark.json'
+BENCH_PREFIX = "bench_"
+
+_CITIES = ["北京", "上海", "深圳", "杭州", "广州", "成都", "武汉", "南京"]
+_TITLES = ["Java开发工程师", "Python开发工程师", "前端开发工程师", "数据分析师", "算法工程师", "测试工程师"]
+
+
+def load_neo4j_config() -> Dict[str, str]:
+    """从 config.yaml 读取 Neo4j 连接配置（不存在时使用本地默认值）"""
+    config = {"uri": "bolt://localhost:7687", "user": "neo4j", "password": "password"}
+    config_file = project_root / 'config.yaml'
+    if config_file.exists():
+        import yaml
+        with open(config_file, 'r', encoding='utf-8') as f:
+            neo4j_conf = (yaml.safe_load(f) or {}).get('neo4j', {})
+        config.update({k: v for k, v in neo4j_conf.items() if k in config and v})
+    return config
+
+
+def synthetic_jobs(n: int, skills: List[str], companies: int, seed: int = 42) -> List[Dict]:
+    """合成岗位：技能按幂律抽样（热门技能被大量岗位共享，接近真实的锁竞争）"""
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(len(skills))]
+    jobs = []
+    for i in range(n):
+        salary_min = rng.randint(5, 40)
+        jobs.append({
+            "job_id": f"{BENCH_PREFIX}{i}",
+            "title": rng.choice(_TITLES),
+            "city": rng.choice(_CITIES),
+            "company": f"{BENCH_PREFIX}company_{rng.randrange(companies)}",
+            "salary_min": salary_min,
+            "salary_max": salary_min + rng.randint(2, 20),
+            "skills": list(dict.fromkeys(rng.choices(skills, weights=weights, k=rng.randint(3, 10)))),
+        })
+    return jobs
+
+
+def file_jobs(paths: List[Path]) -> List[Dict]:
+    """真实数据：job_id / 公司名加前缀，便于清理"""
+    jobs = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for job in json.load(f):
+                if not job.get('job_id'):
+                    continue
+                job = dict(job, job_id=f"{BENCH_PREFIX}{job['job_id']}")
+                if job.get('company'):
+                    job['company'] = f"{BENCH_PREFIX}{job['company']}"
+                jobs.append(job)
+    return jobs
+
+
+def cleanup(importer: Neo4jImporter, batch_size: int = 5000) -> None:
+    """删除基准岗位与公司"""
+    for query in (
+        "MATCH (j:Job) WHERE j.job_id STARTS WITH $prefix "
+        "WITH j LIMIT $limit DETACH DELETE j RETURN count(*) AS deleted",
+        "MATCH (c:Company) WHERE c.company_id STARTS WITH 'company_' + $prefix "
+        "WITH c LIMIT $limit DETACH DELETE c RETURN count(*) AS deleted",
+    ):
+        while importer.graph.run(query, prefix=BENCH_PREFIX, limit=batch_size).data()[0]['deleted']:
+            pass
+
+
+def run_once(conf: Dict[str, str], jobs: List[Dict], workers: int, batch_size: int) -> Dict:
+    importer = Neo4jImporter(conf['uri'], conf['user'], conf['password'])
+    cleanup(importer)
+    started = time.perf_counter()
+    created = importer.import_jobs(jobs, batch_size=batch_size, workers=workers)
+    seconds = time.perf_counter() - started
+    return {
+        "workers": workers,
+        "jobs": created,
+        "seconds": round(seconds, 3),
+        "jobs_per_sec": round(created / seconds, 1) if seconds > 0 else 0.0,
+        "transactions": sum(r['transactions'] for r in importer.worker_reports),
+        "retried": sum(r['retried'] for r in importer.worker_reports),
+        "failed": sum(r['failed'] for r in importer.worker_reports),
+        "worker_reports": importer.worker_reports,
+    }
+
+
+def main() -> int:
+    neo4j_conf = load_neo4j_config()
+    parser = argparse.ArgumentParser(description='岗位导入吞吐基准（串行 vs 并行分区）')
+    parser.add_argument('--uri', default=neo4j_conf['uri'])
+    parser.add_argument('--user', default=neo4j_conf['user'])
+    parser.add_argument('--password', default=neo4j_conf['password'])
+    parser.add_argument('--jobs', type=int, default=20000, help='合成岗位数（未指定 --data 时）')
+    parser.add_argument('--companies', type=int, default=2000, help='合成公司数')
+    parser.add_argument('--data', nargs='*', type=Path, help='使用真实岗位 JSON 代替合成数据')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help='依次测试的 worker 数')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--output', type=Path, default=DEFAULT_REPORT)
+    parser.add_argument('--keep', action='store_true', help='保留最后一轮写入的基准数据')
+    args = parser.parse_args()
+    conf = {"uri": args.uri, "user": args.user, "password": args.password}
+
+    importer = Neo4jImporter(conf['uri'], conf['user'], conf['password'])
+    skills = [r['name'] for r in importer.graph.run(
+        "MATCH (s:Skill) RETURN s.name AS name ORDER BY coalesce(s.demand_count, 0) DESC, s.name"
+    ).data()]
+    if not skills:
+        logger.error("图谱中没有 Skill 节点，请先导入技能词典（scripts/init_neo4j.py 或 reimport_neo4j.py）")
+        return 1
+    jobs = file_jobs(args.data) if args.data else synthetic_jobs(args.jobs, skills, args.companies)
+    logger.info(f"基准数据: {len(jobs)} 个岗位, {len(skills)} 个技能, worker 数 {args.workers}")
+
+    # 串行结果作为加速比基准，始终先跑
+    worker_counts = sorted(set(args.workers) | {1})
+    results = []
+    try:
+        for workers in worker_counts:
+            logger.info(f"--- workers={workers} ---")
+            results.append(run_once(conf, jobs, workers, args.batch_size))
+    finally:
+        if not args.keep:
+            cleanup(importer)
+
+    serial = results[0]['seconds']
+    print(f"\n{'workers':>8}{'耗时s':>10}{'岗位/s':>12}{'加速比':>8}{'事务':>8}{'重试':>6}{'失败':>6}")
+    print("-" * 58)
+    for r in results:
+        r['speedup'] = round(serial / r['seconds'], 2) if r['seconds'] else 0.0
+        print(f"{r['workers']:>8}{r['seconds']:>10}{r['jobs_per_sec']:>12}{r['speedup']:>8}"
+              f"{r['transactions']:>8}{r['retried']:>6}{r['failed']:>6}")
+        if r['workers'] > 1:
+            for w in r['worker_reports']:
+                print(f"{'':>8}  worker {w['worker']}: {w['jobs']} 个岗位, {w['jobs_per_sec']} 岗位/s")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump({
+            "generated_at": datetime.now().isoformat(),
+            "jobs": len(jobs),
+            "batch_size": args.batch_size,
+            "results": results,
+        }, f, ensure_ascii=False, indent=2)
+    logger.info(f"结果已写入 {args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
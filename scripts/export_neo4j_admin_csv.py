@@ -0,0 +1,130 @@
+"""
+全量重建图谱的离线导入（neo4j-admin database import）
+比 reimport_neo4j.py 的事务导入快一到两个数量级，适合从零重建。
+
+用法：
+    python scripts/export_neo4j_admin_csv.py                      # 导出 CSV + import.sh + post_import.cypher
+    python scripts/export_neo4j_admin_csv.py --data a.json b.json # 指定数据文件
+    neo4j stop && sh data/neo4j_import/import.sh                  # 离线导入（覆盖目标库）
+    neo4j start && python scripts/export_neo4j_admin_csv.py --finalize   # 建约束 / 索引 + 递增数据版本
+"""
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# 添加项目根目录到path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_OUTPUT = project_root / 'data' / 'neo4j_import'
+SKILL_DICT_PATH = project_root / 'data' / 'skill_dict' / 'skill_taxonomy.json'
+
+
+def default_data_files():
+    """最新的增强数据文件；没有增强数据时使用全部清洗数据（与 reimport_neo4j.py 的默认选择一致）"""
+    enhanced_dir = project_root / 'data' / 'enhanced'
+    if enhanced_dir.exists():
+        enhanced = sorted(enhanced_dir.glob('*.json'), key=lambda f: f.stat().st_mtime, reverse=True)
+        if enhanced:
+            return [enhanced[0]]
+    cleaned_dir = project_root / 'data' / 'cleaned'
+    return sorted(cleaned_dir.glob('boss_*_cleaned.json')) if cleaned_dir.exists() else []
+
+
+def load_neo4j_config():
+    import yaml
+    with open(project_root / 'config.yaml', 'r', encoding='utf-8') as f:
+        return yaml.safe_load(f)['neo4j']
+
+
+def export(args) -> int:
+    from src.graph_builder.admin_export import AdminImportExporter
+    from src.graph_builder.skill_dictionary import SkillDictionary
+
+    data_files = [Path(p) for p in args.data] if args.data else default_data_files()
+    if not data_files:
+        logger.error("未找到数据文件！请先运行数据清洗或LLM增强")
+        return 1
+    logger.info(f"数据文件: {[f.name for f in data_files]}")
+
+    exporter = AdminImportExporter(
+        SkillDictionary(str(args.skill_dict)), args.output,
+        min_co_occurrence=args.min_co_occurrence, database=args.database,
+    )
+    summary = exporter.export(data_files)
+
+    print("\n" + "=" * 80)
+    print("=== 导出统计 ===")
+    for key, value in summary.items():
+        print(f"  {key}: {value}")
+    print("\n【下一步】")
+    print("  1. 停止数据库后离线导入（会覆盖目标库）:")
+    print(f"     neo4j stop && sh {args.output / 'import.sh'}")
+    print("  2. 启动数据库，建约束 / 索引并递增数据版本:")
+    print("     neo4j start && python scripts/export_neo4j_admin_csv.py --finalize")
+    return 0
+
+
+def finalize(args) -> int:
+    """执行 post_import.cypher 并递增数据版本（API 缓存随之失效）"""
+    from neo4j import GraphDatabase
+    from src.utils.data_version import bump_generation
+
+    script = args.output / 'post_import.cypher'
+    if not script.exists():
+        logger.error(f"{script} 不存在，请先导出")
+        return 1
+    statements = [s.strip() for s in script.read_text(encoding='utf-8').split(';\n') if s.strip()]
+
+    neo4j_config = load_neo4j_config()
+    database = args.database or neo4j_config.get('database', 'neo4j')
+    driver = GraphDatabase.driver(neo4j_config['uri'], auth=(neo4j_config['user'], neo4j_config['password']))
+    try:
+        with driver.session(database=database) as session:
+            for statement in statements:
+                try:
+                    session.run(statement).consume()
+                    logger.info(f"✅ {statement.split(' IF NOT EXISTS')[0]}")
+                except Exception as e:
+                    logger.warning(f"执行失败（可能已存在）: {statement[:60]}... {e}")
+
+            def _executor(query, params):
+                with driver.session(database=database) as s:
+                    return [dict(r) for r in s.run(query, params)]
+
+            bump_generation('neo4j_admin_import', graph_executor=_executor)
+    finally:
+        driver.close()
+    logger.info("✅ 离线导入收尾完成")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='neo4j-admin 离线导入文件导出')
+    parser.add_argument('--data', nargs='*', help='清洗 / 增强后的岗位 JSON，默认取最新增强数据')
+    parser.add_argument('--output', type=Path, default=DEFAULT_OUTPUT, help='CSV 输出目录')
+    parser.add_argument('--skill-dict', type=Path, default=SKILL_DICT_PATH)
+    parser.add_argument('--database', default=None, help='目标库名，默认读取 config.yaml')
+    parser.add_argument('--min-co-occurrence', type=int, default=10, help='RELATED_TO 最小共现次数')
+    parser.add_argument('--finalize', action='store_true', help='导入完成后建约束 / 索引并递增数据版本')
+    args = parser.parse_args()
+
+    if args.finalize:
+        return finalize(args)
+    if args.database is None:
+        try:
+            args.database = load_neo4j_config().get('database', 'neo4j')
+        except (OSError, KeyError):
+            args.database = 'neo4j'
+    return export(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
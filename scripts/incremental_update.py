@@ -14,6 +14,8 @@ sys.path.insert(0, str(project_root))
 
 from src.rag.vector_db import VectorDB
 from src.graph_builder.neo4j_importer import Neo4jImporter
+from src.graph_builder.incremental_sync import IncrementalGraphSync
+from src.utils.data_version import bump_generation
 
 logging.basicConfig(
     level=logging.INFO,
@@ -51,6 +53,7 @@ def incremental_update_vector_db(new_data_file: Path, batch_size: int = 50):
     # 3. 增量添加
     logger.info("\n【步骤3: 增量添加到向量库】")
     db.add_jobs(new_jobs, batch_size=batch_size, show_progress=True)
+    bump_generation('vector_db_incremental', labels=())
     
     # 4. 检查结果
     stats_after = db.get_stats()
@@ -60,12 +63,13 @@ def incremental_update_vector_db(new_data_file: Path, batch_size: int = 50):
     logger.info(f"   新增: {stats_after['total_documents'] - stats_before['total_documents']} 条")
 
 
-def incremental_update_neo4j(new_data_file: Path):
+def incremental_update_neo4j(new_data_file: Path, full_snapshot: bool = False):
     """
-    增量更新Neo4j图数据库
+    增量更新Neo4j图数据库（只写入新增 / 变更的岗位）
     
     Args:
         new_data_file: 新数据文件路径
+        full_snapshot: 数据文件是否为全量快照（是则删除图谱中已不存在于文件的岗位）
     """
     print("\n" + "="*80)
     print("📊 增量更新Neo4j图数据库")
@@ -75,19 +79,27 @@ def incremental_update_neo4j(new_data_file: Path):
     logger.info("【步骤1: 加载新数据】")
     with open(new_data_file, 'r', encoding='utf-8') as f:
         new_jobs = json.load(f)
-    logger.info(f"待添加数据: {len(new_jobs)} 条")
+    logger.info(f"待同步数据: {len(new_jobs)} 条")
     
     # 2. 初始化Neo4j Importer
     logger.info("\n【步骤2: 连接Neo4j】")
     importer = Neo4jImporter()
     
-    # 3. 增量导入（使用MERGE，不会重复）
-    logger.info("\n【步骤3: 增量导入岗位数据】")
-    importer.import_jobs(new_jobs, batch_size=100)
+    # 3. 按内容哈希分类，只写入增量（统计与共现计数随之增量合并）
+    logger.info("\n【步骤3: 同步岗位增量】")
+    sync = IncrementalGraphSync(importer)
+    result = sync.sync(new_jobs, full_snapshot=full_snapshot)
+    logger.info(f"同步结果: {result}")
+    if not (result.get('written') or result.get('deleted')):
+        logger.info("\n✅ 图谱已是最新，无需更新")
+        return
     
-    # 4. 更新技能关联关系
+    # 4. 更新技能关联关系与岗位画像
     logger.info("\n【步骤4: 更新技能关联】")
-    importer.create_skill_relationships()
+    importer.build_skill_relationships()
+    importer.build_position_profiles()
+    # 清单与递增后的数据版本对齐，下次同步不会误判为图谱已被重建
+    sync.mark_synced(importer.bump_data_generation('neo4j_incremental'))
     
     logger.info("\n✅ Neo4j增量更新完成！")
 
@@ -148,7 +160,8 @@ def main():
             incremental_update_vector_db(selected_file)
         
         if target == 2 or target == 3:
-            incremental_update_neo4j(selected_file)
+            full_snapshot = input("\n文件是否为全量快照（删除图谱中文件里没有的岗位）？[y/N]: ").strip().lower() == 'y'
+            incremental_update_neo4j(selected_file, full_snapshot=full_snapshot)
         
         print("\n" + "="*80)
         print("✅ 增量更新全部完成！")
@@ -13,6 +13,7 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.rag.vector_db import VectorDB
+from src.utils.data_version import bump_generation
 
 logging.basicConfig(
     level=logging.INFO,
@@ -110,6 +111,7 @@ def init_vector_database(force_recreate: bool = False):
     try:
         # 批量添加（带进度条）
         db.add_jobs(jobs, batch_size=50, show_progress=True)
+        bump_generation('vector_db_init', labels=())
         
         # 4. 验证
         logger.info("\n【步骤4: 验证】")
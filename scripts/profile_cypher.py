@@ -0,0 +1,308 @@
+"""
+Cypher 查询 PROFILE 回归检查
+遍历 src/utils/cypher_registry 中登记的查询模板，在目标库上逐个执行 PROFILE，
+记录 db hits / 返回行数 / 执行计划算子 / 耗时，并与基线文件比较：
+  - db hits 超过基线 (1 + threshold) 倍且绝对增量 >= min-delta 视为回退
+  - 模板声明的 expect 片段（如 "Skill(name)"）未出现在任何算子中视为索引失效
+  - 查询报错
+任一情况退出码为 1，可直接挂到 CI。
+
+用法：
+    python scripts/profile_cypher.py --seed 2000            # 空库中写入合成图谱后检查
+    python scripts/profile_cypher.py                        # 对现有图谱检查
+    python scripts/profile_cypher.py --update-baseline      # 接受当前结果为新基线
+    python scripts/profile_cypher.py --only search_by_skills job_detail
+"""
+import argparse
+import json
+import logging
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+# 添加项目根目录到path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from src.utils.cypher_registry import CypherTemplate, load_templates
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASELINE = project_root / 'reports' / 'cypher_profile_baseline.json'
+
+# @ 占位符取样查询
+_SAMPLE_CYPHER = {
+    "job_ids": "MATCH (j:Job) WHERE j.job_id IS NOT NULL RETURN j.job_id AS v ORDER BY j.job_id LIMIT 100",
+    "skills": "MATCH (s:Skill) RETURN s.name AS v ORDER BY coalesce(s.demand_count, 0) DESC, s.name LIMIT 5",
+    "city": ("MATCH (j:Job) WHERE j.city IS NOT NULL AND j.city <> '' "
+             "RETURN j.city AS v, count(*) AS n ORDER BY n DESC, v LIMIT 1"),
+}
+
+
+def load_neo4j_config() -> Dict[str, str]:
+    """从 config.yaml 读取 Neo4j 连接配置（不存在时使用本地默认值）"""
+    config = {"uri": "bolt://localhost:7687", "user": "neo4j", "password": "password", "database": "neo4j"}
+    config_file = project_root / 'config.yaml'
+    if config_file.exists():
+        import yaml
+        with open(config_file, 'r', encoding='utf-8') as f:
+            neo4j_conf = (yaml.safe_load(f) or {}).get('neo4j', {})
+        config.update({k: v for k, v in neo4j_conf.items() if k in config and v})
+    return config
+
+
+# ===== 合成图谱 =====
+
+_SEED_CITIES = ["北京", "上海", "深圳", "杭州", "广州", "成都", "武汉", "南京"]
+_SEED_ROLES = ["Java开发工程师", "Python开发工程师", "前端开发工程师", "数据分析师", "算法工程师",
+               "测试工程师", "运维工程师", "Go开发工程师", "C++开发工程师", "产品经理"]
+_SEED_LEVELS = ["", "高级", "资深", "初级"]
+_SEED_CATEGORIES = ["编程语言", "框架", "数据库", "工具", "云原生", "AI"]
+
+
+def seed_graph(session, n_jobs: int, n_skills: int = 200, rng_seed: int = 42) -> None:
+    """写入合成图谱：Skill / Job / Company、REQUIRES / POSTED_BY / RELATED_TO / CO_OCCURS 边、统计属性与岗位画像"""
+    from src.api.queries import API_INDEXES
+    from src.api.title_search import FULLTEXT_ANALYZER, FULLTEXT_INDEX
+    from src.graph_builder.position_profiles import build_profiles
+    from src.utils.graph_stats import REFRESH_CITY_COUNT_CYPHER
+
+    rng = random.Random(rng_seed)
+    skills = [{"skill_id": f"S{i:04d}", "name": f"skill_{i:04d}",
+               "category": _SEED_CATEGORIES[i % len(_SEED_CATEGORIES)]} for i in range(n_skills)]
+    # 技能热度服从长尾分布，少数技能出现在大多数岗位中
+    weights = [1.0 / (i + 1) for i in range(n_skills)]
+    jobs = []
+    for i in range(n_jobs):
+        salary_min = rng.randint(5, 40)
+        jobs.append({
+            "job_id": f"J{i:07d}",
+            "title": rng.choice(_SEED_LEVELS) + rng.choice(_SEED_ROLES),
+            "city": rng.choice(_SEED_CITIES),
+            "salary_min": salary_min,
+            "salary_max": salary_min + rng.randint(2, 20),
+            "company_id": f"C{rng.randrange(max(n_jobs // 20, 1)):05d}",
+            "skills": sorted({skills[k]["name"] for k in rng.choices(range(n_skills), weights, k=rng.randint(3, 10))}),
+        })
+
+    for cypher, _ in API_INDEXES:
+        session.run(cypher).consume()
+    for cypher in (
+        "CREATE CONSTRAINT job_id IF NOT EXISTS FOR (j:Job) REQUIRE j.job_id IS UNIQUE",
+        "CREATE CONSTRAINT company_id IF NOT EXISTS FOR (c:Company) REQUIRE c.company_id IS UNIQUE",
+        f"CREATE FULLTEXT INDEX {FULLTEXT_INDEX} IF NOT EXISTS FOR (j:Job) ON EACH [j.title] "
+        f"OPTIONS {{indexConfig: {{`fulltext.analyzer`: '{FULLTEXT_ANALYZER}'}}}}",
+    ):
+        session.run(cypher).consume()
+    session.run("CALL db.awaitIndexes(300)").consume()
+
+    session.run("UNWIND $rows AS r CREATE (:Skill {skill_id: r.skill_id, name: r.name, category: r.category})",
+                rows=skills).consume()
+    for start in range(0, n_jobs, 1000):
+        batch = jobs[start:start + 1000]
+        session.run("""
+            UNWIND $rows AS r
+            CREATE (j:Job {job_id: r.job_id, title: r.title, city: r.city,
+                           salary_min: r.salary_min, salary_max: r.salary_max})
+            MERGE (c:Company {company_id: r.company_id}) ON CREATE SET c.name = r.company_id
+            CREATE (j)-[:POSTED_BY]->(c)
+            WITH j, r UNWIND r.skills AS skill_name
+            MATCH (s:Skill {name: skill_name})
+            CREATE (j)-[:REQUIRES]->(s)
+        """, rows=batch).consume()
+
+    session.run("""
+        MATCH (s:Skill)
+        OPTIONAL MATCH (j:Job)-[:REQUIRES]->(s)
+        WITH s, count(j) AS demand, avg(j.salary_min) AS avg_min, avg(j.salary_max) AS avg_max
+        SET s.demand_count = demand, s.hot_score = demand,
+            s.avg_salary_min = avg_min, s.avg_salary_max = avg_max,
+            s.avg_salary = (coalesce(avg_min, 0) + coalesce(avg_max, 0)) / 2
+    """).consume()
+    session.run("""
+        MATCH (j:Job)-[:REQUIRES]->(s1:Skill), (j)-[:REQUIRES]->(s2:Skill)
+        WHERE s1.name < s2.name
+        WITH s1, s2, count(j) AS n WHERE n >= 2
+        CREATE (s1)-[:CO_OCCURS {count: n}]->(s2)
+    """).consume()
+    session.run("""
+        MATCH (j:Job)-[:REQUIRES]->(s1:Skill), (j)-[:REQUIRES]->(s2:Skill)
+        WHERE s1.name < s2.name
+        WITH s1, s2, j.city AS city, count(j) AS n WHERE n >= 2
+        CREATE (s1)-[:CO_OCCURS_IN {city: city, count: n}]->(s2)
+    """).consume()
+    session.run("""
+        MATCH (s1:Skill)-[r:CO_OCCURS]->(s2:Skill) WHERE r.count >= 5
+        CREATE (s1)-[:RELATED_TO {correlation: toFloat(r.count) / s1.demand_count}]->(s2)
+    """).consume()
+    session.run(REFRESH_CITY_COUNT_CYPHER, updated_at=datetime.now().isoformat()).consume()
+
+    profiles = build_profiles((j["job_id"], j["title"], j["city"], j["salary_min"], j["salary_max"], j["skills"])
+                              for j in jobs)
+    session.run("UNWIND $rows AS p CREATE (n:PositionProfile) SET n = p", rows=profiles).consume()
+    session.run("CALL db.awaitIndexes(300)").consume()
+    logger.info(f"合成图谱写入完成: {n_jobs} 岗位 / {n_skills} 技能 / {len(profiles)} 岗位画像")
+
+
+# ===== PROFILE =====
+
+def resolve_params(session) -> Dict[str, Any]:
+    """在目标图谱上为 @ 占位符取样"""
+    samples = {key: [r["v"] for r in session.run(cypher)] for key, cypher in _SAMPLE_CYPHER.items()}
+    job_ids, skills, cities = samples["job_ids"], samples["skills"], samples["city"]
+    return {
+        "@job_id": job_ids[0] if job_ids else "",
+        "@job_ids": job_ids,
+        "@skills": skills,
+        "@skill": skills[0] if skills else "",
+        "@city": cities[0] if cities else None,
+    }
+
+
+def _walk_plan(plan) -> Tuple[int, List[str]]:
+    """累加整棵执行计划的 db hits，并收集 "算子 details" 文本"""
+    args = plan.get("args", {}) or {}
+    operators = [f"{plan.get('operatorType', '')} {args.get('Details', '')}".strip()]
+    db_hits = int(plan.get("dbHits", 0) or 0)
+    for child in plan.get("children", []) or []:
+        child_hits, child_ops = _walk_plan(child)
+        db_hits += child_hits
+        operators.extend(child_ops)
+    return db_hits, operators
+
+
+def profile_template(session, template: CypherTemplate, sentinels: Dict[str, Any], repeat: int) -> Dict:
+    params = {k: sentinels.get(v, v) if isinstance(v, str) and v.startswith("@") else v
+              for k, v in template.params.items()}
+    timings = []
+    rows = db_hits = 0
+    operators: List[str] = []
+    for _ in range(max(repeat, 1)):
+        start = time.perf_counter()
+        result = session.run("PROFILE " + template.query, params)
+        rows = len(list(result))
+        summary = result.consume()
+        timings.append((time.perf_counter() - start) * 1000)
+        db_hits, operators = _walk_plan(summary.profile or {})
+    missing = [frag for frag in template.expect if not any(frag in op for op in operators)]
+    return {
+        "db_hits": db_hits,
+        "rows": rows,
+        "ms": round(statistics.median(timings), 2),
+        "operators": operators,
+        "missing_expect": missing,
+    }
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float, min_delta: int) -> List[str]:
+    """与基线比较，返回问题列表"""
+    problems = []
+    for name, r in results.items():
+        if "error" in r:
+            problems.append(f"{name}: 查询失败 {r['error']}")
+            continue
+        if r["missing_expect"]:
+            problems.append(f"{name}: 执行计划未使用期望索引 {r['missing_expect']}")
+        base = baseline.get(name)
+        if base is None:
+            continue
+        delta = r["db_hits"] - base["db_hits"]
+        if delta >= min_delta and r["db_hits"] > base["db_hits"] * (1 + threshold):
+            problems.append(f"{name}: db hits {base['db_hits']} -> {r['db_hits']} (+{delta})")
+    return problems
+
+
+def main() -> int:
+    neo4j_conf = load_neo4j_config()
+    parser = argparse.ArgumentParser(description='Cypher 查询 PROFILE 回归检查')
+    parser.add_argument('--uri', default=neo4j_conf['uri'])
+    parser.add_argument('--user', default=neo4j_conf['user'])
+    parser.add_argument('--password', default=neo4j_conf['password'])
+    parser.add_argument('--database', default=neo4j_conf['database'])
+    parser.add_argument('--seed', type=int, default=0, help='写入 N 个岗位的合成图谱后再检查（要求空库）')
+    parser.add_argument('--force', action='store_true', help='允许在非空库上写入合成图谱')
+    parser.add_argument('--repeat', type=int, default=3, help='每个查询执行次数（耗时取中位数）')
+    parser.add_argument('--baseline', type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument('--update-baseline', action='store_true', help='将本次结果写为新基线')
+    parser.add_argument('--threshold', type=float, default=0.2, help='db hits 相对基线的允许增幅')
+    parser.add_argument('--min-delta', type=int, default=50, help='db hits 绝对增量低于此值不视为回退')
+    parser.add_argument('--only', nargs='*', help='只检查指定模板')
+    parser.add_argument('--list', action='store_true', help='列出已登记的模板后退出')
+    args = parser.parse_args()
+
+    templates = load_templates()
+    if args.only:
+        unknown = set(args.only) - {t.name for t in templates}
+        if unknown:
+            parser.error(f"未登记的模板: {sorted(unknown)}")
+        templates = [t for t in templates if t.name in args.only]
+    if args.list:
+        for t in templates:
+            print(f"{t.name:<28} {t.module:<40} expect={list(t.expect)}")
+        return 0
+
+    from neo4j import GraphDatabase
+
+    driver = GraphDatabase.driver(args.uri, auth=(args.user, args.password))
+    try:
+        with driver.session(database=args.database) as session:
+            if args.seed:
+                existing = session.run("MATCH (n) RETURN count(n) AS c").single()["c"]
+                if existing and not args.force:
+                    logger.error(f"目标库非空（{existing} 个节点），拒绝写入合成图谱；确认后加 --force")
+                    return 1
+                seed_graph(session, args.seed)
+
+            sentinels = resolve_params(session)
+            results: Dict[str, Dict] = {}
+            for t in templates:
+                try:
+                    results[t.name] = profile_template(session, t, sentinels, args.repeat)
+                except Exception as e:
+                    results[t.name] = {"error": str(e)}
+    finally:
+        driver.close()
+
+    baseline: Dict[str, Dict] = {}
+    if args.baseline.exists():
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get("templates", {})
+
+    print(f"\n{'模板':<28}{'db hits':>12}{'基线':>12}{'行数':>8}{'耗时ms':>10}")
+    print("-" * 70)
+    for name, r in results.items():
+        if "error" in r:
+            print(f"{name:<28}{'ERROR':>12}")
+            continue
+        base = baseline.get(name, {}).get("db_hits", "-")
+        print(f"{name:<28}{r['db_hits']:>12}{base:>12}{r['rows']:>8}{r['ms']:>10}")
+
+    problems = compare(results, baseline, args.threshold, args.min_delta)
+
+    if args.update_baseline:
+        merged = {**baseline, **{k: v for k, v in results.items() if "error" not in v}}
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({"generated_at": datetime.now().isoformat(), "uri": args.uri,
+                       "templates": merged}, f, ensure_ascii=False, indent=2)
+        logger.info(f"基线已更新: {args.baseline}")
+
+    if problems:
+        print("\n❌ 发现问题:")
+        for p in problems:
+            print(f"  - {p}")
+        return 1
+    print(f"\n✅ {len(results)} 个查询均无回退")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -22,6 +22,7 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.rag.vector_db import VectorDB
+from src.utils.data_version import bump_generation
 
 
 def main():
@@ -104,6 +105,7 @@ def main():
     logger.info("文档格式：岗位 | 技能要求 | 城市 | 经验 | 薪资 | 公司")
 
     db.add_jobs(all_jobs, batch_size=64, show_progress=True)
+    bump_generation('vector_db_rebuild', labels=())
 
     new_count = db.collection.count()
     logger.info(f"重建完成！向量库文档数: {new_count:,}")
@@ -93,6 +93,16 @@ def reimport_all():
     if not data_files:
         return
     
+    # 上次导入中断时可从检查点继续（不清空数据库）
+    from src.graph_builder.import_checkpoint import ImportCheckpoint
+    from src.utils.data_version import read_marker
+    
+    resume = False
+    checkpoint = ImportCheckpoint.load()
+    if checkpoint is not None and checkpoint.resumable_for(data_files, read_marker())[0]:
+        print(f"\n发现未完成的导入: {checkpoint.describe()}")
+        resume = (input("是否从检查点继续（不清空数据库）？(Y/n): ").strip().lower() or 'y') == 'y'
+    
     # 步骤1: 清空数据库
     print("\n【步骤 1/3】清空Neo4j数据库")
     print("-"*80)
@@ -136,7 +146,7 @@ def reimport_all():
         print(f"当前节点数: {node_count}")
         print(f"当前关系数: {rel_count}")
         
-        if node_count > 0:
+        if node_count > 0 and not resume:
             print("\n⚠️  数据库中已有数据，需要清空")
             confirm = input("确认清空数据库？(yes/no): ").strip().lower()
             
@@ -221,7 +231,9 @@ def reimport_all():
             cleaned_data_paths=[str(f) for f in data_files],
             neo4j_uri=NEO4J_URI,
             neo4j_user=NEO4J_USER,
-            neo4j_password=NEO4J_PASSWORD
+            neo4j_password=NEO4J_PASSWORD,
+            import_workers=config['neo4j'].get('import_workers', 1),
+            resume=resume
         )
         
         print("\n" + "="*80)
@@ -23,6 +23,7 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.rag.vector_db import VectorDB
+from src.utils.data_version import bump_generation
 
 logging.basicConfig(
     level=logging.INFO,
@@ -215,6 +216,7 @@ def update_vector_database(
     try:
         # 批量添加（带进度条）
         db.add_jobs(jobs_to_add, batch_size=50, show_progress=True)
+        bump_generation('vector_db_update', labels=())
         
         # 6. 验证
         logger.info("\n【步骤5: 验证】")
@@ -4,6 +4,7 @@
 """
 import asyncio
 import logging
+import threading
 import yaml
 from pathlib import Path
 from typing import List, AsyncGenerator
@@ -97,13 +98,15 @@ class JobRecommendAgent:
     - 记忆上下文
     """
 
-    def __init__(self, config_path: str = "config.yaml", rag_service=None):
+    def __init__(self, config_path: str = "config.yaml", rag_service=None, neo4j_manager=None, title_search=None):
         """
         初始化Agent
 
         Args:
             config_path: 配置文件路径（相对于项目根目录）
             rag_service: 已有的 RAGService 实例（传入可避免重复加载 VectorDB/m3e-base）
+            neo4j_manager: 已有的 AsyncNeo4jManager（传入则与 API 共用连接池）
+            title_search: 已有的 TitleSearch（传入则与 API 共用职位名称索引）
         """
         logger.info("初始化职位推荐Agent...")
 
@@ -128,8 +131,10 @@ class JobRecommendAgent:
             extra_body={"enable_thinking": False},
         )
 
-        # 初始化工具（传入已有 rag_service 避免重复加载）
-        self.agent_tools = AgentTools(rag_service=rag_service)
+        # 初始化工具（传入已有 rag_service / neo4j_manager / title_search 避免重复加载）
+        self.agent_tools = AgentTools(
+            rag_service=rag_service, neo4j_manager=neo4j_manager, title_search=title_search,
+        )
         self.tools = self.agent_tools.get_tools()
 
         # 使用 LangGraph create_react_agent（LangChain 1.x 推荐方式）
@@ -150,14 +155,38 @@ class JobRecommendAgent:
         # 按 session_id 隔离的对话历史，避免多用户串话
         self._sessions: dict = {}
 
+        # 同步接口（chat）专用事件循环：仅供独立使用（Agent 自己持有 Neo4j 连接）时，
+        # 连接绑定在该循环上；API 中与主循环共用连接池，必须直接 await achat()
+        self._loop = None
+        self._loop_lock = threading.Lock()
+
         logger.info(f"Agent初始化完成，可用工具: {len(self.tools)}")
 
     def close(self):
-        """关闭 Agent 持有的外部连接（Neo4j 等）"""
-        if self.agent_tools and self.agent_tools.neo4j_available:
-            self.agent_tools.neo4j.close()
+        """关闭 Agent 自己创建的外部连接（Neo4j 等；共享的连接由创建方关闭）"""
+        if self.agent_tools and self.agent_tools.owns_neo4j:
+            self._run_sync(self.agent_tools.neo4j.close())
+        if self._loop is not None:
+            self._loop.close()
+            self._loop = None
+
+    def _run_sync(self, coro):
+        """在 Agent 专用事件循环中执行协程（供同步接口使用，多线程调用时串行执行）"""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+            return self._loop.run_until_complete(coro)
 
     def chat(self, user_input: str, session_id: str = "default") -> str:
+        """
+        同步对话接口（命令行 / 脚本等独立使用场景）
+
+        在 Agent 专用事件循环中执行 achat()；已在事件循环中（如 API）时请直接 await achat()，
+        与 API 共用的 AsyncNeo4jManager 连接池绑定在 API 主循环上，不能在其他循环中使用
+        """
+        return self._run_sync(self.achat(user_input, session_id))
+
+    async def achat(self, user_input: str, session_id: str = "default") -> str:
         """
         对话接口（按 session_id 隔离，不同用户/会话互不干扰）
 
@@ -192,7 +221,7 @@ class JobRecommendAgent:
                 and len(messages) > 1
             )
             active = self.followup_graph if _fq else self.graph
-            result = active.invoke(
+            result = await active.ainvoke(
                 {"messages": messages},
                 config={"recursion_limit": 3 if _fq else 8}
             )
@@ -441,7 +470,7 @@ class JobRecommendAgent:
                 try:
                     if action == 'search':
                         result_tuple = await asyncio.wait_for(
-                            asyncio.to_thread(self.agent_tools.search_direct, user_input, city, force_source),
+                            self.agent_tools.search_direct(user_input, city, force_source),
                             timeout=8.0,
                         )
                     else:
@@ -449,13 +478,13 @@ class JobRecommendAgent:
                         skills = AgentTools._extract_skills(user_input)
                         if skills:
                             result_tuple = await asyncio.wait_for(
-                                asyncio.to_thread(self.agent_tools.recommend_direct, skills, city, force_source),
+                                self.agent_tools.recommend_direct(skills, city, force_source),
                                 timeout=8.0,
                             )
                         else:
                             # 没提取到技能词 → 退回 search_direct 兜底
                             result_tuple = await asyncio.wait_for(
-                                asyncio.to_thread(self.agent_tools.search_direct, user_input, city, force_source),
+                                self.agent_tools.search_direct(user_input, city, force_source),
                                 timeout=8.0,
                             )
                 except asyncio.TimeoutError:
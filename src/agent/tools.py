@@ -2,6 +2,7 @@
 Agent工具定义
 定义Agent可以调用的工具集（使用 @tool 装饰器，兼容 LangGraph astream_events）
 """
+import asyncio
 import logging
 from typing import List
 from pathlib import Path
@@ -14,6 +15,9 @@ if str(project_root) not in sys.path:
 
 from langchain_core.tools import tool, BaseTool
 from src.rag.rag_service import RAGService
+from src.api import queries
+from src.api.title_search import TitleSearch
+from src.graph_builder.position_profiles import MATCH_PROFILE_CYPHER, normalize_position
 
 logger = logging.getLogger(__name__)
 
@@ -21,13 +25,17 @@ logger = logging.getLogger(__name__)
 class AgentTools:
     """Agent可用的工具集"""
 
-    def __init__(self, rag_service: RAGService = None):
+    def __init__(self, rag_service: RAGService = None, neo4j_manager=None, title_search: TitleSearch = None):
         """
         初始化工具
 
         Args:
             rag_service: 已有的 RAGService 实例（复用，避免重复加载 VectorDB 和 LLM）。
                          为 None 时自动创建（独立使用场景）。
+            neo4j_manager: 已有的 AsyncNeo4jManager（API 传入，与图谱接口共用连接池和并发上限）。
+                           为 None 时按 config.yaml 自动创建（独立使用场景）。
+            title_search: 已有的 TitleSearch（API 传入，共用全文索引探测结果与 n-gram 索引）。
+                          为 None 时基于 neo4j_manager 自动创建。
         """
         logger.info("初始化Agent工具...")
 
@@ -40,28 +48,36 @@ class AgentTools:
             logger.info("新建 RAGService 实例")
 
         # 初始化Neo4j管理器（可选）
-        try:
-            from src.graph_builder.neo4j_manager import Neo4jManager
-            import yaml
+        self.owns_neo4j = False
+        if neo4j_manager is not None:
+            self.neo4j = neo4j_manager
+            self.neo4j_available = True
+            logger.info("复用已有 Neo4j 连接池")
+        else:
+            try:
+                from src.graph_builder.neo4j_manager import AsyncNeo4jManager
+                import yaml
 
-            project_root_local = Path(__file__).parent.parent.parent
-            config_path = project_root_local / 'config.yaml'
+                project_root_local = Path(__file__).parent.parent.parent
+                config_path = project_root_local / 'config.yaml'
 
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config = yaml.safe_load(f)
+                with open(config_path, 'r', encoding='utf-8') as f:
+                    config = yaml.safe_load(f)
 
-            neo4j_config = config['neo4j']
-            self.neo4j = Neo4jManager(
-                uri=neo4j_config['uri'],
-                user=neo4j_config['user'],
-                password=neo4j_config['password']
-            )
-            self.neo4j_available = True
-            logger.info("Neo4j连接成功")
-        except Exception as e:
-            logger.warning(f"Neo4j连接失败: {e}")
-            self.neo4j = None
-            self.neo4j_available = False
+                self.neo4j = AsyncNeo4jManager.from_config(config['neo4j'])
+                self.owns_neo4j = True
+                self.neo4j_available = True
+                logger.info("Neo4j连接成功")
+            except Exception as e:
+                logger.warning(f"Neo4j连接失败: {e}")
+                self.neo4j = None
+                self.neo4j_available = False
+
+        # 职位名称关键词搜索（全文索引 job_title_fts，索引缺失时退回 n-gram 索引）
+        if title_search is not None:
+            self.title_search = title_search
+        else:
+            self.title_search = TitleSearch(self.neo4j) if self.neo4j_available else None
 
         logger.info("Agent工具初始化完成")
 
@@ -98,7 +114,7 @@ class AgentTools:
                 found.append(AgentTools._SKILLS_DICT[kw])
         return found
 
-    def search_direct(self, query: str, city: str = "", force_source: str = "auto") -> tuple:
+    async def search_direct(self, query: str, city: str = "", force_source: str = "auto") -> tuple:
         """核心搜索逻辑（供 @tool 包装和快速路径直接调用共用）
         返回 (text, source_type)，source_type 为 'graph' 或 'rag'
         """
@@ -110,37 +126,19 @@ class AgentTools:
             try:
                 matched_skills = AgentTools._extract_skills(query)
                 if matched_skills:
-                    rows = self.neo4j.execute_query("""
-                        MATCH (j:Job)-[:REQUIRES]->(s:Skill)
-                        WHERE s.name IN $skills AND ($city IS NULL OR j.city = $city)
-                        WITH j, collect(DISTINCT s.name) AS ms, count(DISTINCT s) AS cnt
-                        ORDER BY cnt DESC LIMIT 8
-                        OPTIONAL MATCH (j)-[:POSTED_BY]->(c:Company)
-                        RETURN j.title AS title, coalesce(c.name,'') AS company,
-                               j.city AS city,
-                               coalesce(j.salary_min,0) AS smin,
-                               coalesce(j.salary_max,0) AS smax,
-                               coalesce(j.experience,'') AS exp,
-                               ms AS matched_skills, cnt
-                    """, {"skills": matched_skills, "city": city_val})
+                    rows = await self.neo4j.execute_query(
+                        queries.AGENT_SEARCH_BY_SKILLS, {"skills": matched_skills, "city": city_val}, cache=True
+                    )
                 else:
                     keywords = [w for w in query.replace('，', ' ').replace(',', ' ').split()
                                 if len(w) >= 2][:3] or [query[:15]]
-                    kw_params = {f"kw{i}": kw.replace("'", "") for i, kw in enumerate(keywords)}
-                    where = " OR ".join([f"j.title CONTAINS $kw{i}" for i in range(len(keywords))])
-                    rows = self.neo4j.execute_query(f"""
-                        MATCH (j:Job) WHERE ({where})
-                          AND ($city IS NULL OR j.city = $city)
-                        WITH j LIMIT 8
-                        OPTIONAL MATCH (j)-[:POSTED_BY]->(c:Company)
-                        OPTIONAL MATCH (j)-[:REQUIRES]->(s:Skill)
-                        RETURN j.title AS title, coalesce(c.name,'') AS company,
-                               j.city AS city,
-                               coalesce(j.salary_min,0) AS smin,
-                               coalesce(j.salary_max,0) AS smax,
-                               coalesce(j.experience,'') AS exp,
-                               collect(DISTINCT s.name) AS matched_skills, 1 AS cnt
-                    """, {"city": city_val, **kw_params})
+                    hits = await self.title_search.search(keywords, city_val, 8)
+                    rows = await self.neo4j.execute_query(
+                        queries.AGENT_JOBS_BY_IDS, {"ids": [h["job_id"] for h in hits]}, cache=True
+                    ) if hits else []
+                    # 按全文索引相关度排序
+                    order = {h["job_id"]: i for i, h in enumerate(hits)}
+                    rows.sort(key=lambda r: order.get(r["job_id"], len(order)))
             except Exception as e:
                 logger.warning(f"[搜索] Neo4j 查询失败，降级到 RAG: {e}")
                 rows = []
@@ -166,7 +164,7 @@ class AgentTools:
 
         logger.info(f"[搜索] Neo4j 无结果，切换到 RAG 语义检索: query={query}")
         filters = {"city": city_val} if city_val else None
-        result = self.rag.search_and_summarize(query, top_k=8, filters=filters)
+        result = await asyncio.to_thread(self.rag.search_and_summarize, query, 8, filters)
         jobs = result.get('retrieved_jobs', [])
         if not jobs:
             return f"未找到与「{query}」相关的岗位，请尝试换个关键词。", "rag"
@@ -183,7 +181,7 @@ class AgentTools:
             )
         return "\n".join(lines), "rag"   # ← RAG 向量库命中
 
-    def recommend_direct(self, user_skills: List[str], city: str = "", force_source: str = "auto") -> tuple:
+    async def recommend_direct(self, user_skills: List[str], city: str = "", force_source: str = "auto") -> tuple:
         """核心推荐逻辑（供 @tool 包装和快速路径直接调用共用）
         返回 (text, source_type)，source_type 为 'graph' 或 'rag'
         """
@@ -193,18 +191,9 @@ class AgentTools:
         rows = []
         if force_source != "rag" and self.neo4j_available and self.neo4j and user_skills:
             try:
-                rows = self.neo4j.execute_query("""
-                    MATCH (j:Job)-[:REQUIRES]->(s:Skill)
-                    WHERE s.name IN $skills AND ($city IS NULL OR j.city = $city)
-                    WITH j, collect(DISTINCT s.name) AS matched, count(DISTINCT s) AS cnt
-                    ORDER BY cnt DESC LIMIT 8
-                    OPTIONAL MATCH (j)-[:POSTED_BY]->(c:Company)
-                    RETURN j.title AS title, coalesce(c.name,'') AS company,
-                           j.city AS city,
-                           coalesce(j.salary_min,0) AS smin,
-                           coalesce(j.salary_max,0) AS smax,
-                           matched, cnt
-                """, {"skills": user_skills, "city": city_val})
+                rows = await self.neo4j.execute_query(
+                    queries.AGENT_RECOMMEND, {"skills": user_skills, "city": city_val}, cache=True
+                )
             except Exception as e:
                 logger.warning(f"[推荐] Neo4j 查询失败，降级到 RAG: {e}")
                 rows = []
@@ -229,7 +218,7 @@ class AgentTools:
 
         logger.info(f"[推荐] Neo4j 无结果，切换到 RAG: skills={user_skills}")
         filters = {"city": city_val} if city_val else None
-        result = self.rag.recommend_jobs(user_skills, top_k=8, filters=filters)
+        result = await asyncio.to_thread(self.rag.recommend_jobs, user_skills, 8, filters)
         jobs = result.get('retrieved_jobs', [])
         if not jobs:
             return "未找到匹配的岗位推荐。", "rag"
@@ -256,9 +245,10 @@ class AgentTools:
         recommend_direct = self.recommend_direct
         rag = self.rag
         _neo4j = self.neo4j if self.neo4j_available else None
+        _title_search = self.title_search
 
         @tool
-        def search_jobs(query: str, city: str = "") -> str:
+        async def search_jobs(query: str, city: str = "") -> str:
             """搜索相关岗位。优先使用图谱数据库（快速、精准），支持按城市筛选。
             Args:
                 query: 技能或岗位关键词，例如 "Vue Node.js"、"Python后端工程师"、"Java开发"
@@ -266,11 +256,11 @@ class AgentTools:
             Returns:
                 匹配的岗位列表（含职位名称、公司、城市、薪资、所需技能）
             """
-            text, _ = search_direct(query, city)   # LangGraph 只需要文本
+            text, _ = await search_direct(query, city)   # LangGraph 只需要文本
             return text
 
         @tool
-        def recommend_jobs(user_skills: str, city: str = "") -> str:
+        async def recommend_jobs(user_skills: str, city: str = "") -> str:
             """基于用户已有技能推荐最匹配的岗位（按技能命中数排序）。
             Args:
                 user_skills: 用户技能，多个技能用英文逗号分隔，例如 "Vue,Node.js,MySQL"
@@ -279,11 +269,11 @@ class AgentTools:
                 推荐岗位列表（按技能匹配度降序）
             """
             skills_list = [s.strip() for s in user_skills.replace('，', ',').split(',') if s.strip()]
-            text, _ = recommend_direct(skills_list, city)   # LangGraph 只需要文本
+            text, _ = await recommend_direct(skills_list, city)   # LangGraph 只需要文本
             return text
 
         @tool
-        def analyze_skill_gap(user_skills: str, target_position: str) -> str:
+        async def analyze_skill_gap(user_skills: str, target_position: str) -> str:
             """分析用户技能与目标岗位的差距，给出需要补充的技能和学习建议。
             Args:
                 user_skills: 用户当前掌握的技能，多个技能用英文逗号分隔，例如 "Python,Django,MySQL"
@@ -296,14 +286,21 @@ class AgentTools:
                 skills_list = [s.strip() for s in user_skills.replace('，', ',').split(',') if s.strip()]
 
                 if _neo4j:
-                    # 从图谱获取目标岗位高频技能
-                    kw = target_position.replace("'", "")[:30]
-                    skill_rows = _neo4j.execute_query("""
-                        MATCH (j:Job)-[:REQUIRES]->(s:Skill)
-                        WHERE j.title CONTAINS $kw
-                        WITH s.name AS skill, count(j) AS freq ORDER BY freq DESC LIMIT 15
-                        RETURN skill, freq
-                    """, {"kw": kw})
+                    # 优先读取预计算的岗位画像，无匹配画像时再按职位名称实时统计高频技能
+                    kw = target_position.strip()[:30]
+                    key = normalize_position(kw)
+                    profile_rows = await _neo4j.execute_query(
+                        MATCH_PROFILE_CYPHER, {"key": key, "city": ""}, cache=True
+                    ) if key else []
+                    if profile_rows:
+                        p = profile_rows[0]
+                        skill_rows = [{"skill": n, "freq": c} for n, c in zip(p["skills"][:15], p["skill_counts"][:15])]
+                    else:
+                        hits = await _title_search.search([kw], None, 2000)
+                        freq_rows = await _neo4j.execute_query(
+                            queries.GAP_SKILL_FREQUENCY, {"ids": [h["job_id"] for h in hits], "limit": 15}, cache=True
+                        ) if hits else []
+                        skill_rows = [{"skill": r["skill_name"], "freq": r["freq"]} for r in freq_rows]
 
                     if skill_rows:
                         required = [r['skill'] for r in skill_rows]
@@ -322,7 +319,9 @@ class AgentTools:
                         return "\n".join(lines)
 
                 # RAG 兜底
-                result = rag.skill_gap_analysis(user_skills=skills_list, target_position=target_position.strip())
+                result = await asyncio.to_thread(
+                    rag.skill_gap_analysis, user_skills=skills_list, target_position=target_position.strip()
+                )
                 output = [
                     f"用户技能: {', '.join(result['user_skills'])}",
                     f"目标岗位: {result['target_position']}\n",
@@ -344,7 +343,7 @@ class AgentTools:
             neo4j = self.neo4j
 
             @tool
-            def query_skill_graph(skill_name: str) -> str:
+            async def query_skill_graph(skill_name: str) -> str:
                 """查询单个技能的图谱信息：热度、需求量、平均薪资、相关技能。
                 Args:
                     skill_name: 技能名称，例如 "Python"、"Vue"、"Docker"
@@ -353,19 +352,7 @@ class AgentTools:
                 """
                 try:
                     logger.info(f"[工具调用] 技能图谱查询: {skill_name}")
-                    result = neo4j.execute_query("""
-                        MATCH (s:Skill {name: $skill_name})
-                        OPTIONAL MATCH (s)-[r:RELATED_TO]-(related:Skill)
-                        OPTIONAL MATCH (j:Job)-[:REQUIRES]->(s)
-                        WITH s,
-                             collect(DISTINCT {name: related.name, correlation: r.correlation})[0..5] AS related_skills,
-                             count(DISTINCT j) AS job_count
-                        RETURN s.name AS skill_name, s.hot_score AS hot_score,
-                               s.category AS category, s.demand_count AS demand_count,
-                               s.avg_salary_min AS avg_salary_min,
-                               s.avg_salary_max AS avg_salary_max,
-                               related_skills, job_count
-                    """, {"skill_name": skill_name})
+                    result = await neo4j.execute_query(queries.AGENT_SKILL_DETAIL, {"skill_name": skill_name}, cache=True)
 
                     if not result:
                         return f"未找到技能「{skill_name}」，请确认名称（区分大小写）。"
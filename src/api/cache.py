@@ -0,0 +1,423 @@
+"""
+API 结果缓存
+带字节预算的 LRU + TTL 内存缓存：按命名空间限额、后台清理过期条目、命中/淘汰计数，
+支持软过期（stale-while-revalidate）：软过期后仍可读到旧值，硬过期才真正删除。
+
+CacheBackend 是 cache_get/cache_set 依赖的后端接口，ApiCache 为进程内实现；
+多 worker 共享的 SQLite / Redis 实现见 src.api.cache_backends。
+
+缓存值统一为 CachedPayload：写入时一次性编码成 JSON 字节并计算 ETag，
+命中时直接把字节作为响应体返回，不再重复校验和序列化
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sys
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，缺失时退回标准库 json
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+
+# 各命名空间默认字节上限（search/recommend 单条可达数 MB，必须单独限额）
+DEFAULT_NAMESPACE_QUOTAS: Dict[str, int] = {
+    "search":    96 * _MB,
+    "recommend": 48 * _MB,
+    "gap":       16 * _MB,
+    "graph":     16 * _MB,
+    "trend":      8 * _MB,
+}
+
+
+class CachedPayload(NamedTuple):
+    """预编码的缓存值：JSON 响应体字节 + 内容哈希 ETag"""
+    body: bytes
+    etag: str
+
+
+def encode_payload(value: Any) -> CachedPayload:
+    """把响应对象编码成 JSON 字节并计算 ETag（orjson 优先）"""
+    if orjson is not None:
+        body = orjson.dumps(value, default=str)
+    else:
+        body = json.dumps(value, ensure_ascii=False, default=str, separators=(",", ":")).encode("utf-8")
+    return CachedPayload(body, make_etag(body))
+
+
+def decode_payload(payload: CachedPayload) -> Any:
+    """还原为 Python 对象（仅供内部读取后修改，如预热补全）"""
+    return orjson.loads(payload.body) if orjson is not None else json.loads(payload.body)
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def namespace_of(key: str) -> str:
+    """从缓存 key 推导命名空间：'search:xx' -> search，'graph_categories' -> graph"""
+    return key.split(":", 1)[0].split("_", 1)[0]
+
+
+# 中日韩字符与相邻字符之间的空白（"Python 后端" -> "Python后端"）
+_CJK_SPACE_RE = re.compile(r"\s+(?=[\u3000-\u9fff\uf900-\ufaff])|(?<=[\u3000-\u9fff\uf900-\ufaff])\s+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def canonical_text(text: Optional[str], casefold: bool = False) -> str:
+    """
+    规范化请求文本用于缓存 key：NFKC（全角转半角）、合并首尾及连续空白
+
+    casefold=True 时再统一小写并去掉中文两侧的空白（"Python 后端" == "python后端"），
+    只用于大小写、分词不影响结果的场景（如技能抽取）
+    """
+    if not text:
+        return ""
+    text = _SPACE_RE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+    return _CJK_SPACE_RE.sub("", text).lower() if casefold else text
+
+
+def canonical_skills(skills: Optional[Iterable[str]]) -> List[str]:
+    """技能列表规范化：去空白、去空串、去重并排序（技能名大小写敏感，保持原样）"""
+    return sorted({canonical_text(s) for s in (skills or [])} - {""})
+
+
+def estimate_size(value: Any) -> int:
+    """
+    估算对象占用的字节数（递归累加 dict/list/tuple/set 及其元素）
+
+    只求量级准确，用于缓存预算控制，不追求与 RSS 完全一致
+    """
+    total = 0
+    seen = set()
+    stack = [value]
+    while stack:
+        obj = stack.pop()
+        oid = id(obj)
+        if oid in seen:
+            continue
+        seen.add(oid)
+        total += sys.getsizeof(obj)
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+    return total
+
+
+class _Entry:
+    __slots__ = ("value", "stale_at", "expire_at", "size", "namespace")
+
+    def __init__(self, value: Any, stale_at: float, expire_at: float, size: int, namespace: str):
+        self.value = value
+        self.stale_at = stale_at
+        self.expire_at = expire_at
+        self.size = size
+        self.namespace = namespace
+
+
+class CacheBackend:
+    """
+    缓存后端接口
+
+    读写的值为 CachedPayload；除读写外还提供带 TTL 的命名锁（try_acquire/release），用于多 worker 间的
+    leader 选举和单 key 刷新互斥；进程内后端的锁只在本进程内生效。
+    """
+
+    name = "base"
+    sweep_interval: float = 60.0
+    # 读写是否涉及阻塞 I/O（文件 / 网络）；为 True 时 API 在线程池中调用，不占用事件循环
+    blocking: bool = False
+
+    def __init__(self):
+        self._counters = {"hits": 0, "stale_hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "rejected": 0}
+        self._ns_counters: Dict[str, Dict[str, int]] = {}
+
+    def lookup(self, key: str) -> Optional[Tuple[CachedPayload, bool]]:
+        """返回 (payload, is_stale)；不存在或已硬过期返回 None"""
+        raise NotImplementedError
+
+    def set(self, key: str, value: CachedPayload, ttl: float = 300, stale_ttl: float = 0,
+            namespace: Optional[str] = None) -> bool:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def purge_expired(self) -> int:
+        """清理所有硬过期条目，返回清理数量"""
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def try_acquire(self, name: str, owner: str, ttl: float) -> bool:
+        """获取（或续期）命名锁，锁已被其他 owner 持有且未过期时返回 False"""
+        raise NotImplementedError
+
+    def release(self, name: str, owner: str) -> None:
+        """释放自己持有的命名锁"""
+        raise NotImplementedError
+
+    def get(self, key: str) -> Optional[CachedPayload]:
+        """读取缓存，不存在或已硬过期返回 None（软过期的旧值照常返回）"""
+        hit = self.lookup(key)
+        return hit[0] if hit is not None else None
+
+    async def sweep_loop(self):
+        """后台清理任务：定期删除过期条目，让内存随 TTL 回落"""
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                purged = await asyncio.to_thread(self.purge_expired)
+                if purged:
+                    logger.debug(f"缓存清理({self.name}): 移除 {purged} 个过期条目")
+            except Exception as e:
+                logger.warning(f"缓存清理失败: {e}")
+
+    def _count(self, name: str, ns: str) -> None:
+        self._counters[name] += 1
+        ns_counters = self._ns_counters.setdefault(ns, {})
+        ns_counters[name] = ns_counters.get(name, 0) + 1
+
+    def _hit_rate(self) -> float:
+        hits = self._counters["hits"] + self._counters["stale_hits"]
+        lookups = hits + self._counters["misses"]
+        return round(hits / lookups, 4) if lookups else 0.0
+
+
+class ApiCache(CacheBackend):
+    """
+    进程内 LRU + TTL 缓存
+
+    - 全局字节预算 max_bytes，超出时从最久未使用的条目开始淘汰
+    - 命名空间限额：某个命名空间超额时只淘汰该命名空间自己的条目，避免 search 挤掉 trend
+    - 过期条目由 sweep_loop 后台定期清理，而不是等到同 key 再次读取
+    - 每个条目有软过期（ttl）和硬过期（ttl + stale_ttl）两个时间点，
+      两者之间 lookup() 返回旧值并标记 stale，由调用方决定是否后台刷新
+    """
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int = 256 * _MB,
+                 namespace_quotas: Optional[Dict[str, int]] = None,
+                 sweep_interval: float = 60.0):
+        """
+        Args:
+            max_bytes: 全局字节预算
+            namespace_quotas: 命名空间 -> 字节上限，None 使用 DEFAULT_NAMESPACE_QUOTAS
+            sweep_interval: 后台清理间隔（秒）
+        """
+        super().__init__()
+        self.max_bytes = max_bytes
+        self.namespace_quotas = dict(DEFAULT_NAMESPACE_QUOTAS if namespace_quotas is None else namespace_quotas)
+        self.sweep_interval = sweep_interval
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._ns_keys: Dict[str, "OrderedDict[str, None]"] = {}
+        self._ns_bytes: Dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._locks: Dict[str, Tuple[str, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    # ── 读写 ──────────────────────────────────────────────
+
+    def lookup(self, key: str) -> Optional[Tuple[Any, bool]]:
+        """
+        读取缓存并返回新鲜度（命中时刷新 LRU 顺序）
+
+        Returns:
+            (value, is_stale)；不存在或已硬过期返回 None
+        """
+        ns = namespace_of(key)
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.time()
+            if entry is not None and now >= entry.expire_at:
+                self._remove(key)
+                self._count("expirations", ns)
+                entry = None
+            if entry is None:
+                self._count("misses", ns)
+                return None
+            self._touch(key, entry.namespace)
+            stale = now >= entry.stale_at
+            self._count("stale_hits" if stale else "hits", ns)
+            return entry.value, stale
+
+    def set(self, key: str, value: Any, ttl: float = 300, stale_ttl: float = 0,
+            namespace: Optional[str] = None) -> bool:
+        """
+        写入缓存
+
+        Args:
+            ttl: 软过期时间（秒），之后读到的是旧值
+            stale_ttl: 软过期后旧值还能继续返回多久（秒），0 表示软过期即硬过期
+
+        Returns:
+            是否写入成功（单条超过命名空间限额或全局预算时拒绝写入）
+        """
+        ns = namespace or namespace_of(key)
+        size = estimate_size(value) + sys.getsizeof(key)
+        quota = self.namespace_quotas.get(ns)
+        with self._lock:
+            if size > self.max_bytes or (quota is not None and size > quota):
+                self._count("rejected", ns)
+                return False
+            if key in self._entries:
+                self._remove(key)
+            stale_at = time.time() + ttl
+            entry = _Entry(value, stale_at, stale_at + stale_ttl, size, ns)
+            self._entries[key] = entry
+            self._ns_keys.setdefault(ns, OrderedDict())[key] = None
+            self._ns_bytes[ns] = self._ns_bytes.get(ns, 0) + size
+            self._bytes += size
+            self._evict(ns, protect=key)
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._ns_keys.clear()
+            self._ns_bytes.clear()
+            self._bytes = 0
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [k for k, e in self._entries.items() if now >= e.expire_at]
+            for key in expired:
+                ns = self._entries[key].namespace
+                self._remove(key)
+                self._count("expirations", ns)
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        """命中/未命中/淘汰计数及各命名空间占用"""
+        with self._lock:
+            namespaces = {}
+            for ns in set(self._ns_keys) | set(self._ns_counters):
+                counters = self._ns_counters.get(ns, {})
+                namespaces[ns] = {
+                    "entries": len(self._ns_keys.get(ns, ())),
+                    "bytes": self._ns_bytes.get(ns, 0),
+                    "quota_bytes": self.namespace_quotas.get(ns),
+                    **counters,
+                }
+            return {
+                "backend": self.name,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                **self._counters,
+                "hit_rate": self._hit_rate(),
+                "namespaces": namespaces,
+            }
+
+    def try_acquire(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            holder = self._locks.get(name)
+            if holder is not None and holder[0] != owner and holder[1] > now:
+                return False
+            self._locks[name] = (owner, now + ttl)
+            return True
+
+    def release(self, name: str, owner: str) -> None:
+        with self._lock:
+            holder = self._locks.get(name)
+            if holder is not None and holder[0] == owner:
+                del self._locks[name]
+
+    # ── 内部方法（调用方已持有锁）──────────────────────────
+
+    def _touch(self, key: str, ns: str) -> None:
+        self._entries.move_to_end(key)
+        self._ns_keys[ns].move_to_end(key)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        ns_keys = self._ns_keys.get(entry.namespace)
+        if ns_keys is not None:
+            ns_keys.pop(key, None)
+            if not ns_keys:
+                del self._ns_keys[entry.namespace]
+        self._ns_bytes[entry.namespace] -= entry.size
+        if not self._ns_bytes[entry.namespace]:
+            del self._ns_bytes[entry.namespace]
+        self._bytes -= entry.size
+
+    def _evict(self, ns: str, protect: str) -> None:
+        """先压回命名空间限额，再压回全局预算；刚写入的 key 不参与淘汰"""
+        quota = self.namespace_quotas.get(ns)
+        if quota is not None:
+            ns_keys = self._ns_keys.get(ns)
+            while ns_keys and self._ns_bytes.get(ns, 0) > quota:
+                victim = next(iter(ns_keys))
+                if victim == protect:
+                    break
+                self._remove(victim)
+                self._count("evictions", ns)
+        while self._bytes > self.max_bytes and self._entries:
+            victim = next(iter(self._entries))
+            if victim == protect:
+                break
+            victim_ns = self._entries[victim].namespace
+            self._remove(victim)
+            self._count("evictions", victim_ns)
+
+
+def create_cache_backend(cache_config: Dict[str, Any], project_root=None) -> CacheBackend:
+    """
+    按 config.yaml 的 cache 段创建缓存后端
+
+    backend: memory（默认，进程内）/ sqlite（同机多 worker 共享文件）/ redis（跨机共享）
+    """
+    max_bytes = int(cache_config.get('max_mb', 256) * _MB)
+    namespace_quotas = {
+        ns: int(mb * _MB) for ns, mb in cache_config['namespace_quota_mb'].items()
+    } if 'namespace_quota_mb' in cache_config else None
+    sweep_interval = cache_config.get('sweep_interval', 60)
+    backend = cache_config.get('backend', 'memory')
+
+    if backend == 'sqlite':
+        from pathlib import Path
+        from src.api.cache_backends import SQLiteCacheBackend
+        path = Path(cache_config.get('sqlite_path', 'data/cache/api_cache.db'))
+        if not path.is_absolute() and project_root is not None:
+            path = Path(project_root) / path
+        return SQLiteCacheBackend(str(path), max_bytes=max_bytes,
+                                  namespace_quotas=namespace_quotas, sweep_interval=sweep_interval)
+    if backend == 'redis':
+        from src.api.cache_backends import RedisCacheBackend
+        return RedisCacheBackend(cache_config.get('redis_url', 'redis://127.0.0.1:6379/0'),
+                                 key_prefix=cache_config.get('redis_prefix', 'sgr:cache:'),
+                                 sweep_interval=sweep_interval)
+    if backend != 'memory':
+        logger.warning(f"未知的缓存后端 {backend}，使用进程内缓存")
+    return ApiCache(max_bytes=max_bytes, namespace_quotas=namespace_quotas, sweep_interval=sweep_interval)
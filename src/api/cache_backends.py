@@ -0,0 +1,399 @@
+"""
+多 worker 共享的缓存后端
+- SQLiteCacheBackend：同一台机器上的多个 uvicorn worker 共享一个 WAL 模式的 SQLite 文件
+- RedisCacheBackend：通过 RESP 协议访问 Redis（或任何兼容 Redis 协议的服务），可跨机器共享
+
+两者直接存储 CachedPayload 的响应体字节和 ETag，接口与进程内 ApiCache 一致（见 src.api.cache.CacheBackend）
+"""
+import logging
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse, unquote
+
+from src.api.cache import CacheBackend, CachedPayload, DEFAULT_NAMESPACE_QUOTAS, namespace_of
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    SQLite（WAL）文件缓存
+
+    WAL 模式下读不阻塞写，多个 worker 进程可同时读取；写入通过 BEGIN IMMEDIATE 串行化。
+    LRU 依据 accessed_at 列，为避免每次读都产生写入，同一条目在 touch_interval 内只更新一次。
+    """
+
+    name = "sqlite"
+    blocking = True
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024,
+                 namespace_quotas: Optional[Dict[str, int]] = None,
+                 sweep_interval: float = 60.0, touch_interval: float = 5.0):
+        """
+        Args:
+            path: SQLite 文件路径（各 worker 必须指向同一个文件）
+            max_bytes: 全局字节预算（按序列化后的大小计）
+            namespace_quotas: 命名空间 -> 字节上限
+            sweep_interval: 后台清理间隔（秒）
+            touch_interval: 同一条目 accessed_at 的最小更新间隔（秒）
+        """
+        super().__init__()
+        self.path = path
+        self.max_bytes = max_bytes
+        self.namespace_quotas = dict(DEFAULT_NAMESPACE_QUOTAS if namespace_quotas is None else namespace_quotas)
+        self.sweep_interval = sweep_interval
+        self.touch_interval = touch_interval
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(cache)")}
+        if columns and "etag" not in columns:
+            # 旧版表结构（JSON 值、无 ETag），缓存可丢弃，直接重建
+            self._conn.execute("DROP TABLE cache")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache (
+                key         TEXT PRIMARY KEY,
+                namespace   TEXT NOT NULL,
+                value       BLOB NOT NULL,
+                etag        TEXT NOT NULL,
+                size        INTEGER NOT NULL,
+                stale_at    REAL NOT NULL,
+                expire_at   REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_ns_access_idx ON cache (namespace, accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_access_idx ON cache (accessed_at)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_expire_idx ON cache (expire_at)")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS locks (
+                name      TEXT PRIMARY KEY,
+                owner     TEXT NOT NULL,
+                expire_at REAL NOT NULL
+            )
+        """)
+        logger.info(f"SQLite 共享缓存: {path}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT count(*) FROM cache").fetchone()[0]
+
+    def lookup(self, key: str) -> Optional[Tuple[CachedPayload, bool]]:
+        ns = namespace_of(key)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stale_at, expire_at, accessed_at, etag FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now >= row[2]:
+                self._conn.execute("DELETE FROM cache WHERE key = ? AND expire_at <= ?", (key, now))
+                self._count("expirations", ns)
+                row = None
+            if row is None:
+                self._count("misses", ns)
+                return None
+            if now - row[3] >= self.touch_interval:
+                self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            stale = now >= row[1]
+            self._count("stale_hits" if stale else "hits", ns)
+        return CachedPayload(bytes(row[0]), row[4]), stale
+
+    def set(self, key: str, value: CachedPayload, ttl: float = 300, stale_ttl: float = 0,
+            namespace: Optional[str] = None) -> bool:
+        ns = namespace or namespace_of(key)
+        size = len(value.body) + len(key)
+        quota = self.namespace_quotas.get(ns)
+        if size > self.max_bytes or (quota is not None and size > quota):
+            self._count("rejected", ns)
+            return False
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, namespace, value, etag, size, stale_at, expire_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, ns, value.body, value.etag, size, now + ttl, now + ttl + stale_ttl, now),
+                )
+                if quota is not None:
+                    self._evict("WHERE namespace = ? AND key <> ?", (ns, key), quota)
+                self._evict("WHERE key <> ?", (key,), self.max_bytes)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache")
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM cache WHERE expire_at <= ?", (time.time(),))
+            purged = cur.rowcount
+        if purged:
+            self._counters["expirations"] += purged
+        return purged
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT namespace, count(*), coalesce(sum(size), 0) FROM cache GROUP BY namespace"
+            ).fetchall()
+        namespaces = {
+            ns: {"entries": n, "bytes": b, "quota_bytes": self.namespace_quotas.get(ns), **self._ns_counters.get(ns, {})}
+            for ns, n, b in rows
+        }
+        return {
+            "backend": self.name,
+            "path": self.path,
+            "entries": sum(r[1] for r in rows),
+            "bytes": sum(r[2] for r in rows),
+            "max_bytes": self.max_bytes,
+            **self._counters,
+            "hit_rate": self._hit_rate(),
+            "namespaces": namespaces,
+        }
+
+    def try_acquire(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT owner, expire_at FROM locks WHERE name = ?", (name,)).fetchone()
+                if row is not None and row[0] != owner and row[1] > now:
+                    self._conn.execute("ROLLBACK")
+                    return False
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO locks (name, owner, expire_at) VALUES (?, ?, ?)",
+                    (name, owner, now + ttl),
+                )
+                self._conn.execute("COMMIT")
+                return True
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def release(self, name: str, owner: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM locks WHERE name = ? AND owner = ?", (name, owner))
+
+    def _evict(self, where: str, params: tuple, budget: int) -> None:
+        """按 accessed_at 从旧到新删除，直到 where 范围内的总大小回到 budget 以内（调用方已开启事务）"""
+        total = self._conn.execute(f"SELECT coalesce(sum(size), 0) FROM cache {where}", params).fetchone()[0]
+        # where 不含刚写入的 key，预算需扣掉它本身的大小
+        own = self._conn.execute("SELECT size FROM cache WHERE key = ?", (params[-1],)).fetchone()
+        excess = total + (own[0] if own else 0) - budget
+        while excess > 0:
+            victims = self._conn.execute(
+                f"SELECT key, namespace, size FROM cache {where} ORDER BY accessed_at LIMIT 64", params
+            ).fetchall()
+            if not victims:
+                break
+            for key, ns, size in victims:
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._count("evictions", ns)
+                excess -= size
+                if excess <= 0:
+                    break
+
+
+class RespClient:
+    """
+    最小化的 Redis 协议（RESP2）客户端
+
+    只实现缓存用到的命令，不依赖 redis-py。连接断开时只有只读命令会重连重试一次；
+    写命令与锁命令（SET NX PX / DEL / PEXPIRE / SET）可能已在服务端生效、只是响应丢失，
+    重发会让锁判断出错（如 SET NX 第二次返回 nil，持有者误以为没抢到锁），因此直接抛出。
+    """
+
+    # 重发不改变结果的只读命令
+    RETRYABLE_COMMANDS = frozenset({"GET", "MGET", "PING", "SCAN"})
+
+    def __init__(self, url: str = "redis://127.0.0.1:6379/0", timeout: float = 2.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def execute(self, *args) -> Any:
+        with self._lock:
+            try:
+                return self._execute(args)
+            except (OSError, ConnectionError):
+                self.close()
+                if str(args[0]).upper() not in self.RETRYABLE_COMMANDS:
+                    raise
+                return self._execute(args)
+
+    def close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._file = None
+
+    def _execute(self, args: tuple) -> Any:
+        if self._sock is None:
+            self._connect()
+        self._sock.sendall(self._encode(args))
+        return self._read_reply()
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._file = self._sock.makefile("rb")
+        if self.password:
+            self._sock.sendall(self._encode(("AUTH", self.password)))
+            self._read_reply()
+        if self.db:
+            self._sock.sendall(self._encode(("SELECT", self.db)))
+            self._read_reply()
+
+    @staticmethod
+    def _encode(args: tuple) -> bytes:
+        parts: List[bytes] = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if isinstance(arg, bytes):
+                data = arg
+            else:
+                data = str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def _read_reply(self) -> Any:
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Redis 连接已关闭")
+        prefix, body = line[:1], line[1:-2]
+        if prefix == b"+":
+            return body.decode("utf-8")
+        if prefix == b"-":
+            raise RuntimeError(f"Redis 错误: {body.decode('utf-8', 'replace')}")
+        if prefix == b":":
+            return int(body)
+        if prefix == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = self._file.read(length + 2)
+            return data[:-2]
+        if prefix == b"*":
+            count = int(body)
+            if count < 0:
+                return None
+            return [self._read_reply() for _ in range(count)]
+        raise ConnectionError(f"无法解析的 Redis 响应: {line!r}")
+
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Redis 协议缓存
+
+    条目以 PX 过期时间 = ttl + stale_ttl 写入，值格式为 "<软过期时间戳>\n<ETag>\n<响应体>"；
+    字节预算与 LRU 淘汰交给 Redis 自身（maxmemory + allkeys-lru），不在客户端重复实现。
+    """
+
+    name = "redis"
+    blocking = True
+
+    def __init__(self, url: str = "redis://127.0.0.1:6379/0", key_prefix: str = "sgr:cache:",
+                 sweep_interval: float = 60.0, timeout: float = 2.0):
+        super().__init__()
+        self.url = url
+        self.key_prefix = key_prefix
+        self.sweep_interval = sweep_interval
+        self._client = RespClient(url, timeout=timeout)
+        logger.info(f"Redis 共享缓存: {self._client.host}:{self._client.port}/{self._client.db}")
+
+    def __len__(self) -> int:
+        return len(self._scan_keys())
+
+    def lookup(self, key: str) -> Optional[Tuple[CachedPayload, bool]]:
+        ns = namespace_of(key)
+        raw = self._client.execute("GET", self.key_prefix + key)
+        if raw is None:
+            self._count("misses", ns)
+            return None
+        stale_at, etag, body = raw.split(b"\n", 2)
+        stale = time.time() >= float(stale_at)
+        self._count("stale_hits" if stale else "hits", ns)
+        return CachedPayload(body, etag.decode("ascii")), stale
+
+    def set(self, key: str, value: CachedPayload, ttl: float = 300, stale_ttl: float = 0,
+            namespace: Optional[str] = None) -> bool:
+        px = int((ttl + stale_ttl) * 1000)
+        if px <= 0:
+            return False
+        blob = b"%r\n%s\n%s" % (time.time() + ttl, value.etag.encode("ascii"), value.body)
+        self._client.execute("SET", self.key_prefix + key, blob, "PX", px)
+        return True
+
+    def delete(self, key: str) -> None:
+        self._client.execute("DEL", self.key_prefix + key)
+
+    def clear(self) -> None:
+        for key in self._scan_keys():
+            self._client.execute("DEL", key)
+
+    def purge_expired(self) -> int:
+        # Redis 自行过期，无需客户端清理
+        return 0
+
+    async def sweep_loop(self):
+        return
+
+    def stats(self) -> Dict[str, Any]:
+        namespaces = {ns: dict(counters) for ns, counters in self._ns_counters.items()}
+        return {
+            "backend": self.name,
+            "url": f"redis://{self._client.host}:{self._client.port}/{self._client.db}",
+            **self._counters,
+            "hit_rate": self._hit_rate(),
+            "namespaces": namespaces,
+        }
+
+    def try_acquire(self, name: str, owner: str, ttl: float) -> bool:
+        lock_key = self.key_prefix + "lock:" + name
+        px = max(1, int(ttl * 1000))
+        if self._client.execute("SET", lock_key, owner, "NX", "PX", px) == "OK":
+            return True
+        holder = self._client.execute("GET", lock_key)
+        if holder is not None and holder.decode("utf-8") == owner:
+            self._client.execute("PEXPIRE", lock_key, px)
+            return True
+        return False
+
+    def release(self, name: str, owner: str) -> None:
+        # GET + DEL 非原子；锁带 TTL，极端情况下的误删只会让另一个 worker 提前接管
+        lock_key = self.key_prefix + "lock:" + name
+        holder = self._client.execute("GET", lock_key)
+        if holder is not None and holder.decode("utf-8") == owner:
+            self._client.execute("DEL", lock_key)
+
+    def _scan_keys(self) -> List[bytes]:
+        keys: List[bytes] = []
+        cursor = b"0"
+        while True:
+            cursor, batch = self._client.execute("SCAN", cursor, "MATCH", self.key_prefix + "*", "COUNT", 500)
+            keys.extend(k for k in batch if not k.startswith((self.key_prefix + "lock:").encode("utf-8")))
+            if cursor in (b"0", 0, "0"):
+                return keys
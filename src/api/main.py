@@ -4,33 +4,20 @@ FastAPI主应用
 """
 import asyncio
 import logging
+import os
+import socket
 import uuid
 import time
 import yaml
-from fastapi import FastAPI, HTTPException, Body, Query
+from datetime import datetime
+from fastapi import FastAPI, HTTPException, Body, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any, Tuple
 from pathlib import Path
 import sys
 
-# ===== 简易 TTL 内存缓存 =====
-_api_cache: Dict[str, Tuple[Any, float]] = {}
-
-def cache_get(key: str) -> Optional[Any]:
-    """从缓存读取，过期返回 None"""
-    if key in _api_cache:
-        value, expire_at = _api_cache[key]
-        if time.time() < expire_at:
-            return value
-        del _api_cache[key]
-    return None
-
-def cache_set(key: str, value: Any, ttl: int = 300) -> None:
-    """写入缓存，ttl 单位秒"""
-    _api_cache[key] = (value, time.time() + ttl)
-
 # 添加项目根目录到path
 project_root = Path(__file__).parent.parent.parent
 if str(project_root) not in sys.path:
@@ -41,6 +28,17 @@ from src.agent.job_agent import JobRecommendAgent
 from src.nlp.hybrid_skill_extractor import HybridSkillExtractor
 from src.auth.routes import include_auth_routes
 from src.database.database import init_db
+from src.api.cache import (
+    CachedPayload, canonical_skills, canonical_text, create_cache_backend, decode_payload, encode_payload,
+)
+from src.api.singleflight import SingleFlight
+from src.api.pagination import CursorError, paginate
+from src.api import queries
+from src.api.views import MaterializedView, ViewRegistry, ViewScheduler
+from src.api.skill_index import LOAD_CYPHER, SkillJobIndex
+from src.api.title_search import TitleSearch
+from src.graph_builder.position_profiles import MATCH_PROFILE_CYPHER, normalize_position
+from src.utils.data_version import DataGenerationWatcher, configured_marker_path
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +50,199 @@ with open(config_path_abs, 'r', encoding='utf-8') as f:
     config = yaml.safe_load(f)
 
 api_config = config.get('api', {})
+cache_config = config.get('cache', {})
+
+# ===== API 结果缓存（字节预算 + LRU + TTL，按命名空间限额）=====
+# backend=memory 为进程内缓存；多 worker 部署时用 sqlite / redis 让各 worker 共享同一份结果
+_api_cache = create_cache_backend(cache_config, project_root=project_root_for_config)
+
+# 当前 worker 的唯一标识（用于 leader 选举和单 key 刷新锁）
+_WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+_LEADER_LOCK = "leader"
+_LEADER_TTL = cache_config.get('leader_ttl', 30)
+_is_leader = False
+
+async def _cache_io(fn, *args, **kwargs):
+    """调用缓存后端；SQLite / Redis 等阻塞后端放到线程池，避免文件锁等待或网络超时卡住事件循环"""
+    if _api_cache.blocking:
+        return await asyncio.to_thread(fn, *args, **kwargs)
+    return fn(*args, **kwargs)
+
+async def cache_get(key: str) -> Optional[Any]:
+    """从缓存读取并解码为 Python 对象，过期返回 None；共享缓存不可用时按未命中处理"""
+    try:
+        payload = await _cache_io(_api_cache.get, key)
+    except Exception as e:
+        logger.warning(f"缓存读取失败 {key}: {e}")
+        return None
+    return decode_payload(payload) if payload is not None else None
+
+# 进行中的后台缓存写入（持有引用，防止任务被回收）
+_cache_writes: set = set()
+
+# 其余后台任务（后台刷新、启动时的常驻循环等），同样持有引用直到结束
+_background_tasks: set = set()
+
+
+def _log_task_exception(task: asyncio.Task) -> None:
+    """取出后台任务的异常，避免 "exception was never retrieved" 且失败不被静默吞掉"""
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(f"后台任务 {task.get_name()} 异常退出: {task.exception()!r}")
+
+
+def _spawn(coro, name: Optional[str] = None) -> asyncio.Task:
+    """启动后台任务并持有引用，结束时移除引用并记录未处理的异常"""
+    task = asyncio.create_task(coro, name=name)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    task.add_done_callback(_log_task_exception)
+    return task
+
+def _write_cache(key: str, payload: CachedPayload, ttl: int, stale_ttl: int) -> None:
+    try:
+        _api_cache.set(key, payload, ttl=ttl, stale_ttl=stale_ttl)
+    except Exception as e:
+        logger.warning(f"缓存写入失败 {key}: {e}")
+
+def cache_set(key: str, value: Any, ttl: int = 300, stale_ttl: int = 0) -> CachedPayload:
+    """
+    编码后写入缓存，ttl 为软过期秒数，stale_ttl 为软过期后仍可返回旧值的秒数；超出预算时按 LRU 淘汰
+
+    返回预编码的 payload，调用方可直接作为响应体返回，避免再序列化一次。
+    阻塞后端在事件循环中调用时写入交给线程池在后台完成，不等待写入结束
+    """
+    payload = encode_payload(value)
+    try:
+        loop = asyncio.get_running_loop() if _api_cache.blocking else None
+    except RuntimeError:
+        loop = None  # 已在工作线程中，直接写
+    if loop is None:
+        _write_cache(key, payload, ttl, stale_ttl)
+    else:
+        task = loop.create_task(asyncio.to_thread(_write_cache, key, payload, ttl, stale_ttl))
+        _cache_writes.add(task)
+        task.add_done_callback(_cache_writes.discard)
+    return payload
+
+# ===== 数据版本 =====
+# 导入脚本每次写入 Neo4j / 向量库后递增 generation，所有缓存 key 都带上当前 generation，
+# 数据更新后旧 key 立即不可达（旧条目随 LRU / TTL 自然淘汰），TTL 不再承担正确性
+data_version_config = config.get('data_version', {})
+_data_version = DataGenerationWatcher(
+    marker_path=configured_marker_path(config_path_abs),
+    interval=data_version_config.get('poll_interval', 10),
+)
+
+
+def _ck(namespace: str, *parts: Any) -> str:
+    """构造带数据版本的缓存 key：namespace:g<generation>:part1:part2..."""
+    return ":".join([namespace, f"g{_data_version.generation}", *(str(p) for p in parts)])
+
+# 同一缓存 key 的并发未命中请求只查一次 Neo4j，其余请求等待同一结果
+_single_flight = SingleFlight()
+
+# trend/graph/stats 等聚合数据软过期后继续返回旧值的时长（秒），期间由访问触发后台刷新
+_STALE_TTL = cache_config.get('stale_ttl', 3600)
+
+
+async def _cached(key: str, compute, http_request: Optional[Request] = None):
+    """
+    stale-while-revalidate 读取
+
+    - 新鲜命中：直接返回
+    - 软过期命中：立即返回旧值，并在后台触发一次刷新（同 key 只会有一个刷新在跑）
+    - 未命中 / 硬过期：合并并发请求，等待 compute() 计算（compute 自行写缓存并返回 cache_set 的 payload）
+
+    payload 以原始字节 + ETag 返回；请求带 If-None-Match 且与 ETag 一致时返回 304
+    """
+    try:
+        hit = await _cache_io(_api_cache.lookup, key)
+    except Exception as e:
+        logger.warning(f"缓存读取失败 {key}: {e}")
+        hit = None
+    if hit is not None:
+        value, stale = hit
+        if stale and not _single_flight.in_flight(key):
+            _spawn(_revalidate(key, compute), name=f"revalidate:{key}")
+        return _payload_response(value, http_request)
+    result = await _single_flight.do(key, compute)
+    if isinstance(result, CachedPayload):
+        return _payload_response(result, http_request)
+    return result
+
+
+def _payload_response(payload: CachedPayload, http_request: Optional[Request]) -> Response:
+    """预编码 payload -> 原始 JSON 响应；客户端 ETag 匹配时返回 304（无响应体）"""
+    headers = {"ETag": payload.etag, "Cache-Control": "no-cache"}
+    if http_request is not None:
+        if_none_match = http_request.headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, payload.etag):
+            return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """按 RFC 7232 弱比较：支持 *、逗号分隔的多个值和 W/ 前缀"""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [t.strip() for t in if_none_match.split(",")]
+    return any((t[2:] if t.startswith("W/") else t) == etag for t in candidates)
+
+
+async def _revalidate(key: str, compute):
+    """
+    后台刷新软过期的缓存条目，失败时保留旧值直到硬过期
+
+    共享缓存下先抢占该 key 的刷新锁，多个 worker 同时读到旧值时只有一个去查 Neo4j
+    """
+    lock_name = f"refresh:{key}"
+    try:
+        if not await asyncio.to_thread(_api_cache.try_acquire, lock_name, _WORKER_ID, 120):
+            return
+    except Exception as e:
+        logger.warning(f"  ⚠️ 获取刷新锁失败 {key}: {e}")
+        return
+    try:
+        await _single_flight.do(key, compute)
+        logger.debug(f"♻️  缓存后台刷新完成: {key}")
+    except Exception as e:
+        logger.warning(f"  ⚠️ 缓存后台刷新失败 {key}: {e}")
+    finally:
+        try:
+            await asyncio.to_thread(_api_cache.release, lock_name, _WORKER_ID)
+        except Exception:
+            pass
+
+
+def _set_view_scheduler(running: bool):
+    """成为 leader 时启动物化视图调度器，失去 leader 时停止"""
+    global _view_task
+    if running and _view_task is None:
+        _view_task = asyncio.create_task(_view_scheduler.run(), name="view_scheduler")
+        _view_task.add_done_callback(_log_task_exception)
+    elif not running and _view_task is not None:
+        _view_task.cancel()
+        _view_task = None
+
+
+async def _leader_election_loop():
+    """
+    多 worker leader 选举：持有 leader 锁的 worker 负责物化视图预计算等全局任务
+
+    锁带 TTL，每 1/3 TTL 续期一次；leader 进程退出后锁自然过期，由其他 worker 接管
+    """
+    global _is_leader
+    while True:
+        try:
+            acquired = await asyncio.to_thread(_api_cache.try_acquire, _LEADER_LOCK, _WORKER_ID, _LEADER_TTL)
+        except Exception as e:
+            logger.warning(f"leader 选举失败: {e}")
+            acquired = False
+        if acquired != _is_leader:
+            logger.info(f"👑 worker {_WORKER_ID} {'成为' if acquired else '不再是'} 缓存 leader")
+            _set_view_scheduler(acquired)
+        _is_leader = acquired
+        await asyncio.sleep(max(1.0, _LEADER_TTL / 3))
 
 # 创建FastAPI应用
 app = FastAPI(
@@ -76,6 +267,7 @@ rag_service = None
 agent = None
 skill_extractor = None
 neo4j_manager = None
+title_search = None
 
 
 # ===== 数据模型 =====
@@ -122,6 +314,9 @@ class GraphSearchRequest(BaseModel):
     top_k: Optional[int] = Field(default=None, ge=1, description="返回结果数量，None=全量返回")
     city: Optional[str] = Field(None, description="城市过滤")
     include_vector: bool = Field(default=False, description="是否追加向量语义补充（较慢）")
+    page_size: Optional[int] = Field(default=None, ge=1, le=100, description="分页大小；传入后按页返回")
+    cursor: Optional[str] = Field(default=None, description="上一页返回的 next_cursor")
+    fields: Optional[List[str]] = Field(default=None, description="返回字段投影，分页时默认不含 jd_text")
 
 
 class GraphRecommendRequest(BaseModel):
@@ -129,6 +324,9 @@ class GraphRecommendRequest(BaseModel):
     user_skills: List[str] = Field(..., description="用户技能列表")
     top_k: Optional[int] = Field(default=100, ge=1, le=500, description="推荐数量，最多500")
     city: Optional[str] = Field(None, description="城市过滤")
+    page_size: Optional[int] = Field(default=None, ge=1, le=100, description="分页大小；传入后按页返回")
+    cursor: Optional[str] = Field(default=None, description="上一页返回的 next_cursor")
+    fields: Optional[List[str]] = Field(default=None, description="返回字段投影")
 
 
 class GraphGapAnalysisRequest(BaseModel):
@@ -143,7 +341,7 @@ class GraphGapAnalysisRequest(BaseModel):
 @app.on_event("startup")
 async def startup_event():
     """启动时初始化服务"""
-    global rag_service, agent, skill_extractor, neo4j_manager
+    global rag_service, agent, skill_extractor, neo4j_manager, title_search
     
     logger.info("="*80)
     logger.info("🚀 启动API服务...")
@@ -160,10 +358,24 @@ async def startup_event():
         rag_service = RAGService()
         logger.info("✅ RAG服务初始化完成")
         
+        # 初始化Neo4j（异步驱动，图谱接口与 Agent 共用同一个连接池）
+        try:
+            logger.info("初始化Neo4j连接...")
+            from src.graph_builder.neo4j_manager import AsyncNeo4jManager
+            neo4j_manager = AsyncNeo4jManager.from_config(config.get('neo4j', {}))
+            title_search = TitleSearch(neo4j_manager)
+            logger.info("✅ Neo4j连接初始化完成")
+        except Exception as e:
+            logger.warning(f"Neo4j初始化失败: {e}，图谱接口将降级为向量搜索")
+            neo4j_manager = None
+            title_search = None
+
         # 初始化Agent（传入已有 rag_service，避免重复加载 VectorDB 和 m3e-base）
         try:
             logger.info("初始化Agent...")
-            agent = JobRecommendAgent(rag_service=rag_service)
+            agent = JobRecommendAgent(
+                rag_service=rag_service, neo4j_manager=neo4j_manager, title_search=title_search,
+            )
             logger.info("✅ Agent初始化完成")
         except Exception as e:
             logger.warning(f"Agent初始化失败: {e}")
@@ -174,42 +386,109 @@ async def startup_event():
         logger.info("初始化技能抽取器...")
         skill_extractor = HybridSkillExtractor()
         logger.info("✅ 技能抽取器初始化完成")
-
-        # 初始化Neo4j（用于图谱接口）
-        try:
-            logger.info("初始化Neo4j连接...")
-            from src.graph_builder.neo4j_manager import Neo4jManager
-            neo4j_cfg = config.get('neo4j', {})
-            neo4j_manager = Neo4jManager(
-                uri=neo4j_cfg['uri'],
-                user=neo4j_cfg['user'],
-                password=neo4j_cfg['password']
-            )
-            logger.info("✅ Neo4j连接初始化完成")
-        except Exception as e:
-            logger.warning(f"Neo4j初始化失败: {e}，图谱接口将降级为向量搜索")
-            neo4j_manager = None
         
         logger.info("="*80)
         logger.info("✅ API服务启动成功！")
         logger.info(f"📖 API文档: http://localhost:{api_config.get('port', 8000)}/docs")
         logger.info("="*80)
 
-        # 后台：确保 Neo4j 索引存在 + 预热缓存 + 启动定时刷新（均不阻塞启动）
-        asyncio.create_task(_ensure_neo4j_indexes())
-        asyncio.create_task(_warmup_cache())
-        asyncio.create_task(_cache_refresh_loop())
+        # 后台：确保 Neo4j 索引存在 + leader 选举 + 过期条目清理（均不阻塞启动）
+        # stats/trend/graph 等物化视图由 leader worker 的调度器定时预计算，其余 worker 直接读共享缓存；
+        # 其他 key 的刷新由访问驱动（stale-while-revalidate），只刷新真正被请求的热 key
+        _spawn(_ensure_neo4j_indexes(), name="ensure_neo4j_indexes")
+        _spawn(_leader_election_loop(), name="leader_election")
+        _spawn(_api_cache.sweep_loop(), name="cache_sweep")
+        if neo4j_manager is not None:
+            _data_version.neo4j_query = _neo4j_query
+            if _SKILL_INDEX_ENABLED:
+                _spawn(_load_skill_index(), name="load_skill_index")
+        _data_version.on_change(_on_data_generation_change)
+        _spawn(_data_version.poll_loop(), name="data_version_poll")
 
     except Exception as e:
         logger.error(f"❌ 服务初始化失败: {e}")
         raise
 
 
-async def _neo4j_query(cypher: str, params: dict = None):
-    """把同步 Neo4j 查询放到线程池执行，避免阻塞 asyncio 事件循环"""
+def _on_data_generation_change(old: int, new: int):
+    """
+    数据版本变化：新 generation 下缓存全部未命中，由 leader 立即重新计算所有物化视图；
+    每个 worker 各自重建进程内的技能倒排索引（以及在用的职位名称 n-gram 索引），
+    并按导入声明的标签淘汰 Neo4j 查询结果缓存（向量库导入不影响图谱查询缓存）
+    """
+    if _is_leader:
+        _view_scheduler.trigger_all()
+    if neo4j_manager is not None and neo4j_manager.result_cache is not None:
+        labels = _data_version.changed_labels
+        if labels is None or labels:
+            dropped = neo4j_manager.result_cache.invalidate(labels)
+            logger.info(f"Neo4j 查询结果缓存淘汰 {dropped} 条（标签: {sorted(labels) if labels else '全部'}）")
+    if neo4j_manager is not None and _SKILL_INDEX_ENABLED:
+        _spawn(_load_skill_index(), name="load_skill_index")
+    if title_search is not None:
+        title_search.invalidate()
+
+
+# ===== 技能倒排索引（进程内）=====
+# 技能匹配（搜索技能路径 / 推荐精准匹配与扩展）在内存中完成，Neo4j 只负责回填最终结果页的岗位详情；
+# 索引未就绪（启动加载中 / 加载失败）时自动走 Cypher 查询
+_SKILL_INDEX_ENABLED = config.get('skill_index', {}).get('enabled', True)
+_skill_index: Optional[SkillJobIndex] = None
+_skill_index_loading = False
+
+
+async def _load_skill_index():
+    """从 Neo4j 读取 (岗位, 城市, 薪资, 技能列表) 并在线程池中构建倒排索引，完成后原子替换"""
+    global _skill_index, _skill_index_loading
+    if _skill_index_loading:
+        return
+    _skill_index_loading = True
+    try:
+        started = time.time()
+        rows = await neo4j_manager.execute_query(LOAD_CYPHER, timeout=300)
+        index = await asyncio.to_thread(
+            SkillJobIndex.from_records,
+            ((r["job_id"], r["city"], r["salary_max"], r["skills"]) for r in rows),
+        )
+        _skill_index = index
+        logger.info(f"✅ 技能倒排索引已加载: {index.stats()}，耗时 {time.time() - started:.1f}s")
+    except Exception as e:
+        logger.warning(f"⚠️ 技能倒排索引加载失败，技能匹配继续走 Neo4j: {e}")
+    finally:
+        _skill_index_loading = False
+
+
+_BASIC_COLUMNS = ("title", "city", "company", "salary_min", "salary_max")
+
+
+async def _fetch_job_columns(job_ids: List[str], columns) -> Dict[str, dict]:
+    """按 job_id 批量读取指定列（一次 IN 查询），返回 {job_id: row}"""
+    if not job_ids:
+        return {}
+    rows = await _neo4j_query(queries.job_columns_cypher(columns), {"ids": job_ids})
+    return {r["job_id"]: r for r in rows}
+
+
+async def _hydrate_jobs(hits: List[dict], extra_fields: bool = True) -> List[dict]:
+    """按倒排索引命中结果回填岗位详情（一次 IN 查询），保持命中顺序；索引加载后被删除的岗位自动跳过"""
+    if not hits:
+        return []
+    details = await _fetch_job_columns(
+        [h["job_id"] for h in hits], queries.JOB_COLUMNS if extra_fields else _BASIC_COLUMNS
+    )
+    return [{**details[h["job_id"]], **h} for h in hits if h["job_id"] in details]
+
+
+async def _neo4j_query(cypher: str, params: dict = None, cache: bool = False):
+    """
+    异步执行 Neo4j 查询（原生异步驱动，受连接池与并发上限约束）
+
+    cache=True 时读写进程内查询结果缓存（neo4j.query_cache 启用时生效），
+    用于 Agent 与各接口重复执行的小查询（技能回填、关联技能、岗位画像等）
+    """
     if neo4j_manager is None:
         raise RuntimeError("Neo4j 服务不可用")
-    return await asyncio.to_thread(neo4j_manager.execute_query, cypher, params or {})
+    return await neo4j_manager.execute_query(cypher, params or {}, cache=cache)
 
 
 async def _ensure_neo4j_indexes():
@@ -217,269 +496,157 @@ async def _ensure_neo4j_indexes():
     if not neo4j_manager:
         return
     await asyncio.sleep(5)  # 等初始化稳定
-    indexes = [
-        # Skill.name 点查/IN 查询索引（技能搜索核心路径）
-        ("CREATE INDEX skill_name_idx IF NOT EXISTS FOR (s:Skill) ON (s.name)", "Skill.name"),
-        # Skill.demand_count 范围查询索引（trend/graph 过滤）
-        ("CREATE INDEX skill_demand_idx IF NOT EXISTS FOR (s:Skill) ON (s.demand_count)", "Skill.demand_count"),
-        # Job.city 城市筛选索引
-        ("CREATE INDEX job_city_idx IF NOT EXISTS FOR (j:Job) ON (j.city)", "Job.city"),
-        # Job 全文索引：让 j.title CONTAINS 'xxx' 走全文搜索，而非全表扫描
-        # 注意：全文索引语法在 Neo4j 4.x / 5.x 不同，用 try-except 兼容
-    ]
-    for cypher, label in indexes:
+    for cypher, label in queries.API_INDEXES:
         try:
-            await asyncio.to_thread(neo4j_manager.execute_query, cypher, {})
+            await neo4j_manager.execute_write(cypher)
             logger.info(f"  ✅ Neo4j 索引确认: {label}")
         except Exception as e:
             logger.debug(f"  索引 {label} 跳过（可能已存在或不支持）: {e}")
 
-    # 全文索引（Job.title），语法兼容 Neo4j 4.x 和 5.x
-    fulltext_cyphs = [
-        # Neo4j 5.x 语法
-        "CREATE FULLTEXT INDEX job_title_fts IF NOT EXISTS FOR (j:Job) ON EACH [j.title]",
-        # Neo4j 4.x 语法（无 IF NOT EXISTS）
-        "CALL db.index.fulltext.createNodeIndex('job_title_fts', ['Job'], ['title'])",
-    ]
-    for fc in fulltext_cyphs:
-        try:
-            await asyncio.to_thread(neo4j_manager.execute_query, fc, {})
-            logger.info("  ✅ Neo4j 全文索引 job_title_fts 确认")
-            break
-        except Exception:
-            pass  # 忽略，换下一种语法
+    # 全文索引（Job.title，cjk 分析器），职位名称搜索 / 差距分析按关键词查岗位时使用
+    if title_search is not None:
+        await title_search.ensure_index()
 
     logger.info("✅ Neo4j 索引检查完毕")
 
 
-async def _warmup_cache():
-    """
-    两阶段预热：
-    - 快阶（~2s）：只跑轻量查询，确保 stats/trend/graph 的核心数据在服务启动后秒级可用
-    - 慢阶（后台）：co-occurrence（技能组合）等重型查询异步补全，不阻塞快阶
-    """
-    await asyncio.sleep(2)  # 等待服务完全就绪
-    logger.info("🔥 [快阶] 开始核心缓存预热...")
-
-    # ── stats（快，<500ms）──────────────────────────────
-    try:
-        if rag_service or neo4j_manager:
-            stats: dict = {}
-            if rag_service:
-                stats['rag'] = await asyncio.to_thread(rag_service.vector_db.get_stats)
-            if neo4j_manager:
-                try:
-                    stats['neo4j'] = await asyncio.to_thread(neo4j_manager.get_database_stats)
-                except Exception:
-                    stats['neo4j'] = None
-            cache_set("stats", {"success": True, "data": stats}, ttl=300)
-            logger.info("  ✅ /api/stats 预热完成")
-    except Exception as e:
-        logger.warning(f"  ⚠️ stats 预热失败: {e}")
-
-    if not neo4j_manager:
-        logger.info("🔥 Neo4j 不可用，跳过图谱预热")
-        return
+# ===== 物化视图（stats / trend / graph 等聚合结果的统一定义）=====
+# 接口未命中与 leader 后台预计算共用同一个查询函数，保证预热数据与接口实时计算一致
 
-    # ── trend 快阶：hot_skills + category + city_distribution（均为轻量查询）──
+async def _query_stats() -> dict:
+    stats: dict = {"computed_at": datetime.now().isoformat()}
+    if rag_service:
+        stats['rag'] = await asyncio.to_thread(rag_service.vector_db.get_stats)
     try:
-        hot_rows, cat_rows, city_rows_fast = await asyncio.gather(
-            _neo4j_query("""
-                MATCH (s:Skill) WHERE s.demand_count > 0
-                RETURN s.name AS skill, s.category AS category,
-                       s.demand_count AS demand_count, s.hot_score AS hot_score
-                ORDER BY s.demand_count DESC LIMIT 100
-            """),
-            _neo4j_query("""
-                MATCH (s:Skill) WHERE s.demand_count > 0 AND s.category IS NOT NULL
-                RETURN s.category AS category, count(s) AS skill_count,
-                       sum(s.demand_count) AS total_demand
-                ORDER BY total_demand DESC
-            """),
-            _neo4j_query("""
-                MATCH (j:Job)
-                WHERE j.city IS NOT NULL AND j.city <> ''
-                WITH j.city AS city, count(j) AS job_count
-                ORDER BY job_count DESC LIMIT 15
-                RETURN city, job_count
-            """),
-            return_exceptions=True
-        )
-        # 先用空列表占位 combo/salary，慢阶完成后会覆盖
-        cache_set("trend", {
-            "success": True,
-            "data": {
-                "hot_skills":            [dict(r) for r in (hot_rows if isinstance(hot_rows, list) else [])],
-                "category_distribution": [dict(r) for r in (cat_rows if isinstance(cat_rows, list) else [])],
-                "skill_combos":          [],
-                "high_salary_skills":    [],
-                "city_distribution":     [{"city": r["city"], "job_count": r["job_count"]} for r in (city_rows_fast if isinstance(city_rows_fast, list) else [])],
-            }
-        }, ttl=600)
-        logger.info("  ✅ /api/trend 快阶预热完成（hot_skills + category + city_distribution）")
-    except Exception as e:
-        logger.warning(f"  ⚠️ trend 快阶预热失败: {e}")
+        stats['neo4j'] = await neo4j_manager.get_database_stats() if neo4j_manager else None
+    except Exception:
+        stats['neo4j'] = None
+    return {"success": True, "data": stats}
+
+
+async def _query_trend() -> dict:
+    # 5 个子查询并发执行，时间取决于最慢的那个而非 5 个之和
+    hot_rows, cat_rows, combo_rows, salary_rows, city_rows = await asyncio.gather(
+        _neo4j_query(queries.TREND_HOT_SKILLS),
+        _neo4j_query(queries.TREND_CATEGORIES),
+        _top_skill_pairs(min_demand=101, limit=10),
+        _neo4j_query(queries.TREND_HIGH_SALARY),
+        _neo4j_query(queries.TREND_CITY_DISTRIBUTION),
+    )
+    return {
+        "success": True,
+        "data": {
+            "hot_skills":            [dict(r) for r in hot_rows],
+            "category_distribution": [dict(r) for r in cat_rows],
+            "skill_combos":          [dict(r) for r in combo_rows],
+            "high_salary_skills": [
+                {"skill": r["skill"], "avg_salary_k": round(r["avg_sal"] or 0, 1), "job_count": r["job_count"]}
+                for r in salary_rows
+            ],
+            "city_distribution": [
+                {"city": r["city"], "job_count": r["job_count"]}
+                for r in city_rows
+            ],
+        },
+    }
 
-    # ── graph（默认参数：100节点 200边）──────────────────
-    try:
-        # graph 快阶：只预热节点（轻量），不跑 co-occurrence 边查询
-        node_rows = await _neo4j_query("""
-            MATCH (s:Skill) WHERE coalesce(s.demand_count,0) >= 5
-            RETURN s.name AS skill, s.category AS category,
-                   coalesce(s.demand_count,0) AS demand_count,
-                   coalesce(s.hot_score,0)    AS hot_score,
-                   coalesce(s.avg_salary,0)   AS avg_salary
-            ORDER BY demand_count DESC LIMIT 100
-        """)
-        node_list = [dict(r) for r in node_rows]
-        # 先用空边列表占位，慢阶完成后覆盖
-        cache_set("graph:100:5:200", {
-            "success": True,
-            "data": {"nodes": node_list, "edges": [], "node_count": len(node_list), "edge_count": 0}
-        }, ttl=600)
-        logger.info("  ✅ /api/graph 快阶预热完成（节点已缓存，边将在慢阶补全）")
-    except Exception as e:
-        logger.warning(f"  ⚠️ graph 快阶预热失败: {e}")
 
-    # ── graph/categories（轻量，走 category 属性）──────
-    try:
-        cat_rows = await _neo4j_query(
-            "MATCH (s:Skill) WHERE s.category IS NOT NULL "
-            "RETURN DISTINCT s.category AS category, count(s) AS cnt ORDER BY cnt DESC"
-        )
-        cache_set("graph_categories", {"success": True, "data": [dict(r) for r in cat_rows]}, ttl=3600)
-        logger.info("  ✅ /api/graph/categories 预热完成")
-    except Exception as e:
-        logger.warning(f"  ⚠️ graph/categories 预热失败: {e}")
+async def _query_skill_categories() -> dict:
+    rows = await _neo4j_query(queries.SKILL_CATEGORIES)
+    return {"success": True, "data": [dict(r) for r in rows]}
 
-    logger.info("🔥 [快阶] 核心缓存预热完毕！启动慢阶后台补全...")
-    # 慢阶：co-occurrence 等重型查询交给后台，不阻塞服务启动
-    asyncio.create_task(_warmup_slow_phase())
 
+async def _top_skill_pairs(min_demand: int, limit: int, city: Optional[str] = None) -> List[dict]:
+    """
+    共现最多的技能对：直接读导入时预计算的 CO_OCCURS / CO_OCCURS_IN 边，按 r.count 索引取 top-N
 
-async def _warmup_slow_phase():
-    """慢阶预热：co-occurrence / 高薪技能 / 城市分布等重型查询，在快阶完成后异步补全缓存"""
-    logger.info("🐢 [慢阶] 开始补全重型缓存（co-occurrence / 高薪技能 / 城市分布）...")
-    if not neo4j_manager:
-        return
-    try:
-        combo_rows, salary_rows, city_rows = await asyncio.gather(
-            _neo4j_query("""
-                MATCH (j:Job)-[:REQUIRES]->(s1:Skill),(j)-[:REQUIRES]->(s2:Skill)
-                WHERE s1.name < s2.name AND s1.demand_count > 100 AND s2.demand_count > 100
-                WITH s1.name AS skill1, s2.name AS skill2, count(j) AS co_count
-                ORDER BY co_count DESC LIMIT 10
-                RETURN skill1, skill2, co_count
-            """),
-            _neo4j_query("""
-                MATCH (j:Job)-[:REQUIRES]->(s:Skill)
-                WHERE j.salary_min > 0 AND j.salary_min < 200
-                WITH s.name AS skill, avg(j.salary_min) AS avg_sal, count(j) AS job_count
-                WHERE job_count >= 3
-                RETURN skill, avg_sal, job_count ORDER BY avg_sal DESC LIMIT 100
-            """),
-            _neo4j_query("""
-                MATCH (j:Job)
-                WHERE j.city IS NOT NULL AND j.city <> ''
-                WITH j.city AS city, count(j) AS job_count
-                ORDER BY job_count DESC LIMIT 15
-                RETURN city, job_count
-            """),
-            return_exceptions=True
-        )
-        # 读取快阶已有的 trend 缓存，补充 combo / salary / city
-        existing = cache_get("trend") or {"success": True, "data": {}}
-        existing["data"]["skill_combos"] = [dict(r) for r in (combo_rows if isinstance(combo_rows, list) else [])]
-        existing["data"]["high_salary_skills"] = [
-            {"skill": r["skill"], "avg_salary_k": round(r["avg_sal"] or 0, 1), "job_count": r["job_count"]}
-            for r in (salary_rows if isinstance(salary_rows, list) else [])
-        ]
-        # 城市数据在快阶已写入，慢阶用新查询结果覆盖（数据相同，保持新鲜度）
-        existing["data"]["city_distribution"] = [
-            {"city": r["city"], "job_count": r["job_count"]}
-            for r in (city_rows if isinstance(city_rows, list) else [])
-        ] or existing["data"].get("city_distribution", [])
-        cache_set("trend", existing, ttl=600)
-        logger.info("  ✅ /api/trend 慢阶补全完成（skill_combos + high_salary_skills + city_distribution）")
-    except Exception as e:
-        logger.warning(f"  ⚠️ trend 慢阶补全失败: {e}")
+    图谱尚未预计算共现边（旧数据未重新导入）时退回实时两两展开计算
+    """
+    if city:
+        rows = await _neo4j_query(queries.TOP_SKILL_PAIRS_IN_CITY,
+                                  {"city": city, "min_demand": min_demand, "limit": limit})
+    else:
+        rows = await _neo4j_query(queries.TOP_SKILL_PAIRS, {"min_demand": min_demand, "limit": limit})
+    if rows or limit == 0:
+        return rows
+
+    has_edges = await _neo4j_query("MATCH ()-[r:CO_OCCURS]->() RETURN r LIMIT 1")
+    if has_edges:
+        return rows
+    logger.warning("图谱中没有预计算的 CO_OCCURS 边，技能共现退回实时计算（请重新导入以生成）")
+    return await _neo4j_query(queries.TOP_SKILL_PAIRS_RUNTIME,
+                              {"city": city, "min_demand": min_demand, "limit": limit})
+
+
+async def _query_skill_graph(limit: int, min_demand: int, edge_limit: int, city: Optional[str] = None) -> dict:
+    # 节点与边查询并发：边查询直接读预计算的共现边，无需先等节点结果
+    node_rows, edge_rows = await asyncio.gather(
+        _neo4j_query(queries.GRAPH_NODES, {"min_demand": min_demand, "limit": limit}),
+        _top_skill_pairs(min_demand, edge_limit, city),
+        return_exceptions=True,
+    )
+    if isinstance(node_rows, Exception):
+        raise node_rows  # 节点查询失败直接上报
+    if isinstance(edge_rows, Exception):
+        logger.warning(f"图谱边查询失败（节点仍返回）: {edge_rows}")
+        edge_rows = []
+    node_list = [dict(r) for r in node_rows]
+    edge_list = [dict(r) for r in edge_rows]
+    return {
+        "success": True,
+        "data": {
+            "nodes": node_list,
+            "edges": edge_list,
+            "node_count": len(node_list),
+            "edge_count": len(edge_list),
+        },
+    }
 
-    try:
-        # graph 边查询（co-occurrence，最重的查询）
-        existing_graph = cache_get("graph:100:5:200") or {"success": True, "data": {"nodes": [], "edges": []}}
-        skill_names = [n["skill"] for n in existing_graph["data"].get("nodes", [])]
-        if skill_names:
-            edge_rows = await _neo4j_query("""
-                MATCH (j:Job)-[:REQUIRES]->(s1:Skill),(j)-[:REQUIRES]->(s2:Skill)
-                WHERE s1.name < s2.name AND s1.name IN $names AND s2.name IN $names
-                WITH s1.name AS skill1, s2.name AS skill2, count(j) AS co_count
-                WHERE co_count >= 1
-                RETURN skill1, skill2, co_count ORDER BY co_count DESC LIMIT 200
-            """, {"names": skill_names})
-            existing_graph["data"]["edges"] = [dict(r) for r in edge_rows]
-            existing_graph["data"]["edge_count"] = len(edge_rows)
-            cache_set("graph:100:5:200", existing_graph, ttl=600)
-            logger.info(f"  ✅ /api/graph 慢阶补全完成（{len(edge_rows)} 条边）")
-    except Exception as e:
-        logger.warning(f"  ⚠️ graph 慢阶补全失败: {e}")
 
-    logger.info("🐢 [慢阶] 重型缓存补全完毕")
+# /api/graph 默认参数（前端首页请求），只有这一组参数作为物化视图预计算
+_GRAPH_DEFAULTS = (100, 5, 200)
+
+_views = ViewRegistry()
+_views.register(MaterializedView(
+    name="stats", key=lambda: _ck("stats"), query=_query_stats,
+    interval=300, ttl=600, stale_ttl=_STALE_TTL, priority=0, cost="light",
+))
+_views.register(MaterializedView(
+    name="graph_categories", key=lambda: _ck("graph_categories"), query=_query_skill_categories,
+    interval=1800, ttl=3600, stale_ttl=_STALE_TTL, priority=1, cost="light",
+    enabled=lambda: neo4j_manager is not None,
+))
+_views.register(MaterializedView(
+    name="graph", key=lambda: _ck("graph", *_GRAPH_DEFAULTS), query=lambda: _query_skill_graph(*_GRAPH_DEFAULTS),
+    interval=900, ttl=1800, stale_ttl=_STALE_TTL, priority=2, cost="heavy",
+    enabled=lambda: neo4j_manager is not None,
+))
+_views.register(MaterializedView(
+    name="trend", key=lambda: _ck("trend"), query=_query_trend,
+    interval=900, ttl=1800, stale_ttl=_STALE_TTL, priority=3, cost="heavy",
+    enabled=lambda: neo4j_manager is not None,
+))
+
+_view_scheduler = ViewScheduler(
+    _views,
+    store=lambda key, value, ttl, stale_ttl: cache_set(key, value, ttl=ttl, stale_ttl=stale_ttl),
+    concurrency=cache_config.get('view_concurrency'),
+    jitter=cache_config.get('view_jitter', 0.1),
+    single_flight=_single_flight,
+)
+_view_task: Optional[asyncio.Task] = None
 
 
-async def _cache_refresh_loop():
-    """后台定时刷新任务：每 4.5 分钟刷新一次，让缓存始终热着（stats TTL=5min，trend/graph TTL=10min）"""
-    await asyncio.sleep(270)  # 首次刷新等 4.5 min（预热已完成）
-    while True:
-        logger.info("♻️  后台缓存刷新开始...")
+async def _view_response(name: str, http_request: Optional[Request] = None):
+    """按物化视图读取：命中直接返回，未命中由当前请求执行视图查询并写缓存"""
+    async def _compute():
         try:
-            # ── stats ──────────────────────────────────────────
-            if rag_service or neo4j_manager:
-                s: dict = {}
-                if rag_service:
-                    s['rag'] = await asyncio.to_thread(rag_service.vector_db.get_stats)
-                if neo4j_manager:
-                    try:
-                        s['neo4j'] = await asyncio.to_thread(neo4j_manager.get_database_stats)
-                    except Exception:
-                        s['neo4j'] = None
-                cache_set("stats", {"success": True, "data": s}, ttl=300)
+            return await _view_scheduler.refresh(name)
         except Exception as e:
-            logger.warning(f"  ⚠️ stats 刷新失败: {e}")
-
-        if neo4j_manager:
-            # ── trend（并发 4 子查询）──────────────────────────
-            try:
-                hot_r, cat_r, combo_r, sal_r = await asyncio.gather(
-                    _neo4j_query("MATCH (s:Skill) WHERE s.demand_count > 0 RETURN s.name AS skill, s.category AS category, s.demand_count AS demand_count, s.hot_score AS hot_score ORDER BY s.demand_count DESC LIMIT 100"),
-                    _neo4j_query("MATCH (s:Skill) WHERE s.demand_count > 0 AND s.category IS NOT NULL RETURN s.category AS category, count(s) AS skill_count, sum(s.demand_count) AS total_demand ORDER BY total_demand DESC"),
-                    _neo4j_query("MATCH (j:Job)-[:REQUIRES]->(s1:Skill),(j)-[:REQUIRES]->(s2:Skill) WHERE s1.name < s2.name AND s1.demand_count > 100 AND s2.demand_count > 100 WITH s1.name AS skill1, s2.name AS skill2, count(j) AS co_count ORDER BY co_count DESC LIMIT 10 RETURN skill1, skill2, co_count"),
-                    _neo4j_query("MATCH (j:Job)-[:REQUIRES]->(s:Skill) WHERE j.salary_min > 0 AND j.salary_min < 200 WITH s.name AS skill, avg(j.salary_min) AS avg_sal, count(j) AS job_count WHERE job_count >= 3 RETURN skill, avg_sal, job_count ORDER BY avg_sal DESC LIMIT 100"),
-                    return_exceptions=True
-                )
-                cache_set("trend", {"success": True, "data": {
-                    "hot_skills":            [dict(r) for r in (hot_r   if isinstance(hot_r,   list) else [])],
-                    "category_distribution": [dict(r) for r in (cat_r   if isinstance(cat_r,   list) else [])],
-                    "skill_combos":          [dict(r) for r in (combo_r if isinstance(combo_r, list) else [])],
-                    "high_salary_skills":    [{"skill": r["skill"], "avg_salary_k": round(r["avg_sal"] or 0, 1), "job_count": r["job_count"]} for r in (sal_r if isinstance(sal_r, list) else [])],
-                }}, ttl=600)
-            except Exception as e:
-                logger.warning(f"  ⚠️ trend 刷新失败: {e}")
-
-            # ── graph（默认参数并发）──────────────────────────
-            try:
-                n_rows, e_rows = await asyncio.gather(
-                    _neo4j_query("MATCH (s:Skill) WHERE coalesce(s.demand_count,0) >= 5 RETURN s.name AS skill, s.category AS category, coalesce(s.demand_count,0) AS demand_count, coalesce(s.hot_score,0) AS hot_score, coalesce(s.avg_salary,0) AS avg_salary ORDER BY demand_count DESC LIMIT 100"),
-                    _neo4j_query("MATCH (j:Job)-[:REQUIRES]->(s1:Skill),(j)-[:REQUIRES]->(s2:Skill) WHERE s1.name < s2.name AND coalesce(s1.demand_count,0) >= 5 AND coalesce(s2.demand_count,0) >= 5 WITH s1.name AS skill1, s2.name AS skill2, count(j) AS co_count WHERE co_count >= 1 RETURN skill1, skill2, co_count ORDER BY co_count DESC LIMIT 200"),
-                    return_exceptions=True
-                )
-                nl = [dict(r) for r in (n_rows if isinstance(n_rows, list) else [])]
-                el = [dict(r) for r in (e_rows if isinstance(e_rows, list) else [])]
-                cache_set("graph:100:5:200", {"success": True, "data": {"nodes": nl, "edges": el, "node_count": len(nl), "edge_count": len(el)}}, ttl=600)
-            except Exception as e:
-                logger.warning(f"  ⚠️ graph 刷新失败: {e}")
+            logger.error(f"物化视图 {name} 查询失败: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
 
-        logger.info("♻️  缓存刷新完成")
-        await asyncio.sleep(270)  # 每 4.5 分钟刷新一次
+    return await _cached(_views.get(name).key(), _compute, http_request)
 
 
 # ===== 路由注册 =====
@@ -492,10 +659,16 @@ include_auth_routes(app)
 async def shutdown_event():
     """关闭时清理资源"""
     logger.info("关闭API服务...")
+    _set_view_scheduler(False)
+    if _is_leader:
+        try:
+            await _cache_io(_api_cache.release, _LEADER_LOCK, _WORKER_ID)
+        except Exception:
+            pass
     if agent is not None:
         agent.close()
     if neo4j_manager is not None:
-        neo4j_manager.close()
+        await neo4j_manager.close()
 
 
 # ===== API端点 =====
@@ -520,6 +693,7 @@ async def root():
 @app.get("/api/health/quick")
 async def health_quick():
     """轻量健康检查 —— 仅返回服务初始化状态，<10ms，供监控看板使用"""
+    cache_stats = await _cache_io(_api_cache.stats)
     return {
         "status": "ok",
         "ts": time.time(),
@@ -529,7 +703,18 @@ async def health_quick():
             "neo4j":  neo4j_manager is not None,
             "search": skill_extractor is not None,
         },
-        "cache_size": len(_api_cache),
+        "cache_size": cache_stats.get("entries"),
+        "cache": cache_stats,
+        "cache_leader": _is_leader,
+        "single_flight": _single_flight.stats(),
+        "views": _view_scheduler.stats(),
+        "neo4j_pool": neo4j_manager.stats() if neo4j_manager is not None else None,
+        "skill_index": _skill_index.stats() if _skill_index is not None else None,
+        "title_search": title_search.stats() if title_search is not None else None,
+        "embedding_cache": (rag_service.vector_db.embedding_cache.stats()
+                            if rag_service is not None and rag_service.vector_db.embedding_cache is not None
+                            else None),
+        "data_generation": _data_version.generation,
     }
 
 
@@ -584,7 +769,7 @@ async def extract_skills(request: SkillExtractRequest):
 
 
 @app.post("/api/rag/search")
-async def rag_search(request: SearchRequest):
+async def rag_search(request: SearchRequest, http_request: Request):
     """
     RAG语义搜索
 
@@ -596,48 +781,41 @@ async def rag_search(request: SearchRequest):
         raise HTTPException(status_code=503, detail="RAG服务不可用")
 
     # 缓存：同一 (query, city, top_k) 组合 2 分钟内不重复跑向量推断
-    rag_cache_key = f"rag:{request.query}:{request.city}:{request.top_k}"
-    cached = cache_get(rag_cache_key)
-    if cached:
-        return cached
+    rag_cache_key = _ck("rag", canonical_text(request.query), request.city, request.top_k)
+    async def _compute():
+        try:
+            filters = {"city": request.city} if request.city else None
 
-    try:
-        filters = {"city": request.city} if request.city else None
+            # search_and_summarize 是同步阻塞（ChromaDB + 可能调 LLM），放入线程池
+            result = await asyncio.to_thread(
+                rag_service.search_and_summarize,
+                request.query,
+                request.top_k,
+                filters,
+            )
 
-        # search_and_summarize 是同步阻塞（ChromaDB + 可能调 LLM），放入线程池
-        result = await asyncio.to_thread(
-            rag_service.search_and_summarize,
-            request.query,
-            request.top_k,
-            filters,
-        )
+            # 用 Neo4j 批量回填技能（向量库元数据不一定有 skills 字段，Neo4j 是权威来源）
+            jobs = result.get("retrieved_jobs", [])
+            if jobs and neo4j_manager:
+                try:
+                    job_ids = [j["job_id"] for j in jobs if j.get("job_id")]
+                    if job_ids:
+                        rows = await _neo4j_query(queries.JOB_SKILLS, {"ids": job_ids}, cache=True)
+                        skills_map = {r["job_id"]: r["skills"] for r in rows}
+                        for job in jobs:
+                            neo4j_skills = skills_map.get(job["job_id"])
+                            if neo4j_skills:
+                                job["skills"] = neo4j_skills
+                except Exception as e:
+                    logger.warning(f"Neo4j 技能回填失败（不影响搜索结果）: {e}")
+
+            final = {"success": True, "data": result}
+            return cache_set(rag_cache_key, final, ttl=1800)
+        except Exception as e:
+            logger.error(f"RAG搜索失败: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
 
-        # 用 Neo4j 批量回填技能（向量库元数据不一定有 skills 字段，Neo4j 是权威来源）
-        jobs = result.get("retrieved_jobs", [])
-        if jobs and neo4j_manager:
-            try:
-                job_ids = [j["job_id"] for j in jobs if j.get("job_id")]
-                if job_ids:
-                    cypher = """
-                    MATCH (j:Job)-[:REQUIRES]->(s:Skill)
-                    WHERE j.job_id IN $job_ids
-                    RETURN j.job_id AS job_id, collect(s.name) AS skills
-                    """
-                    rows = await _neo4j_query(cypher, {"job_ids": job_ids})
-                    skills_map = {r["job_id"]: r["skills"] for r in rows}
-                    for job in jobs:
-                        neo4j_skills = skills_map.get(job["job_id"])
-                        if neo4j_skills:
-                            job["skills"] = neo4j_skills
-            except Exception as e:
-                logger.warning(f"Neo4j 技能回填失败（不影响搜索结果）: {e}")
-
-        final = {"success": True, "data": result}
-        cache_set(rag_cache_key, final, ttl=120)  # 缓存 2 分钟
-        return final
-    except Exception as e:
-        logger.error(f"RAG搜索失败: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _cached(rag_cache_key, _compute, http_request)
 
 
 @app.post("/api/skill/gap-analysis")
@@ -701,7 +879,8 @@ async def agent_chat(request: AgentChatRequest):
     Agent对话（非流式，兼容旧客户端）
 
     与智能Agent进行多轮对话，返回完整响应。
-    注意：使用 run_in_executor 避免同步调用阻塞 asyncio 事件循环。
+    注意：直接 await agent.achat()，不能把同步的 agent.chat() 放进线程池
+    （其专用事件循环不可并发使用，且共享的 Neo4j 连接池只能在主循环中使用）。
     """
     # 健康检查专用 ping 快速路径，<5ms 返回，不消耗 LLM 调用
     if request.message.strip().lower() in ("ping", "__ping__", "health"):
@@ -719,11 +898,8 @@ async def agent_chat(request: AgentChatRequest):
 
     try:
         session_id = request.session_id or str(uuid.uuid4())
-        # agent.chat() 是同步阻塞调用，必须放入线程池，否则会卡住整个事件循环
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(
-            None, agent.chat, request.message, session_id
-        )
+        # 在主事件循环中直接 await：Agent 与 API 共用的 Neo4j 连接池绑定在该循环上
+        response = await agent.achat(request.message, session_id)
         return {
             "success": True,
             "data": {
@@ -771,164 +947,219 @@ async def agent_chat_stream(request: AgentChatRequest):
 
 
 @app.get("/api/stats")
-async def get_stats():
+async def get_stats(http_request: Request):
     """获取系统统计信息"""
-    cached = cache_get("stats")
-    if cached:
+    return await _view_response("stats", http_request)
+
+
+# 二级搜索缓存的 limit 档位：小 limit 请求复用已缓存的大结果切片，未命中时按所在档位查询
+_SEARCH_LIMIT_BUCKETS = (20, 100, 500)
+
+
+async def _search_skills(query: str) -> List[str]:
+    """查询文本 -> 标准技能名列表（按大小写、空白不敏感的规范化文本缓存，避免重复抽取）"""
+    if not skill_extractor:
+        return []
+    normalized = canonical_text(query, casefold=True)
+    key = _ck("search_skills", normalized)
+    cached = await cache_get(key)
+    if cached is not None:
         return cached
+
+    def _extract():
+        job_data = {'title': normalized, 'jd_text': normalized, 'skills': []}
+        return skill_extractor.extract(job_data, use_llm=False)
+
+    async def _compute():
+        # CPU 密集型字典扫描，放入线程池避免阻塞事件循环
+        extract_result = await asyncio.to_thread(_extract)
+        skills = [s['name'] for s in extract_result.get('merged_skills', [])]
+        cache_set(key, skills, ttl=1800)
+        return skills
+
+    return await _single_flight.do(key, _compute)
+
+
+async def _search_hits(kind: str, ident: str, city: Optional[str], limit: int, fetch) -> List[dict]:
+    """
+    二级搜索缓存：(技能集合 / 关键词, 城市, limit 档位) -> 排好序的命中列表（只含 job_id 与排序信息）
+
+    依次检查各档位缓存：档位 >= limit，或结果条数不足档位（已是全部结果）即可直接切片返回；
+    都未命中时按 limit 所在档位调用 fetch(bucket) 查询
+    """
+    for bucket in _SEARCH_LIMIT_BUCKETS:
+        hits = await cache_get(_ck("search_hits", kind, ident, city, bucket))
+        if hits is not None and (bucket >= limit or len(hits) < bucket):
+            return hits[:limit]
+
+    bucket = next((b for b in _SEARCH_LIMIT_BUCKETS if b >= limit), limit)
+    key = _ck("search_hits", kind, ident, city, bucket)
+
+    async def _compute():
+        hits = await fetch(bucket)
+        cache_set(key, hits, ttl=1800)
+        return hits
+
+    hits = await _single_flight.do(key, _compute)
+    return hits[:limit]
+
+
+async def _search_jobs_by_skills(skill_names: List[str], city: Optional[str], limit: int) -> List[dict]:
+    """
+    技能搜索：优先用进程内倒排索引求 top-N；
+    索引未就绪时利用 Skill.name 索引定位匹配岗位，按命中技能数排序，仅对 top-N 结果再统计技能总数
+    """
+    if _skill_index is not None:
+        hits = _skill_index.match(skill_names, city, limit)
+    else:
+        hits = await _neo4j_query(queries.SEARCH_BY_SKILLS,
+                                  {"skill_names": skill_names, "city": city, "limit_val": limit})
+    return [{**h, "search_type": "skill", "source": "graph"} for h in hits]
+
+
+async def _search_jobs_by_title(keywords: List[str], city: Optional[str], limit: int) -> List[dict]:
+    """
+    职位名称关键词搜索（无技能词时）
+    全文索引 job_title_fts（或进程内 n-gram 索引）给出排好序的岗位 id，再按 id 取技能列表
+    """
+    hits = await title_search.search(keywords, city, limit)
+    if not hits:
+        return []
+    skill_rows = await _neo4j_query(queries.JOB_SKILLS, {"ids": [h["job_id"] for h in hits]}, cache=True)
+    all_skills = {r["job_id"]: r["skills"] for r in skill_rows}
+    return [{
+        "job_id":         h["job_id"],
+        "matched_skills": all_skills.get(h["job_id"], []),
+        "match_count":    h["match_count"],
+        "total_skills":   len(all_skills.get(h["job_id"], [])),
+        "search_type":    "title",
+        "source":         "graph",
+    } for h in hits]
+
+
+# ===== 分页与字段投影 =====
+# 排序结果（只含 job_id 与分数）单独缓存，每页的列按需用一次 IN 查询回填；
+# 请求未传 page_size / cursor / fields 时保持原有的一次性全量返回
+
+# 各接口可投影的字段（按返回顺序），以及分页时的默认字段（列表页不显示 JD）
+_SEARCH_FIELDS = (
+    "job_id", "title", "city", "company", "salary_range", "experience", "education", "jd_text",
+    "publish_date", "matched_skills", "match_count", "total_skills", "search_type", "source",
+)
+_RECOMMEND_FIELDS = (
+    "job_id", "title", "city", "company", "salary_range",
+    "matched_skills", "match_count", "total_skills", "match_type",
+)
+_DEFAULT_PAGE_SIZE = 20
+
+
+def _is_paged(request) -> bool:
+    return request.page_size is not None or request.cursor is not None or request.fields is not None
+
+
+def _page_fields(requested: Optional[List[str]], allowed: tuple) -> List[str]:
+    """校验字段投影；未指定时返回除 jd_text 外的全部字段"""
+    if not requested:
+        return [f for f in allowed if f != "jd_text"]
+    unknown = sorted(set(requested) - set(allowed))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"不支持的字段: {', '.join(unknown)}，可选: {', '.join(allowed)}")
+    return [f for f in allowed if f in requested or f == "job_id"]
+
+
+async def _render_jobs(hits: List[dict], fields, project_vector: bool = True) -> List[dict]:
+    """
+    命中列表 -> 响应中的岗位行：图谱命中按所需列批量回填，向量命中检索时已带全部字段直接透传
+
+    Args:
+        hits: 排序结果（图谱命中只含 job_id 与分数）
+        fields: 输出字段
+        project_vector: 向量命中是否也按 fields 投影（全量模式下保持原样返回）
+    """
+    columns = {"salary_min", "salary_max"} if "salary_range" in fields else set()
+    columns |= {f for f in fields if f in queries.JOB_COLUMNS}
+    graph_ids = [h["job_id"] for h in hits if h.get("source") != "vector"]
+    details = await _fetch_job_columns(graph_ids, columns) if graph_ids else {}
+
+    jobs = []
+    for h in hits:
+        if h.get("source") == "vector":
+            jobs.append({f: h[f] for f in fields if f in h} if project_vector else h)
+            continue
+        detail = details.get(h["job_id"])
+        if detail is None:
+            continue  # 排序结果缓存后岗位已被删除
+        row = {**detail, **h}
+        if "salary_range" in fields:
+            row["salary_range"] = f"{row['salary_min'] or 0}-{row['salary_max'] or 0}K"
+        jobs.append({f: row[f] for f in fields if f in row})
+    return jobs
+
+
+async def _paged_response(ranked_key: str, ranked: dict, request, fields: List[str], extra: dict) -> dict:
+    """按游标截取一页排序结果并回填该页的列"""
+    hits = ranked["hits"]
+    page_size = request.page_size or _DEFAULT_PAGE_SIZE
     try:
-        stats = {}
-        if rag_service:
-            stats['rag'] = await asyncio.to_thread(rag_service.vector_db.get_stats)
-        try:
-            stats['neo4j'] = await asyncio.to_thread(neo4j_manager.get_database_stats) if neo4j_manager else None
-        except Exception:
-            stats['neo4j'] = None
-        result = {"success": True, "data": stats}
-        cache_set("stats", result, ttl=300)
-        return result
-    except Exception as e:
-        logger.error(f"获取统计信息失败: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        page, next_cursor = paginate(hits, ranked_key, request.cursor, page_size)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    jobs = await _render_jobs(page, fields)
+    return {
+        "success": True,
+        "data": {
+            **extra,
+            "jobs": jobs,
+            "count": len(jobs),
+            "total": len(hits),
+            "page_size": page_size,
+            "next_cursor": next_cursor,
+        },
+    }
 
 
 # ===== 图谱增强接口 =====
 
-@app.post("/api/search")
-async def graph_search(request: GraphSearchRequest):
+async def _search_ranked(request: GraphSearchRequest, query_text: str, limit: int) -> Tuple[str, dict]:
     """
-    语义化搜索（图谱增强版）
+    搜索排序结果（缓存）：{"hits", "matched_skills", "graph_hits", "vector_hits"}
 
-    流程：
-    1. 用技能词典将查询词映射到标准技能名
-    2. 通过 Neo4j 图遍历找到需要这些技能的岗位
-    3. 若 Neo4j 不可用则自动降级为向量检索
+    图谱命中只保存 job_id 与排序信息；向量命中来自 Chroma 元数据，检索时已带齐字段
     """
-    if not skill_extractor and not rag_service:
-        raise HTTPException(status_code=503, detail="搜索服务不可用")
+    key = _ck("search_ranked", query_text, request.city, limit, int(bool(request.include_vector)))
+    cached = await cache_get(key)
+    if cached is not None:
+        return key, cached
 
-    # 统一用实际生效的 limit 值作为 cache key，避免 top_k=None 和 top_k=500 命中不同缓存
-    _effective_limit = min(request.top_k, 500) if request.top_k else 500
-    cache_key = f"search:{request.query}:{request.city}:{_effective_limit}"
-    cached = cache_get(cache_key)
-    if cached:
-        return cached
+    async def _compute():
+        # Step 1：技能词典映射（一级缓存：规范化查询文本 -> 技能集合）
+        matched_skills = await _search_skills(request.query)
 
-    try:
-        matched_skills = []
-
-        # Step 1：技能词典映射（CPU 密集型字典扫描，放入线程池避免阻塞事件循环）
-        if skill_extractor:
-            def _extract():
-                job_data = {'title': request.query, 'jd_text': request.query, 'skills': []}
-                return skill_extractor.extract(job_data, use_llm=False)
-            extract_result = await asyncio.to_thread(_extract)
-            matched_skills = [s['name'] for s in extract_result.get('merged_skills', [])]
-
-        # Step 2：Neo4j 图谱查询
-        graph_jobs = []
-        search_type = "skill"   # "skill" | "title"
+        # Step 2：Neo4j 图谱查询（二级缓存：技能集合 / 关键词 + 城市 + limit 档位 -> 命中列表）
+        graph_hits = []
         if neo4j_manager:
-            # 结果上限：外部明确指定时遵从，否则默认 500（全库检索后取前 500 条）
-            # 监控健康检查传 top_k=1，不受影响；前端不传 top_k 则取 500 条
-            limit_val = min(request.top_k, 500) if request.top_k else 500
-
             if matched_skills:
                 # 2a：技能搜索 —— 从 Skill 节点（已建索引）出发遍历 Job，效率最高
-                # 第一步：利用 Skill.name 索引快速定位所有匹配岗位，按命中技能数排序
-                # 第二步：仅对 top-500 结果再查一次 all_skills，避免对全库做二次扫描
-                search_type = "skill"
-                cypher = f"""
-                MATCH (j:Job)-[:REQUIRES]->(s:Skill)
-                WHERE s.name IN $skill_names
-                  AND ($city IS NULL OR j.city = $city)
-                WITH j,
-                     collect(DISTINCT s.name) AS matched_skills,
-                     count(DISTINCT s)        AS match_count
-                ORDER BY match_count DESC, j.salary_max DESC
-                LIMIT {limit_val}
-                MATCH (j)-[:REQUIRES]->(all_s:Skill)
-                WITH j, matched_skills, match_count,
-                     count(DISTINCT all_s) AS total_skills
-                OPTIONAL MATCH (j)-[:POSTED_BY]->(c:Company)
-                RETURN j.job_id          AS job_id,
-                       j.title           AS title,
-                       j.city            AS city,
-                       coalesce(c.name, '') AS company,
-                       coalesce(j.salary_min, 0) AS salary_min,
-                       coalesce(j.salary_max, 0) AS salary_max,
-                       coalesce(j.experience,    '') AS experience,
-                       coalesce(j.education,     '') AS education,
-                       coalesce(j.jd_text,       '') AS jd_text,
-                       coalesce(j.publish_date,  '') AS publish_date,
-                       matched_skills,
-                       match_count,
-                       total_skills
-                """
-                rows = await _neo4j_query(cypher, {
-                    "skill_names": matched_skills,
-                    "city": request.city,
-                })
+                skill_names = sorted(matched_skills)
+                graph_hits = await _search_hits(
+                    "skill", ",".join(skill_names), request.city, limit,
+                    lambda bucket: _search_jobs_by_skills(skill_names, request.city, bucket),
+                )
             else:
                 # 2b：职位名称关键词搜索（无技能词时）
-                # 若 Neo4j 已建全文索引 job_title_fts，此查询可在毫秒级完成
-                search_type = "title"
-                raw_keywords = [w for w in request.query.replace('，', ' ').replace(',', ' ').split() if len(w) >= 2]
+                raw_keywords = [w for w in query_text.replace('，', ' ').replace(',', ' ').split() if len(w) >= 2]
                 if not raw_keywords:
-                    raw_keywords = [request.query]
+                    raw_keywords = [query_text]
                 # 去掉单引号防止 Cypher 注入；限制最多 5 个关键词
                 keywords = [kw.replace("'", "") for kw in raw_keywords[:5]]
-                # 参数化写法：$kw0, $kw1... 替代字符串拼接，彻底消除注入风险
-                kw_params = {f"kw{i}": kw for i, kw in enumerate(keywords)}
-                where_parts = " OR ".join([f"j.title CONTAINS $kw{i}" for i in range(len(keywords))])
-                score_parts = " + ".join([f"(CASE WHEN j.title CONTAINS $kw{i} THEN 1 ELSE 0 END)" for i in range(len(keywords))])
-                cypher = f"""
-                MATCH (j:Job)
-                WHERE ({where_parts})
-                  AND ($city IS NULL OR j.city = $city)
-                WITH j, ({score_parts}) AS kw_score
-                ORDER BY kw_score DESC, j.salary_max DESC
-                LIMIT $limit_val
-                OPTIONAL MATCH (j)-[:REQUIRES]->(s:Skill)
-                WITH j, kw_score, collect(DISTINCT s.name) AS all_skills
-                OPTIONAL MATCH (j)-[:POSTED_BY]->(c:Company)
-                RETURN j.job_id          AS job_id,
-                       j.title           AS title,
-                       j.city            AS city,
-                       coalesce(c.name, '') AS company,
-                       coalesce(j.salary_min, 0) AS salary_min,
-                       coalesce(j.salary_max, 0) AS salary_max,
-                       coalesce(j.experience,    '') AS experience,
-                       coalesce(j.education,     '') AS education,
-                       coalesce(j.jd_text,       '') AS jd_text,
-                       coalesce(j.publish_date,  '') AS publish_date,
-                       all_skills        AS matched_skills,
-                       kw_score          AS match_count,
-                       size(all_skills)  AS total_skills
-                """
-                rows = await _neo4j_query(cypher, {"city": request.city, "limit_val": limit_val, **kw_params})
-
-            for r in rows:
-                graph_jobs.append({
-                    "job_id":        r["job_id"],
-                    "title":         r["title"],
-                    "city":          r["city"],
-                    "company":       r["company"],
-                    "salary_range":  f"{r['salary_min'] or 0}-{r['salary_max'] or 0}K",
-                    "experience":    r.get("experience", ""),
-                    "education":     r.get("education", ""),
-                    "jd_text":        r.get("jd_text", ""),
-                    "publish_date":   r.get("publish_date", ""),
-                    "matched_skills": r["matched_skills"],
-                    "match_count":   r["match_count"],
-                    "total_skills":  r["total_skills"],
-                    "search_type":   search_type,
-                    "source":        "graph",
-                })
+                graph_hits = await _search_hits(
+                    "title", "|".join(keywords), request.city, limit,
+                    lambda bucket: _search_jobs_by_title(keywords, request.city, bucket),
+                )
 
         # Step 3：向量语义补充（可选，默认关闭以加速响应）
         vector_jobs = []
-        need_vector = request.include_vector or (not graph_jobs and rag_service)
+        need_vector = request.include_vector or (not graph_hits and rag_service)
         if need_vector and rag_service:
             filters = {"city": request.city} if request.city else None
             v_result = rag_service.search_and_summarize(
@@ -938,101 +1169,119 @@ async def graph_search(request: GraphSearchRequest):
                 j["source"] = "vector"
                 vector_jobs.append(j)
 
-        # 合并去重：图谱结果优先，向量结果补足
-        seen_ids = {j["job_id"] for j in graph_jobs}
-        merged = graph_jobs[:]
+        # 合并去重：图谱结果优先，向量结果补足；外部明确传了 top_k 则遵从，否则统一上限 500
+        seen_ids = {h["job_id"] for h in graph_hits}
+        hits = graph_hits[:]
         for j in vector_jobs:
             if j["job_id"] not in seen_ids:
-                merged.append(j)
+                hits.append(j)
                 seen_ids.add(j["job_id"])
 
-        # 最终截断：外部明确传了 top_k 则遵从，否则统一上限 500
-        final_limit = min(request.top_k, 500) if request.top_k else 500
-        merged = merged[:final_limit]
-
-        result = {
-            "success": True,
-            "data": {
-                "jobs": merged,
-                "count": len(merged),
-                "query": request.query,
-                "matched_skills": matched_skills,
-                "graph_hits": len(graph_jobs),
-                "vector_hits": len(vector_jobs),
-            },
+        ranked = {
+            "hits": hits[:limit],
+            "matched_skills": matched_skills,
+            "graph_hits": len(graph_hits),
+            "vector_hits": len(vector_jobs),
         }
-        cache_set(cache_key, result, ttl=180)   # 搜索结果缓存 3 分钟
-        return result
-    except Exception as e:
-        logger.error(f"图谱搜索失败: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        cache_set(key, ranked, ttl=1800)
+        return ranked
 
+    return key, await _single_flight.do(key, _compute)
 
-@app.post("/api/recommend")
-async def graph_recommend(request: GraphRecommendRequest):
+
+@app.post("/api/search")
+async def graph_search(request: GraphSearchRequest, http_request: Request):
     """
-    智能岗位推荐（Cypher 精准匹配 + 语义扩展）
+    语义化搜索（图谱增强版）
 
     流程：
-    1. Cypher 精准匹配：查找需要用户技能最多的岗位
-    2. 图谱扩展：通过 RELATED_TO 关系找关联技能，扩大推荐范围
-    3. 降级：Neo4j 不可用时退回向量推荐
+    1. 用技能词典将查询词映射到标准技能名
+    2. 通过 Neo4j 图遍历找到需要这些技能的岗位
+    3. 若 Neo4j 不可用则自动降级为向量检索
+
+    传入 page_size / cursor / fields 时按页返回（默认不含 jd_text，JD 全文见 /api/job/{job_id}），
+    否则一次性返回全部结果
     """
-    if not rag_service and not neo4j_manager:
-        raise HTTPException(status_code=503, detail="推荐服务不可用")
+    if not skill_extractor and not rag_service:
+        raise HTTPException(status_code=503, detail="搜索服务不可用")
 
-    skills_key = ",".join(sorted(request.user_skills or []))
-    cache_key = f"recommend:{skills_key}:{request.city}:{request.top_k}"
-    cached = cache_get(cache_key)
-    if cached:
-        return cached
+    # 统一用实际生效的 limit 值作为 cache key，避免 top_k=None 和 top_k=500 命中不同缓存
+    _effective_limit = min(request.top_k, 500) if request.top_k else 500
+    query_text = canonical_text(request.query)
 
-    try:
-        precise_jobs = []
-        expanded_jobs = []
+    if _is_paged(request):
+        fields = _page_fields(request.fields, _SEARCH_FIELDS)
+        try:
+            ranked_key, ranked = await _search_ranked(request, query_text, _effective_limit)
+            return await _paged_response(ranked_key, ranked, request, fields, {
+                "query": request.query,
+                "matched_skills": ranked["matched_skills"],
+                "graph_hits": ranked["graph_hits"],
+                "vector_hits": ranked["vector_hits"],
+            })
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"图谱搜索失败: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    cache_key = _ck("search", query_text, request.city, _effective_limit, int(bool(request.include_vector)))
+    async def _compute():
+        try:
+            _, ranked = await _search_ranked(request, query_text, _effective_limit)
+            jobs = await _render_jobs(ranked["hits"], _SEARCH_FIELDS, project_vector=False)
+            result = {
+                "success": True,
+                "data": {
+                    "jobs": jobs,
+                    "count": len(jobs),
+                    "query": request.query,
+                    "matched_skills": ranked["matched_skills"],
+                    "graph_hits": ranked["graph_hits"],
+                    "vector_hits": ranked["vector_hits"],
+                },
+            }
+            return cache_set(cache_key, result, ttl=1800)
+        except Exception as e:
+            logger.error(f"图谱搜索失败: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    return await _cached(cache_key, _compute, http_request)
+
+
+async def _recommend_ranked(request: GraphRecommendRequest) -> Tuple[str, dict]:
+    """
+    推荐排序结果（缓存）：{"hits", "precise_count", "expanded_count", "related_skills"}
+
+    精准 / 扩展命中只保存 job_id 与匹配信息，岗位列在输出时按需回填
+    """
+    key = _ck("recommend_ranked", ",".join(request.user_skills), request.city, request.top_k)
+    cached = await cache_get(key)
+    if cached is not None:
+        return key, cached
+
+    async def _compute():
+        precise_hits = []
+        expanded_hits = []
         related_skills: List[str] = []
 
         if neo4j_manager and request.user_skills:
             rec_limit = min(request.top_k, 500) if request.top_k else 500
 
             # Step 1 & 2：精准匹配 + 关联技能扩展 并发执行
-            precise_cypher = """
-            MATCH (j:Job)-[:REQUIRES]->(s:Skill)
-            WHERE s.name IN $user_skills
-              AND ($city IS NULL OR j.city = $city)
-            WITH j,
-                 collect(DISTINCT s.name) AS matched_skills,
-                 count(DISTINCT s)        AS match_count
-            ORDER BY match_count DESC
-            LIMIT $top_k
-            MATCH (j)-[:REQUIRES]->(all_s:Skill)
-            WITH j, matched_skills, match_count,
-                 count(DISTINCT all_s) AS total_skills
-            OPTIONAL MATCH (j)-[:POSTED_BY]->(c:Company)
-            RETURN j.job_id     AS job_id,
-                   j.title      AS title,
-                   j.city       AS city,
-                   coalesce(c.name, '') AS company,
-                   j.salary_min AS salary_min,
-                   j.salary_max AS salary_max,
-                   matched_skills,
-                   match_count,
-                   total_skills
-            """
-            expand_cypher = """
-            MATCH (us:Skill)-[:RELATED_TO]-(rs:Skill)
-            WHERE us.name IN $user_skills
-              AND NOT rs.name IN $user_skills
-            RETURN DISTINCT rs.name AS related_skill
-            LIMIT 10
-            """
-            precise_rows, rel_rows = await asyncio.gather(
-                _neo4j_query(precise_cypher, {
+            if _skill_index is not None:
+                async def _match_index():
+                    return _skill_index.match(request.user_skills, request.city, rec_limit)
+                precise_query = _match_index()
+            else:
+                precise_query = _neo4j_query(queries.RECOMMEND_PRECISE, {
                     "user_skills": request.user_skills,
                     "city": request.city,
                     "top_k": rec_limit,
-                }),
-                _neo4j_query(expand_cypher, {"user_skills": request.user_skills}),
+                })
+            precise_rows, rel_rows = await asyncio.gather(
+                precise_query,
+                _neo4j_query(queries.RECOMMEND_RELATED_SKILLS, {"user_skills": request.user_skills}, cache=True),
                 return_exceptions=True,
             )
             if isinstance(precise_rows, Exception):
@@ -1043,12 +1292,8 @@ async def graph_recommend(request: GraphRecommendRequest):
                 rel_rows = []
 
             for r in precise_rows:
-                precise_jobs.append({
+                precise_hits.append({
                     "job_id": r["job_id"],
-                    "title": r["title"],
-                    "city": r["city"],
-                    "company": r["company"],
-                    "salary_range": f"{r['salary_min'] or 0}-{r['salary_max'] or 0}K",
                     "matched_skills": r["matched_skills"],
                     "match_count": r["match_count"],
                     "total_skills": r["total_skills"],
@@ -1057,46 +1302,29 @@ async def graph_recommend(request: GraphRecommendRequest):
 
             related_skills = [r["related_skill"] for r in rel_rows]
 
-            if related_skills:
-                cypher_expanded = """
-                MATCH (j:Job)-[:REQUIRES]->(s:Skill)
-                WHERE s.name IN $related_skills
-                  AND ($city IS NULL OR j.city = $city)
-                WITH j,
-                     collect(DISTINCT s.name) AS expansion_skills,
-                     count(DISTINCT s)        AS exp_count
-                ORDER BY exp_count DESC
-                LIMIT $top_k
-                OPTIONAL MATCH (j)-[:POSTED_BY]->(c:Company)
-                RETURN j.job_id     AS job_id,
-                       j.title      AS title,
-                       j.city       AS city,
-                       coalesce(c.name, '') AS company,
-                       j.salary_min AS salary_min,
-                       j.salary_max AS salary_max,
-                       expansion_skills,
-                       exp_count
-                """
-                exp_rows = await _neo4j_query(cypher_expanded, {
+            exp_rows = []
+            if related_skills and _skill_index is not None:
+                exp_rows = [
+                    {"job_id": r["job_id"], "expansion_skills": r["matched_skills"], "exp_count": r["match_count"]}
+                    for r in _skill_index.match(related_skills, request.city, rec_limit)
+                ]
+            elif related_skills:
+                exp_rows = await _neo4j_query(queries.RECOMMEND_EXPANDED, {
                     "related_skills": related_skills,
                     "city": request.city,
                     "top_k": rec_limit,
                 })
-                for r in exp_rows:
-                    expanded_jobs.append({
-                        "job_id": r["job_id"],
-                        "title": r["title"],
-                        "city": r["city"],
-                        "company": r["company"],
-                        "salary_range": f"{r['salary_min'] or 0}-{r['salary_max'] or 0}K",
-                        "matched_skills": r["expansion_skills"],
-                        "match_count": r["exp_count"],
-                        "match_type": "expanded",
-                    })
+            for r in exp_rows:
+                expanded_hits.append({
+                    "job_id": r["job_id"],
+                    "matched_skills": r["expansion_skills"],
+                    "match_count": r["exp_count"],
+                    "match_type": "expanded",
+                })
 
         # 向量兜底
         vector_jobs = []
-        if rag_service and not precise_jobs:
+        if rag_service and not precise_hits:
             filters = {"city": request.city} if request.city else None
             v_result = rag_service.recommend_jobs(
                 user_skills=request.user_skills,
@@ -1105,179 +1333,280 @@ async def graph_recommend(request: GraphRecommendRequest):
             )
             for j in v_result.get("retrieved_jobs", []):
                 j["match_type"] = "vector"
+                j["source"] = "vector"
                 vector_jobs.append(j)
 
         # 合并：精准 > 扩展 > 向量
         seen_ids: set = set()
         merged: List[Dict] = []
-        for j in precise_jobs + expanded_jobs + vector_jobs:
+        for j in precise_hits + expanded_hits + vector_jobs:
             if j["job_id"] not in seen_ids:
                 merged.append(j)
                 seen_ids.add(j["job_id"])
 
         # top_k 为 None 时 list[:None] 等于 list[:]（全量），不会截断
         merge_limit = min(request.top_k, 500) if request.top_k else 500
-        merged = merged[:merge_limit]
-
-        result = {
-            "success": True,
-            "data": {
-                "jobs": merged,
-                "count": len(merged),
-                "precise_count": len(precise_jobs),
-                "expanded_count": len(expanded_jobs),
-                "related_skills": related_skills,
-            },
+        ranked = {
+            "hits": merged[:merge_limit],
+            "precise_count": len(precise_hits),
+            "expanded_count": len(expanded_hits),
+            "related_skills": related_skills,
         }
-        cache_set(cache_key, result, ttl=180)   # 推荐结果缓存 3 分钟
-        return result
+        cache_set(key, ranked, ttl=1800)
+        return ranked
+
+    return key, await _single_flight.do(key, _compute)
+
+
+@app.post("/api/recommend")
+async def graph_recommend(request: GraphRecommendRequest, http_request: Request):
+    """
+    智能岗位推荐（Cypher 精准匹配 + 语义扩展）
+
+    流程：
+    1. Cypher 精准匹配：查找需要用户技能最多的岗位
+    2. 图谱扩展：通过 RELATED_TO 关系找关联技能，扩大推荐范围
+    3. 降级：Neo4j 不可用时退回向量推荐
+
+    传入 page_size / cursor / fields 时按页返回，否则一次性返回全部结果
+    """
+    if not rag_service and not neo4j_manager:
+        raise HTTPException(status_code=503, detail="推荐服务不可用")
+
+    # 先规范化请求（技能去空白/去重/排序），让等价请求落到同一个 cache key 且计算结果一致
+    request.user_skills = canonical_skills(request.user_skills)
+
+    if _is_paged(request):
+        fields = _page_fields(request.fields, _RECOMMEND_FIELDS)
+        try:
+            ranked_key, ranked = await _recommend_ranked(request)
+            return await _paged_response(ranked_key, ranked, request, fields, {
+                "precise_count": ranked["precise_count"],
+                "expanded_count": ranked["expanded_count"],
+                "related_skills": ranked["related_skills"],
+            })
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"图谱推荐失败: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    cache_key = _ck("recommend", ",".join(request.user_skills), request.city, request.top_k)
+    async def _compute():
+        try:
+            _, ranked = await _recommend_ranked(request)
+            jobs = await _render_jobs(ranked["hits"], _RECOMMEND_FIELDS, project_vector=False)
+            result = {
+                "success": True,
+                "data": {
+                    "jobs": jobs,
+                    "count": len(jobs),
+                    "precise_count": ranked["precise_count"],
+                    "expanded_count": ranked["expanded_count"],
+                    "related_skills": ranked["related_skills"],
+                },
+            }
+            return cache_set(cache_key, result, ttl=1800)
+        except Exception as e:
+            logger.error(f"图谱推荐失败: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    return await _cached(cache_key, _compute, http_request)
+
+
+@app.get("/api/job/{job_id}")
+async def get_job(job_id: str, http_request: Request):
+    """岗位详情（含 JD 全文与全部技能），供列表页点开单个岗位时按需加载"""
+    if not neo4j_manager:
+        raise HTTPException(status_code=503, detail="Neo4j服务不可用")
+
+    cache_key = _ck("job", job_id)
+    async def _compute():
+        rows = await _neo4j_query(queries.JOB_DETAIL, {"job_id": job_id})
+        if not rows:
+            raise HTTPException(status_code=404, detail=f"岗位不存在: {job_id}")
+        job = rows[0]
+        job["salary_range"] = f"{job['salary_min'] or 0}-{job['salary_max'] or 0}K"
+        return cache_set(cache_key, {"success": True, "data": job}, ttl=1800)
+
+    return await _cached(cache_key, _compute, http_request)
+
+
+# 差距分析统计技能频次时取标题最相关的岗位数（足以稳定 top-20 技能排名）
+_GAP_TITLE_SAMPLE = 2000
+
+
+async def _match_position_profile(target_position: str, city: Optional[str]) -> Optional[dict]:
+    """目标岗位 -> 预计算的岗位画像（按城市；未导入画像或无匹配簇时返回 None）"""
+    key = normalize_position(target_position)
+    if not key:
+        return None
+    try:
+        rows = await _neo4j_query(MATCH_PROFILE_CYPHER, {"key": key, "city": city or ""}, cache=True)
     except Exception as e:
-        logger.error(f"图谱推荐失败: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.warning(f"岗位画像查询失败，改为实时聚合: {e}")
+        return None
+    return rows[0] if rows else None
+
+
+def _profile_summary(profile: dict) -> dict:
+    """画像中返回给前端的部分：簇名称、岗位数、技能频率与薪资分布"""
+    job_count = profile["job_count"] or 0
+    return {
+        "name": profile["name"],
+        "job_count": job_count,
+        "skill_frequency": [
+            {"skill": skill, "count": count, "ratio": round(count / job_count, 3) if job_count else 0.0}
+            for skill, count in zip(profile["skills"][:20], profile["skill_counts"][:20])
+        ],
+        "salary": {
+            "avg_min": profile["salary_avg_min"],
+            "avg_max": profile["salary_avg_max"],
+            "p25": profile["salary_p25"],
+            "p50": profile["salary_p50"],
+            "p75": profile["salary_p75"],
+        },
+    }
 
 
 @app.post("/api/gap-analysis")
-async def graph_gap_analysis(request: GraphGapAnalysisRequest):
+async def graph_gap_analysis(request: GraphGapAnalysisRequest, http_request: Request):
     """
     技能差距分析（图谱版）
 
     流程：
-    1. 从 Neo4j 中查找目标岗位所需的高频技能
+    1. 目标岗位映射到预计算的岗位画像，直接读取高频技能与样本岗位（无画像时再实时查询）
     2. 与用户技能对比，计算匹配率和缺失技能
     3. 通过图谱查询缺失技能的前置/关联技能，生成学习路径
     """
     if not neo4j_manager and not rag_service:
         raise HTTPException(status_code=503, detail="分析服务不可用")
 
-    user_key = ",".join(sorted(request.user_skills or []))
-    cache_key = f"gap:{request.target_position}:{user_key}"
-    cached = cache_get(cache_key)
-    if cached:
-        return cached
-
-    try:
-        required_skills: List[str] = []
-        sample_jobs: List[Dict] = []
-
-        if neo4j_manager:
-            # Step 1 & 2：高频技能 + 样本岗位 并发查询（独立查询，无依赖关系）
-            req_params = {"position": request.target_position, "city": request.city}
-            skill_rows, job_rows = await asyncio.gather(
-                _neo4j_query("""
-                    MATCH (j:Job)-[:REQUIRES]->(s:Skill)
-                    WHERE j.title CONTAINS $position
-                      AND ($city IS NULL OR j.city = $city)
-                    WITH s.name AS skill_name, count(j) AS freq
-                    ORDER BY freq DESC LIMIT 20
-                    RETURN skill_name, freq
-                """, req_params),
-                _neo4j_query("""
-                    MATCH (j:Job)
-                    WHERE j.title CONTAINS $position
-                      AND ($city IS NULL OR j.city = $city)
-                    OPTIONAL MATCH (j)-[:POSTED_BY]->(c:Company)
-                    RETURN j.job_id AS job_id, j.title AS title, j.city AS city,
-                           coalesce(c.name, '') AS company,
-                           j.salary_min AS salary_min, j.salary_max AS salary_max
-                    LIMIT 5
-                """, req_params),
-                return_exceptions=True,
-            )
-            if isinstance(skill_rows, Exception):
-                logger.warning(f"gap-analysis 技能查询失败: {skill_rows}")
-                skill_rows = []
-            if isinstance(job_rows, Exception):
-                logger.warning(f"gap-analysis 样本岗位查询失败: {job_rows}")
-                job_rows = []
-            required_skills = [r["skill_name"] for r in skill_rows]
-            sample_jobs = [{
-                "title": r["title"],
-                "city": r["city"],
-                "company": r["company"],
-                "salary_range": f"{r['salary_min'] or 0}-{r['salary_max'] or 0}K",
-            } for r in job_rows]
-
-        # 若图谱无数据，用向量搜索兜底
-        if not required_skills:
-            if rag_service:
-                v_result = rag_service.skill_gap_analysis(
-                    user_skills=request.user_skills,
-                    target_position=request.target_position,
-                    city=request.city,
+    request.user_skills = canonical_skills(request.user_skills)
+    request.target_position = canonical_text(request.target_position)
+    cache_key = _ck("gap", request.target_position, ",".join(request.user_skills), request.city)
+    async def _compute():
+        try:
+            required_skills: List[str] = []
+            sample_jobs: List[Dict] = []
+            profile = await _match_position_profile(request.target_position, request.city) if neo4j_manager else None
+
+            if profile:
+                # Step 1：命中岗位画像，技能频次 / 样本岗位均为导入时预计算，只需回填 5 个样本岗位
+                required_skills = profile["skills"][:20]
+                job_rows = await _hydrate_jobs(
+                    [{"job_id": job_id} for job_id in (profile["sample_job_ids"] or [])[:5]], extra_fields=False
                 )
-                return {"success": True, "data": v_result}
-            else:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"图谱中未找到与「{request.target_position}」相关的岗位，请尝试更通用的岗位名称",
+                sample_jobs = [{
+                    "title": r["title"],
+                    "city": r["city"],
+                    "company": r["company"],
+                    "salary_range": f"{r['salary_min'] or 0}-{r['salary_max'] or 0}K",
+                } for r in job_rows]
+            elif neo4j_manager:
+                # Step 1a：全文索引取标题最相关的岗位 id（不再对全部 Job 做 CONTAINS 扫描）
+                try:
+                    hits = await title_search.search([request.target_position], request.city, _GAP_TITLE_SAMPLE)
+                except Exception as e:
+                    logger.warning(f"gap-analysis 职位名称搜索失败: {e}")
+                    hits = []
+                job_ids = [h["job_id"] for h in hits]
+                # Step 1b：高频技能 + 样本岗位 并发查询（独立查询，无依赖关系）
+                skill_rows, job_rows = await asyncio.gather(
+                    _neo4j_query(queries.GAP_SKILL_FREQUENCY, {"ids": job_ids, "limit": 20}),
+                    _hydrate_jobs(hits[:5], extra_fields=False),
+                    return_exceptions=True,
                 )
+                if isinstance(skill_rows, Exception):
+                    logger.warning(f"gap-analysis 技能查询失败: {skill_rows}")
+                    skill_rows = []
+                if isinstance(job_rows, Exception):
+                    logger.warning(f"gap-analysis 样本岗位查询失败: {job_rows}")
+                    job_rows = []
+                required_skills = [r["skill_name"] for r in skill_rows]
+                sample_jobs = [{
+                    "title": r["title"],
+                    "city": r["city"],
+                    "company": r["company"],
+                    "salary_range": f"{r['salary_min'] or 0}-{r['salary_max'] or 0}K",
+                } for r in job_rows]
 
-        # Step 2：计算匹配 / 缺失技能
-        user_set = set(request.user_skills)
-        required_set = set(required_skills)
-        matched_skills = sorted(user_set & required_set)
-        missing_skills = sorted(required_set - user_set)
-        match_rate = round(len(matched_skills) / len(required_set), 3) if required_set else 0.0
-
-        # Step 3：为缺失技能查找学习路径（前置 / 关联技能）
-        learning_path: List[Dict] = []
-        if neo4j_manager and missing_skills:
-            top_missing = missing_skills[:10]
-            # OPTIONAL MATCH 确保没有 RELATED_TO 的技能也会出现在结果中
-            cypher_path = """
-            UNWIND $missing AS miss_name
-            MATCH (ms:Skill {name: miss_name})
-            OPTIONAL MATCH (ms)-[:RELATED_TO]-(pre:Skill)
-            RETURN miss_name,
-                   collect(DISTINCT pre.name) AS prerequisites
-            """
-            path_rows = await _neo4j_query(cypher_path, {"missing": top_missing})
-            covered = set()
-            for r in path_rows:
-                prereqs = [p for p in r.get("prerequisites", []) if p]
-                owned = [p for p in prereqs if p in user_set]
-                needed = [p for p in prereqs if p not in user_set]
-                learning_path.append({
-                    "skill": r["miss_name"],
-                    "owned_prerequisites": owned,
-                    "needed_prerequisites": needed,
-                    "ready_to_learn": len(needed) == 0,
-                })
-                covered.add(r["miss_name"])
-            # 补充在图谱中找不到节点的技能（直接可学习）
-            for skill in top_missing:
-                if skill not in covered:
+            # 若图谱无数据，用向量搜索兜底
+            if not required_skills:
+                if rag_service:
+                    v_result = rag_service.skill_gap_analysis(
+                        user_skills=request.user_skills,
+                        target_position=request.target_position,
+                        city=request.city,
+                    )
+                    return {"success": True, "data": v_result}
+                else:
+                    raise HTTPException(
+                        status_code=404,
+                        detail=f"图谱中未找到与「{request.target_position}」相关的岗位，请尝试更通用的岗位名称",
+                    )
+
+            # Step 2：计算匹配 / 缺失技能
+            user_set = set(request.user_skills)
+            required_set = set(required_skills)
+            matched_skills = sorted(user_set & required_set)
+            missing_skills = sorted(required_set - user_set)
+            match_rate = round(len(matched_skills) / len(required_set), 3) if required_set else 0.0
+
+            # Step 3：为缺失技能查找学习路径（前置 / 关联技能）
+            learning_path: List[Dict] = []
+            if neo4j_manager and missing_skills:
+                top_missing = missing_skills[:10]
+                # OPTIONAL MATCH 确保没有 RELATED_TO 的技能也会出现在结果中
+                path_rows = await _neo4j_query(queries.GAP_LEARNING_PATH, {"missing": top_missing}, cache=True)
+                covered = set()
+                for r in path_rows:
+                    prereqs = [p for p in r.get("prerequisites", []) if p]
+                    owned = [p for p in prereqs if p in user_set]
+                    needed = [p for p in prereqs if p not in user_set]
                     learning_path.append({
-                        "skill": skill,
-                        "owned_prerequisites": [],
-                        "needed_prerequisites": [],
-                        "ready_to_learn": True,
+                        "skill": r["miss_name"],
+                        "owned_prerequisites": owned,
+                        "needed_prerequisites": needed,
+                        "ready_to_learn": len(needed) == 0,
                     })
-            # 优先展示"可直接学习"的技能
-            learning_path.sort(key=lambda x: (not x["ready_to_learn"]))
+                    covered.add(r["miss_name"])
+                # 补充在图谱中找不到节点的技能（直接可学习）
+                for skill in top_missing:
+                    if skill not in covered:
+                        learning_path.append({
+                            "skill": skill,
+                            "owned_prerequisites": [],
+                            "needed_prerequisites": [],
+                            "ready_to_learn": True,
+                        })
+                # 优先展示"可直接学习"的技能
+                learning_path.sort(key=lambda x: (not x["ready_to_learn"]))
+
+            result = {
+                "success": True,
+                "data": {
+                    "target_position": request.target_position,
+                    "user_skills": request.user_skills,
+                    "required_skills": required_skills,
+                    "matched_skills": matched_skills,
+                    "missing_skills": missing_skills,
+                    "match_rate": match_rate,
+                    "learning_path": learning_path,
+                    "sample_jobs": sample_jobs,
+                    "position_profile": _profile_summary(profile) if profile else None,
+                },
+            }
+            return cache_set(cache_key, result, ttl=1800)
+        except Exception as e:
+            logger.error(f"图谱差距分析失败: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
 
-        result = {
-            "success": True,
-            "data": {
-                "target_position": request.target_position,
-                "user_skills": request.user_skills,
-                "required_skills": required_skills,
-                "matched_skills": matched_skills,
-                "missing_skills": missing_skills,
-                "match_rate": match_rate,
-                "learning_path": learning_path,
-                "sample_jobs": sample_jobs,
-            },
-        }
-        cache_set(cache_key, result, ttl=300)   # 差距分析缓存 5 分钟
-        return result
-    except Exception as e:
-        logger.error(f"图谱差距分析失败: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _cached(cache_key, _compute, http_request)
 
 
 @app.get("/api/trend")
-async def market_trend():
+async def market_trend(http_request: Request):
     """
     市场趋势分析
 
@@ -1289,94 +1618,24 @@ async def market_trend():
     """
     if not neo4j_manager:
         raise HTTPException(status_code=503, detail="Neo4j服务不可用，趋势分析需要图谱数据")
-
-    cached = cache_get("trend")
-    if cached:
-        return cached
-
-    try:
-        # 5 个子查询并发执行，时间取决于最慢的那个而非 5 个之和
-        hot_rows, cat_rows, combo_rows, salary_rows, city_rows = await asyncio.gather(
-            _neo4j_query("""
-                MATCH (s:Skill) WHERE s.demand_count > 0
-                RETURN s.name AS skill, s.category AS category,
-                       s.demand_count AS demand_count, s.hot_score AS hot_score
-                ORDER BY s.demand_count DESC LIMIT 100
-            """),
-            _neo4j_query("""
-                MATCH (s:Skill) WHERE s.demand_count > 0 AND s.category IS NOT NULL
-                RETURN s.category AS category, count(s) AS skill_count,
-                       sum(s.demand_count) AS total_demand
-                ORDER BY total_demand DESC
-            """),
-            _neo4j_query("""
-                MATCH (j:Job)-[:REQUIRES]->(s1:Skill),(j)-[:REQUIRES]->(s2:Skill)
-                WHERE s1.name < s2.name AND s1.demand_count > 100 AND s2.demand_count > 100
-                WITH s1.name AS skill1, s2.name AS skill2, count(j) AS co_count
-                ORDER BY co_count DESC LIMIT 10
-                RETURN skill1, skill2, co_count
-            """),
-            _neo4j_query("""
-                MATCH (j:Job)-[:REQUIRES]->(s:Skill)
-                WHERE j.salary_min > 0 AND j.salary_min < 200
-                WITH s.name AS skill, avg(j.salary_min) AS avg_sal, count(j) AS job_count
-                WHERE job_count >= 3
-                RETURN skill, avg_sal, job_count ORDER BY avg_sal DESC LIMIT 100
-            """),
-            _neo4j_query("""
-                MATCH (j:Job)
-                WHERE j.city IS NOT NULL AND j.city <> ''
-                WITH j.city AS city, count(j) AS job_count
-                ORDER BY job_count DESC LIMIT 15
-                RETURN city, job_count
-            """),
-        )
-        result = {
-            "success": True,
-            "data": {
-                "hot_skills":            [dict(r) for r in hot_rows],
-                "category_distribution": [dict(r) for r in cat_rows],
-                "skill_combos":          [dict(r) for r in combo_rows],
-                "high_salary_skills": [
-                    {"skill": r["skill"], "avg_salary_k": round(r["avg_sal"] or 0, 1), "job_count": r["job_count"]}
-                    for r in salary_rows
-                ],
-                "city_distribution": [
-                    {"city": r["city"], "job_count": r["job_count"]}
-                    for r in city_rows
-                ],
-            },
-        }
-        cache_set("trend", result, ttl=600)
-        return result
-    except Exception as e:
-        logger.error(f"趋势分析失败: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _view_response("trend", http_request)
 
 
 @app.get("/api/graph/categories")
-async def get_skill_categories():
+async def get_skill_categories(http_request: Request):
     """查询 Neo4j 中所有 Skill 节点实际存在的 category 值"""
     if not neo4j_manager:
         raise HTTPException(status_code=503, detail="Neo4j服务不可用")
-    cached = cache_get("graph_categories")
-    if cached:
-        return cached
-    rows = await _neo4j_query(
-        "MATCH (s:Skill) WHERE s.category IS NOT NULL "
-        "RETURN DISTINCT s.category AS category, count(s) AS cnt "
-        "ORDER BY cnt DESC"
-    )
-    result = {"success": True, "data": [dict(r) for r in rows]}
-    cache_set("graph_categories", result, ttl=3600)  # 分类几乎不变，缓存 1 小时
-    return result
+    return await _view_response("graph_categories", http_request)
 
 
 @app.get("/api/graph")
 async def get_skill_graph(
+    http_request: Request,
     limit: int = Query(default=100, ge=1, le=500, description="返回技能节点数量上限"),
     min_demand: int = Query(default=5, ge=0, description="最低岗位需求数过滤"),
     edge_limit: int = Query(default=200, ge=0, le=5000, description="返回关系边数量上限，0表示不返回边"),
+    city: Optional[str] = Query(default=None, description="按城市统计技能共现边，不填为全国"),
 ):
     """
     技能知识图谱可视化专用接口
@@ -1388,57 +1647,19 @@ async def get_skill_graph(
     if not neo4j_manager:
         raise HTTPException(status_code=503, detail="Neo4j服务不可用")
 
-    cache_key = f"graph:{limit}:{min_demand}:{edge_limit}"
-    cached = cache_get(cache_key)
-    if cached:
-        return cached
+    if (limit, min_demand, edge_limit) == _GRAPH_DEFAULTS and not city:
+        return await _view_response("graph", http_request)
 
-    try:
-        # 节点与边查询并发：边查询直接用 demand_count 过滤，无需先等节点结果
-        node_rows, edge_rows = await asyncio.gather(
-            _neo4j_query("""
-                MATCH (s:Skill)
-                WHERE coalesce(s.demand_count, 0) >= $min_demand
-                RETURN s.name AS skill, s.category AS category,
-                       coalesce(s.demand_count, 0) AS demand_count,
-                       coalesce(s.hot_score, 0)    AS hot_score,
-                       coalesce(s.avg_salary, 0)   AS avg_salary
-                ORDER BY demand_count DESC LIMIT $limit
-            """, {"min_demand": min_demand, "limit": limit}),
-            _neo4j_query("""
-                MATCH (j:Job)-[:REQUIRES]->(s1:Skill),(j)-[:REQUIRES]->(s2:Skill)
-                WHERE s1.name < s2.name
-                  AND coalesce(s1.demand_count, 0) >= $min_demand
-                  AND coalesce(s2.demand_count, 0) >= $min_demand
-                WITH s1.name AS skill1, s2.name AS skill2, count(j) AS co_count
-                WHERE co_count >= 1
-                RETURN skill1, skill2, co_count
-                ORDER BY co_count DESC LIMIT $edge_limit
-            """, {"min_demand": min_demand, "edge_limit": edge_limit}),
-            return_exceptions=True,
-        )
-        if isinstance(node_rows, Exception):
-            raise node_rows  # 节点查询失败直接上报
-        if isinstance(edge_rows, Exception):
-            logger.warning(f"图谱边查询失败（节点仍返回）: {edge_rows}")
-            edge_rows = []
-        node_list = [dict(r) for r in node_rows]
-        edge_list = [dict(r) for r in edge_rows]
-
-        result = {
-            "success": True,
-            "data": {
-                "nodes": node_list,
-                "edges": edge_list,
-                "node_count": len(node_list),
-                "edge_count": len(edge_list),
-            },
-        }
-        cache_set(cache_key, result, ttl=600)
-        return result
-    except Exception as e:
-        logger.error(f"技能图谱查询失败: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    cache_key = _ck("graph", limit, min_demand, edge_limit, city or "")
+    async def _compute():
+        try:
+            result = await _query_skill_graph(limit, min_demand, edge_limit, city)
+            return cache_set(cache_key, result, ttl=1800, stale_ttl=_STALE_TTL)
+        except Exception as e:
+            logger.error(f"技能图谱查询失败: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+
+    return await _cached(cache_key, _compute, http_request)
 
 
 # ===== 启动脚本 =====
@@ -0,0 +1,53 @@
+"""
+排序结果分页游标
+游标 = 排序结果缓存 key 的摘要 + 偏移量（base64）。缓存 key 带数据版本（namespace:g<generation>:...），
+数据更新或查询条件变化后 key 不同，旧游标随之失效，不会在新结果上翻到错位的页
+"""
+import base64
+import hashlib
+import json
+from typing import List, Optional, Sequence, Tuple
+
+
+class CursorError(ValueError):
+    """游标无法解析或已失效；stale 为 True 表示格式正确但对应的排序结果已变化"""
+
+    def __init__(self, message: str, stale: bool = False):
+        super().__init__(message)
+        self.stale = stale
+
+
+def _digest(ranked_key: str) -> str:
+    return hashlib.sha1(ranked_key.encode("utf-8")).hexdigest()[:12]
+
+
+def encode_cursor(ranked_key: str, offset: int) -> str:
+    raw = json.dumps({"k": _digest(ranked_key), "o": offset}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, ranked_key: str) -> int:
+    """游标 -> 偏移量；格式无效或与当前排序结果不对应时抛出 CursorError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        offset = int(data["o"])
+    except (ValueError, KeyError, TypeError):
+        raise CursorError("cursor 格式无效")
+    if data.get("k") != _digest(ranked_key) or offset < 0:
+        raise CursorError("cursor 已失效（查询条件变化或数据已更新），请重新搜索", stale=True)
+    return offset
+
+
+def paginate(hits: Sequence, ranked_key: str, cursor: Optional[str],
+             page_size: int) -> Tuple[List, Optional[str]]:
+    """
+    按游标截取一页排序结果
+
+    Returns:
+        (本页命中, 下一页游标)；已是最后一页时游标为 None
+    """
+    offset = decode_cursor(cursor, ranked_key) if cursor else 0
+    page = list(hits[offset:offset + page_size])
+    next_offset = offset + len(page)
+    return page, encode_cursor(ranked_key, next_offset) if next_offset < len(hits) else None
@@ -0,0 +1,273 @@
+"""
+API 与 Agent 请求路径上的 Cypher 模板
+集中声明并登记到 cypher_registry，scripts/profile_cypher.py 据此做 PROFILE 回归检查；
+expect 中的 "Label(prop)" 表示执行计划必须走该属性上的索引。
+"""
+from src.utils.cypher_registry import register_cypher
+
+# API 启动时确认的索引（与导入器 create_indexes 中的同名索引一致）
+API_INDEXES = [
+    # Skill.name 点查/IN 查询索引（技能搜索核心路径）
+    ("CREATE INDEX skill_name_idx IF NOT EXISTS FOR (s:Skill) ON (s.name)", "Skill.name"),
+    # Skill.demand_count 范围查询索引（trend/graph 过滤）
+    ("CREATE INDEX skill_demand_idx IF NOT EXISTS FOR (s:Skill) ON (s.demand_count)", "Skill.demand_count"),
+    # Job.city 城市筛选索引
+    ("CREATE INDEX job_city_idx IF NOT EXISTS FOR (j:Job) ON (j.city)", "Job.city"),
+    # 预计算技能共现边的权重索引（graph 边 / trend 技能组合按 count 取 top-N）
+    ("CREATE INDEX co_occurs_count_idx IF NOT EXISTS FOR ()-[r:CO_OCCURS]-() ON (r.count)", "CO_OCCURS.count"),
+    ("CREATE INDEX co_occurs_in_city_idx IF NOT EXISTS FOR ()-[r:CO_OCCURS_IN]-() ON (r.city, r.count)", "CO_OCCURS_IN.city"),
+    # 岗位画像（差距分析按城市 + 簇 key 查询）
+    ("CREATE INDEX position_profile_idx IF NOT EXISTS FOR (p:PositionProfile) ON (p.city, p.key)", "PositionProfile"),
+]
+
+# ===== 岗位列回填 =====
+
+# 岗位列 -> Cypher 表达式：详情按需投影，列表页不必取 jd_text
+JOB_COLUMNS = {
+    "title":        "j.title",
+    "city":         "j.city",
+    "company":      "coalesce(c.name, '')",
+    "salary_min":   "coalesce(j.salary_min, 0)",
+    "salary_max":   "coalesce(j.salary_max, 0)",
+    "experience":   "coalesce(j.experience, '')",
+    "education":    "coalesce(j.education, '')",
+    "jd_text":      "coalesce(j.jd_text, '')",
+    "publish_date": "coalesce(j.publish_date, '')",
+}
+
+
+def job_columns_cypher(columns) -> str:
+    """按 job_id 批量读取指定列的语句（只在需要 company 时才展开 POSTED_BY）"""
+    projections = "".join(f", {JOB_COLUMNS[c]} AS {c}" for c in JOB_COLUMNS if c in columns)
+    company = "OPTIONAL MATCH (j)-[:POSTED_BY]->(c:Company)" if "company" in columns else ""
+    return f"""
+        MATCH (j:Job) WHERE j.job_id IN $ids
+        {company}
+        RETURN j.job_id AS job_id{projections}
+    """
+
+
+register_cypher("hydrate_jobs", job_columns_cypher(JOB_COLUMNS),
+                {"ids": "@job_ids"}, expect=["Job(job_id)"], module=__name__)
+
+JOB_DETAIL = register_cypher("job_detail", """
+    MATCH (j:Job {job_id: $job_id})
+    OPTIONAL MATCH (j)-[:POSTED_BY]->(c:Company)
+    OPTIONAL MATCH (j)-[:REQUIRES]->(s:Skill)
+    RETURN j.job_id AS job_id, j.title AS title, j.city AS city,
+           coalesce(c.name, '') AS company,
+           coalesce(j.salary_min, 0) AS salary_min,
+           coalesce(j.salary_max, 0) AS salary_max,
+           coalesce(j.experience, '') AS experience,
+           coalesce(j.education, '') AS education,
+           coalesce(j.jd_text, '') AS jd_text,
+           coalesce(j.publish_date, '') AS publish_date,
+           collect(DISTINCT s.name) AS skills
+""", {"job_id": "@job_id"}, expect=["Job(job_id)"], module=__name__)
+
+JOB_SKILLS = register_cypher("job_skills", """
+    MATCH (j:Job)-[:REQUIRES]->(s:Skill) WHERE j.job_id IN $ids
+    RETURN j.job_id AS job_id, collect(DISTINCT s.name) AS skills
+""", {"ids": "@job_ids"}, expect=["Job(job_id)"], module=__name__)
+
+# ===== 搜索 / 推荐 =====
+
+SEARCH_BY_SKILLS = register_cypher("search_by_skills", """
+    MATCH (j:Job)-[:REQUIRES]->(s:Skill)
+    WHERE s.name IN $skill_names
+      AND ($city IS NULL OR j.city = $city)
+    WITH j,
+         collect(DISTINCT s.name) AS matched_skills,
+         count(DISTINCT s)        AS match_count
+    ORDER BY match_count DESC, j.salary_max DESC
+    LIMIT $limit_val
+    MATCH (j)-[:REQUIRES]->(all_s:Skill)
+    WITH j, matched_skills, match_count,
+         count(DISTINCT all_s) AS total_skills
+    RETURN j.job_id AS job_id, matched_skills, match_count, total_skills
+""", {"skill_names": "@skills", "city": None, "limit_val": 100}, expect=["Skill(name)"], module=__name__)
+
+RECOMMEND_PRECISE = register_cypher("recommend_precise", """
+    MATCH (j:Job)-[:REQUIRES]->(s:Skill)
+    WHERE s.name IN $user_skills
+      AND ($city IS NULL OR j.city = $city)
+    WITH j,
+         collect(DISTINCT s.name) AS matched_skills,
+         count(DISTINCT s)        AS match_count
+    ORDER BY match_count DESC
+    LIMIT $top_k
+    MATCH (j)-[:REQUIRES]->(all_s:Skill)
+    WITH j, matched_skills, match_count,
+         count(DISTINCT all_s) AS total_skills
+    RETURN j.job_id AS job_id, matched_skills, match_count, total_skills
+""", {"user_skills": "@skills", "city": "@city", "top_k": 100}, expect=["Skill(name)"], module=__name__)
+
+RECOMMEND_RELATED_SKILLS = register_cypher("recommend_related_skills", """
+    MATCH (us:Skill)-[:RELATED_TO]-(rs:Skill)
+    WHERE us.name IN $user_skills
+      AND NOT rs.name IN $user_skills
+    RETURN DISTINCT rs.name AS related_skill
+    LIMIT 10
+""", {"user_skills": "@skills"}, expect=["Skill(name)"], module=__name__)
+
+RECOMMEND_EXPANDED = register_cypher("recommend_expanded", """
+    MATCH (j:Job)-[:REQUIRES]->(s:Skill)
+    WHERE s.name IN $related_skills
+      AND ($city IS NULL OR j.city = $city)
+    WITH j,
+         collect(DISTINCT s.name) AS expansion_skills,
+         count(DISTINCT s)        AS exp_count
+    ORDER BY exp_count DESC
+    LIMIT $top_k
+    RETURN j.job_id AS job_id, expansion_skills, exp_count
+""", {"related_skills": "@skills", "city": None, "top_k": 100}, expect=["Skill(name)"], module=__name__)
+
+# ===== 差距分析 =====
+
+GAP_SKILL_FREQUENCY = register_cypher("gap_skill_frequency", """
+    MATCH (j:Job)-[:REQUIRES]->(s:Skill)
+    WHERE j.job_id IN $ids
+    WITH s.name AS skill_name, count(j) AS freq
+    ORDER BY freq DESC LIMIT $limit
+    RETURN skill_name, freq
+""", {"ids": "@job_ids", "limit": 20}, expect=["Job(job_id)"], module=__name__)
+
+GAP_LEARNING_PATH = register_cypher("gap_learning_path", """
+    UNWIND $missing AS miss_name
+    MATCH (ms:Skill {name: miss_name})
+    OPTIONAL MATCH (ms)-[:RELATED_TO]-(pre:Skill)
+    RETURN miss_name,
+           collect(DISTINCT pre.name) AS prerequisites
+""", {"missing": "@skills"}, expect=["Skill(name)"], module=__name__)
+
+# ===== 趋势 / 图谱（物化视图）=====
+
+TREND_HOT_SKILLS = register_cypher("trend_hot_skills", """
+    MATCH (s:Skill) WHERE s.demand_count > 0
+    RETURN s.name AS skill, s.category AS category,
+           s.demand_count AS demand_count, s.hot_score AS hot_score
+    ORDER BY s.demand_count DESC LIMIT 100
+""", expect=["Skill(demand_count)"], module=__name__)
+
+TREND_CATEGORIES = register_cypher("trend_categories", """
+    MATCH (s:Skill) WHERE s.demand_count > 0 AND s.category IS NOT NULL
+    RETURN s.category AS category, count(s) AS skill_count,
+           sum(s.demand_count) AS total_demand
+    ORDER BY total_demand DESC
+""", module=__name__)
+
+TREND_HIGH_SALARY = register_cypher("trend_high_salary", """
+    MATCH (j:Job)-[:REQUIRES]->(s:Skill)
+    WHERE j.salary_min > 0 AND j.salary_min < 200
+    WITH s.name AS skill, avg(j.salary_min) AS avg_sal, count(j) AS job_count
+    WHERE job_count >= 3
+    RETURN skill, avg_sal, job_count ORDER BY avg_sal DESC LIMIT 100
+""", module=__name__)
+
+TREND_CITY_DISTRIBUTION = register_cypher("trend_city_distribution", """
+    MATCH (j:Job)
+    WHERE j.city IS NOT NULL AND j.city <> ''
+    WITH j.city AS city, count(j) AS job_count
+    ORDER BY job_count DESC LIMIT 15
+    RETURN city, job_count
+""", expect=["Job(city)"], module=__name__)
+
+SKILL_CATEGORIES = register_cypher("skill_categories", """
+    MATCH (s:Skill) WHERE s.category IS NOT NULL
+    RETURN DISTINCT s.category AS category, count(s) AS cnt
+    ORDER BY cnt DESC
+""", module=__name__)
+
+TOP_SKILL_PAIRS = register_cypher("top_skill_pairs", """
+    MATCH (s1:Skill)-[r:CO_OCCURS]->(s2:Skill)
+    WHERE coalesce(s1.demand_count, 0) >= $min_demand
+      AND coalesce(s2.demand_count, 0) >= $min_demand
+    RETURN s1.name AS skill1, s2.name AS skill2, r.count AS co_count
+    ORDER BY r.count DESC LIMIT $limit
+""", {"min_demand": 5, "limit": 200}, module=__name__)
+
+TOP_SKILL_PAIRS_IN_CITY = register_cypher("top_skill_pairs_in_city", """
+    MATCH (s1:Skill)-[r:CO_OCCURS_IN]->(s2:Skill)
+    WHERE r.city = $city
+      AND coalesce(s1.demand_count, 0) >= $min_demand
+      AND coalesce(s2.demand_count, 0) >= $min_demand
+    RETURN s1.name AS skill1, s2.name AS skill2, r.count AS co_count
+    ORDER BY r.count DESC LIMIT $limit
+""", {"city": "@city", "min_demand": 5, "limit": 200}, expect=["CO_OCCURS_IN(city"], module=__name__)
+
+# 未预计算共现边时的实时兜底（两两展开，开销大，不在常规路径上）
+TOP_SKILL_PAIRS_RUNTIME = register_cypher("top_skill_pairs_runtime", """
+    MATCH (j:Job)-[:REQUIRES]->(s1:Skill),(j)-[:REQUIRES]->(s2:Skill)
+    WHERE s1.name < s2.name
+      AND ($city IS NULL OR j.city = $city)
+      AND coalesce(s1.demand_count, 0) >= $min_demand
+      AND coalesce(s2.demand_count, 0) >= $min_demand
+    WITH s1.name AS skill1, s2.name AS skill2, count(j) AS co_count
+    RETURN skill1, skill2, co_count
+    ORDER BY co_count DESC LIMIT $limit
+""", {"city": "@city", "min_demand": 5, "limit": 10}, module=__name__)
+
+GRAPH_NODES = register_cypher("graph_nodes", """
+    MATCH (s:Skill)
+    WHERE coalesce(s.demand_count, 0) >= $min_demand
+    RETURN s.name AS skill, s.category AS category,
+           coalesce(s.demand_count, 0) AS demand_count,
+           coalesce(s.hot_score, 0)    AS hot_score,
+           coalesce(s.avg_salary, 0)   AS avg_salary
+    ORDER BY demand_count DESC LIMIT $limit
+""", {"min_demand": 5, "limit": 100}, module=__name__)
+
+# ===== Agent 工具 =====
+
+AGENT_SEARCH_BY_SKILLS = register_cypher("agent_search_by_skills", """
+    MATCH (j:Job)-[:REQUIRES]->(s:Skill)
+    WHERE s.name IN $skills AND ($city IS NULL OR j.city = $city)
+    WITH j, collect(DISTINCT s.name) AS ms, count(DISTINCT s) AS cnt
+    ORDER BY cnt DESC LIMIT 8
+    OPTIONAL MATCH (j)-[:POSTED_BY]->(c:Company)
+    RETURN j.title AS title, coalesce(c.name,'') AS company,
+           j.city AS city,
+           coalesce(j.salary_min,0) AS smin,
+           coalesce(j.salary_max,0) AS smax,
+           coalesce(j.experience,'') AS exp,
+           ms AS matched_skills, cnt
+""", {"skills": "@skills", "city": None}, expect=["Skill(name)"], module=__name__)
+
+AGENT_JOBS_BY_IDS = register_cypher("agent_jobs_by_ids", """
+    MATCH (j:Job) WHERE j.job_id IN $ids
+    OPTIONAL MATCH (j)-[:POSTED_BY]->(c:Company)
+    OPTIONAL MATCH (j)-[:REQUIRES]->(s:Skill)
+    RETURN j.job_id AS job_id, j.title AS title, coalesce(c.name,'') AS company,
+           j.city AS city,
+           coalesce(j.salary_min,0) AS smin,
+           coalesce(j.salary_max,0) AS smax,
+           coalesce(j.experience,'') AS exp,
+           collect(DISTINCT s.name) AS matched_skills, 1 AS cnt
+""", {"ids": "@job_ids"}, expect=["Job(job_id)"], module=__name__)
+
+AGENT_RECOMMEND = register_cypher("agent_recommend", """
+    MATCH (j:Job)-[:REQUIRES]->(s:Skill)
+    WHERE s.name IN $skills AND ($city IS NULL OR j.city = $city)
+    WITH j, collect(DISTINCT s.name) AS matched, count(DISTINCT s) AS cnt
+    ORDER BY cnt DESC LIMIT 8
+    OPTIONAL MATCH (j)-[:POSTED_BY]->(c:Company)
+    RETURN j.title AS title, coalesce(c.name,'') AS company,
+           j.city AS city,
+           coalesce(j.salary_min,0) AS smin,
+           coalesce(j.salary_max,0) AS smax,
+           matched, cnt
+""", {"skills": "@skills", "city": None}, expect=["Skill(name)"], module=__name__)
+
+AGENT_SKILL_DETAIL = register_cypher("agent_skill_detail", """
+    MATCH (s:Skill {name: $skill_name})
+    OPTIONAL MATCH (s)-[r:RELATED_TO]-(related:Skill)
+    OPTIONAL MATCH (j:Job)-[:REQUIRES]->(s)
+    WITH s,
+         collect(DISTINCT {name: related.name, correlation: r.correlation})[0..5] AS related_skills,
+         count(DISTINCT j) AS job_count
+    RETURN s.name AS skill_name, s.hot_score AS hot_score,
+           s.category AS category, s.demand_count AS demand_count,
+           s.avg_salary_min AS avg_salary_min,
+           s.avg_salary_max AS avg_salary_max,
+           related_skills, job_count
+""", {"skill_name": "@skill"}, expect=["Skill(name)"], module=__name__)
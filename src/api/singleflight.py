@@ -0,0 +1,55 @@
+"""
+请求合并（single-flight）
+同一 key 的并发请求只执行一次查询，其余调用方等待同一个结果
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    按 key 合并进行中的异步调用
+
+    首个调用方创建任务执行查询，并发的重复调用方 await 同一个任务；
+    查询以独立 Task 运行并被 shield 保护，发起者断开连接不会连带取消其他等待者。
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._counters = {"leaders": 0, "coalesced": 0}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        执行 fn()，若同 key 已有进行中的调用则直接等待其结果
+
+        Args:
+            key: 合并键（与缓存 key 一致）
+            fn: 无参协程工厂，只有首个调用方的 fn 会被执行
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._on_done(k, t))
+            self._counters["leaders"] += 1
+        else:
+            self._counters["coalesced"] += 1
+            logger.debug(f"请求合并: {key}")
+        return await asyncio.shield(task)
+
+    def in_flight(self, key: str) -> bool:
+        """该 key 是否有进行中的调用"""
+        return key in self._inflight
+
+    def stats(self) -> Dict[str, int]:
+        return {**self._counters, "in_flight": len(self._inflight)}
+
+    def _on_done(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # 所有等待者都已断开时，异常也要被取走，避免 "exception was never retrieved" 警告
+        if not task.cancelled():
+            task.exception()
@@ -0,0 +1,144 @@
+"""
+技能 -> 岗位倒排索引（进程内）
+回答"哪些岗位要求这些技能最多（可按城市过滤）"：每个技能保存一个有序的岗位序号数组（int32），
+每个岗位保存城市编码、薪资上限和技能总数。查询时按技能累加命中计数、向量化过滤城市、
+argpartition 取 top-k，整个过程不访问 Neo4j，只在最后一页结果回填详情时才查库。
+"""
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.utils.cypher_registry import register_cypher
+
+logger = logging.getLogger(__name__)
+
+# 从 Neo4j 读取索引所需的最小字段（每个岗位一行）
+LOAD_CYPHER = register_cypher("skill_index_load", """
+MATCH (j:Job)
+OPTIONAL MATCH (j)-[:REQUIRES]->(s:Skill)
+RETURN j.job_id AS job_id, coalesce(j.city, '') AS city,
+       coalesce(j.salary_max, 0) AS salary_max, collect(s.name) AS skills
+""", module=__name__)
+
+
+class SkillJobIndex:
+    """技能倒排索引：技能名 -> 有序岗位序号数组"""
+
+    def __init__(self, job_ids: List[str], city_codes: np.ndarray, city_names: List[str],
+                 salary_max: np.ndarray, skill_counts: np.ndarray,
+                 postings: Dict[str, np.ndarray]):
+        self.job_ids = job_ids
+        self.city_codes = city_codes
+        self.city_lookup = {name: code for code, name in enumerate(city_names)}
+        self.skill_counts = skill_counts
+        self.postings = postings
+        # 排序键的次级部分：薪资上限在全体岗位中的名次（同命中数时薪资高者在前，与原 Cypher 排序一致）
+        self._salary_rank = np.empty(len(job_ids), dtype=np.int64)
+        self._salary_rank[np.argsort(salary_max, kind="stable")] = np.arange(len(job_ids))
+        self.built_at = time.time()
+
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple[str, str, Any, Sequence[str]]]) -> "SkillJobIndex":
+        """
+        由 (job_id, city, salary_max, skills) 记录构建索引
+
+        记录可以来自 Neo4j（LOAD_CYPHER）或清洗后的数据文件
+        """
+        job_ids: List[str] = []
+        cities: List[int] = []
+        salaries: List[float] = []
+        counts: List[int] = []
+        city_lookup: Dict[str, int] = {}
+        skill_lists: Dict[str, List[int]] = {}
+
+        for ordinal, (job_id, city, salary_max, skills) in enumerate(records):
+            job_ids.append(job_id)
+            cities.append(city_lookup.setdefault(city or '', len(city_lookup)))
+            salaries.append(float(salary_max or 0))
+            unique_skills = set(skills or ())
+            counts.append(len(unique_skills))
+            for skill in unique_skills:
+                skill_lists.setdefault(skill, []).append(ordinal)
+
+        # 序号按插入顺序递增，每个倒排表天然有序
+        postings = {skill: np.asarray(ords, dtype=np.int32) for skill, ords in skill_lists.items()}
+        city_names = sorted(city_lookup, key=city_lookup.get)
+        return cls(
+            job_ids=job_ids,
+            city_codes=np.asarray(cities, dtype=np.int32),
+            city_names=city_names,
+            salary_max=np.asarray(salaries, dtype=np.float64),
+            skill_counts=np.asarray(counts, dtype=np.int32),
+            postings=postings,
+        )
+
+    def __len__(self) -> int:
+        return len(self.job_ids)
+
+    def match(self, skills: Sequence[str], city: Optional[str] = None, k: int = 500) -> List[Dict[str, Any]]:
+        """
+        查找要求给定技能最多的岗位
+
+        Args:
+            skills: 标准技能名列表
+            city: 城市过滤，None 表示全国
+            k: 返回数量上限
+
+        Returns:
+            [{"job_id", "matched_skills", "match_count", "total_skills"}]，
+            按命中技能数降序、薪资上限降序排列
+        """
+        lists = [(name, self.postings[name]) for name in dict.fromkeys(skills) if name in self.postings]
+        if not lists or k <= 0:
+            return []
+
+        counts = np.zeros(len(self.job_ids), dtype=np.int16)
+        for _, posting in lists:
+            counts[posting] += 1  # 单个倒排表内序号不重复，可直接花式索引累加
+
+        candidates = np.flatnonzero(counts)
+        if city:
+            code = self.city_lookup.get(city)
+            if code is None:
+                return []
+            candidates = candidates[self.city_codes[candidates] == code]
+        if candidates.size == 0:
+            return []
+
+        score = counts[candidates].astype(np.int64) * len(self.job_ids) + self._salary_rank[candidates]
+        if candidates.size > k:
+            top = np.argpartition(-score, k - 1)[:k]
+        else:
+            top = np.arange(candidates.size)
+        top = top[np.argsort(-score[top], kind="stable")]
+        selected = candidates[top]
+
+        # 每个结果岗位具体命中了哪些技能：在各倒排表中二分查找
+        matched: List[List[str]] = [[] for _ in range(selected.size)]
+        for name, posting in lists:
+            pos = np.searchsorted(posting, selected)
+            hit = (pos < posting.size) & (posting[np.minimum(pos, posting.size - 1)] == selected)
+            for i in np.flatnonzero(hit):
+                matched[i].append(name)
+
+        return [
+            {
+                "job_id": self.job_ids[ordinal],
+                "matched_skills": matched[i],
+                "match_count": int(counts[ordinal]),
+                "total_skills": int(self.skill_counts[ordinal]),
+            }
+            for i, ordinal in enumerate(selected.tolist())
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        postings_bytes = sum(p.nbytes for p in self.postings.values())
+        return {
+            "jobs": len(self.job_ids),
+            "skills": len(self.postings),
+            "cities": len(self.city_lookup),
+            "postings_mb": round(postings_bytes / 1024 / 1024, 2),
+            "built_at": self.built_at,
+        }
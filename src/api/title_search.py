@@ -0,0 +1,323 @@
+"""
+职位名称关键词搜索
+优先走 Neo4j 全文索引 job_title_fts（cjk 分析器，中文按二元组切词、英文按单词切词），
+索引不存在时退回进程内的字符 n-gram 倒排索引；两者都只返回按相关度排好序的岗位 id，
+岗位详情仍由调用方用 job_id IN $ids 的 Cypher 回填，避免 j.title CONTAINS 对全部 Job 节点做全表扫描。
+"""
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.api.cache import canonical_text
+from src.utils.cypher_registry import register_cypher
+
+logger = logging.getLogger(__name__)
+
+FULLTEXT_INDEX = "job_title_fts"
+FULLTEXT_ANALYZER = "cjk"
+
+# 全文索引查询：queryNodes 按 Lucene 相关度降序产出节点，城市过滤与 LIMIT 在流式结果上完成
+FULLTEXT_CYPHER = register_cypher("title_fulltext", """
+CALL db.index.fulltext.queryNodes($index, $q) YIELD node, score
+WHERE $city IS NULL OR node.city = $city
+RETURN node.job_id AS job_id, node.title AS title, score
+ORDER BY score DESC, node.salary_max DESC
+LIMIT $limit_val
+""", {"index": FULLTEXT_INDEX, "q": '"开发"', "city": None, "limit_val": 100},
+   expect=["db.index.fulltext.queryNodes"], module=__name__)
+
+# n-gram 索引所需的最小字段（每个岗位一行）
+TITLE_LOAD_CYPHER = register_cypher("title_ngram_load", """
+MATCH (j:Job)
+RETURN j.job_id AS job_id, coalesce(j.title, '') AS title,
+       coalesce(j.city, '') AS city, coalesce(j.salary_max, 0) AS salary_max
+""", module=__name__)
+
+_LUCENE_ESCAPE_RE = re.compile(r'(["\\])')
+
+
+def lucene_query(keywords: Sequence[str]) -> str:
+    """关键词 -> Lucene 查询串：每个关键词作为短语（"Java开发" 需相邻出现），多个关键词 OR 连接"""
+    phrases = ['"' + _LUCENE_ESCAPE_RE.sub(r"\\\1", kw) + '"' for kw in keywords if kw.strip()]
+    return " OR ".join(phrases)
+
+
+def _normalize(text: str) -> str:
+    return canonical_text(text, casefold=True)
+
+
+def _grams(text: str) -> List[str]:
+    """字符二元组；单字关键词退化为一元组"""
+    if len(text) < 2:
+        return [text] if text else []
+    return [text[i:i + 2] for i in range(len(text) - 1)]
+
+
+class TitleNgramIndex:
+    """进程内职位名称倒排索引：字符一元组 / 二元组 -> 有序岗位序号数组"""
+
+    def __init__(self, job_ids: List[str], titles: List[str], city_codes: np.ndarray,
+                 city_names: List[str], salary_max: np.ndarray, postings: Dict[str, np.ndarray]):
+        self.job_ids = job_ids
+        self.titles = titles
+        self.city_codes = city_codes
+        self.city_lookup = {name: code for code, name in enumerate(city_names)}
+        self.postings = postings
+        # 同命中数时薪资高者在前，与原 Cypher 的 ORDER BY kw_score DESC, j.salary_max DESC 一致
+        self._salary_rank = np.empty(len(job_ids), dtype=np.int64)
+        self._salary_rank[np.argsort(salary_max, kind="stable")] = np.arange(len(job_ids))
+        self.built_at = time.time()
+
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple[str, str, str, Any]]) -> "TitleNgramIndex":
+        """由 (job_id, title, city, salary_max) 记录构建索引"""
+        job_ids: List[str] = []
+        titles: List[str] = []
+        cities: List[int] = []
+        salaries: List[float] = []
+        city_lookup: Dict[str, int] = {}
+        gram_lists: Dict[str, List[int]] = {}
+
+        for ordinal, (job_id, title, city, salary_max) in enumerate(records):
+            title = _normalize(title)
+            job_ids.append(job_id)
+            titles.append(title)
+            cities.append(city_lookup.setdefault(city or '', len(city_lookup)))
+            salaries.append(float(salary_max or 0))
+            for gram in set(title) | set(_grams(title)):
+                gram_lists.setdefault(gram, []).append(ordinal)
+
+        postings = {gram: np.asarray(ords, dtype=np.int32) for gram, ords in gram_lists.items()}
+        city_names = sorted(city_lookup, key=city_lookup.get)
+        return cls(
+            job_ids=job_ids,
+            titles=titles,
+            city_codes=np.asarray(cities, dtype=np.int32),
+            city_names=city_names,
+            salary_max=np.asarray(salaries, dtype=np.float64),
+            postings=postings,
+        )
+
+    def __len__(self) -> int:
+        return len(self.job_ids)
+
+    def _candidates(self, keyword: str) -> np.ndarray:
+        """包含该关键词全部 n-gram 的岗位，再逐个校验子串（n-gram 相交只保证必要条件）"""
+        grams = sorted(set(_grams(keyword)), key=lambda g: self.postings.get(g, np.empty(0)).size)
+        if not grams or grams[0] not in self.postings:
+            return np.empty(0, dtype=np.int32)
+        result = self.postings[grams[0]]
+        for gram in grams[1:]:
+            posting = self.postings.get(gram)
+            if posting is None:
+                return np.empty(0, dtype=np.int32)
+            result = np.intersect1d(result, posting, assume_unique=True)
+            if result.size == 0:
+                return result
+        if len(keyword) <= 2:
+            return result
+        return np.asarray([o for o in result.tolist() if keyword in self.titles[o]], dtype=np.int32)
+
+    def search(self, keywords: Sequence[str], city: Optional[str] = None, k: int = 100) -> List[Dict[str, Any]]:
+        """
+        按职位名称关键词查找岗位
+
+        Returns:
+            [{"job_id", "match_count"}]，按命中关键词数降序、薪资上限降序排列
+        """
+        keywords = [kw for kw in dict.fromkeys(_normalize(kw) for kw in keywords) if kw]
+        if not keywords or k <= 0:
+            return []
+
+        counts = np.zeros(len(self.job_ids), dtype=np.int16)
+        for kw in keywords:
+            counts[self._candidates(kw)] += 1
+
+        candidates = np.flatnonzero(counts)
+        if city:
+            code = self.city_lookup.get(city)
+            if code is None:
+                return []
+            candidates = candidates[self.city_codes[candidates] == code]
+        if candidates.size == 0:
+            return []
+
+        score = counts[candidates].astype(np.int64) * len(self.job_ids) + self._salary_rank[candidates]
+        if candidates.size > k:
+            top = np.argpartition(-score, k - 1)[:k]
+        else:
+            top = np.arange(candidates.size)
+        top = top[np.argsort(-score[top], kind="stable")]
+        return [
+            {"job_id": self.job_ids[o], "match_count": int(counts[o])}
+            for o in candidates[top].tolist()
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "jobs": len(self.job_ids),
+            "grams": len(self.postings),
+            "postings_mb": round(sum(p.nbytes for p in self.postings.values()) / 1024 / 1024, 2),
+            "built_at": self.built_at,
+        }
+
+
+class TitleSearch:
+    """
+    职位名称搜索入口（API 与 Agent 共用）
+
+    search() 返回 [{"job_id", "match_count"}]：
+    - 全文索引可用：queryNodes 取相关度最高的岗位
+    - 全文索引不存在：后台加载 n-gram 索引，加载完成前临时用 CONTAINS 查询兜底
+    """
+
+    def __init__(self, neo4j_manager, index_name: str = FULLTEXT_INDEX, analyzer: str = FULLTEXT_ANALYZER):
+        """
+        Args:
+            neo4j_manager: AsyncNeo4jManager
+            index_name: 全文索引名
+            analyzer: 全文索引分析器（cjk 对中文按二元组切词）
+        """
+        self.neo4j = neo4j_manager
+        self.index_name = index_name
+        self.analyzer = analyzer
+        self.fulltext_available: Optional[bool] = None   # None 表示尚未探测
+        self.ngram_index: Optional[TitleNgramIndex] = None
+        self._ngram_loading = False
+        self._ngram_task: Optional[asyncio.Task] = None  # 持有引用，防止加载任务被回收
+        self._counters = {"fulltext": 0, "ngram": 0, "contains": 0}
+
+    async def ensure_index(self) -> bool:
+        """
+        创建 cjk 分析器的全文索引（Neo4j 5.x / 4.x 语法兼容）；
+        已存在但分析器不同（如早期用默认 standard-no-stop-words 创建）时删除重建
+        """
+        try:
+            rows = await self.neo4j.execute_query(
+                "SHOW INDEXES YIELD name, options WHERE name = $name RETURN options", {"name": self.index_name}
+            )
+            current = ((rows[0].get("options") or {}).get("indexConfig") or {}).get("fulltext.analyzer") if rows else None
+            if rows and current != self.analyzer:
+                logger.info(f"  全文索引 {self.index_name} 分析器为 {current}，重建为 {self.analyzer}")
+                await self.neo4j.execute_write(f"DROP INDEX {self.index_name} IF EXISTS")
+        except Exception as e:
+            logger.debug(f"  读取全文索引配置失败（可能为 Neo4j 4.x）: {e}")
+
+        statements = [
+            # Neo4j 5.x 语法
+            f"CREATE FULLTEXT INDEX {self.index_name} IF NOT EXISTS FOR (j:Job) ON EACH [j.title] "
+            f"OPTIONS {{indexConfig: {{`fulltext.analyzer`: '{self.analyzer}'}}}}",
+            # Neo4j 4.x 语法（无 IF NOT EXISTS）
+            f"CALL db.index.fulltext.createNodeIndex('{self.index_name}', ['Job'], ['title'], "
+            f"{{analyzer: '{self.analyzer}'}})",
+        ]
+        for statement in statements:
+            try:
+                await self.neo4j.execute_write(statement)
+                logger.info(f"  ✅ Neo4j 全文索引 {self.index_name} 确认（{self.analyzer}）")
+                break
+            except Exception as e:
+                logger.debug(f"  全文索引语法不适用，尝试下一种: {e}")
+        return await self.probe()
+
+    async def probe(self) -> bool:
+        """探测全文索引是否可查询；不可用时开始加载 n-gram 索引"""
+        try:
+            await self.neo4j.execute_query(
+                "CALL db.index.fulltext.queryNodes($index, 'probe') YIELD node RETURN node LIMIT 1",
+                {"index": self.index_name},
+            )
+            self.fulltext_available = True
+        except Exception as e:
+            logger.warning(f"⚠️ 全文索引 {self.index_name} 不可用，职位名称搜索改用进程内 n-gram 索引: {e}")
+            self.fulltext_available = False
+            self._schedule_ngram_load()
+        return self.fulltext_available
+
+    def invalidate(self) -> None:
+        """数据版本变化：已加载的 n-gram 索引在后台重建（旧索引在新索引就绪前继续服务）"""
+        if self.ngram_index is not None or self.fulltext_available is False:
+            self._schedule_ngram_load()
+
+    async def search(self, keywords: Sequence[str], city: Optional[str] = None,
+                     limit: int = 100) -> List[Dict[str, Any]]:
+        """按职位名称关键词返回排好序的 [{"job_id", "match_count"}]"""
+        keywords = [kw for kw in keywords if kw and kw.strip()]
+        if not keywords or limit <= 0:
+            return []
+
+        if self.fulltext_available is not False:
+            try:
+                rows = await self.neo4j.execute_query(FULLTEXT_CYPHER, {
+                    "index": self.index_name, "q": lucene_query(keywords),
+                    "city": city, "limit_val": limit,
+                })
+                self.fulltext_available = True
+                self._counters["fulltext"] += 1
+                normalized = [_normalize(kw) for kw in keywords]
+                return [{
+                    "job_id": r["job_id"],
+                    # 与 n-gram / CONTAINS 路径口径一致：标题中实际出现的关键词个数
+                    "match_count": max(1, sum(kw in _normalize(r["title"] or "") for kw in normalized)),
+                } for r in rows]
+            except Exception as e:
+                if self.index_name not in str(e) and "fulltext" not in str(e).lower():
+                    raise
+                logger.warning(f"⚠️ 全文索引 {self.index_name} 查询失败，改用 n-gram 索引: {e}")
+                self.fulltext_available = False
+                self._schedule_ngram_load()
+
+        if self.ngram_index is not None:
+            self._counters["ngram"] += 1
+            return self.ngram_index.search(keywords, city, limit)
+
+        self._counters["contains"] += 1
+        return await self._search_contains(keywords, city, limit)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "fulltext_available": self.fulltext_available,
+            "queries": dict(self._counters),
+            "ngram_index": self.ngram_index.stats() if self.ngram_index is not None else None,
+        }
+
+    def _schedule_ngram_load(self) -> None:
+        if not self._ngram_loading:
+            self._ngram_loading = True
+            self._ngram_task = asyncio.create_task(self._load_ngram_index())
+
+    async def _load_ngram_index(self):
+        """从 Neo4j 读取 (岗位, 标题, 城市, 薪资) 并在线程池中构建 n-gram 索引，完成后原子替换"""
+        try:
+            started = time.time()
+            rows = await self.neo4j.execute_query(TITLE_LOAD_CYPHER, timeout=300)
+            index = await asyncio.to_thread(
+                TitleNgramIndex.from_records,
+                ((r["job_id"], r["title"], r["city"], r["salary_max"]) for r in rows),
+            )
+            self.ngram_index = index
+            logger.info(f"✅ 职位名称 n-gram 索引已加载: {index.stats()}，耗时 {time.time() - started:.1f}s")
+        except Exception as e:
+            logger.warning(f"⚠️ 职位名称 n-gram 索引加载失败，继续使用 CONTAINS 查询: {e}")
+        finally:
+            self._ngram_loading = False
+
+    async def _search_contains(self, keywords: Sequence[str], city: Optional[str], limit: int) -> List[Dict[str, Any]]:
+        """两种索引都不可用时的兜底（全表扫描，仅在 n-gram 索引加载完成前使用）"""
+        kw_params = {f"kw{i}": kw for i, kw in enumerate(keywords)}
+        where_parts = " OR ".join(f"j.title CONTAINS $kw{i}" for i in range(len(keywords)))
+        score_parts = " + ".join(f"(CASE WHEN j.title CONTAINS $kw{i} THEN 1 ELSE 0 END)" for i in range(len(keywords)))
+        rows = await self.neo4j.execute_query(f"""
+            MATCH (j:Job)
+            WHERE ({where_parts})
+              AND ($city IS NULL OR j.city = $city)
+            WITH j, ({score_parts}) AS kw_score
+            ORDER BY kw_score DESC, j.salary_max DESC
+            LIMIT $limit_val
+            RETURN j.job_id AS job_id, kw_score AS match_count
+        """, {"city": city, "limit_val": limit, **kw_params})
+        return [{"job_id": r["job_id"], "match_count": r["match_count"]} for r in rows]
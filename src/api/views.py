@@ -0,0 +1,207 @@
+"""
+物化视图注册表与预计算调度器
+stats / trend / graph 等聚合结果统一声明为"物化视图"：查询函数、缓存 key、刷新间隔、优先级、成本等级，
+接口读缓存与后台预计算走同一个查询函数，预热数据与接口实时计算结果完全一致。
+
+调度器只在 leader worker 上运行：按优先级执行到期视图，按成本等级限制并发的 Neo4j 查询数，
+刷新间隔带随机抖动避免多个视图同时打到数据库，失败后指数退避重试。
+"""
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MaterializedView:
+    """
+    一个物化视图
+
+    Attributes:
+        name: 视图名称（用于统计与日志）
+        key: 返回当前缓存 key 的函数（key 中带数据版本，数据更新后自动变化）
+        query: 无参协程工厂，返回完整的接口响应 dict
+        interval: 后台刷新间隔（秒），应小于 ttl，保证热数据不会软过期
+        ttl: 缓存软过期秒数
+        stale_ttl: 软过期后仍可返回旧值的秒数
+        priority: 优先级，数值越小越先执行（启动 / 数据更新后按此顺序预热）
+        cost: 成本等级 light / heavy，决定使用哪个并发池
+        enabled: 返回视图当前是否可用（如依赖的 Neo4j 未连接），不可用时调度器跳过
+    """
+    name: str
+    key: Callable[[], str]
+    query: Callable[[], Awaitable[Any]]
+    interval: float
+    ttl: int
+    stale_ttl: int = 0
+    priority: int = 0
+    cost: str = "light"
+    enabled: Callable[[], bool] = lambda: True
+
+
+@dataclass
+class _ViewState:
+    next_run: float = 0.0
+    running: bool = False
+    failures: int = 0
+    last_success: Optional[float] = None
+    last_duration: Optional[float] = None
+    last_error: Optional[str] = None
+    refreshes: int = 0
+
+
+class ViewRegistry:
+    """物化视图注册表"""
+
+    def __init__(self):
+        self._views: Dict[str, MaterializedView] = {}
+
+    def register(self, view: MaterializedView) -> MaterializedView:
+        if view.name in self._views:
+            raise ValueError(f"物化视图重复注册: {view.name}")
+        self._views[view.name] = view
+        return view
+
+    def get(self, name: str) -> MaterializedView:
+        return self._views[name]
+
+    def __iter__(self) -> Iterator[MaterializedView]:
+        return iter(sorted(self._views.values(), key=lambda v: v.priority))
+
+    def __len__(self) -> int:
+        return len(self._views)
+
+
+class ViewScheduler:
+    """
+    物化视图调度器
+
+    refresh(name) 执行一次查询并写缓存，接口未命中和后台调度共用；
+    run() 为后台循环，只应在 leader worker 上启动
+    """
+
+    def __init__(self, registry: ViewRegistry,
+                 store: Callable[[str, Any, int, int], Any],
+                 concurrency: Optional[Dict[str, int]] = None,
+                 jitter: float = 0.1,
+                 max_backoff: float = 600.0,
+                 single_flight=None):
+        """
+        Args:
+            registry: 视图注册表
+            store: 写缓存函数 store(key, value, ttl, stale_ttl)，返回值作为 refresh 的结果
+            concurrency: 各成本等级的最大并发数，默认 light=4, heavy=1
+            jitter: 刷新间隔的随机抖动比例
+            max_backoff: 失败退避上限（秒）
+            single_flight: 可选的 SingleFlight，后台刷新与同 key 的接口请求合并
+        """
+        self.registry = registry
+        self.store = store
+        self.jitter = jitter
+        self.max_backoff = max_backoff
+        self.single_flight = single_flight
+        limits = {"light": 4, "heavy": 1, **(concurrency or {})}
+        self._semaphores = {cost: asyncio.Semaphore(n) for cost, n in limits.items()}
+        self._states: Dict[str, _ViewState] = {}
+        self._wakeup = asyncio.Event()
+        self._tasks: set = set()  # 进行中的视图刷新任务（持有引用，防止被回收）
+
+    async def refresh(self, name: str) -> Any:
+        """执行一次视图查询并写入缓存（受成本等级并发池限制），异常向上抛出"""
+        view = self.registry.get(name)
+        state = self._state(name)
+        key = view.key()
+        semaphore = self._semaphores.get(view.cost) or self._semaphores["light"]
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                result = await view.query()
+            except Exception as e:
+                state.failures += 1
+                state.last_error = str(e)
+                state.next_run = time.monotonic() + self._backoff(view, state.failures)
+                raise
+            state.last_duration = time.monotonic() - started
+        state.failures = 0
+        state.last_error = None
+        state.last_success = time.time()
+        state.refreshes += 1
+        state.next_run = time.monotonic() + self._jittered(view.interval)
+        return self.store(key, result, view.ttl, view.stale_ttl)
+
+    def trigger_all(self) -> None:
+        """让所有视图立即到期（如数据版本变化后重新预计算）"""
+        for view in self.registry:
+            self._state(view.name).next_run = 0.0
+        self._wakeup.set()
+
+    async def run(self):
+        """后台调度循环：按优先级启动到期视图，睡眠到下一个视图到期或被唤醒"""
+        self.trigger_all()
+        while True:
+            now = time.monotonic()
+            for view in self.registry:
+                state = self._state(view.name)
+                if state.running or state.next_run > now:
+                    continue
+                if not view.enabled():
+                    state.next_run = now + self._jittered(view.interval)
+                    continue
+                state.running = True
+                task = asyncio.create_task(self._run_view(view, state), name=f"view:{view.name}")
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            upcoming = [s.next_run for s in self._states.values() if not s.running]
+            delay = max(0.5, min(upcoming) - time.monotonic()) if upcoming else 5.0
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """各视图最近一次刷新耗时、距上次成功刷新的时长（staleness）和失败次数"""
+        now = time.time()
+        result = {}
+        for view in self.registry:
+            state = self._state(view.name)
+            result[view.name] = {
+                "cost": view.cost,
+                "interval": view.interval,
+                "refreshes": state.refreshes,
+                "running": state.running,
+                "last_duration_ms": round(state.last_duration * 1000, 1) if state.last_duration is not None else None,
+                "staleness_s": round(now - state.last_success, 1) if state.last_success else None,
+                "failures": state.failures,
+                "last_error": state.last_error,
+            }
+        return result
+
+    async def _run_view(self, view: MaterializedView, state: _ViewState):
+        try:
+            if self.single_flight is not None:
+                await self.single_flight.do(view.key(), lambda: self.refresh(view.name))
+            else:
+                await self.refresh(view.name)
+            logger.debug(f"♻️  物化视图刷新完成: {view.name}")
+        except Exception as e:
+            logger.warning(f"  ⚠️ 物化视图刷新失败 {view.name}（第 {state.failures} 次）: {e}")
+        finally:
+            state.running = False
+            self._wakeup.set()
+
+    def _state(self, name: str) -> _ViewState:
+        state = self._states.get(name)
+        if state is None:
+            state = self._states[name] = _ViewState()
+        return state
+
+    def _jittered(self, seconds: float) -> float:
+        return seconds * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def _backoff(self, view: MaterializedView, failures: int) -> float:
+        return self._jittered(min(self.max_backoff, view.interval, 5.0 * 2 ** (failures - 1)))
@@ -0,0 +1,352 @@
+"""
+离线全量导入：导出 neo4j-admin database import 所需的 CSV
+逐个读取清洗 / 增强后的 JSON，边读边写节点与关系 CSV，技能名按词典标准化，id 与事务导入一致
+（skill_<name>、job_id、company_<name>）；导入前在内存中完成统计类计算：
+技能需求量与平均薪资、公司岗位数与 TOP 技能、RELATED_TO / CO_OCCURS / CO_OCCURS_IN、岗位画像、城市数。
+同时生成导入命令 import.sh 与导入后建约束 / 索引的 post_import.cypher。
+
+全量重建的流程：
+    1. python scripts/export_neo4j_admin_csv.py                # 导出 CSV
+    2. neo4j stop && sh data/neo4j_import/import.sh             # 离线导入（覆盖目标库）
+    3. neo4j start && python scripts/export_neo4j_admin_csv.py --finalize   # 建索引 + 递增数据版本
+"""
+import csv
+import json
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from src.graph_builder.bulk_writer import company_id_of
+from src.graph_builder.position_profiles import PositionProfileBuilder
+from src.graph_builder.schema import GRAPH_CONSTRAINTS, GRAPH_INDEXES, SKILL_FULLTEXT_INDEX
+from src.graph_builder.skill_correlation import SkillMatrixBuilder, co_occurrence_pairs, score_pairs
+
+logger = logging.getLogger(__name__)
+
+ARRAY_DELIMITER = ";"
+
+# 文件名 -> (标签 / 关系类型, 表头)；标签与关系类型在导入命令中指定，CSV 中不含 :LABEL / :TYPE 列
+NODE_FILES = {
+    "skills.csv": ("Skill", [
+        "skill_id:ID(Skill)", "name", "category", "sub_category", "level", "hot_score:float",
+        "aliases:string[]", "description", "parent", "demand_count:long",
+        "avg_salary_min:float", "avg_salary_max:float", "salary_min_samples:long", "salary_max_samples:long",
+        "created_at", "updated_at",
+    ]),
+    "jobs.csv": ("Job", [
+        "job_id:ID(Job)", "title", "city", "district", "business_district",
+        "salary_min:float", "salary_max:float", "salary_text", "experience", "education",
+        "publish_date", "source", "welfare:string[]", "jd_text", "skill_count:long", "created_at",
+    ]),
+    "companies.csv": ("Company", [
+        "company_id:ID(Company)", "name", "industry", "size", "stage", "city", "job_count:long",
+        "avg_salary_min:float", "avg_salary_max:float", "salary_min_samples:long", "salary_max_samples:long",
+        "top_skills:string[]",
+        "top_skill_counts:long[]", "created_at",
+    ]),
+    "position_profiles.csv": ("PositionProfile", [
+        ":ID(PositionProfile)", "key", "city", "name", "job_count:long", "skills:string[]",
+        "skill_counts:long[]", "sample_job_ids:string[]", "salary_avg_min:float", "salary_avg_max:float",
+        "salary_p25:float", "salary_p50:float", "salary_p75:float",
+    ]),
+    "graph_stats.csv": ("GraphStats", [":ID(GraphStats)", "name", "city_count:long", "updated_at"]),
+}
+RELATIONSHIP_FILES = {
+    "requires.csv": ("REQUIRES", [
+        ":START_ID(Job)", ":END_ID(Skill)", "importance", "source", "confidence:float", "extracted_at",
+    ]),
+    "posted_by.csv": ("POSTED_BY", [":START_ID(Job)", ":END_ID(Company)", "post_date"]),
+    "related_to.csv": ("RELATED_TO", [
+        ":START_ID(Skill)", ":END_ID(Skill)", "co_occurrence:long", "correlation:float",
+        "pmi:float", "lift:float", "strength:float", "relation_type", "created_at:datetime",
+    ]),
+    "co_occurs.csv": ("CO_OCCURS", [":START_ID(Skill)", ":END_ID(Skill)", "count:long", "updated_at:datetime"]),
+    "co_occurs_in.csv": ("CO_OCCURS_IN", [
+        ":START_ID(Skill)", ":END_ID(Skill)", "city", "count:long", "updated_at:datetime",
+    ]),
+}
+
+
+def skill_id_of(skill_name: str) -> str:
+    return f"skill_{skill_name.lower().replace(' ', '_')}"
+
+
+def _array(values: Iterable) -> str:
+    return ARRAY_DELIMITER.join(str(v).replace(ARRAY_DELIMITER, ",") for v in values if v is not None)
+
+
+def _avg(total: float, count: int) -> Optional[float]:
+    return total / count if count else None
+
+
+class AdminImportExporter:
+    """neo4j-admin 离线导入文件生成器"""
+
+    def __init__(self, skill_dictionary, output_dir: Path, min_co_occurrence: int = 10,
+                 database: str = "neo4j", profile_kwargs: Optional[Dict] = None):
+        """
+        Args:
+            skill_dictionary: SkillDictionary 实例（技能节点 + 别名标准化）
+            output_dir: 输出目录
+            min_co_occurrence: RELATED_TO 的最小共现次数（与 build_skill_relationships 一致）
+            database: 导入的目标库名
+            profile_kwargs: PositionProfileBuilder 参数
+        """
+        self.skill_dictionary = skill_dictionary
+        self.output_dir = Path(output_dir)
+        self.min_co_occurrence = min_co_occurrence
+        self.database = database
+        self.profile_kwargs = profile_kwargs or {}
+        self.alias_map = skill_dictionary.alias_map()
+        # 同名技能以词典中最后一次出现为准（与 MERGE 覆盖属性的行为一致）
+        self.skills: Dict[str, Dict] = {s['name']: s for s in skill_dictionary.all_skills}
+        self.stats = Counter()
+
+    def normalize_skill(self, skill_name: str) -> Optional[str]:
+        """别名 -> 标准技能名；不在词典中的技能返回 None（与事务导入一样跳过）"""
+        normalized = self.alias_map.get(skill_name.lower())
+        if normalized and normalized != skill_name:
+            self.stats['skills_normalized'] += 1
+        return normalized
+
+    def export(self, data_paths: Iterable[Path]) -> Dict:
+        """导出全部 CSV 与导入脚本，返回各文件行数"""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        now = datetime.now().isoformat()
+
+        skill_jobs = Counter()
+        skill_salary = defaultdict(lambda: [0.0, 0, 0.0, 0])   # sum_min, n_min, sum_max, n_max
+        company_props: Dict[str, Dict] = {}
+        company_jobs = Counter()
+        company_salary = defaultdict(lambda: [0.0, 0, 0.0, 0])
+        company_skills: Dict[str, Counter] = defaultdict(Counter)
+        job_skills = SkillMatrixBuilder()  # 全局共现由 Xᵀ·X 得到
+        city_pair_counts = Counter()
+        cities = set()
+        profiles = PositionProfileBuilder(**self.profile_kwargs)
+        seen_jobs = set()
+
+        with self._writer("jobs.csv") as jobs_out, \
+                self._writer("requires.csv") as requires_out, \
+                self._writer("posted_by.csv") as posted_out:
+            for path in data_paths:
+                with open(path, 'r', encoding='utf-8') as f:
+                    jobs = json.load(f)
+                logger.info(f"导出 {Path(path).name}: {len(jobs)} 个岗位")
+                for job in jobs:
+                    job_id = job.get('job_id')
+                    if not job_id:
+                        self.stats['jobs_invalid'] += 1
+                        continue
+                    if job_id in seen_jobs:
+                        # 同一岗位出现在多个文件中时保留第一次出现的记录
+                        self.stats['jobs_duplicate'] += 1
+                        continue
+                    seen_jobs.add(job_id)
+
+                    skills = []
+                    for name in job.get('skills', []) if isinstance(job.get('skills'), list) else []:
+                        normalized = self.normalize_skill(name) if isinstance(name, str) else None
+                        if normalized and normalized not in skills:
+                            skills.append(normalized)
+                    city = job.get('city', '') or ''
+                    salary_min, salary_max = job.get('salary_min', 0), job.get('salary_max', 0)
+
+                    jobs_out.writerow([
+                        job_id, job.get('title', ''), city, job.get('district', ''),
+                        job.get('business_district', ''), salary_min, salary_max,
+                        job.get('salary_text', ''), job.get('experience', ''), job.get('education', ''),
+                        job.get('publish_date', ''), job.get('source', ''), _array(job.get('welfare') or []),
+                        job.get('jd_text', ''), len(job.get('skills', []) or []), now,
+                    ])
+                    for name in skills:
+                        requires_out.writerow([job_id, skill_id_of(name), "must", "explicit", 1.0, now])
+                        skill_jobs[name] += 1
+                        acc = skill_salary[name]
+                        if salary_min is not None:
+                            acc[0] += salary_min
+                            acc[1] += 1
+                        if salary_max is not None:
+                            acc[2] += salary_max
+                            acc[3] += 1
+
+                    company_name = (job.get('company') or '').strip()
+                    if company_name:
+                        company_id = company_id_of(company_name)
+                        company_props.setdefault(company_id, {
+                            "name": company_name,
+                            "industry": job.get('company_industry', ''),
+                            "size": job.get('company_size', ''),
+                            "stage": job.get('company_stage', ''),
+                            "city": city,
+                        })
+                        posted_out.writerow([job_id, company_id, job.get('publish_date', '')])
+                        company_jobs[company_id] += 1
+                        acc = company_salary[company_id]
+                        if salary_min is not None:
+                            acc[0] += salary_min
+                            acc[1] += 1
+                        if salary_max is not None:
+                            acc[2] += salary_max
+                            acc[3] += 1
+                        company_skills[company_id].update(skills)
+
+                    job_skills.add(skills)
+                    if city:
+                        for s1, s2 in combinations(sorted(skills), 2):
+                            city_pair_counts[(city, s1, s2)] += 1
+                    if city:
+                        cities.add(city)
+                    profiles.add(job_id, job.get('title', ''), city, salary_min, salary_max, skills)
+
+                    self.stats['jobs'] += 1
+                    self.stats['requires'] += len(skills)
+                    self.stats['posted_by'] += 1 if company_name else 0
+
+        with self._writer("skills.csv") as out:
+            for name, skill in self.skills.items():
+                acc = skill_salary.get(name, [0.0, 0, 0.0, 0])
+                out.writerow([
+                    skill_id_of(name), name, skill.get('category', 'unknown'), skill.get('sub_category', ''),
+                    skill.get('level', ''), skill.get('hot_score', 0), _array(skill.get('aliases', [])),
+                    skill.get('description', ''), skill.get('parent', ''), skill_jobs.get(name, 0),
+                    _avg(acc[0], acc[1]) or 0.0, _avg(acc[2], acc[3]) or 0.0, acc[1], acc[3], now, now,
+                ])
+                self.stats['skills'] += 1
+
+        with self._writer("companies.csv") as out:
+            for company_id, props in company_props.items():
+                acc = company_salary[company_id]
+                top_skills = company_skills[company_id].most_common(10)
+                out.writerow([
+                    company_id, props["name"], props["industry"], props["size"], props["stage"], props["city"],
+                    company_jobs[company_id], _avg(acc[0], acc[1]), _avg(acc[2], acc[3]), acc[1], acc[3],
+                    _array([name for name, _ in top_skills]), _array([count for _, count in top_skills]), now,
+                ])
+                self.stats['companies'] += 1
+
+        self._write_skill_relationships(job_skills, city_pair_counts, now)
+
+        with self._writer("position_profiles.csv") as out:
+            for p in profiles.profiles():
+                out.writerow([
+                    f"{p['city']}|{p['key']}", p['key'], p['city'], p['name'], p['job_count'],
+                    _array(p['skills']), _array(p['skill_counts']), _array(p['sample_job_ids']),
+                    p['salary_avg_min'], p['salary_avg_max'], p['salary_p25'], p['salary_p50'], p['salary_p75'],
+                ])
+                self.stats['position_profiles'] += 1
+
+        with self._writer("graph_stats.csv") as out:
+            out.writerow(["global", "global", len(cities), now])
+
+        self._write_import_script()
+        self._write_post_import_script()
+        summary = {"exported_at": now, "database": self.database, **self.stats}
+        with open(self.output_dir / 'export_summary.json', 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        logger.info(f"导出完成: {dict(self.stats)}")
+        return summary
+
+    def _write_skill_relationships(self, job_skills: SkillMatrixBuilder, city_pair_counts: Counter,
+                                   now: str) -> None:
+        """RELATED_TO（correlation / pmi / lift，与 build_skill_relationships 同一算法）与 CO_OCCURS / CO_OCCURS_IN"""
+        X = job_skills.matrix()
+        names = job_skills.skills
+        i, j, co, counts = co_occurrence_pairs(X)
+        related = co >= self.min_co_occurrence
+        scores = score_pairs(co[related], counts[i[related]], counts[j[related]], X.shape[0])
+        with self._writer("related_to.csv") as out:
+            columns = [scores[name].tolist() for name in ("correlation", "pmi", "lift")]
+            for a, b, n, correlation, pmi, lift in zip(i[related].tolist(), j[related].tolist(),
+                                                       co[related].tolist(), *columns):
+                # 与 build_skill_relationships 一致：按 skill_id 小 -> 大定向
+                start, end = sorted((skill_id_of(names[a]), skill_id_of(names[b])))
+                out.writerow([start, end, n, correlation, pmi, lift, min(n / 1000.0, 1.0), "complementary", now])
+                self.stats['related_to'] += 1
+        with self._writer("co_occurs.csv") as out:
+            for a, b, n in zip(i.tolist(), j.tolist(), co.tolist()):
+                s1, s2 = sorted((names[a], names[b]))
+                out.writerow([skill_id_of(s1), skill_id_of(s2), n, now])
+                self.stats['co_occurs'] += 1
+        with self._writer("co_occurs_in.csv") as out:
+            for (city, s1, s2), n in city_pair_counts.items():
+                out.writerow([skill_id_of(s1), skill_id_of(s2), city, n, now])
+                self.stats['co_occurs_in'] += 1
+
+    def _writer(self, filename: str):
+        """写 CSV（带 neo4j-admin 表头）的上下文管理器"""
+        header = (NODE_FILES.get(filename) or RELATIONSHIP_FILES[filename])[1]
+        return _CsvFile(self.output_dir / filename, header)
+
+    def import_command(self) -> str:
+        """neo4j-admin（5.x）离线导入命令，需在数据库停止时执行"""
+        args = [
+            "neo4j-admin database import full",
+            "--overwrite-destination=true",
+            "--multiline-fields=true",
+            f'--array-delimiter="{ARRAY_DELIMITER}"',
+            "--skip-duplicate-nodes=true",
+        ]
+        args += [f"--nodes={label}={name}" for name, (label, _) in NODE_FILES.items()]
+        args += [f"--relationships={rel}={name}" for name, (rel, _) in RELATIONSHIP_FILES.items()]
+        args.append(self.database)
+        return " \\\n  ".join(args)
+
+    def _write_import_script(self) -> None:
+        legacy = self.import_command().replace(
+            "neo4j-admin database import full", f"neo4j-admin import --database={self.database}"
+        ).replace("--overwrite-destination=true", "--force").rsplit(" \\\n  ", 1)[0]
+        script = "\n".join([
+            "#!/usr/bin/env sh",
+            "# neo4j-admin 离线导入（需先停止数据库：neo4j stop）",
+            "set -e",
+            'cd "$(dirname "$0")"',
+            self.import_command(),
+            "",
+            "# Neo4j 4.x 使用：",
+            *("# " + line for line in legacy.splitlines()),
+            "",
+        ])
+        path = self.output_dir / 'import.sh'
+        path.write_text(script, encoding='utf-8')
+        path.chmod(0o755)
+
+    def _write_post_import_script(self) -> None:
+        """导入后建约束 / 索引（cypher-shell -f post_import.cypher）"""
+        from src.api.title_search import FULLTEXT_ANALYZER, FULLTEXT_INDEX
+        statements = post_import_statements(FULLTEXT_INDEX, FULLTEXT_ANALYZER)
+        (self.output_dir / 'post_import.cypher').write_text(
+            "".join(f"{stmt};\n" for stmt in statements), encoding='utf-8'
+        )
+
+
+def post_import_statements(title_index: str, title_analyzer: str) -> List[str]:
+    """离线导入后需执行的约束与索引语句（最后等待索引上线）"""
+    return [
+        *GRAPH_CONSTRAINTS,
+        *GRAPH_INDEXES,
+        "CREATE INDEX skill_demand_idx IF NOT EXISTS FOR (s:Skill) ON (s.demand_count)",
+        SKILL_FULLTEXT_INDEX,
+        f"CREATE FULLTEXT INDEX {title_index} IF NOT EXISTS FOR (j:Job) ON EACH [j.title] "
+        f"OPTIONS {{indexConfig: {{`fulltext.analyzer`: '{title_analyzer}'}}}}",
+        "CALL db.awaitIndexes(600)",
+    ]
+
+
+class _CsvFile:
+    def __init__(self, path: Path, header: List[str]):
+        self.path = path
+        self.header = header
+
+    def __enter__(self):
+        self._file = open(self.path, 'w', encoding='utf-8', newline='')
+        writer = csv.writer(self._file)
+        writer.writerow(self.header)
+        return writer
+
+    def __exit__(self, *exc):
+        self._file.close()
+        return False
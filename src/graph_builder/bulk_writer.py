@@ -0,0 +1,253 @@
+"""
+岗位批量写入（UNWIND）
+岗位、公司、POSTED_BY、REQUIRES 各用一条 UNWIND $rows 语句整批写入，同一批次的四条语句在一个事务中提交；
+批次失败时二分重试，直到定位到单条坏数据，其余岗位照常写入（失败隔离与逐岗位事务一致）。
+
+关系按终点（公司 id / 技能名）排序后写入：并行导入时各事务以相同顺序锁定共享的 Skill / Company 节点，
+不会形成环形等待；仍遇到死锁等瞬时错误时整批重试，而不是二分。
+"""
+import logging
+import time
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+UPSERT_JOBS_CYPHER = """
+UNWIND $rows AS row
+MERGE (j:Job {job_id: row.job_id})
+SET j += row.props
+"""
+
+# 公司只在首次出现时写入属性（与原 NodeMatcher 查到即复用的行为一致）
+UPSERT_COMPANIES_CYPHER = """
+UNWIND $rows AS row
+MERGE (c:Company {company_id: row.company_id})
+ON CREATE SET c += row.props
+"""
+
+MERGE_POSTED_BY_CYPHER = """
+UNWIND $rows AS row
+MATCH (j:Job {job_id: row.job_id})
+MATCH (c:Company {company_id: row.company_id})
+MERGE (j)-[r:POSTED_BY]->(c)
+SET r.post_date = row.post_date
+"""
+
+# 技能名在构建行时已标准化并过滤为已存在的 Skill，这里只做关联；每行一条 (岗位, 技能)，按技能名排序
+MERGE_REQUIRES_CYPHER = """
+UNWIND $rows AS row
+MATCH (s:Skill {name: row.skill})
+MATCH (j:Job {job_id: row.job_id})
+MERGE (j)-[r:REQUIRES]->(s)
+SET r.importance = 'must', r.source = 'explicit', r.confidence = 1.0, r.extracted_at = row.extracted_at
+"""
+
+# 死锁 / 锁等待超时等可重试错误（py2neo 与官方驱动的错误类名或 code 中均带 Transient / Deadlock）
+_TRANSIENT_MARKERS = ("TransientError", "DeadlockDetected", "LockClient")
+
+
+def is_transient_error(error: Exception) -> bool:
+    text = f"{type(error).__name__} {getattr(error, 'code', '')} {error}"
+    return any(marker in text for marker in _TRANSIENT_MARKERS)
+
+
+def company_id_of(company_name: str) -> str:
+    return f"company_{company_name.lower().replace(' ', '_')}"
+
+
+def build_job_row(job: Dict, skills: List[str], now: str) -> Dict:
+    """
+    岗位 -> 一行写入参数
+
+    Args:
+        job: 清洗后的岗位
+        skills: 已标准化、且在图谱中存在的技能名
+        now: 写入时间
+    """
+    company_name = (job.get('company') or '').strip()
+    company = None
+    if company_name:
+        company = {
+            "company_id": company_id_of(company_name),
+            "props": {
+                "name": company_name,
+                "industry": job.get('company_industry', ''),
+                "size": job.get('company_size', ''),
+                "stage": job.get('company_stage', ''),
+                "city": job.get('city', ''),
+                "job_count": 0,  # 后续 update_statistics 更新
+                "avg_salary_min": 0.0,
+                "avg_salary_max": 0.0,
+                "salary_min_samples": 0,
+                "salary_max_samples": 0,
+                "top_skills": [],
+                "top_skill_counts": [],
+                "created_at": now,
+            },
+        }
+    return {
+        "job_id": job['job_id'],
+        "city": job.get('city', ''),
+        "props": {
+            "title": job.get('title', ''),
+            "city": job.get('city', ''),
+            "district": job.get('district', ''),
+            "business_district": job.get('business_district', ''),
+            "salary_min": job.get('salary_min', 0),
+            "salary_max": job.get('salary_max', 0),
+            "salary_text": job.get('salary_text', ''),
+            "experience": job.get('experience', ''),
+            "education": job.get('education', ''),
+            "publish_date": job.get('publish_date', ''),
+            "source": job.get('source', ''),
+            "welfare": job.get('welfare', []),
+            "jd_text": job.get('jd_text', ''),
+            "skill_count": len(job.get('skills', [])),
+            "created_at": now,
+        },
+        "company": company,
+        "post_date": job.get('publish_date', ''),
+        "skills": skills,
+        "extracted_at": now,
+    }
+
+
+def company_rows(rows: Iterable[Dict]) -> List[Dict]:
+    """写入行中出现的公司（按 company_id 去重、排序）"""
+    companies: Dict[str, Dict] = {}
+    for r in rows:
+        if r["company"] is not None:
+            companies.setdefault(r["company"]["company_id"], r["company"])
+    return [companies[company_id] for company_id in sorted(companies)]
+
+
+def write_job_batch(tx, rows: List[Dict], upsert_companies: bool = True) -> Dict[str, int]:
+    """
+    在事务 tx 中写入一批岗位行，返回新建公司数 / 关系数
+
+    Args:
+        upsert_companies: False 时假定公司节点已预先创建（并行导入），只写岗位及其出边
+    """
+    tx.run(UPSERT_JOBS_CYPHER, rows=[{"job_id": r["job_id"], "props": r["props"]} for r in rows])
+
+    companies_created = 0
+    if upsert_companies:
+        companies = company_rows(rows)
+        if companies:
+            stats = tx.run(UPSERT_COMPANIES_CYPHER, rows=companies).stats()
+            companies_created = stats.get('nodes_created', 0)
+
+    posted = sorted(
+        ({"job_id": r["job_id"], "company_id": r["company"]["company_id"], "post_date": r["post_date"]}
+         for r in rows if r["company"] is not None),
+        key=lambda p: (p["company_id"], p["job_id"])
+    )
+    if posted:
+        tx.run(MERGE_POSTED_BY_CYPHER, rows=posted)
+
+    requires = sorted(
+        ({"job_id": r["job_id"], "skill": skill, "extracted_at": r["extracted_at"]}
+         for r in rows for skill in r["skills"]),
+        key=lambda p: (p["skill"], p["job_id"])
+    )
+    if requires:
+        tx.run(MERGE_REQUIRES_CYPHER, rows=requires)
+
+    return {
+        "companies_created": companies_created,
+        "posted_by_created": len(posted),
+        "requires_created": len(requires),
+    }
+
+
+class BisectingBatchWriter:
+    """
+    批量写入 + 二分失败隔离
+
+    一批写入失败时回滚并拆成两半分别重试，递归到单行仍失败即记为坏数据；
+    n 行中有 k 行坏数据时额外事务数约为 2k·log2(n)
+    """
+
+    def __init__(self, graph, write_batch: Callable = write_job_batch,
+                 on_success: Optional[Callable[[List[Dict], Dict[str, int]], None]] = None,
+                 retries: int = 3):
+        """
+        Args:
+            graph: py2neo Graph
+            write_batch: (tx, rows) -> 计数字典
+            on_success: 每个成功提交的（子）批次回调 (rows, counters)
+            retries: 瞬时错误（死锁等）整批重试的次数
+        """
+        self.graph = graph
+        self.write_batch = write_batch
+        self.on_success = on_success
+        self.retries = retries
+        self.failed: List[Tuple[str, str]] = []
+        self.transactions = 0
+        self.retried = 0
+
+    def write(self, rows: List[Dict]) -> None:
+        if not rows:
+            return
+        attempt = 0
+        while True:
+            tx = self.graph.begin()
+            self.transactions += 1
+            try:
+                counters = self.write_batch(tx, rows)
+                self.graph.commit(tx)
+                break
+            except Exception as e:
+                try:
+                    self.graph.rollback(tx)
+                except Exception:
+                    pass
+                if is_transient_error(e) and attempt < self.retries:
+                    attempt += 1
+                    self.retried += 1
+                    logger.debug(f"批次遇到瞬时错误（第 {attempt} 次重试）: {e}")
+                    time.sleep(0.1 * 2 ** attempt)
+                    continue
+                if len(rows) == 1:
+                    logger.error(f"导入岗位失败 {rows[0].get('job_id')}: {e}")
+                    self.failed.append((rows[0].get('job_id'), str(e)))
+                    return
+                logger.debug(f"批次写入失败（{len(rows)} 行），二分重试: {e}")
+                mid = len(rows) // 2
+                self.write(rows[:mid])
+                self.write(rows[mid:])
+                return
+        if self.on_success is not None:
+            self.on_success(rows, counters)
+
+
+def prepare_job_rows(jobs: Iterable[Dict], normalize_skill: Callable[[str], str],
+                     known_skills: Set[str]) -> Tuple[List[Dict], List[Tuple[str, str]], Set[str]]:
+    """
+    清洗后的岗位 -> 写入行（技能标准化并过滤为图谱中已有的技能）
+
+    Returns:
+        (rows, 无法构建的岗位 [(job_id, 原因)], 跳过的未定义技能)
+    """
+    now = datetime.now().isoformat()
+    rows, invalid, unknown = [], [], set()
+    for job in jobs:
+        if not job.get('job_id'):
+            invalid.append((job.get('job_id'), "缺少 job_id"))
+            continue
+        skills = job.get('skills', [])
+        linked = []
+        if isinstance(skills, list):
+            seen = set()
+            for skill_name in skills:
+                if not isinstance(skill_name, str):
+                    continue
+                normalized = normalize_skill(skill_name)
+                if normalized not in known_skills:
+                    unknown.add(skill_name)
+                elif normalized not in seen:
+                    seen.add(normalized)
+                    linked.append(normalized)
+        rows.append(build_job_row(job, linked, now))
+    return rows, invalid, unknown
@@ -0,0 +1,35 @@
+"""
+技能共现（CO_OCCURS / CO_OCCURS_IN）计数
+全量重建时按岗位扫描一次 (城市, 技能列表)，在 Python 中两两计数；
+增量更新对新增 / 删除岗位使用同一计数函数，结果再累加 / 扣减到已有边上。
+"""
+from collections import Counter
+from itertools import combinations
+from typing import Iterable, List, Tuple
+
+# 每个岗位一行 (城市, 技能名列表)；必须先按 j 分组，按城市分组会把“同城出现过”当成共现
+JOB_SKILLS_BY_CITY_CYPHER = """
+MATCH (j:Job)-[:REQUIRES]->(s:Skill)
+WITH j, collect(s.name) AS skills
+RETURN coalesce(j.city, '') AS city, skills
+"""
+
+
+def count_skill_pairs(job_skills: Iterable[Tuple[str, List[str]]]) -> Tuple[Counter, Counter]:
+    """
+    统计技能对共现次数
+
+    Args:
+        job_skills: 每个岗位的 (城市, 技能名列表)
+
+    Returns:
+        (全局计数 {(s1, s2): n}, 按城市计数 {(city, s1, s2): n})，s1 < s2
+    """
+    global_counts = Counter()
+    city_counts = Counter()
+    for city, skills in job_skills:
+        for s1, s2 in combinations(sorted(set(skills)), 2):
+            global_counts[(s1, s2)] += 1
+            if city:
+                city_counts[(city, s1, s2)] += 1
+    return global_counts, city_counts
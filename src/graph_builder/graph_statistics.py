@@ -0,0 +1,247 @@
+"""
+图谱统计（技能需求量 / 平均薪资，公司岗位数 / 平均薪资 / TOP 技能）的进程内计算
+岗位 -> 公司序号、技能序号后，用 bincount / unique 做分组归约，一次扫描得到全部统计，
+代替三条全图聚合 Cypher（其中公司 TOP 技能需要展开每条 Company<-Job->Skill 路径）。
+
+增量导入只对变化的岗位求增量（新增 / 新版本记 +1，删除 / 旧版本记 -1），再与节点上已有的计数合并：
+- 平均薪资以节点上的非空薪资样本数（salary_min_samples / salary_max_samples）为权重，
+  与增量的薪资和 / 样本数合并；缺少样本数的旧节点退回以 demand_count / job_count 为权重
+- 公司 TOP 技能以 top_skills + top_skill_counts 为已有计数，合并后重新取前 N；
+  跌出前 N 的技能不再保留计数，长期增量后可用全量 update_statistics 校正
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# (company_id 或 None, salary_min, salary_max, 技能名列表)
+JobStatRow = Tuple[Optional[str], Optional[float], Optional[float], Sequence[str]]
+
+SKILL_STATS_CYPHER = """
+UNWIND $rows AS row
+MATCH (s:Skill {name: row.name})
+SET s.demand_count = row.demand_count,
+    s.avg_salary_min = row.avg_salary_min,
+    s.avg_salary_max = row.avg_salary_max,
+    s.salary_min_samples = row.salary_min_samples,
+    s.salary_max_samples = row.salary_max_samples,
+    s.updated_at = datetime()
+RETURN count(s) AS updated
+"""
+
+COMPANY_STATS_CYPHER = """
+UNWIND $rows AS row
+MATCH (c:Company {company_id: row.company_id})
+SET c.job_count = row.job_count,
+    c.avg_salary_min = row.avg_salary_min,
+    c.avg_salary_max = row.avg_salary_max,
+    c.salary_min_samples = row.salary_min_samples,
+    c.salary_max_samples = row.salary_max_samples,
+    c.top_skills = row.top_skills,
+    c.top_skill_counts = row.top_skill_counts
+RETURN count(c) AS updated
+"""
+
+# 线性扫描一次图谱得到每个岗位的统计行（内存中没有完整岗位数据时使用）
+JOB_STAT_SNAPSHOT_CYPHER = """
+MATCH (j:Job)
+OPTIONAL MATCH (j)-[:POSTED_BY]->(c:Company)
+OPTIONAL MATCH (j)-[:REQUIRES]->(s:Skill)
+RETURN j.job_id AS job_id, c.company_id AS company_id, coalesce(j.city, '') AS city,
+       j.salary_min AS salary_min, j.salary_max AS salary_max, collect(DISTINCT s.name) AS skills
+"""
+
+EXISTING_SKILL_STATS_CYPHER = """
+MATCH (s:Skill) WHERE s.name IN $names
+RETURN s.name AS name, s.demand_count AS demand_count,
+       s.avg_salary_min AS avg_salary_min, s.avg_salary_max AS avg_salary_max,
+       s.salary_min_samples AS salary_min_samples, s.salary_max_samples AS salary_max_samples
+"""
+
+EXISTING_COMPANY_STATS_CYPHER = """
+MATCH (c:Company) WHERE c.company_id IN $ids
+RETURN c.company_id AS company_id, c.job_count AS job_count,
+       c.avg_salary_min AS avg_salary_min, c.avg_salary_max AS avg_salary_max,
+       c.salary_min_samples AS salary_min_samples, c.salary_max_samples AS salary_max_samples,
+       c.top_skills AS top_skills, c.top_skill_counts AS top_skill_counts
+"""
+
+
+def _salary(values: List) -> np.ndarray:
+    """None / 非数值 -> NaN（与 Cypher AVG 忽略 null 一致）"""
+    return np.array([v if isinstance(v, (int, float)) else np.nan for v in values], dtype=np.float64)
+
+
+def _grouped_sum(groups: np.ndarray, values: np.ndarray, signs: np.ndarray,
+                 size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """按组求（带符号的）薪资和 / 非空样本数"""
+    present = ~np.isnan(values)
+    sums = np.bincount(groups[present], weights=values[present] * signs[present], minlength=size)
+    samples = np.rint(np.bincount(groups[present], weights=signs[present], minlength=size)).astype(np.int64)
+    return sums, samples
+
+
+def _count(groups: np.ndarray, signs: np.ndarray, size: int) -> np.ndarray:
+    return np.rint(np.bincount(groups, weights=signs, minlength=size)).astype(np.int64)
+
+
+def _mean(total: float, samples: int) -> Optional[float]:
+    return float(total / samples) if samples > 0 else None
+
+
+def aggregate_statistics(jobs: Iterable[JobStatRow], top_n: Optional[int] = 10,
+                         signs: Optional[Sequence[int]] = None) -> Tuple[List[Dict], List[Dict]]:
+    """
+    一次扫描计算技能与公司统计
+
+    Args:
+        jobs: 岗位统计行
+        top_n: 每家公司保留的 TOP 技能数，None 表示全部保留（求增量时使用）
+        signs: 与 jobs 对应的 +1 / -1，默认全部 +1；-1 表示扣除该岗位原先的贡献
+
+    Returns:
+        (技能行, 公司行)。行内带 *_sum / *_samples（薪资和与非空样本数），供增量合并使用
+    """
+    skill_index: Dict[str, int] = {}
+    company_index: Dict[str, int] = {}
+    job_company, salary_min, salary_max = [], [], []
+    pair_job, pair_skill = [], []
+    for n, (company_id, s_min, s_max, skills) in enumerate(jobs):
+        job_company.append(company_index.setdefault(company_id, len(company_index)) if company_id else -1)
+        salary_min.append(s_min)
+        salary_max.append(s_max)
+        for name in set(skills):
+            pair_job.append(n)
+            pair_skill.append(skill_index.setdefault(name, len(skill_index)))
+
+    job_company = np.array(job_company, dtype=np.int64)
+    salary_min, salary_max = _salary(salary_min), _salary(salary_max)
+    job_sign = (np.ones(len(job_company), dtype=np.float64) if signs is None
+                else np.asarray(signs, dtype=np.float64))
+    pair_job = np.array(pair_job, dtype=np.int64)
+    pair_skill = np.array(pair_skill, dtype=np.int64)
+    pair_sign = job_sign[pair_job]
+    n_skills, n_companies = len(skill_index), len(company_index)
+
+    # 技能：按技能序号归约 REQUIRES 对
+    demand = _count(pair_skill, pair_sign, n_skills)
+    skill_min, skill_min_n = _grouped_sum(pair_skill, salary_min[pair_job], pair_sign, n_skills)
+    skill_max, skill_max_n = _grouped_sum(pair_skill, salary_max[pair_job], pair_sign, n_skills)
+    skill_rows = [
+        {
+            "name": name,
+            "demand_count": int(demand[k]),
+            "avg_salary_min": _mean(skill_min[k], skill_min_n[k]),
+            "avg_salary_max": _mean(skill_max[k], skill_max_n[k]),
+            "salary_min_sum": float(skill_min[k]),
+            "salary_min_samples": int(skill_min_n[k]),
+            "salary_max_sum": float(skill_max[k]),
+            "salary_max_samples": int(skill_max_n[k]),
+        }
+        for name, k in skill_index.items()
+    ]
+
+    # 公司：按公司序号归约岗位
+    posted = job_company >= 0
+    companies = job_company[posted]
+    job_count = _count(companies, job_sign[posted], n_companies)
+    company_min, company_min_n = _grouped_sum(companies, salary_min[posted], job_sign[posted], n_companies)
+    company_max, company_max_n = _grouped_sum(companies, salary_max[posted], job_sign[posted], n_companies)
+
+    # 公司 × 技能计数：组合键分组计数后按 (公司, 计数降序, 技能序号) 排序，每家公司取前 top_n
+    top: List[Tuple[List[str], List[int]]] = [([], []) for _ in range(n_companies)]
+    pair_company = job_company[pair_job]
+    keep = pair_company >= 0
+    if keep.any() and n_skills:
+        keys, inverse = np.unique(pair_company[keep] * n_skills + pair_skill[keep], return_inverse=True)
+        counts = np.rint(np.bincount(inverse, weights=pair_sign[keep])).astype(np.int64)
+        nonzero = counts != 0
+        keys, counts = keys[nonzero], counts[nonzero]
+        company_of, skill_of = keys // n_skills, keys % n_skills
+        order = np.lexsort((skill_of, -counts, company_of))
+        company_of, skill_of, counts = company_of[order], skill_of[order], counts[order]
+        selected = np.ones(len(company_of), dtype=bool)
+        if top_n is not None and len(company_of):
+            starts = np.flatnonzero(np.r_[True, company_of[1:] != company_of[:-1]])
+            rank = np.arange(len(company_of)) - np.repeat(starts, np.diff(np.r_[starts, len(company_of)]))
+            selected = rank < top_n
+        skill_names = list(skill_index)
+        for c, s, cnt in zip(company_of[selected].tolist(), skill_of[selected].tolist(),
+                             counts[selected].tolist()):
+            top[c][0].append(skill_names[s])
+            top[c][1].append(cnt)
+
+    company_rows = [
+        {
+            "company_id": company_id,
+            "job_count": int(job_count[k]),
+            "avg_salary_min": _mean(company_min[k], company_min_n[k]),
+            "avg_salary_max": _mean(company_max[k], company_max_n[k]),
+            "salary_min_sum": float(company_min[k]),
+            "salary_min_samples": int(company_min_n[k]),
+            "salary_max_sum": float(company_max[k]),
+            "salary_max_samples": int(company_max_n[k]),
+            "top_skills": top[k][0],
+            "top_skill_counts": top[k][1],
+        }
+        for company_id, k in company_index.items()
+    ]
+    return skill_rows, company_rows
+
+
+def _merge_mean(old_avg: Optional[float], old_samples: int,
+                delta_sum: float, delta_samples: int) -> Tuple[Optional[float], int]:
+    """已有均值（以 old_samples 为样本数）+ 增量薪资和 / 样本数 -> (均值, 样本数)"""
+    weight = old_samples if old_avg is not None else 0
+    samples = weight + delta_samples
+    if samples <= 0:
+        return None, 0
+    if not delta_samples and not delta_sum:
+        return old_avg, samples
+    return ((old_avg or 0.0) * weight + delta_sum) / samples, samples
+
+
+def _merge_salary(row: Dict, existing: Dict, delta: Dict, old_count: int) -> None:
+    """合并薪资均值并写入 row；旧节点没有样本数时以岗位数近似"""
+    for field in ("min", "max"):
+        old_samples = existing.get(f'salary_{field}_samples')
+        if old_samples is None:
+            old_samples = old_count
+        avg, samples = _merge_mean(existing.get(f'avg_salary_{field}'), old_samples,
+                                   delta[f"salary_{field}_sum"], delta[f"salary_{field}_samples"])
+        row[f"avg_salary_{field}"] = avg
+        row[f"salary_{field}_samples"] = samples
+
+
+def merge_skill_statistics(delta: Dict, existing: Optional[Dict]) -> Dict:
+    """技能增量 + 节点上已有计数 -> 写回行"""
+    existing = existing or {}
+    old_count = existing.get('demand_count') or 0
+    row = {
+        "name": delta["name"],
+        "demand_count": max(old_count + delta["demand_count"], 0),
+    }
+    _merge_salary(row, existing, delta, old_count)
+    return row
+
+
+def merge_company_statistics(delta: Dict, existing: Optional[Dict], top_n: int = 10) -> Dict:
+    """公司增量 + 节点上已有计数 -> 写回行"""
+    existing = existing or {}
+    old_count = existing.get('job_count') or 0
+    skill_counts: Dict[str, int] = {}
+    old_skills = existing.get('top_skills') or []
+    old_counts = existing.get('top_skill_counts') or []
+    for name, count in zip(old_skills, old_counts):
+        skill_counts[name] = count
+    for name, count in zip(delta["top_skills"], delta["top_skill_counts"]):
+        skill_counts[name] = skill_counts.get(name, 0) + count
+    ranked = sorted(((name, count) for name, count in skill_counts.items() if count > 0),
+                    key=lambda item: -item[1])[:top_n]
+    row = {
+        "company_id": delta["company_id"],
+        "job_count": max(old_count + delta["job_count"], 0),
+        "top_skills": [name for name, _ in ranked],
+        "top_skill_counts": [count for _, count in ranked],
+    }
+    _merge_salary(row, existing, delta, old_count)
+    return row
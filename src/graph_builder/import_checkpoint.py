@@ -0,0 +1,139 @@
+"""
+可断点续传的全量导入
+按文件、按批次流式读取岗位（内存中最多一个文件 / 一个批次），每个批次提交后原子写入检查点
+data/import_checkpoint.json：(文件序号, 文件内偏移, 数据版本 generation, 已完成的阶段)。
+中断后重新运行会从最后一个检查点继续：已完成的批次与后处理阶段直接跳过。
+
+检查点记录每个数据文件的大小与修改时间，文件变化或数据版本被其他导入推进后不再续传。
+.json 文件整体读入（每次一个文件），.jsonl 文件逐行读取。
+"""
+import json
+import logging
+import os
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+project_root = Path(__file__).parent.parent.parent
+DEFAULT_CHECKPOINT_PATH = project_root / 'data' / 'import_checkpoint.json'
+
+# 岗位写完之后的阶段，按顺序执行
+POST_IMPORT_STAGES = ("skill_relationships", "co_occurrence", "statistics", "position_profiles", "generation")
+
+
+def file_fingerprint(path: Path) -> Dict:
+    stat = Path(path).stat()
+    return {"path": str(path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+@dataclass
+class ImportCheckpoint:
+    files: List[Dict] = field(default_factory=list)
+    generation: int = 0
+    skills_imported: bool = False
+    file_index: int = 0
+    offset: int = 0
+    jobs_written: int = 0
+    stages_done: List[str] = field(default_factory=list)
+    started_at: str = ""
+    updated_at: str = ""
+
+    @classmethod
+    def start(cls, data_paths: List[Path], generation: int) -> "ImportCheckpoint":
+        now = datetime.now().isoformat()
+        return cls(files=[file_fingerprint(p) for p in data_paths], generation=generation,
+                   started_at=now, updated_at=now)
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_CHECKPOINT_PATH) -> Optional["ImportCheckpoint"]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def save(self, path: Path = DEFAULT_CHECKPOINT_PATH) -> None:
+        """先写临时文件并 fsync，再原子替换，进程在任意时刻被杀都不会留下半个检查点"""
+        self.updated_at = datetime.now().isoformat()
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(asdict(self), f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def clear(path: Path = DEFAULT_CHECKPOINT_PATH) -> None:
+        Path(path).unlink(missing_ok=True)
+
+    @property
+    def finished(self) -> bool:
+        return "generation" in self.stages_done
+
+    def resumable_for(self, data_paths: List[Path], generation: int) -> Tuple[bool, str]:
+        """能否用于续传本次导入；不能时返回原因"""
+        if self.finished:
+            return False, "上次导入已完成"
+        try:
+            current = [file_fingerprint(p) for p in data_paths]
+        except OSError as e:
+            return False, f"数据文件不可读: {e}"
+        if current != self.files:
+            return False, "数据文件已变化"
+        # 只差递增数据版本时（可能已递增但检查点未落盘），版本变化不影响续传
+        if generation != self.generation and set(self.stages_done) != set(POST_IMPORT_STAGES[:-1]):
+            return False, f"数据版本已变化（{self.generation} -> {generation}），期间有其他导入"
+        return True, ""
+
+    def describe(self) -> str:
+        total = len(self.files)
+        if self.file_index >= total:
+            return f"岗位已全部写入（{self.jobs_written} 个），已完成阶段: {self.stages_done or '无'}"
+        name = Path(self.files[self.file_index]['path']).name
+        return f"文件 {self.file_index + 1}/{total}（{name}）偏移 {self.offset}，已写入 {self.jobs_written} 个岗位"
+
+
+def _read_jobs(path: Path, offset: int) -> Iterator[Dict]:
+    """从 offset 开始逐个产出岗位"""
+    if path.suffix == '.jsonl':
+        with open(path, 'r', encoding='utf-8') as f:
+            index = 0
+            for line in f:
+                if not line.strip():
+                    continue
+                if index >= offset:
+                    yield json.loads(line)
+                index += 1
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            jobs = json.load(f)
+        for job in jobs[offset:]:
+            yield job
+
+
+def iter_job_batches(checkpoint: ImportCheckpoint, batch_size: int) -> Iterator[Tuple[int, int, List[Dict]]]:
+    """
+    从检查点位置开始按批产出岗位
+
+    Yields:
+        (文件序号, 该批之后的文件内偏移, 岗位批次)；每个文件读完后额外产出一次空批次用于推进到下一个文件
+    """
+    for file_index in range(checkpoint.file_index, len(checkpoint.files)):
+        path = Path(checkpoint.files[file_index]['path'])
+        offset = checkpoint.offset if file_index == checkpoint.file_index else 0
+        batch: List[Dict] = []
+        for job in _read_jobs(path, offset):
+            batch.append(job)
+            if len(batch) >= batch_size:
+                offset += len(batch)
+                yield file_index, offset, batch
+                batch = []
+        if batch:
+            offset += len(batch)
+            yield file_index, offset, batch
+        yield file_index + 1, 0, []
@@ -0,0 +1,341 @@
+"""
+图谱增量同步
+每个岗位写入图谱时按写入内容计算哈希，连同统计所需的快照（公司、城市、薪资、技能）记录在
+SQLite 旁路清单（data/graph_sync_manifest.db）中。再次同步时把输入岗位分为
+新增 / 变更 / 未变 / 删除 四类，只对新增与变更岗位做 UNWIND 批量写入、删除岗位 DETACH DELETE，
+随后按这批增量（新版本 +1，旧版本与删除 -1）合并技能 / 公司统计与 CO_OCCURS 计数。
+
+清单记录与之对应的图谱数据版本（DataVersion generation）。岗位数不一致（首次启用）或数据版本不一致
+（图谱经全量导入 / 离线 CSV 重建，岗位数可能不变而内容已变）时，先从图谱线性扫描一次重建快照；
+这些岗位的哈希未知，下次同步时若出现在输入中会按变更重写一次。
+
+每个批次提交后先合并该批的统计 / 共现增量，再写清单：中途失败时未写入清单的岗位下次会重新同步，
+不会出现“清单已记为同步、统计却未更新”的情况。
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.graph_builder.bulk_writer import BisectingBatchWriter, prepare_job_rows, write_job_batch
+from src.graph_builder.graph_statistics import JOB_STAT_SNAPSHOT_CYPHER
+from src.utils.data_version import READ_GENERATION_CYPHER
+
+logger = logging.getLogger(__name__)
+
+project_root = Path(__file__).parent.parent.parent
+DEFAULT_MANIFEST_PATH = project_root / 'data' / 'graph_sync_manifest.db'
+
+# 变更岗位重写前先删掉旧的 REQUIRES / POSTED_BY，避免技能被移除或换公司后残留旧边
+DETACH_JOB_EDGES_CYPHER = """
+UNWIND $ids AS id
+MATCH (j:Job {job_id: id})-[r:REQUIRES|POSTED_BY]->()
+DELETE r
+"""
+
+DELETE_JOBS_CYPHER = """
+UNWIND $ids AS id
+MATCH (j:Job {job_id: id})
+DETACH DELETE j
+RETURN count(*) AS deleted
+"""
+
+# 写入时间戳不参与哈希
+_VOLATILE_KEYS = ("created_at", "extracted_at")
+
+# SQLite 单条语句的参数个数上限（旧版本为 999）
+_SQLITE_CHUNK = 500
+
+
+def content_hash(row: Dict) -> str:
+    """写入行（build_job_row 的结果）的内容哈希"""
+    payload = {
+        "props": {k: v for k, v in row["props"].items() if k not in _VOLATILE_KEYS},
+        "company": None if row["company"] is None else {
+            "company_id": row["company"]["company_id"],
+            "props": {k: v for k, v in row["company"]["props"].items() if k not in _VOLATILE_KEYS},
+        },
+        "post_date": row["post_date"],
+        "skills": sorted(row["skills"]),
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+
+@dataclass
+class JobSnapshot:
+    """清单中记录的岗位快照：哈希 + 计算统计 / 共现增量所需的字段"""
+    job_id: str
+    content_hash: Optional[str]
+    company_id: Optional[str]
+    city: str
+    salary_min: Optional[float]
+    salary_max: Optional[float]
+    skills: List[str]
+
+    @classmethod
+    def from_row(cls, row: Dict) -> "JobSnapshot":
+        return cls(
+            job_id=row["job_id"],
+            content_hash=content_hash(row),
+            company_id=row["company"]["company_id"] if row["company"] is not None else None,
+            city=row["city"] or '',
+            salary_min=row["props"]["salary_min"],
+            salary_max=row["props"]["salary_max"],
+            skills=list(row["skills"]),
+        )
+
+    @property
+    def stat_row(self) -> Tuple:
+        return self.company_id, self.salary_min, self.salary_max, self.skills
+
+    @property
+    def city_skills(self) -> Tuple[str, List[str]]:
+        return self.city, sorted(self.skills)
+
+
+class SyncManifest:
+    """job_id -> JobSnapshot 的 SQLite 旁路清单"""
+
+    def __init__(self, path: Path = DEFAULT_MANIFEST_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id       TEXT PRIMARY KEY,
+                content_hash TEXT,
+                company_id   TEXT,
+                city         TEXT NOT NULL,
+                salary_min   REAL,
+                salary_max   REAL,
+                skills       TEXT NOT NULL,
+                synced_at    REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+
+    def get_generation(self) -> Optional[int]:
+        """清单对应的图谱数据版本，未记录时返回 None"""
+        row = self._conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        return int(row[0]) if row and row[0] is not None else None
+
+    def set_generation(self, generation: Optional[int]) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('generation', ?)",
+                           (None if generation is None else str(generation),))
+        self._conn.commit()
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT count(*) FROM jobs").fetchone()[0]
+
+    def get_many(self, job_ids: Iterable[str]) -> Dict[str, JobSnapshot]:
+        job_ids = list(job_ids)
+        found = {}
+        for i in range(0, len(job_ids), _SQLITE_CHUNK):
+            chunk = job_ids[i:i + _SQLITE_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for row in self._conn.execute(
+                f"SELECT job_id, content_hash, company_id, city, salary_min, salary_max, skills "
+                f"FROM jobs WHERE job_id IN ({placeholders})", chunk
+            ):
+                found[row[0]] = JobSnapshot(*row[:6], skills=json.loads(row[6]))
+        return found
+
+    def all_ids(self) -> List[str]:
+        return [row[0] for row in self._conn.execute("SELECT job_id FROM jobs")]
+
+    def upsert(self, snapshots: Iterable[JobSnapshot]) -> None:
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(s.job_id, s.content_hash, s.company_id, s.city, s.salary_min, s.salary_max,
+              json.dumps(s.skills, ensure_ascii=False), now) for s in snapshots]
+        )
+        self._conn.commit()
+
+    def clear(self) -> None:
+        self._conn.execute("DELETE FROM jobs")
+        self._conn.commit()
+
+    def delete(self, job_ids: Iterable[str]) -> None:
+        self._conn.executemany("DELETE FROM jobs WHERE job_id = ?", [(job_id,) for job_id in job_ids])
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+@dataclass
+class SyncPlan:
+    """一次同步的分类结果"""
+    new: List[Dict] = field(default_factory=list)              # 写入行
+    changed: List[Dict] = field(default_factory=list)          # 写入行
+    previous: Dict[str, JobSnapshot] = field(default_factory=dict)  # 变更 / 删除岗位的旧快照
+    removed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    invalid: List[Tuple[str, str]] = field(default_factory=list)
+
+    @property
+    def empty(self) -> bool:
+        return not (self.new or self.changed or self.removed)
+
+    def summary(self) -> Dict[str, int]:
+        return {
+            "new": len(self.new),
+            "changed": len(self.changed),
+            "unchanged": self.unchanged,
+            "removed": len(self.removed),
+            "invalid": len(self.invalid),
+        }
+
+
+class IncrementalGraphSync:
+    """按内容哈希只同步变化的岗位，并增量维护统计与共现计数"""
+
+    def __init__(self, importer, manifest: Optional[SyncManifest] = None, batch_size: int = 10000):
+        """
+        Args:
+            importer: Neo4jImporter（提供 graph、技能标准化与统计 / 共现增量写入）
+            manifest: 旁路清单，默认 data/graph_sync_manifest.db
+            batch_size: 每批写入 / 删除的岗位数
+        """
+        self.importer = importer
+        self.graph = importer.graph
+        self.manifest = manifest or SyncManifest()
+        self.batch_size = batch_size
+
+    def bootstrap(self) -> int:
+        """
+        清单与图谱岗位数或数据版本不一致时（首次启用、或图谱经全量导入重建）从图谱重新生成快照（哈希未知）
+
+        Returns:
+            记录的岗位数，清单可用时返回 0
+        """
+        graph_jobs = self.graph.run("MATCH (j:Job) RETURN count(j) AS count").data()[0]['count']
+        graph_generation = self.graph_generation()
+        manifest_jobs = self.manifest.count()
+        manifest_generation = self.manifest.get_generation()
+        if graph_jobs == manifest_jobs and graph_generation == manifest_generation:
+            return 0
+        if manifest_jobs:
+            logger.warning(f"同步清单（{manifest_jobs} 个岗位，版本 {manifest_generation}）与图谱"
+                           f"（{graph_jobs} 个岗位，版本 {graph_generation}）不一致，从图谱重建清单")
+            self.manifest.clear()
+        snapshots = [
+            JobSnapshot(r['job_id'], None, r['company_id'], r['city'], r['salary_min'], r['salary_max'],
+                        list(r['skills']))
+            for r in self.graph.run(JOB_STAT_SNAPSHOT_CYPHER) if r['job_id']
+        ]
+        if snapshots:
+            self.manifest.upsert(snapshots)
+            logger.info(f"已从图谱记录 {len(snapshots)} 个岗位快照")
+        self.manifest.set_generation(graph_generation)
+        return len(snapshots)
+
+    def graph_generation(self) -> Optional[int]:
+        """图谱中 DataVersion 节点记录的数据版本"""
+        rows = self.graph.run(READ_GENERATION_CYPHER).data()
+        return rows[0]['generation'] if rows and rows[0].get('generation') is not None else None
+
+    def mark_synced(self, generation: int) -> None:
+        """本次同步后递增数据版本时调用，清单随之对齐，下次同步不会因版本变化而重建"""
+        self.manifest.set_generation(generation)
+
+    def plan(self, jobs: Iterable[Dict], full_snapshot: bool = False) -> SyncPlan:
+        """
+        对输入岗位分类
+
+        Args:
+            jobs: 清洗后的岗位
+            full_snapshot: 输入是否为全量快照；是则清单中有、输入中没有的岗位判为删除
+        """
+        self.bootstrap()
+        known_skills = {r['name'] for r in self.graph.run("MATCH (s:Skill) RETURN s.name AS name").data()}
+        rows, invalid, _ = prepare_job_rows(jobs, self.importer.normalize_skill_name, known_skills)
+        # 同一岗位出现多次时以最后一次为准（与 MERGE 覆盖写入一致）
+        incoming = {row['job_id']: row for row in rows}
+        existing = self.manifest.get_many(incoming)
+
+        plan = SyncPlan(invalid=invalid)
+        for job_id, row in incoming.items():
+            previous = existing.get(job_id)
+            if previous is None:
+                plan.new.append(row)
+            elif previous.content_hash is not None and previous.content_hash == content_hash(row):
+                plan.unchanged += 1
+            else:
+                plan.changed.append(row)
+                plan.previous[job_id] = previous
+        if full_snapshot:
+            removed = [job_id for job_id in self.manifest.all_ids() if job_id not in incoming]
+            plan.previous.update(self.manifest.get_many(removed))
+            plan.removed = removed
+        logger.info(f"同步计划: {plan.summary()}")
+        return plan
+
+    def apply(self, plan: SyncPlan) -> Dict[str, int]:
+        """
+        写入新增 / 变更岗位、删除已下线岗位，并合并统计与共现增量
+
+        每个批次提交后先合并该批增量、再写清单，中途失败时清单只包含增量已合并的岗位
+        """
+        counters = {"written": 0, "deleted": 0}
+        changed_ids = {row['job_id'] for row in plan.changed}
+
+        def _write_batch(tx, rows: List[Dict]) -> Dict[str, int]:
+            stale = [row['job_id'] for row in rows if row['job_id'] in changed_ids]
+            if stale:
+                tx.run(DETACH_JOB_EDGES_CYPHER, ids=stale)
+            return write_job_batch(tx, rows)
+
+        def _on_success(rows: List[Dict], _counters: Dict[str, int]):
+            snapshots = [JobSnapshot.from_row(row) for row in rows]
+            replaced = [plan.previous[row['job_id']] for row in rows if row['job_id'] in changed_ids]
+            self._apply_deltas(snapshots, replaced)
+            self.manifest.upsert(snapshots)
+            counters["written"] += len(snapshots)
+
+        writer = BisectingBatchWriter(self.graph, write_batch=_write_batch, on_success=_on_success)
+        rows = plan.new + plan.changed
+        for i in range(0, len(rows), self.batch_size):
+            writer.write(rows[i:i + self.batch_size])
+
+        for i in range(0, len(plan.removed), self.batch_size):
+            ids = plan.removed[i:i + self.batch_size]
+            result = self.graph.run(DELETE_JOBS_CYPHER, ids=ids).data()
+            counters["deleted"] += result[0]['deleted'] if result else 0
+            self._apply_deltas([], [plan.previous[job_id] for job_id in ids if job_id in plan.previous])
+            self.manifest.delete(ids)
+
+        for job_id, error in writer.failed[:10]:
+            logger.warning(f"  - {job_id}: {error}")
+        return {
+            **plan.summary(),
+            **counters,
+            "failed": len(writer.failed),
+        }
+
+    def _apply_deltas(self, added: List[JobSnapshot], replaced: List[JobSnapshot]) -> None:
+        """合并一批岗位的统计 / 共现增量（新版本 +1，旧版本与删除 -1）"""
+        if not added and not replaced:
+            return
+        self.importer.apply_statistics_delta(
+            [s.stat_row for s in added], [s.stat_row for s in replaced]
+        )
+        self.importer.update_co_occurrence(
+            [s.city_skills for s in added], removed_job_skills=[s.city_skills for s in replaced]
+        )
+        self.importer.update_city_count()
+
+    def sync(self, jobs: Iterable[Dict], full_snapshot: bool = False, dry_run: bool = False) -> Dict[str, int]:
+        """分类并应用增量；dry_run 时只返回分类结果"""
+        plan = self.plan(jobs, full_snapshot=full_snapshot)
+        if dry_run or plan.empty:
+            return plan.summary()
+        return self.apply(plan)
@@ -2,13 +2,24 @@
 Neo4j数据导入模块
 将清洗后的招聘数据和技能关系导入Neo4j图数据库
 """
-from py2neo import Graph, Node, Relationship, NodeMatcher
-from typing import List, Dict
+from py2neo import Graph, Node
+from typing import List, Dict, Iterable, Tuple
 import logging
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from datetime import datetime
 from collections import Counter
 import math
 
+from src.graph_builder.bulk_writer import (
+    UPSERT_COMPANIES_CYPHER, BisectingBatchWriter, company_rows, prepare_job_rows, write_job_batch,
+)
+from src.graph_builder.co_occurrence import JOB_SKILLS_BY_CITY_CYPHER, count_skill_pairs
+from src.graph_builder.schema import GRAPH_CONSTRAINTS, GRAPH_INDEXES, OBSOLETE_INDEXES, SKILL_FULLTEXT_INDEX
+
 logger = logging.getLogger(__name__)
 
 
@@ -28,9 +39,10 @@ class Neo4jImporter:
             password: 密码
             skill_dictionary: SkillDictionary实例（用于技能标准化）
         """
+        self.uri = uri
+        self.auth = (user, password)
         try:
-            self.graph = Graph(uri, auth=(user, password))
-            self.matcher = NodeMatcher(self.graph)
+            self.graph = Graph(uri, auth=self.auth)
             logger.info(f"成功连接到Neo4j: {uri}")
         except Exception as e:
             logger.error(f"连接Neo4j失败: {e}")
@@ -42,6 +54,8 @@ class Neo4jImporter:
             'companies_created': 0,
             'requires_created': 0,
             'related_to_created': 0,
+            'co_occurs_written': 0,
+            'position_profiles': 0,
             'posted_by_created': 0,
             'skills_normalized': 0  # 标准化的技能数量
         }
@@ -49,6 +63,16 @@ class Neo4jImporter:
         # 用于跟踪已警告过的未定义技能，避免重复日志
         self._warned_skills = set()
         
+        # 本次新建岗位的 (城市, 技能名列表)，用于增量更新技能共现计数
+        self.new_job_skills: List[Tuple[str, List[str]]] = []
+        
+        # 最近一次 import_jobs 各 worker 的写入报告（串行导入时只有一项）
+        self.worker_reports: List[Dict] = []
+        self._stats_lock = threading.Lock()
+        
+        # 本次写入岗位的 job_id -> (是否新建, (company_id, salary_min, salary_max, 技能名列表))，用于进程内计算统计信息
+        self.job_stat_rows: Dict[str, Tuple[bool, Tuple]] = {}
+        
         # 技能词典（用于标准化）
         self.skill_dictionary = skill_dictionary
         
@@ -63,17 +87,7 @@ class Neo4jImporter:
         将所有别名映射到标准技能名称，用于技能标准化
         """
         logger.info("构建技能别名映射表...")
-        
-        for skill in self.skill_dictionary.all_skills:
-            standard_name = skill['name']
-            
-            # 标准名称也加入映射（自己映射到自己）
-            self._skill_alias_map[standard_name.lower()] = standard_name
-            
-            # 添加所有别名的映射
-            for alias in skill.get('aliases', []):
-                self._skill_alias_map[alias.lower()] = standard_name
-        
+        self._skill_alias_map = self.skill_dictionary.alias_map()
         logger.info(f"别名映射表构建完成，共 {len(self._skill_alias_map)} 个映射")
     
     def normalize_skill_name(self, skill_name: str) -> str:
@@ -104,14 +118,7 @@ class Neo4jImporter:
         logger.info("创建索引和约束...")
         
         # 创建约束（唯一性）
-        constraints = [
-            "CREATE CONSTRAINT skill_id IF NOT EXISTS FOR (s:Skill) REQUIRE s.skill_id IS UNIQUE",
-            "CREATE CONSTRAINT skill_name IF NOT EXISTS FOR (s:Skill) REQUIRE s.name IS UNIQUE",
-            "CREATE CONSTRAINT job_id IF NOT EXISTS FOR (j:Job) REQUIRE j.job_id IS UNIQUE",
-            "CREATE CONSTRAINT company_id IF NOT EXISTS FOR (c:Company) REQUIRE c.company_id IS UNIQUE",
-        ]
-        
-        for constraint in constraints:
+        for constraint in GRAPH_CONSTRAINTS:
             try:
                 self.graph.run(constraint)
                 logger.info(f"创建约束: {constraint.split()[2]}")
@@ -119,27 +126,22 @@ class Neo4jImporter:
                 logger.warning(f"约束可能已存在: {e}")
         
         # 创建索引
-        indexes = [
-            "CREATE INDEX skill_category_idx IF NOT EXISTS FOR (s:Skill) ON (s.category)",
-            "CREATE INDEX skill_hot_score_idx IF NOT EXISTS FOR (s:Skill) ON (s.hot_score)",
-            "CREATE INDEX job_city_idx IF NOT EXISTS FOR (j:Job) ON (j.city)",
-            "CREATE INDEX job_salary_idx IF NOT EXISTS FOR (j:Job) ON (j.salary_min, j.salary_max)",
-            "CREATE INDEX company_name_idx IF NOT EXISTS FOR (c:Company) ON (c.name)",
-        ]
-        
-        for index in indexes:
+        for index in GRAPH_INDEXES:
             try:
                 self.graph.run(index)
                 logger.info(f"创建索引: {index.split()[2]}")
             except Exception as e:
                 logger.warning(f"索引可能已存在: {e}")
         
+        for index in OBSOLETE_INDEXES:
+            try:
+                self.graph.run(index)
+            except Exception as e:
+                logger.warning(f"删除废弃索引失败: {e}")
+        
         # 创建全文索引（用于技能搜索）
         try:
-            self.graph.run(
-                "CREATE FULLTEXT INDEX skill_fulltext IF NOT EXISTS "
-                "FOR (s:Skill) ON EACH [s.name, s.aliases]"
-            )
+            self.graph.run(SKILL_FULLTEXT_INDEX)
             logger.info("创建全文索引: skill_fulltext")
         except Exception as e:
             logger.warning(f"全文索引可能已存在: {e}")
@@ -174,6 +176,8 @@ class Neo4jImporter:
                 demand_count=0,  # 初始值，后续更新
                 avg_salary_min=0.0,
                 avg_salary_max=0.0,
+                salary_min_samples=0,
+                salary_max_samples=0,
                 created_at=datetime.now().isoformat(),
                 updated_at=datetime.now().isoformat()
             )
@@ -186,85 +190,62 @@ class Neo4jImporter:
         
         return self.stats['skills_created']
     
-    def import_jobs(self, jobs: List[Dict], batch_size: int = 100) -> int:
+    def import_jobs(self, jobs: List[Dict], batch_size: int = 10000, workers: int = 1,
+                    track_new_jobs: bool = True) -> int:
         """
-        导入岗位节点和关系
+        导入岗位节点和关系（UNWIND 批量写入，失败批次二分重试定位坏数据）
         
         Args:
             jobs: 岗位列表
-            batch_size: 批处理大小
+            batch_size: 每批岗位数（建议 5000~20000）
+            workers: 并行写入的 worker 数；>1 时先建好全部公司节点，
+                再按 job_id 哈希把岗位分到各 worker，每个 worker 只写岗位及其出边
+            track_new_jobs: 是否记录本次写入的岗位供 update_co_occurrence / update_statistics 增量使用；
+                流式全量导入时关闭，避免在内存中累积全部岗位
             
         Returns:
             创建的岗位节点数
         """
-        logger.info(f"开始导入岗位节点和关系，共 {len(jobs)} 个岗位")
-        
-        company_cache = {}  # 公司缓存
-        skill_cache = {}    # 技能缓存
-        failed_jobs = []    # 记录失败的岗位
-        
-        for i in range(0, len(jobs), batch_size):
-            batch = jobs[i:i+batch_size]
-            
-            for job in batch:
-                tx = None
-                try:
-                    # 为每个岗位创建独立事务，避免一个失败影响整批
-                    tx = self.graph.begin()
-                    
-                    # 1. 创建岗位节点
-                    job_node = self._create_job_node(job, tx)
-                    
-                    # 2. 创建/获取公司节点
-                    company_node = self._get_or_create_company(
-                        job, company_cache, tx
-                    )
-                    
-                    # 3. 创建 POSTED_BY 关系
-                    if company_node:
-                        posted_by = Relationship(
-                            job_node, "POSTED_BY", company_node,
-                            post_date=job.get('publish_date', '')
-                        )
-                        tx.merge(posted_by)
-                        self.stats['posted_by_created'] += 1
-                    
-                    # 4. 创建 REQUIRES 关系（岗位要求技能）
-                    skills = job.get('skills', [])
-                    if isinstance(skills, list):
-                        for skill_name in skills:
-                            skill_node = self._get_skill_node(
-                                skill_name, skill_cache, tx
-                            )
-                            if skill_node:
-                                requires = Relationship(
-                                    job_node, "REQUIRES", skill_node,
-                                    importance="must",  # 可以从_extracted_skills获取更详细信息
-                                    source="explicit",
-                                    confidence=1.0,
-                                    extracted_at=datetime.now().isoformat()
-                                )
-                                tx.merge(requires)
-                                self.stats['requires_created'] += 1
-                    
-                    # 提交事务
-                    self.graph.commit(tx)
-                    self.stats['jobs_created'] += 1
-                    
-                except Exception as e:
-                    logger.error(f"导入岗位失败 {job.get('job_id')}: {e}")
-                    failed_jobs.append((job.get('job_id'), str(e)))
-                    # 回滚失败的事务
-                    if tx:
-                        try:
-                            self.graph.rollback(tx)
-                        except:
-                            pass
-                    continue
+        logger.info(f"开始导入岗位节点和关系，共 {len(jobs)} 个岗位（每批 {batch_size}，{workers} 个 worker）")
+        
+        known_skills = {r['name'] for r in self.graph.run("MATCH (s:Skill) RETURN s.name AS name").data()}
+        rows, failed_jobs, unknown = prepare_job_rows(jobs, self.normalize_skill_name, known_skills)
+        for skill_name in unknown - self._warned_skills:
+            logger.debug(f"跳过未定义的技能: {skill_name}")
+        self._warned_skills |= unknown
+        for job_id, error in failed_jobs:
+            logger.error(f"导入岗位失败 {job_id}: {error}")
+        
+        if workers <= 1:
+            self.worker_reports = [self._write_job_rows(self.graph, rows, batch_size, write_job_batch, 0,
+                                                         track_new_jobs)]
+        else:
+            # 1. 公司节点串行预建（Skill 节点已由 import_skills_from_dictionary 创建）
+            companies = company_rows(rows)
+            for i in range(0, len(companies), batch_size):
+                stats = self.graph.run(UPSERT_COMPANIES_CYPHER, rows=companies[i:i + batch_size]).stats()
+                self.stats['companies_created'] += stats.get('nodes_created', 0)
+            logger.info(f"公司节点预建完成: {len(companies)} 个")
             
-            if (i + batch_size) % 1000 == 0 or (i + batch_size) >= len(jobs):
-                logger.info(f"已处理 {min(i+batch_size, len(jobs))}/{len(jobs)} 个岗位，成功: {self.stats['jobs_created']}, 失败: {len(failed_jobs)}")
-        
+            # 2. 岗位按 job_id 哈希分区，各 worker 使用独立连接
+            partitions: List[List[Dict]] = [[] for _ in range(workers)]
+            for row in rows:
+                partitions[zlib.crc32(str(row['job_id']).encode('utf-8')) % workers].append(row)
+            write_batch = partial(write_job_batch, upsert_companies=False)
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job-import') as pool:
+                futures = [
+                    pool.submit(self._write_job_rows, Graph(self.uri, auth=self.auth), part, batch_size,
+                                write_batch, worker_id, track_new_jobs)
+                    for worker_id, part in enumerate(partitions)
+                ]
+                self.worker_reports = [future.result() for future in futures]
+        
+        for report in self.worker_reports:
+            failed_jobs.extend(report.pop('failed_jobs'))
+            if workers > 1:
+                logger.info(f"worker {report['worker']}: {report['jobs']} 个岗位, {report['seconds']}s, "
+                            f"{report['jobs_per_sec']} 岗位/s, 事务 {report['transactions']}, "
+                            f"重试 {report['retried']}, 失败 {report['failed']}")
         if failed_jobs:
             logger.warning(f"共有 {len(failed_jobs)} 个岗位导入失败")
             # 只显示前10个失败案例
@@ -274,205 +255,427 @@ class Neo4jImporter:
         logger.info(f"岗位导入完成: {self.stats['jobs_created']} 个")
         return self.stats['jobs_created']
     
-    def _create_job_node(self, job: Dict, tx) -> Node:
-        """创建岗位节点"""
-        job_node = Node(
-            "Job",
-            job_id=job['job_id'],
-            title=job.get('title', ''),
-            city=job.get('city', ''),
-            district=job.get('district', ''),
-            business_district=job.get('business_district', ''),
-            salary_min=job.get('salary_min', 0),
-            salary_max=job.get('salary_max', 0),
-            salary_text=job.get('salary_text', ''),
-            experience=job.get('experience', ''),
-            education=job.get('education', ''),
-            publish_date=job.get('publish_date', ''),
-            source=job.get('source', ''),
-            welfare=job.get('welfare', []),
-            jd_text=job.get('jd_text', ''),
-            skill_count=len(job.get('skills', [])),
-            created_at=datetime.now().isoformat()
-        )
-        
-        tx.merge(job_node, "Job", "job_id")
-        return job_node
-    
-    def _get_or_create_company(self, job: Dict, cache: Dict, tx) -> Node:
-        """获取或创建公司节点"""
-        company_name = job.get('company', '').strip()
-        if not company_name:
-            return None
-        
-        # 检查缓存
-        if company_name in cache:
-            return cache[company_name]
-        
-        # 生成公司ID
-        company_id = f"company_{company_name.lower().replace(' ', '_')}"
-        
-        # 尝试从数据库获取
-        company_node = self.matcher.match("Company", company_id=company_id).first()
-        
-        if not company_node:
-            # 创建新公司节点
-            company_node = Node(
-                "Company",
-                company_id=company_id,
-                name=company_name,
-                industry=job.get('company_industry', ''),
-                size=job.get('company_size', ''),
-                stage=job.get('company_stage', ''),
-                city=job.get('city', ''),
-                job_count=0,  # 后续更新
-                avg_salary_min=0.0,
-                avg_salary_max=0.0,
-                top_skills=[],
-                created_at=datetime.now().isoformat()
-            )
-            tx.merge(company_node, "Company", "company_id")
-            self.stats['companies_created'] += 1
+    def _write_job_rows(self, graph, rows: List[Dict], batch_size: int, write_batch, worker_id: int,
+                        track_new_jobs: bool = True) -> Dict:
+        """按批写入一组岗位行（串行导入或单个 worker 的分区），返回该 worker 的写入报告"""
+        existing_ids: set = set()
+        
+        def _on_success(batch_rows: List[Dict], counters: Dict[str, int]):
+            with self._stats_lock:
+                self.stats['jobs_created'] += len(batch_rows)
+                self.stats['companies_created'] += counters['companies_created']
+                self.stats['posted_by_created'] += counters['posted_by_created']
+                self.stats['requires_created'] += counters['requires_created']
+                if not track_new_jobs:
+                    return
+                # 只有新建岗位才计入技能共现增量
+                self.new_job_skills.extend(
+                    (r['city'], sorted(r['skills'])) for r in batch_rows if r['job_id'] not in existing_ids
+                )
+                for r in batch_rows:
+                    previous = self.job_stat_rows.get(r['job_id'])
+                    is_new = previous[0] if previous else r['job_id'] not in existing_ids
+                    company_id = r['company']['company_id'] if r['company'] is not None else None
+                    self.job_stat_rows[r['job_id']] = (
+                        is_new, (company_id, r['props']['salary_min'], r['props']['salary_max'], r['skills'])
+                    )
         
-        # 添加到缓存
-        cache[company_name] = company_node
-        return company_node
+        started = time.perf_counter()
+        writer = BisectingBatchWriter(graph, write_batch=write_batch, on_success=_on_success)
+        for i in range(0, len(rows), batch_size):
+            batch = rows[i:i+batch_size]
+            if track_new_jobs:
+                existing_ids = {
+                    r['job_id'] for r in graph.run(
+                        "MATCH (j:Job) WHERE j.job_id IN $ids RETURN j.job_id AS job_id",
+                        ids=[r['job_id'] for r in batch]
+                    ).data()
+                }
+            writer.write(batch)
+            logger.info(f"[worker {worker_id}] 已处理 {min(i+batch_size, len(rows))}/{len(rows)} 个岗位，"
+                        f"失败: {len(writer.failed)}")
+        seconds = time.perf_counter() - started
+        return {
+            "worker": worker_id,
+            "jobs": len(rows) - len(writer.failed),
+            "failed": len(writer.failed),
+            "transactions": writer.transactions,
+            "retried": writer.retried,
+            "seconds": round(seconds, 3),
+            "jobs_per_sec": round((len(rows) - len(writer.failed)) / seconds, 1) if seconds > 0 else 0.0,
+            "failed_jobs": writer.failed,
+        }
     
-    def _get_skill_node(self, skill_name: str, cache: Dict, tx) -> Node:
+    def build_skill_relationships(self, min_co_occurrence: int = 10, metric: str = "correlation",
+                                  min_score: float = None, batch_size: int = 5000) -> int:
         """
-        获取技能节点（只使用已存在的技能，不自动创建）
-        支持技能标准化：自动将别名映射到标准名称
+        构建技能关联关系
+        基于岗位共现频率计算技能之间的关联度：流式读取每个岗位的技能构建 岗位×技能 稀疏矩阵，
+        共现 = Xᵀ·X，correlation（余弦）/ PMI / lift 在进程内向量化计算后 UNWIND 批量写入
         
         Args:
-            skill_name: 技能名称（可能是别名）
-            cache: 缓存字典
-            tx: 事务对象
+            min_co_occurrence: 最小共现次数阈值
+            metric: 二次过滤使用的分数（co_occurrence / correlation / pmi / lift）
+            min_score: metric 的下限，默认只按共现次数过滤
+            batch_size: UNWIND 每批写入的关系数
             
         Returns:
-            技能节点（如果存在），否则返回None
-        """
-        # 步骤1：技能标准化（别名 -> 标准名称）
-        normalized_name = self.normalize_skill_name(skill_name)
-        
-        # 步骤2：检查缓存
-        if normalized_name in cache:
-            return cache[normalized_name]
-        
-        # 步骤3：从数据库获取（使用标准化后的名称）
-        skill_node = self.matcher.match("Skill", name=normalized_name).first()
-        
-        if skill_node:
-            cache[normalized_name] = skill_node
-            # 也缓存原始名称，避免重复标准化
-            if skill_name != normalized_name:
-                cache[skill_name] = skill_node
-            return skill_node
-        else:
-            # 技能不在skill_taxonomy.json中，跳过
-            # 使用debug级别避免日志过多
-            if skill_name not in self._warned_skills:
-                logger.debug(f"跳过未定义的技能: {skill_name}")
-                self._warned_skills.add(skill_name)
-            return None
-    
-    def build_skill_relationships(self, min_co_occurrence: int = 10):
+            写入的关系数
         """
-        构建技能关联关系
-        基于岗位共现频率计算技能之间的关联度
+        from src.graph_builder.skill_correlation import (
+            JOB_SKILL_IDS_CYPHER, SkillMatrixBuilder, related_skill_rows,
+        )
         
-        Args:
-            min_co_occurrence: 最小共现次数阈值
-        """
         logger.info("开始构建技能关联关系...")
         
-        # Cypher查询：计算技能共现
-        query = f"""
-        MATCH (s1:Skill)<-[:REQUIRES]-(j:Job)-[:REQUIRES]->(s2:Skill)
-        WHERE s1.skill_id < s2.skill_id
-        WITH s1, s2, COUNT(j) as co_occurrence
-        WHERE co_occurrence >= {min_co_occurrence}
-        
-        // 计算相关性分数（使用点互信息PMI）
-        MATCH (s1)<-[:REQUIRES]-(j1:Job)
-        WITH s1, s2, co_occurrence, COUNT(DISTINCT j1) as s1_count
-        
-        MATCH (s2)<-[:REQUIRES]-(j2:Job)
-        WITH s1, s2, co_occurrence, s1_count, COUNT(DISTINCT j2) as s2_count
-        
-        MATCH (j:Job)
-        WITH s1, s2, co_occurrence, s1_count, s2_count, COUNT(j) as total_jobs
-        
-        // 计算correlation和strength
-        WITH s1, s2, co_occurrence, s1_count, s2_count, total_jobs,
-             co_occurrence * 1.0 / sqrt(s1_count * s2_count) as correlation,
-             toFloat(co_occurrence) / 1000.0 as strength
-        
+        query = """
+        UNWIND $rows AS row
+        MATCH (s1:Skill {skill_id: row.s1}), (s2:Skill {skill_id: row.s2})
         MERGE (s1)-[r:RELATED_TO]-(s2)
-        SET r.co_occurrence = co_occurrence,
-            r.correlation = correlation,
-            r.strength = CASE WHEN strength > 1.0 THEN 1.0 ELSE strength END,
+        SET r.co_occurrence = row.co_occurrence,
+            r.correlation = row.correlation,
+            r.pmi = row.pmi,
+            r.lift = row.lift,
+            r.strength = row.strength,
             r.relation_type = 'complementary',
             r.created_at = datetime()
-        
-        RETURN COUNT(r) as relationship_count
+        RETURN count(r) AS written
         """
         
         try:
-            result = self.graph.run(query).data()
-            count = result[0]['relationship_count'] if result else 0
+            builder = SkillMatrixBuilder()
+            for record in self.graph.run(JOB_SKILL_IDS_CYPHER):
+                builder.add(record['skills'])
+            X = builder.matrix()
+            logger.info(f"岗位×技能矩阵: {X.shape[0]} × {X.shape[1]}，非零元 {X.nnz}")
+            
+            rows = related_skill_rows(X, builder.skills, min_co_occurrence, metric, min_score)
+            count = 0
+            for i in range(0, len(rows), batch_size):
+                result = self.graph.run(query, rows=rows[i:i + batch_size]).data()
+                count += result[0]['written'] if result else 0
             self.stats['related_to_created'] = count
             logger.info(f"技能关联关系创建完成: {count} 条")
+            return count
         except Exception as e:
             logger.error(f"构建技能关系失败: {e}")
+            return 0
     
-    def update_statistics(self):
-        """更新图谱统计信息"""
-        logger.info("更新图谱统计信息...")
+    @staticmethod
+    def count_skill_pairs(job_skills: Iterable[Tuple[str, List[str]]]) -> Tuple[Counter, Counter]:
+        """统计技能对共现次数，见 co_occurrence.count_skill_pairs"""
+        return count_skill_pairs(job_skills)
+
+    def build_co_occurrence(self, batch_size: int = 5000) -> int:
+        """
+        全量重建预计算的技能共现边
+
+        线性扫描一次 (岗位城市, 技能列表)，在 Python 中计数技能对，
+        再写成带权重的 CO_OCCURS（全局）与 CO_OCCURS_IN {city}（按城市）关系，
+        API 只需按 r.count 取 top-N，无需在查询时做岗位内技能两两展开。
+
+        原地重建：按本次计数 MERGE 并覆盖 count、打上构建号，写完后再分批删除未被本次覆盖的旧边，
+        重建期间 API 始终能读到完整的共现边，不会退回实时两两展开
+
+        Returns:
+            写入的关系数
+        """
+        logger.info("开始构建技能共现边（CO_OCCURS）...")
+        cursor = self.graph.run(JOB_SKILLS_BY_CITY_CYPHER)
+        global_counts, city_counts = self.count_skill_pairs(
+            (record['city'], record['skills']) for record in cursor
+        )
+        logger.info(f"技能对统计完成: 全局 {len(global_counts)} 对，按城市 {len(city_counts)} 对")
+
+        build_id = datetime.now().isoformat()
+        written = self._replace_co_occurrence(global_counts, city_counts, batch_size, build_id)
+        removed = self._delete_stale_co_occurrence(build_id, batch_size * 10)
+        if removed:
+            logger.info(f"删除过期共现边: {removed} 条")
+        # 全量结果已包含本次新建的岗位，不再重复累加
+        self.new_job_skills = []
+        logger.info(f"技能共现边构建完成: {written} 条")
+        return written
+
+    def update_co_occurrence(self, job_skills: List[Tuple[str, List[str]]] = None,
+                             batch_size: int = 5000,
+                             removed_job_skills: List[Tuple[str, List[str]]] = ()) -> int:
+        """
+        增量更新技能共现边：只把新增岗位的技能对计数累加到已有边上
+
+        Args:
+            job_skills: 新增岗位的 (城市, 技能名列表)，默认使用本次 import_jobs 新建的岗位
+            removed_job_skills: 删除岗位（或变更岗位的旧版本）的 (城市, 技能名列表)，从已有边上扣减
+
+        Returns:
+            写入的关系数
+        """
+        if job_skills is None:
+            job_skills = self.new_job_skills
+        if not job_skills and not removed_job_skills:
+            logger.info("无新增岗位，跳过技能共现增量更新")
+            return 0
+        global_counts, city_counts = self.count_skill_pairs(job_skills)
+        if removed_job_skills:
+            removed_global, removed_city = self.count_skill_pairs(removed_job_skills)
+            global_counts.subtract(removed_global)
+            city_counts.subtract(removed_city)
+        written = self._write_co_occurrence(global_counts, city_counts, batch_size)
+        logger.info(f"技能共现边增量更新完成: +{len(job_skills)} / -{len(removed_job_skills)} 个岗位，"
+                    f"写入 {written} 条")
+        if job_skills is self.new_job_skills:
+            self.new_job_skills = []
+        return written
+
+    def _replace_co_occurrence(self, global_counts: Counter, city_counts: Counter,
+                               batch_size: int, build_id: str) -> int:
+        """按批 UNWIND 写入全量计数（覆盖已有边的 count）并打上构建号"""
+        global_query = """
+        UNWIND $rows AS row
+        MATCH (s1:Skill {name: row.s1}), (s2:Skill {name: row.s2})
+        MERGE (s1)-[r:CO_OCCURS]->(s2)
+        SET r.count = row.n, r.build_id = $build_id, r.updated_at = datetime()
+        RETURN count(r) AS written
+        """
+        city_query = """
+        UNWIND $rows AS row
+        MATCH (s1:Skill {name: row.s1}), (s2:Skill {name: row.s2})
+        MERGE (s1)-[r:CO_OCCURS_IN {city: row.city}]->(s2)
+        SET r.count = row.n, r.build_id = $build_id, r.updated_at = datetime()
+        RETURN count(r) AS written
+        """
+        global_rows = [{'s1': s1, 's2': s2, 'n': n} for (s1, s2), n in global_counts.items() if n > 0]
+        city_rows = [{'city': c, 's1': s1, 's2': s2, 'n': n} for (c, s1, s2), n in city_counts.items() if n > 0]
+
+        written = 0
+        for query, rows in ((global_query, global_rows), (city_query, city_rows)):
+            for i in range(0, len(rows), batch_size):
+                result = self.graph.run(query, rows=rows[i:i + batch_size], build_id=build_id).data()
+                written += result[0]['written'] if result else 0
+        self.stats['co_occurs_written'] += written
+        return written
+
+    def _delete_stale_co_occurrence(self, build_id: str, batch_size: int) -> int:
+        """分批删除未被本次构建覆盖的共现边，避免单个大事务撑爆内存"""
+        removed = 0
+        while True:
+            result = self.graph.run(
+                "MATCH ()-[r:CO_OCCURS|CO_OCCURS_IN]->() "
+                "WHERE r.build_id IS NULL OR r.build_id <> $build_id "
+                "WITH r LIMIT $limit DELETE r RETURN count(*) AS deleted",
+                build_id=build_id, limit=batch_size
+            ).data()
+            deleted = result[0]['deleted'] if result else 0
+            removed += deleted
+            if not deleted:
+                return removed
+
+    def _write_co_occurrence(self, global_counts: Counter, city_counts: Counter, batch_size: int) -> int:
+        """按批 UNWIND 累加共现计数（边不存在时创建）；负计数只扣减已有边，减到 0 时删除"""
+        global_query = """
+        UNWIND $rows AS row
+        MATCH (s1:Skill {name: row.s1}), (s2:Skill {name: row.s2})
+        MERGE (s1)-[r:CO_OCCURS]->(s2)
+        ON CREATE SET r.count = row.n
+        ON MATCH SET r.count = r.count + row.n
+        SET r.updated_at = datetime()
+        RETURN count(r) AS written
+        """
+        city_query = """
+        UNWIND $rows AS row
+        MATCH (s1:Skill {name: row.s1}), (s2:Skill {name: row.s2})
+        MERGE (s1)-[r:CO_OCCURS_IN {city: row.city}]->(s2)
+        ON CREATE SET r.count = row.n
+        ON MATCH SET r.count = r.count + row.n
+        SET r.updated_at = datetime()
+        RETURN count(r) AS written
+        """
+        global_decrement = """
+        UNWIND $rows AS row
+        MATCH (:Skill {name: row.s1})-[r:CO_OCCURS]->(:Skill {name: row.s2})
+        SET r.count = r.count + row.n, r.updated_at = datetime()
+        WITH r, r.count <= 0 AS empty
+        FOREACH (_ IN CASE WHEN empty THEN [1] ELSE [] END | DELETE r)
+        RETURN count(r) AS written
+        """
+        city_decrement = """
+        UNWIND $rows AS row
+        MATCH (:Skill {name: row.s1})-[r:CO_OCCURS_IN {city: row.city}]->(:Skill {name: row.s2})
+        SET r.count = r.count + row.n, r.updated_at = datetime()
+        WITH r, r.count <= 0 AS empty
+        FOREACH (_ IN CASE WHEN empty THEN [1] ELSE [] END | DELETE r)
+        RETURN count(r) AS written
+        """
+        global_rows = [{'s1': s1, 's2': s2, 'n': n} for (s1, s2), n in global_counts.items()]
+        city_rows = [{'city': c, 's1': s1, 's2': s2, 'n': n} for (c, s1, s2), n in city_counts.items()]
+
+        written = 0
+        for query, decrement, rows in ((global_query, global_decrement, global_rows),
+                                       (city_query, city_decrement, city_rows)):
+            for statement, selected in ((query, [r for r in rows if r['n'] > 0]),
+                                        (decrement, [r for r in rows if r['n'] < 0])):
+                for i in range(0, len(selected), batch_size):
+                    result = self.graph.run(statement, rows=selected[i:i + batch_size]).data()
+                    written += result[0]['written'] if result else 0
+        self.stats['co_occurs_written'] += written
+        return written
+    
+    def build_position_profiles(self, batch_size: int = 1000, **kwargs) -> int:
+        """
+        全量重建岗位画像（PositionProfile 节点）
+
+        线性扫描一次 (岗位, 标题, 城市, 薪资, 技能列表)，按规范化职位名称聚类，
+        每个簇（全国 + 各城市）写入排好序的技能频次、样本岗位和薪资分布
+
+        Args:
+            batch_size: UNWIND 每批写入的画像数
+            **kwargs: 透传给 PositionProfileBuilder（min_jobs / top_skills / sample_size）
+
+        Returns:
+            写入的画像数
+        """
+        from src.graph_builder.position_profiles import build_profiles
+
+        logger.info("开始构建岗位画像（PositionProfile）...")
+        cursor = self.graph.run("""
+            MATCH (j:Job)
+            OPTIONAL MATCH (j)-[:REQUIRES]->(s:Skill)
+            RETURN j.job_id AS job_id, coalesce(j.title, '') AS title, coalesce(j.city, '') AS city,
+                   j.salary_min AS salary_min, j.salary_max AS salary_max, collect(s.name) AS skills
+        """)
+        profiles = build_profiles(
+            ((r['job_id'], r['title'], r['city'], r['salary_min'], r['salary_max'], r['skills']) for r in cursor),
+            **kwargs
+        )
+
+        # 原地更新：按 (city, key) MERGE 并打上本次构建号，全部写完后再分批删除未被本次覆盖的旧画像；
+        # 重建期间读方始终能读到完整的一份画像（旧版本或新版本），不会出现画像缺失
+        build_id = datetime.now().isoformat()
+        query = """
+        UNWIND $rows AS row
+        MERGE (p:PositionProfile {city: row.city, key: row.key})
+        SET p = row, p.build_id = $build_id, p.updated_at = datetime()
+        """
+        for i in range(0, len(profiles), batch_size):
+            self.graph.run(query, rows=profiles[i:i + batch_size], build_id=build_id)
+        stale_query = """
+        MATCH (p:PositionProfile) WHERE p.build_id IS NULL OR p.build_id <> $build_id
+        WITH p LIMIT $limit
+        DELETE p
+        RETURN count(*) AS deleted
+        """
+        removed = 0
+        while True:
+            result = self.graph.run(stale_query, build_id=build_id, limit=batch_size * 10).data()
+            deleted = result[0]['deleted'] if result else 0
+            removed += deleted
+            if not deleted:
+                break
+        if removed:
+            logger.info(f"删除过期岗位画像: {removed} 个")
+        self.stats['position_profiles'] = len(profiles)
+        logger.info(f"岗位画像构建完成: {len(profiles)} 个")
+        return len(profiles)
+
+    def update_statistics(self, incremental: bool = False, batch_size: int = 5000):
+        """
+        更新图谱统计信息
+        技能需求量 / 平均薪资、公司岗位数 / 平均薪资 / TOP 技能在进程内一次分组归约得到，UNWIND 批量写回
         
-        # 1. 更新技能的需求数量和平均薪资
-        query_skill_stats = """
-        MATCH (s:Skill)<-[:REQUIRES]-(j:Job)
-        WITH s, COUNT(j) as demand_count, 
-             AVG(j.salary_min) as avg_min, 
-             AVG(j.salary_max) as avg_max
-        SET s.demand_count = demand_count,
-            s.avg_salary_min = avg_min,
-            s.avg_salary_max = avg_max,
-            s.updated_at = datetime()
-        RETURN COUNT(s) as updated_skills
+        Args:
+            incremental: True 时只对本次新建的岗位求增量并合并到节点已有的计数上；
+                False 时全量重算（本次导入的岗位覆盖全图时直接用内存数据，否则线性扫描一次图谱）
+            batch_size: UNWIND 每批写入的节点数
         """
+        from src.graph_builder.graph_statistics import JOB_STAT_SNAPSHOT_CYPHER, aggregate_statistics
+        
+        logger.info("更新图谱统计信息...")
         
-        result = self.graph.run(query_skill_stats).data()
-        logger.info(f"更新技能统计: {result[0]['updated_skills']} 个")
-        
-        # 2. 更新公司的岗位数量和平均薪资
-        query_company_stats = """
-        MATCH (c:Company)<-[:POSTED_BY]-(j:Job)
-        WITH c, COUNT(j) as job_count,
-             AVG(j.salary_min) as avg_min,
-             AVG(j.salary_max) as avg_max
-        SET c.job_count = job_count,
-            c.avg_salary_min = avg_min,
-            c.avg_salary_max = avg_max
-        RETURN COUNT(c) as updated_companies
+        if incremental:
+            new_jobs = [row for is_new, row in self.job_stat_rows.values() if is_new]
+            if new_jobs:
+                self.apply_statistics_delta(new_jobs, batch_size=batch_size)
+            else:
+                logger.info("无新增岗位，跳过统计信息增量更新")
+        else:
+            total_jobs = self.graph.run("MATCH (j:Job) RETURN count(j) AS count").data()[0]['count']
+            if self.job_stat_rows and total_jobs == len(self.job_stat_rows):
+                jobs = (row for _, row in self.job_stat_rows.values())
+            else:
+                cursor = self.graph.run(JOB_STAT_SNAPSHOT_CYPHER)
+                jobs = ((r['company_id'], r['salary_min'], r['salary_max'], r['skills']) for r in cursor)
+            skill_rows, company_rows = aggregate_statistics(jobs)
+            self._write_statistics(skill_rows, company_rows, batch_size)
+        
+        # 统计已包含本次写入的岗位，不再重复累加
+        self.job_stat_rows = {}
+
+        # 3. 更新城市数（/api/stats 直接读取，避免请求时 count(DISTINCT j.city) 扫描）
+        self.update_city_count()
+
+    def apply_statistics_delta(self, added: List[Tuple], removed: List[Tuple] = (),
+                               batch_size: int = 5000) -> None:
         """
+        把岗位增量合并到技能 / 公司节点已有的统计上
         
-        result = self.graph.run(query_company_stats).data()
-        logger.info(f"更新公司统计: {result[0]['updated_companies']} 个")
-        
-        # 3. 更新公司的TOP技能
-        query_company_top_skills = """
-        MATCH (c:Company)<-[:POSTED_BY]-(j:Job)-[:REQUIRES]->(s:Skill)
-        WITH c, s.name as skill_name, COUNT(j) as skill_count
-        ORDER BY skill_count DESC
-        WITH c, COLLECT(skill_name)[0..10] as top_skills
-        SET c.top_skills = top_skills
-        RETURN COUNT(c) as updated_companies
+        Args:
+            added: 新增岗位（或变更岗位的新版本）的统计行 (company_id, salary_min, salary_max, 技能名列表)
+            removed: 删除岗位（或变更岗位的旧版本）的统计行，从已有统计中扣除
         """
+        from src.graph_builder.graph_statistics import (
+            EXISTING_COMPANY_STATS_CYPHER, EXISTING_SKILL_STATS_CYPHER, aggregate_statistics,
+            merge_company_statistics, merge_skill_statistics,
+        )
         
-        result = self.graph.run(query_company_top_skills).data()
-        logger.info(f"更新公司TOP技能: {result[0]['updated_companies']} 个")
-    
+        jobs = list(added) + list(removed)
+        signs = [1] * len(added) + [-1] * len(removed)
+        skill_delta, company_delta = aggregate_statistics(jobs, top_n=None, signs=signs)
+        existing_skills = {
+            r['name']: r for r in self.graph.run(
+                EXISTING_SKILL_STATS_CYPHER, names=[d['name'] for d in skill_delta]
+            ).data()
+        }
+        existing_companies = {
+            r['company_id']: r for r in self.graph.run(
+                EXISTING_COMPANY_STATS_CYPHER, ids=[d['company_id'] for d in company_delta]
+            ).data()
+        }
+        skill_rows = [merge_skill_statistics(d, existing_skills.get(d['name'])) for d in skill_delta]
+        company_rows = [merge_company_statistics(d, existing_companies.get(d['company_id']))
+                        for d in company_delta]
+        logger.info(f"统计增量: +{len(added)} / -{len(removed)} 个岗位")
+        self._write_statistics(skill_rows, company_rows, batch_size)
+
+    def _write_statistics(self, skill_rows: List[Dict], company_rows: List[Dict], batch_size: int) -> None:
+        from src.graph_builder.graph_statistics import COMPANY_STATS_CYPHER, SKILL_STATS_CYPHER
+        
+        # 1. 技能的需求数量和平均薪资
+        updated = 0
+        for i in range(0, len(skill_rows), batch_size):
+            result = self.graph.run(SKILL_STATS_CYPHER, rows=skill_rows[i:i + batch_size]).data()
+            updated += result[0]['updated'] if result else 0
+        logger.info(f"更新技能统计: {updated} 个")
+        
+        # 2. 公司的岗位数量、平均薪资和TOP技能
+        updated = 0
+        for i in range(0, len(company_rows), batch_size):
+            result = self.graph.run(COMPANY_STATS_CYPHER, rows=company_rows[i:i + batch_size]).data()
+            updated += result[0]['updated'] if result else 0
+        logger.info(f"更新公司统计: {updated} 个")
+
+    def update_city_count(self) -> int:
+        """重新计算不重复城市数，写入 (:GraphStats {name: 'global'}).city_count"""
+        from src.utils.graph_stats import REFRESH_CITY_COUNT_CYPHER
+        result = self.graph.run(REFRESH_CITY_COUNT_CYPHER, updated_at=datetime.now().isoformat()).data()
+        city_count = result[0]['city_count'] if result else 0
+        logger.info(f"更新城市数: {city_count} 个")
+        return city_count
+    
+    def bump_data_generation(self, source: str = 'neo4j_import', labels=None) -> int:
+        """导入完成后递增数据版本，让 API 缓存立即失效（labels 为本次写入的标签，None 表示全部）"""
+        from src.utils.data_version import bump_generation
+        return bump_generation(source, graph_executor=lambda q, p: self.graph.run(q, **p).data(), labels=labels)
+
     def get_import_stats(self) -> Dict:
         """获取导入统计信息"""
         return self.stats
@@ -499,18 +702,24 @@ class Neo4jImporter:
 
 
 def import_data_pipeline(skill_dict_path: str, cleaned_data_paths: List[str],
-                         neo4j_uri: str, neo4j_user: str, neo4j_password: str):
+                         neo4j_uri: str, neo4j_user: str, neo4j_password: str,
+                         import_workers: int = 1, batch_size: int = 10000, resume: bool = True,
+                         checkpoint_path=None):
     """
     完整的数据导入流程
+    按文件、按批次流式导入岗位，每批提交后写检查点；中断后再次运行从最后一个检查点继续
     
     Args:
         skill_dict_path: 技能词典路径
-        cleaned_data_paths: 清洗后数据文件路径列表
+        cleaned_data_paths: 清洗后数据文件路径列表（.json / .jsonl）
         neo4j_uri: Neo4j连接URI
         neo4j_user: 用户名
         neo4j_password: 密码
+        import_workers: 岗位并行写入的 worker 数（1 为串行）
+        batch_size: 每批岗位数（也是检查点粒度）
+        resume: 存在可用的检查点时是否续传；False 时丢弃检查点重新开始
+        checkpoint_path: 检查点文件，默认 data/import_checkpoint.json
     """
-    import json
     import sys
     from pathlib import Path
     
@@ -519,7 +728,27 @@ def import_data_pipeline(skill_dict_path: str, cleaned_data_paths: List[str],
     if str(project_root) not in sys.path:
         sys.path.insert(0, str(project_root))
     
+    from src.graph_builder.import_checkpoint import (
+        DEFAULT_CHECKPOINT_PATH, POST_IMPORT_STAGES, ImportCheckpoint, iter_job_batches,
+    )
     from src.graph_builder.skill_dictionary import SkillDictionary
+    from src.utils.data_version import read_marker
+    
+    checkpoint_path = Path(checkpoint_path or DEFAULT_CHECKPOINT_PATH)
+    data_paths = [Path(p) for p in cleaned_data_paths]
+    generation = read_marker()
+    
+    checkpoint = ImportCheckpoint.load(checkpoint_path) if resume else None
+    if checkpoint is not None:
+        usable, reason = checkpoint.resumable_for(data_paths, generation)
+        if usable:
+            logger.info(f"从检查点继续导入: {checkpoint.describe()}")
+        else:
+            logger.info(f"忽略已有检查点（{reason}），重新开始导入")
+            checkpoint = None
+    if checkpoint is None:
+        checkpoint = ImportCheckpoint.start(data_paths, generation)
+        checkpoint.save(checkpoint_path)
     
     # 1. 加载技能词典
     logger.info("加载技能词典...")
@@ -532,25 +761,37 @@ def import_data_pipeline(skill_dict_path: str, cleaned_data_paths: List[str],
     importer.create_indexes()
     
     # 4. 导入技能节点
-    importer.import_skills_from_dictionary(skill_dict)
-    
-    # 5. 导入岗位数据
-    all_jobs = []
-    for data_path in cleaned_data_paths:
-        with open(data_path, 'r', encoding='utf-8') as f:
-            jobs = json.load(f)
-            all_jobs.extend(jobs)
-    
-    logger.info(f"加载了 {len(all_jobs)} 个岗位数据")
-    importer.import_jobs(all_jobs, batch_size=100)
-    
-    # 6. 构建技能关系
-    importer.build_skill_relationships(min_co_occurrence=10)
-    
-    # 7. 更新统计信息
-    importer.update_statistics()
-    
-    # 8. 输出统计报告
+    if not checkpoint.skills_imported:
+        importer.import_skills_from_dictionary(skill_dict)
+        checkpoint.skills_imported = True
+        checkpoint.save(checkpoint_path)
+    
+    # 5. 流式导入岗位数据（全量后处理直接扫描图谱，不在内存中累积岗位）
+    for file_index, offset, batch in iter_job_batches(checkpoint, batch_size):
+        if batch:
+            importer.import_jobs(batch, batch_size=batch_size, workers=import_workers, track_new_jobs=False)
+            checkpoint.jobs_written += len(batch)
+        checkpoint.file_index, checkpoint.offset = file_index, offset
+        checkpoint.save(checkpoint_path)
+    logger.info(f"岗位写入完成，共处理 {checkpoint.jobs_written} 个岗位")
+    
+    # 6~8. 技能关系 + 共现边、统计信息 + 岗位画像、递增数据版本（API 缓存随之失效）
+    stages = {
+        "skill_relationships": lambda: importer.build_skill_relationships(min_co_occurrence=10),
+        "co_occurrence": importer.build_co_occurrence,
+        "statistics": importer.update_statistics,
+        "position_profiles": importer.build_position_profiles,
+        "generation": lambda: importer.bump_data_generation('neo4j_import'),
+    }
+    for stage in POST_IMPORT_STAGES:
+        if stage in checkpoint.stages_done:
+            continue
+        stages[stage]()
+        checkpoint.stages_done.append(stage)
+        checkpoint.save(checkpoint_path)
+    ImportCheckpoint.clear(checkpoint_path)
+    
+    # 9. 输出统计报告
     print("\n" + "="*50)
     print("=== Neo4j导入统计 ===")
     import_stats = importer.get_import_stats()
@@ -1,9 +1,17 @@
 """
 Neo4j数据库管理器
 """
-from neo4j import GraphDatabase
-from typing import List, Dict, Any
+from neo4j import AsyncGraphDatabase, GraphDatabase, Query
+from datetime import datetime
+from typing import List, Dict, Any, Optional
+import asyncio
 import logging
+import time
+
+from src.graph_builder.query_cache import QueryResultCache, cypher_tags, is_write
+from src.utils.graph_stats import (
+    DATABASE_STATS_CYPHER, REFRESH_CITY_COUNT_CYPHER, database_stats_from_row,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -11,7 +19,8 @@ logger = logging.getLogger(__name__)
 class Neo4jManager:
     """Neo4j连接和操作管理"""
 
-    def __init__(self, uri: str, user: str, password: str):
+    def __init__(self, uri: str, user: str, password: str,
+                 result_cache: Optional[QueryResultCache] = None):
         """
         初始化Neo4j连接
 
@@ -19,8 +28,10 @@ class Neo4jManager:
             uri: Neo4j连接URI，如 bolt://localhost:7687
             user: 用户名
             password: 密码
+            result_cache: 查询结果缓存，None 表示不缓存（execute_query 的 cache 参数无效）
         """
         self.driver = GraphDatabase.driver(uri, auth=(user, password))
+        self.result_cache = result_cache
         logger.info(f"Neo4j连接成功: {uri}")
 
     def close(self):
@@ -41,24 +52,37 @@ class Neo4jManager:
             logger.error(f"连接失败: {str(e)}")
             return False
 
-    def execute_query(self, query: str, parameters: Dict = None) -> List[Dict]:
+    def execute_query(self, query: str, parameters: Dict = None, cache: bool = False) -> List[Dict]:
         """
         执行Cypher查询
 
         Args:
             query: Cypher查询语句
             parameters: 查询参数
+            cache: 是否读写查询结果缓存（需创建时传入 result_cache）
 
         Returns:
             查询结果列表
         """
+        key = epoch = None
+        if cache and self.result_cache is not None:
+            key = self.result_cache.make_key(query, parameters)
+            rows = self.result_cache.get(key)
+            if rows is not None:
+                return rows
+            epoch = self.result_cache.epoch
         with self.driver.session() as session:
             result = session.run(query, parameters or {})
-            return [dict(record) for record in result]
+            rows = [dict(record) for record in result]
+        if key is not None:
+            self.result_cache.put(key, rows, cypher_tags(query), epoch)
+        elif self.result_cache is not None and is_write(query):
+            self.result_cache.invalidate(cypher_tags(query))
+        return rows
 
     def execute_write(self, query: str, parameters: Dict = None):
         """
-        执行写入操作
+        执行写入操作（淘汰结果缓存中涉及相同标签的查询）
 
         Args:
             query: Cypher语句
@@ -66,6 +90,8 @@ class Neo4jManager:
         """
         with self.driver.session() as session:
             session.run(query, parameters or {})
+        if self.result_cache is not None:
+            self.result_cache.invalidate(cypher_tags(query))
 
     def clear_database(self):
         """清空数据库（谨慎使用）"""
@@ -118,18 +144,195 @@ class Neo4jManager:
         result = self.execute_query(query)
         return result[0]['count'] if result else 0
 
+    def refresh_city_count(self) -> int:
+        """重新计算城市数并写入 GraphStats 节点"""
+        result = self.execute_query(REFRESH_CITY_COUNT_CYPHER, {'updated_at': datetime.now().isoformat()})
+        return result[0]['city_count'] if result else 0
+
     def get_database_stats(self) -> Dict:
-        """获取数据库统计信息"""
+        """获取数据库统计信息（count store 一次查询；城市数读预计算值，缺失时补算一次）"""
+        result = self.execute_query(DATABASE_STATS_CYPHER)
+        stats = database_stats_from_row(result[0] if result else None)
+        if stats['cities'] is None:
+            stats['cities'] = self.refresh_city_count()
+        return stats
+
+
+class AsyncNeo4jManager:
+    """
+    基于 AsyncGraphDatabase 的异步 Neo4j 管理器（供 API / Agent 使用）
+
+    - 原生异步驱动，不占用默认线程池，避免与 to_thread 的其他调用方互相拖慢
+    - 信号量限制同时执行的查询数，超出的请求在事件循环中排队，并统计排队时长
+    - 每个查询带超时：服务端事务超时 + 客户端 wait_for 兜底
+    """
+
+    def __init__(self, uri: str, user: str, password: str,
+                 database: Optional[str] = None,
+                 max_connection_pool_size: int = 50,
+                 connection_acquisition_timeout: float = 30.0,
+                 max_concurrency: int = 32,
+                 query_timeout: float = 30.0,
+                 result_cache: Optional[QueryResultCache] = None):
+        """
+        初始化异步Neo4j连接
+
+        Args:
+            uri: Neo4j连接URI，如 bolt://localhost:7687
+            user: 用户名
+            password: 密码
+            database: 数据库名，None 使用服务端默认库
+            max_connection_pool_size: 连接池大小
+            connection_acquisition_timeout: 从连接池获取连接的超时（秒）
+            max_concurrency: 同时执行的查询上限（应不大于连接池大小）
+            query_timeout: 默认单查询超时（秒）
+            result_cache: 查询结果缓存，None 表示不缓存（execute_query 的 cache 参数无效）
+        """
+        self.driver = AsyncGraphDatabase.driver(
+            uri, auth=(user, password),
+            max_connection_pool_size=max_connection_pool_size,
+            connection_acquisition_timeout=connection_acquisition_timeout,
+        )
+        self.database = database
+        self.max_concurrency = max_concurrency
+        self.query_timeout = query_timeout
+        self.result_cache = result_cache
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+        self._running = 0
+        self._counters = {"queries": 0, "errors": 0, "timeouts": 0, "queued": 0}
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        logger.info(f"Neo4j异步连接已创建: {uri}（连接池 {max_connection_pool_size}，并发上限 {max_concurrency}）")
+
+    @classmethod
+    def from_config(cls, neo4j_config: Dict) -> "AsyncNeo4jManager":
+        """从 config.yaml 的 neo4j 配置段创建"""
+        return cls(
+            uri=neo4j_config['uri'],
+            user=neo4j_config['user'],
+            password=neo4j_config['password'],
+            database=neo4j_config.get('database'),
+            max_connection_pool_size=neo4j_config.get('max_connection_pool_size', 50),
+            connection_acquisition_timeout=neo4j_config.get('connection_acquisition_timeout', 30.0),
+            max_concurrency=neo4j_config.get('max_concurrency', 32),
+            query_timeout=neo4j_config.get('query_timeout', 30.0),
+            result_cache=QueryResultCache.from_config(neo4j_config.get('query_cache')),
+        )
+
+    async def close(self):
+        """关闭连接"""
+        if self.driver:
+            await self.driver.close()
+            logger.info("Neo4j异步连接已关闭")
+
+    async def execute_query(self, query: str, parameters: Dict = None, timeout: float = None,
+                            cache: bool = False) -> List[Dict]:
+        """
+        执行Cypher查询
+
+        Args:
+            query: Cypher查询语句
+            parameters: 查询参数
+            timeout: 超时秒数，默认使用 query_timeout
+            cache: 是否读写查询结果缓存（未配置 query_cache 时无效）
+
+        Returns:
+            查询结果列表
+        """
+        timeout = timeout or self.query_timeout
+        key = epoch = None
+        if cache and self.result_cache is not None:
+            key = self.result_cache.make_key(query, parameters)
+            rows = self.result_cache.get(key)
+            if rows is not None:
+                return rows
+            epoch = self.result_cache.epoch
+
+        async def _run(session):
+            result = await session.run(Query(query, timeout=timeout), parameters or {})
+            return [dict(record) async for record in result]
+
+        rows = await self._execute(_run, timeout)
+        if key is not None:
+            self.result_cache.put(key, rows, cypher_tags(query), epoch)
+        elif self.result_cache is not None and is_write(query):
+            self.result_cache.invalidate(cypher_tags(query))
+        return rows
+
+    async def execute_write(self, query: str, parameters: Dict = None, timeout: float = None):
+        """
+        执行写入操作（淘汰结果缓存中涉及相同标签的查询）
+
+        Args:
+            query: Cypher语句
+            parameters: 参数
+            timeout: 超时秒数，默认使用 query_timeout
+        """
+        timeout = timeout or self.query_timeout
+
+        async def _run(session):
+            result = await session.run(Query(query, timeout=timeout), parameters or {})
+            await result.consume()
+
+        await self._execute(_run, timeout)
+        if self.result_cache is not None:
+            self.result_cache.invalidate(cypher_tags(query))
+
+    async def refresh_city_count(self) -> int:
+        """重新计算城市数并写入 GraphStats 节点"""
+        result = await self.execute_query(REFRESH_CITY_COUNT_CYPHER, {'updated_at': datetime.now().isoformat()})
+        return result[0]['city_count'] if result else 0
+
+    async def get_database_stats(self) -> Dict:
+        """获取数据库统计信息（count store 一次查询；城市数读预计算值，缺失时补算一次）"""
+        result = await self.execute_query(DATABASE_STATS_CYPHER)
+        stats = database_stats_from_row(result[0] if result else None)
+        if stats['cities'] is None:
+            stats['cities'] = await self.refresh_city_count()
+        return stats
+
+    def stats(self) -> Dict[str, Any]:
+        """并发与排队指标（以及查询结果缓存命中情况）"""
+        queries = self._counters["queries"]
         return {
-            'skills': self.get_node_count('Skill'),
-            'jobs': self.get_node_count('Job'),
-            'cities': self.get_city_count(),
-            'total_nodes': self.get_node_count(),
-            'requires_relationships': self.get_relationship_count('REQUIRES'),
-            'related_relationships': self.get_relationship_count('RELATED_TO'),
-            'total_relationships': self.get_relationship_count()
+            **self._counters,
+            "result_cache": self.result_cache.stats() if self.result_cache is not None else None,
+            "running": self._running,
+            "waiting": self._waiting,
+            "max_concurrency": self.max_concurrency,
+            "avg_wait_ms": round(self._wait_total / queries * 1000, 2) if queries else 0.0,
+            "max_wait_ms": round(self._wait_max * 1000, 2),
         }
 
+    async def _execute(self, work, timeout: float):
+        queued_at = time.monotonic()
+        if self._semaphore.locked():
+            self._counters["queued"] += 1
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        waited = time.monotonic() - queued_at
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        self._counters["queries"] += 1
+        self._running += 1
+        try:
+            async with self.driver.session(database=self.database) as session:
+                # 服务端事务超时之外再加客户端兜底，避免连接卡死时请求无限等待
+                return await asyncio.wait_for(work(session), timeout=timeout + 5)
+        except asyncio.TimeoutError:
+            self._counters["timeouts"] += 1
+            raise
+        except Exception:
+            self._counters["errors"] += 1
+            raise
+        finally:
+            self._running -= 1
+            self._semaphore.release()
+
 
 # 使用示例
 if __name__ == "__main__":
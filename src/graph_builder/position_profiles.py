@@ -0,0 +1,147 @@
+"""
+岗位画像（position profile）
+导入时把职位名称规范化后聚类（"高级Java开发工程师（北京）" / "Java开发" -> java），
+每个簇（全国 + 各城市）预计算排好序的技能频次向量、样本岗位和薪资分布，
+写成 (:PositionProfile {key, city}) 节点；差距分析把目标岗位映射到簇后直接读画像，无需聚合查询。
+"""
+import re
+import statistics
+import unicodedata
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.utils.cypher_registry import register_cypher
+
+# 聚类时去掉的修饰词（级别 / 招聘类型），不影响岗位本身的技能要求
+_QUALIFIER_RE = re.compile(r"资深|高级|中级|初级|实习生|实习|校招|应届生?|急招|诚聘|senior|junior|sr\.|jr\.")
+# 括号内通常是城市、部门或薪资说明
+_BRACKET_RE = re.compile(r"[（(【\[［][^）)】\]］]*[）)】\]］]")
+_PUNCT_RE = re.compile(r"[\s\-_/·|,，、。]+")  # 保留 + . #（C++ / Node.js / C#）
+# 岗位名称末尾的通用后缀，"Java开发工程师" / "Java工程师" / "Java开发" 归为同一簇
+_ROLE_SUFFIXES = ("工程师", "开发", "研发", "人员", "岗")
+
+# 按簇 key 查画像：完全匹配优先；其次是包含目标词的簇（"java" -> "java后端"，取岗位最多的）；
+# 最后是被目标词包含的簇（"java开发组长" -> "java"，取最长的 key）
+MATCH_PROFILE_CYPHER = register_cypher("match_position_profile", """
+MATCH (p:PositionProfile {city: $city})
+WHERE p.key = $key OR p.key CONTAINS $key OR ($key CONTAINS p.key AND size(p.key) >= 2)
+WITH p, CASE WHEN p.key = $key THEN 3 WHEN p.key CONTAINS $key THEN 2 ELSE 1 END AS rank
+ORDER BY rank DESC, CASE WHEN rank = 1 THEN size(p.key) ELSE 0 END DESC, p.job_count DESC
+LIMIT 1
+RETURN p.key AS key, p.name AS name, p.city AS city, p.job_count AS job_count,
+       p.skills AS skills, p.skill_counts AS skill_counts, p.sample_job_ids AS sample_job_ids,
+       p.salary_avg_min AS salary_avg_min, p.salary_avg_max AS salary_avg_max,
+       p.salary_p25 AS salary_p25, p.salary_p50 AS salary_p50, p.salary_p75 AS salary_p75
+""", {"key": "java", "city": ""}, expect=["PositionProfile(city"], module=__name__)
+
+
+def normalize_position(title: Optional[str]) -> str:
+    """职位名称 -> 簇 key（NFKC、小写、去括号说明 / 级别修饰词 / 标点 / 通用后缀）"""
+    if not title:
+        return ""
+    text = unicodedata.normalize("NFKC", title).lower()
+    text = _BRACKET_RE.sub("", text)
+    text = _QUALIFIER_RE.sub("", text)
+    text = _PUNCT_RE.sub("", text)
+    stripped = True
+    while stripped:
+        stripped = False
+        for suffix in _ROLE_SUFFIXES:
+            if text.endswith(suffix) and len(text) > len(suffix):
+                text = text[:-len(suffix)]
+                stripped = True
+    return text
+
+
+@dataclass
+class _Cluster:
+    titles: Counter = field(default_factory=Counter)
+    skills: Counter = field(default_factory=Counter)
+    jobs: List[Tuple[float, str]] = field(default_factory=list)        # (salary_max, job_id)
+    salaries: List[Tuple[float, float]] = field(default_factory=list)  # (salary_min, salary_max)
+
+
+class PositionProfileBuilder:
+    """
+    岗位画像构建器
+
+    add() 逐个喂入岗位，profiles() 输出满足最小岗位数的画像（全国 city='' + 各城市）
+    """
+
+    def __init__(self, min_jobs: int = 3, top_skills: int = 30, sample_size: int = 10):
+        """
+        Args:
+            min_jobs: 簇内岗位数下限，低于此值的簇不生成画像（差距分析走实时查询）
+            top_skills: 每个画像保留的技能数
+            sample_size: 样本岗位数（按薪资上限降序）
+        """
+        self.min_jobs = min_jobs
+        self.top_skills = top_skills
+        self.sample_size = sample_size
+        self._clusters: Dict[Tuple[str, str], _Cluster] = defaultdict(_Cluster)
+
+    def add(self, job_id: str, title: str, city: str, salary_min, salary_max, skills: Sequence[str]) -> None:
+        key = normalize_position(title)
+        if not key:
+            return
+        salary_min, salary_max = float(salary_min or 0), float(salary_max or 0)
+        unique_skills = set(skills or ())
+        for scope in ("", city or ""):
+            cluster = self._clusters[(key, scope)]
+            cluster.titles[title.strip()] += 1
+            cluster.skills.update(unique_skills)
+            cluster.jobs.append((salary_max, job_id))
+            if salary_max > 0:
+                cluster.salaries.append((salary_min, salary_max))
+            if not city:
+                break
+
+    def profiles(self) -> List[Dict]:
+        """画像列表（可直接作为 UNWIND 参数写入 Neo4j）"""
+        result = []
+        for (key, city), cluster in self._clusters.items():
+            job_count = len(cluster.jobs)
+            if job_count < self.min_jobs:
+                continue
+            top = cluster.skills.most_common(self.top_skills)
+            samples = sorted(cluster.jobs, key=lambda x: -x[0])[:self.sample_size]
+            result.append({
+                "key": key,
+                "city": city,
+                "name": cluster.titles.most_common(1)[0][0],
+                "job_count": job_count,
+                "skills": [name for name, _ in top],
+                "skill_counts": [n for _, n in top],
+                "sample_job_ids": [job_id for _, job_id in samples],
+                **self._salary_distribution(cluster.salaries),
+            })
+        return result
+
+    @staticmethod
+    def _salary_distribution(salaries: List[Tuple[float, float]]) -> Dict:
+        """薪资分布：平均上下限 + 月薪中位数（上下限均值）的四分位"""
+        if not salaries:
+            return {"salary_avg_min": None, "salary_avg_max": None,
+                    "salary_p25": None, "salary_p50": None, "salary_p75": None}
+        mids = [(lo + hi) / 2 for lo, hi in salaries]
+        if len(mids) >= 2:
+            p25, p50, p75 = statistics.quantiles(mids, n=4, method="inclusive")
+        else:
+            p25 = p50 = p75 = mids[0]
+        return {
+            "salary_avg_min": round(statistics.fmean(lo for lo, _ in salaries), 1),
+            "salary_avg_max": round(statistics.fmean(hi for _, hi in salaries), 1),
+            "salary_p25": round(p25, 1),
+            "salary_p50": round(p50, 1),
+            "salary_p75": round(p75, 1),
+        }
+
+
+def build_profiles(records: Iterable[Tuple[str, str, str, float, float, Sequence[str]]],
+                   **kwargs) -> List[Dict]:
+    """由 (job_id, title, city, salary_min, salary_max, skills) 记录构建全部画像"""
+    builder = PositionProfileBuilder(**kwargs)
+    for job_id, title, city, salary_min, salary_max, skills in records:
+        builder.add(job_id, title, city, salary_min, salary_max, skills)
+    return builder.profiles()
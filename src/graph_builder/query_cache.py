@@ -0,0 +1,150 @@
+"""
+Neo4j 查询结果缓存（进程内，读穿透）
+execute_query(..., cache=True) 的结果按 "规范化 Cypher + 参数哈希" 缓存，
+每条缓存打上查询涉及的标签 / 关系类型（Skill、Job、REQUIRES ...）：
+- 经 execute_write（或 execute_query 中的写语句）写入某些标签后，只淘汰带这些标签的缓存
+- 导入递增数据版本时按导入声明的标签淘汰（未声明则全部淘汰）
+语句中解析不出标签的查询打 "*" 标记，任何写入都会淘汰。
+多 worker 部署时写入只淘汰本进程的缓存，其他进程依赖数据版本变化与 TTL。
+"""
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+ANY_TAG = "*"
+
+# (s:Skill / [r:REQUIRES / [:CO_OCCURS / (:PositionProfile
+_TAG_RE = re.compile(r"[(\[]\s*`?\w*`?\s*:\s*`?([A-Za-z_]\w*)")
+_WRITE_RE = re.compile(r"\b(CREATE|MERGE|SET|DELETE|REMOVE)\b", re.IGNORECASE)
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_cypher(query: str) -> str:
+    """折叠空白：同一模板不同缩进的写法共用缓存"""
+    return _WS_RE.sub(" ", query).strip()
+
+
+def cypher_tags(query: str) -> FrozenSet[str]:
+    """语句涉及的标签与关系类型；解析不出时返回 {"*"}"""
+    tags = frozenset(_TAG_RE.findall(query))
+    return tags or frozenset((ANY_TAG,))
+
+
+def is_write(query: str) -> bool:
+    return bool(_WRITE_RE.search(query))
+
+
+class QueryResultCache:
+    """LRU + TTL 的查询结果缓存，按标签反向索引支持局部淘汰"""
+
+    def __init__(self, max_entries: int = 2048, ttl: float = 300.0):
+        """
+        Args:
+            max_entries: 最多缓存的查询结果数
+            ttl: 单条结果存活秒数（兜底，正常情况下由写入 / 数据版本淘汰）
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, FrozenSet[str], List[Dict]]]" = OrderedDict()
+        self._by_tag: Dict[str, set] = {}
+        self._lock = threading.Lock()
+        self._epoch = 0  # 每次淘汰递增：查询期间发生过写入的结果不回填，避免把旧数据写回缓存
+        self._counters = {"hits": 0, "misses": 0, "invalidated": 0, "evicted": 0}
+
+    @classmethod
+    def from_config(cls, cache_config: Optional[Dict]) -> Optional["QueryResultCache"]:
+        """从 neo4j.query_cache 配置段创建，未启用时返回 None"""
+        cache_config = cache_config or {}
+        if not cache_config.get('enabled', False):
+            return None
+        return cls(max_entries=cache_config.get('max_entries', 2048), ttl=cache_config.get('ttl', 300.0))
+
+    @staticmethod
+    def make_key(query: str, parameters: Optional[Dict[str, Any]]) -> str:
+        payload = json.dumps(parameters or {}, sort_keys=True, ensure_ascii=False, default=str)
+        digest = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+        return f"{normalize_cypher(query)}|{digest}"
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._drop(key)
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            rows = entry[2]
+        # 调用方可能就地修改结果行（如补 salary_range），返回行的浅拷贝
+        return [dict(row) for row in rows]
+
+    @property
+    def epoch(self) -> int:
+        """查询前记下，回填时传给 put"""
+        return self._epoch
+
+    def put(self, key: str, rows: List[Dict], tags: Iterable[str], epoch: Optional[int] = None) -> None:
+        tags = frozenset(tags)
+        with self._lock:
+            if epoch is not None and epoch != self._epoch:
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, tags, [dict(row) for row in rows])
+            for tag in tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self._counters["evicted"] += 1
+
+    def invalidate(self, tags: Optional[Iterable[str]] = None) -> int:
+        """
+        淘汰带指定标签的缓存（以及打了 "*" 的缓存）
+
+        Args:
+            tags: 被写入的标签；None 或包含 "*" 表示影响范围未知，全部淘汰
+
+        Returns:
+            淘汰条数
+        """
+        with self._lock:
+            self._epoch += 1
+            tags = None if tags is None else set(tags)
+            if tags is None or ANY_TAG in tags:
+                count = len(self._entries)
+                self._entries.clear()
+                self._by_tag.clear()
+            else:
+                keys = set(self._by_tag.get(ANY_TAG, ()))
+                for tag in tags:
+                    keys |= self._by_tag.get(tag, set())
+                for key in keys:
+                    self._drop(key)
+                count = len(keys)
+            self._counters["invalidated"] += count
+            return count
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            **self._counters,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hit_rate": round(self._counters["hits"] / lookups, 4) if lookups else 0.0,
+        }
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[1]:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
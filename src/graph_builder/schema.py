@@ -0,0 +1,37 @@
+"""
+图谱约束与索引定义
+事务导入（Neo4jImporter.create_indexes）与离线导入（admin_export 生成的 post_import.cypher）共用
+"""
+
+# 唯一性约束
+GRAPH_CONSTRAINTS = [
+    "CREATE CONSTRAINT skill_id IF NOT EXISTS FOR (s:Skill) REQUIRE s.skill_id IS UNIQUE",
+    "CREATE CONSTRAINT skill_name IF NOT EXISTS FOR (s:Skill) REQUIRE s.name IS UNIQUE",
+    "CREATE CONSTRAINT job_id IF NOT EXISTS FOR (j:Job) REQUIRE j.job_id IS UNIQUE",
+    "CREATE CONSTRAINT company_id IF NOT EXISTS FOR (c:Company) REQUIRE c.company_id IS UNIQUE",
+]
+
+GRAPH_INDEXES = [
+    "CREATE INDEX skill_category_idx IF NOT EXISTS FOR (s:Skill) ON (s.category)",
+    "CREATE INDEX skill_hot_score_idx IF NOT EXISTS FOR (s:Skill) ON (s.hot_score)",
+    "CREATE INDEX job_city_idx IF NOT EXISTS FOR (j:Job) ON (j.city)",
+    "CREATE INDEX job_salary_idx IF NOT EXISTS FOR (j:Job) ON (j.salary_min, j.salary_max)",
+    "CREATE INDEX company_name_idx IF NOT EXISTS FOR (c:Company) ON (c.name)",
+    # 预计算的技能共现边：按权重取 top-N（全局 / 按城市）
+    "CREATE INDEX co_occurs_count_idx IF NOT EXISTS FOR ()-[r:CO_OCCURS]-() ON (r.count)",
+    "CREATE INDEX co_occurs_in_city_idx IF NOT EXISTS FOR ()-[r:CO_OCCURS_IN]-() ON (r.city, r.count)",
+    # 岗位画像：差距分析按 (城市, 簇 key) 查画像
+    "CREATE INDEX position_profile_idx IF NOT EXISTS FOR (p:PositionProfile) ON (p.city, p.key)",
+]
+
+# 已废弃的索引：没有查询能用上，只增加写入开销，建索引时一并删除
+OBSOLETE_INDEXES = [
+    # salary_max 只在聚合 / 全文检索之后参与排序，执行计划不会走该索引
+    "DROP INDEX job_salary_max_idx IF EXISTS",
+]
+
+# 全文索引（用于技能搜索）
+SKILL_FULLTEXT_INDEX = (
+    "CREATE FULLTEXT INDEX skill_fulltext IF NOT EXISTS "
+    "FOR (s:Skill) ON EACH [s.name, s.aliases]"
+)
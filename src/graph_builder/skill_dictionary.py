@@ -105,6 +105,16 @@ class SkillDictionary:
 
         return results
 
+    def alias_map(self) -> Dict[str, str]:
+        """别名（小写）-> 标准技能名，标准名称本身也映射到自己"""
+        mapping = {}
+        for skill in self.all_skills:
+            standard_name = skill['name']
+            mapping[standard_name.lower()] = standard_name
+            for alias in skill.get('aliases', []):
+                mapping[alias.lower()] = standard_name
+        return mapping
+
     def get_skill_by_name(self, skill_name: str) -> Dict:
         """根据名称获取技能信息"""
         for skill in self.all_skills:
@@ -0,0 +1,228 @@
+"""
+查询向量缓存（LRU，可选 SQLite 持久化）
+搜索 / 推荐的查询文本高度重复（如 "需要以下技能的岗位: Python, Java"），
+缓存命中时跳过 m3e-base 的前向计算。key 为 模型标识 + 规范化文本（NFKC、折叠空白），
+未命中时对规范化后的文本编码，保证同一 key 对应的向量与直接编码一致。
+
+持久化文件每条写入即落盘（WAL），重启后按最近访问时间预热内存中的 LRU；
+文件中的条目数超过上限时按最近访问时间淘汰。
+内存中的向量存为元组，每次返回新的列表，调用方修改返回值不会污染缓存。
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+class EmbeddingCache:
+    """按 (模型, 规范化文本) 缓存向量"""
+
+    def __init__(self, model_id: str, max_entries: int = 10000, persist_path: Optional[str] = None,
+                 persist_max_entries: Optional[int] = None):
+        """
+        Args:
+            model_id: 模型标识（模型名 / 本地路径），换模型后旧向量自然失效
+            max_entries: 内存中最多缓存的向量数
+            persist_path: SQLite 持久化文件，None 表示只缓存在内存
+            persist_max_entries: 持久化文件最多保留的向量数，默认与 max_entries 相同
+        """
+        self.model_id = model_id
+        self.max_entries = max_entries
+        self.persist_max_entries = persist_max_entries or max_entries
+        self._entries: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "disk_hits": 0, "misses": 0, "evicted": 0, "persisted": 0}
+        self._conn: Optional[sqlite3.Connection] = None
+        self._touched: set = set()  # 内存命中的 key，攒批更新持久化文件中的 accessed_at
+        if persist_path:
+            self._open(Path(persist_path))
+
+    @classmethod
+    def from_config(cls, cache_config: Optional[Dict], model_id: str,
+                    project_root: Optional[Path] = None) -> Optional["EmbeddingCache"]:
+        """从 embedding.query_cache 配置段创建，未启用时返回 None"""
+        cache_config = cache_config or {}
+        if not cache_config.get('enabled', False):
+            return None
+        persist_path = cache_config.get('persist_path')
+        if persist_path and project_root is not None:
+            persist_path = str(project_root / persist_path)
+        return cls(model_id, max_entries=cache_config.get('max_entries', 10000), persist_path=persist_path,
+                   persist_max_entries=cache_config.get('persist_max_entries'))
+
+    def key(self, text: str) -> str:
+        digest = hashlib.sha1(normalize_text(text).encode('utf-8')).hexdigest()
+        return f"{self.model_id}|{digest}"
+
+    def encode(self, texts: List[str], encoder: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+        """
+        命中的直接返回，未命中的规范化后一次性交给 encoder 批量编码并回填
+
+        Args:
+            texts: 查询文本
+            encoder: texts -> 向量列表（模型前向）
+        """
+        keys = [self.key(text) for text in texts]
+        results: List[Optional[Tuple[float, ...]]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    results[i] = vector
+                    self._counters["hits"] += 1
+                    if self._conn is not None:
+                        self._touched.add(key)
+                else:
+                    missing.setdefault(key, []).append(i)
+        if missing:
+            # 内存未命中的再查持久化文件，仍未命中的才走模型
+            disk_hits = 0
+            for key, vector in self._load(list(missing)).items():
+                positions = missing.pop(key)
+                for i in positions:
+                    results[i] = vector
+                disk_hits += len(positions)
+                self._remember(key, vector)
+            if disk_hits:
+                with self._lock:
+                    self._counters["disk_hits"] += disk_hits
+        if missing:
+            with self._lock:
+                self._counters["misses"] += sum(len(positions) for positions in missing.values())
+            order = list(missing)
+            vectors = [tuple(vector) for vector in
+                       encoder([normalize_text(texts[missing[key][0]]) for key in order])]
+            for key, vector in zip(order, vectors):
+                for i in missing[key]:
+                    results[i] = vector
+                self._remember(key, vector)
+            self._persist(dict(zip(order, vectors)))
+        if len(self._touched) >= 100:
+            self._flush_touched()
+        return [list(vector) for vector in results]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._entries)
+        hits = counters["hits"] + counters["disk_hits"]
+        lookups = hits + counters["misses"]
+        return {
+            **counters,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "persistent": self._conn is not None,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM embeddings WHERE model = ?", (self.model_id,))
+
+    # ===== 内部 =====
+
+    def _remember(self, key: str, vector: Tuple[float, ...]) -> None:
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evicted"] += 1
+
+    def _open(self, path: Path) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(path), timeout=5.0, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    key         TEXT PRIMARY KEY,
+                    model       TEXT NOT NULL,
+                    vector      BLOB NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_access_idx ON embeddings (accessed_at)")
+            self._prune()
+            rows = self._conn.execute(
+                "SELECT key, vector FROM embeddings WHERE model = ? ORDER BY accessed_at DESC LIMIT ?",
+                (self.model_id, self.max_entries)
+            ).fetchall()
+            for key, blob in reversed(rows):
+                self._entries[key] = tuple(np.frombuffer(blob, dtype=np.float32).tolist())
+            logger.info(f"查询向量缓存已预热: {len(rows)} 条（{path}）")
+        except sqlite3.Error as e:
+            logger.warning(f"查询向量缓存持久化不可用，仅使用内存缓存: {e}")
+            self._conn = None
+
+    def _load(self, keys: List[str]) -> Dict[str, Tuple[float, ...]]:
+        if self._conn is None or not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", keys
+                ).fetchall()
+                if rows:
+                    self._conn.executemany("UPDATE embeddings SET accessed_at = ? WHERE key = ?",
+                                           [(time.time(), key) for key, _ in rows])
+        except sqlite3.Error as e:
+            logger.warning(f"读取查询向量缓存失败: {e}")
+            return {}
+        return {key: tuple(np.frombuffer(blob, dtype=np.float32).tolist()) for key, blob in rows}
+
+    def _persist(self, vectors: Dict[str, Sequence[float]]) -> None:
+        if self._conn is None or not vectors:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)",
+                    [(key, self.model_id, np.asarray(vector, dtype=np.float32).tobytes(), now)
+                     for key, vector in vectors.items()]
+                )
+                self._counters["persisted"] += len(vectors)
+                if self._counters["persisted"] % 1000 < len(vectors):
+                    self._prune()
+        except sqlite3.Error as e:
+            logger.warning(f"写入查询向量缓存失败: {e}")
+
+    def _flush_touched(self) -> None:
+        with self._lock:
+            touched, self._touched = self._touched, set()
+            if self._conn is None or not touched:
+                return
+            try:
+                now = time.time()
+                self._conn.executemany("UPDATE embeddings SET accessed_at = ? WHERE key = ?",
+                                       [(now, key) for key in touched])
+            except sqlite3.Error as e:
+                logger.warning(f"更新查询向量缓存访问时间失败: {e}")
+
+    def _prune(self) -> None:
+        """按最近访问时间只保留 persist_max_entries 条"""
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key NOT IN "
+            "(SELECT key FROM embeddings ORDER BY accessed_at DESC LIMIT ?)",
+            (self.persist_max_entries,)
+        )
@@ -11,6 +11,8 @@ import logging
 from pathlib import Path
 from tqdm import tqdm
 
+from .embedding_cache import EmbeddingCache
+
 logger = logging.getLogger(__name__)
 
 
@@ -52,13 +54,21 @@ class VectorDB:
             if model_path_abs.exists():
                 logger.info(f"从本地加载模型: {model_path_abs}")
                 self.model = SentenceTransformer(str(model_path_abs))
+                self.model_id = str(model_path_abs)
             else:
                 logger.warning(f"本地模型不存在: {model_path_abs}")
                 logger.info(f"从HuggingFace下载模型: {self.embedding_config['model_name']}")
                 self.model = SentenceTransformer(self.embedding_config['model_name'])
+                self.model_id = self.embedding_config['model_name']
         else:
             logger.info(f"从HuggingFace下载模型: {self.embedding_config['model_name']}")
             self.model = SentenceTransformer(self.embedding_config['model_name'])
+            self.model_id = self.embedding_config['model_name']
+
+        # 查询向量缓存（embedding.query_cache，未启用时为 None）
+        self.embedding_cache = EmbeddingCache.from_config(
+            self.embedding_config.get('query_cache'), self.model_id, project_root
+        )
         
         # 创建或获取collection（使用cosine距离，相似度范围0~1，更直观）
         collection_name = self.vector_config['collection_name']
@@ -75,17 +85,22 @@ class VectorDB:
         logger.info(f"  存储路径: {persist_dir}")
         logger.info(f"  当前文档数: {self.collection.count()}")
     
-    def encode(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+    def encode(self, texts: List[str], batch_size: Optional[int] = None,
+               cache: bool = False) -> List[List[float]]:
         """
         文本向量化
         
         Args:
             texts: 文本列表
             batch_size: 批处理大小（可选）
+            cache: 是否走查询向量缓存（查询文本使用；批量写入的岗位文档不缓存）
             
         Returns:
             向量列表
         """
+        if cache and self.embedding_cache is not None:
+            return self.embedding_cache.encode(texts, lambda misses: self.encode(misses, batch_size))
+
         if batch_size is None:
             batch_size = self.embedding_config.get('batch_size', 32)
         
@@ -250,7 +265,7 @@ class VectorDB:
             }
         """
         # 向量化查询
-        query_embedding = self.encode([query])[0]
+        query_embedding = self.encode([query], cache=True)[0]
         
         # ChromaDB 底层 SQLite 有变量数量限制，n_results 不能过大
         # 实际上向量搜索返回超过 500 条后相似度已很低，没有意义
@@ -293,8 +308,9 @@ class VectorDB:
         """获取统计信息"""
         return {
             'total_documents': self.collection.count(),
-            'embedding_dim': len(self.model.encode(["test"])[0]),
-            'model_name': self.embedding_config['model_name']
+            'embedding_dim': self.model.get_sentence_embedding_dimension(),
+            'model_name': self.embedding_config['model_name'],
+            'embedding_cache': self.embedding_cache.stats() if self.embedding_cache else None
         }
     
     def clear(self):
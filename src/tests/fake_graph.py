@@ -0,0 +1,99 @@
+"""
+py2neo Graph 的最小替身，供测试使用
+只按语句内容识别导入 / 同步路径用到的几类 Cypher，事务提交后才把写入的岗位记入图谱；
+bad_ids 中的岗位写入时抛错，transient_failures 次写入抛瞬时错误（模拟死锁）。
+"""
+from typing import Dict, List, Optional
+
+from src.graph_builder.bulk_writer import MERGE_POSTED_BY_CYPHER, MERGE_REQUIRES_CYPHER, UPSERT_JOBS_CYPHER
+from src.graph_builder.graph_statistics import JOB_STAT_SNAPSHOT_CYPHER
+from src.graph_builder.incremental_sync import DELETE_JOBS_CYPHER
+from src.utils.data_version import READ_GENERATION_CYPHER
+
+
+class TransientError(Exception):
+    """名称与 Neo4j 瞬时错误一致，is_transient_error 据此判断"""
+
+
+class _Result:
+    def __init__(self, rows: Optional[List[Dict]] = None):
+        self._rows = rows or []
+
+    def data(self) -> List[Dict]:
+        return list(self._rows)
+
+    def stats(self) -> Dict[str, int]:
+        return {}
+
+    def __iter__(self):
+        return iter(self._rows)
+
+
+class FakeTransaction:
+    def __init__(self, graph: "FakeGraph"):
+        self.graph = graph
+        self.statements: List[tuple] = []
+        self.job_rows: List[Dict] = []
+        self.companies: Dict[str, str] = {}
+        self.skills: Dict[str, List[str]] = {}
+
+    def run(self, query: str, **params) -> _Result:
+        self.statements.append((query, params))
+        if query == UPSERT_JOBS_CYPHER:
+            if self.graph.transient_failures > 0:
+                self.graph.transient_failures -= 1
+                raise TransientError("DeadlockDetected")
+            bad = [r["job_id"] for r in params["rows"] if r["job_id"] in self.graph.bad_ids]
+            if bad:
+                raise ValueError(f"bad row {bad[0]}")
+            self.job_rows.extend(params["rows"])
+        elif query == MERGE_POSTED_BY_CYPHER:
+            self.companies.update((r["job_id"], r["company_id"]) for r in params["rows"])
+        elif query == MERGE_REQUIRES_CYPHER:
+            for r in params["rows"]:
+                self.skills.setdefault(r["job_id"], []).append(r["skill"])
+        return _Result()
+
+
+class FakeGraph:
+    def __init__(self, skills=(), jobs: Optional[Dict[str, Dict]] = None):
+        self.skills = list(skills)
+        # job_id -> JOB_STAT_SNAPSHOT_CYPHER 返回的一行
+        self.jobs: Dict[str, Dict] = dict(jobs or {})
+        self.bad_ids = set()
+        self.transient_failures = 0
+        self.committed: List[FakeTransaction] = []
+        self.rolled_back = 0
+        self.deleted: List[str] = []
+        self.generation: Optional[int] = None  # DataVersion 节点的数据版本
+
+    def begin(self) -> FakeTransaction:
+        return FakeTransaction(self)
+
+    def commit(self, tx: FakeTransaction) -> None:
+        for row in tx.job_rows:
+            job_id, props = row["job_id"], row["props"]
+            self.jobs[job_id] = {
+                "job_id": job_id, "company_id": tx.companies.get(job_id), "city": props.get("city") or "",
+                "salary_min": props.get("salary_min"), "salary_max": props.get("salary_max"),
+                "skills": tx.skills.get(job_id, []),
+            }
+        self.committed.append(tx)
+
+    def rollback(self, tx: FakeTransaction) -> None:
+        self.rolled_back += 1
+
+    def run(self, query: str, **params) -> _Result:
+        if query == READ_GENERATION_CYPHER:
+            return _Result([] if self.generation is None else [{"generation": self.generation}])
+        if "count(j) AS count" in query:
+            return _Result([{"count": len(self.jobs)}])
+        if query == JOB_STAT_SNAPSHOT_CYPHER:
+            return _Result(list(self.jobs.values()))
+        if "MATCH (s:Skill) RETURN s.name AS name" in query:
+            return _Result([{"name": name} for name in self.skills])
+        if query == DELETE_JOBS_CYPHER:
+            deleted = [job_id for job_id in params["ids"] if self.jobs.pop(job_id, None) is not None]
+            self.deleted.extend(deleted)
+            return _Result([{"deleted": len(deleted)}])
+        raise AssertionError(f"unexpected query: {query}")
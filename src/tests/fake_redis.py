@@ -0,0 +1,149 @@
+"""
+进程内的 Redis 协议（RESP2）替身，供测试使用
+只实现 RedisCacheBackend / RespClient 用到的命令：PING、AUTH、SELECT、GET、SET（PX / NX）、DEL、PEXPIRE、SCAN；
+过期按 time.time() 惰性判断，与真实 Redis 的可见行为一致。
+drop_replies 次命令执行后不回复、直接断开连接（模拟命令已生效但响应丢失）。
+"""
+import fnmatch
+import socketserver
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class _Store:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+
+    def get(self, key: bytes) -> Optional[bytes]:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expire_at = item
+        if expire_at is not None and time.time() >= expire_at:
+            del self.data[key]
+            return None
+        return value
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                args = self._read_command()
+            except (ConnectionError, ValueError):
+                return
+            if args is None:
+                return
+            try:
+                reply = self._dispatch(args)
+            except Exception as e:
+                reply = RuntimeError(str(e))
+            with self.server.store.lock:
+                drop = self.server.drop_replies > 0
+                self.server.drop_replies -= drop
+            if drop:
+                return
+            self.wfile.write(_encode(reply))
+
+    def _read_command(self) -> Optional[List[bytes]]:
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            raise ValueError(line)
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def _dispatch(self, args: List[bytes]):
+        store: _Store = self.server.store
+        command = args[0].upper()
+        with store.lock:
+            if command in (b"PING", b"AUTH", b"SELECT"):
+                return "PONG" if command == b"PING" else "OK"
+            if command == b"GET":
+                return store.get(args[1])
+            if command == b"SET":
+                key, value = args[1], args[2]
+                options = [a.upper() for a in args[3:]]
+                expire_at = None
+                if b"PX" in options:
+                    expire_at = time.time() + int(args[3 + options.index(b"PX") + 1]) / 1000
+                if b"NX" in options and store.get(key) is not None:
+                    return None
+                store.data[key] = (value, expire_at)
+                return "OK"
+            if command == b"DEL":
+                deleted = 0
+                for key in args[1:]:
+                    if store.get(key) is not None:
+                        del store.data[key]
+                        deleted += 1
+                return deleted
+            if command == b"PEXPIRE":
+                value = store.get(args[1])
+                if value is None:
+                    return 0
+                store.data[args[1]] = (value, time.time() + int(args[2]) / 1000)
+                return 1
+            if command == b"SCAN":
+                pattern = args[args.index(b"MATCH") + 1].decode("utf-8") if b"MATCH" in args else "*"
+                keys = [k for k in list(store.data) if store.get(k) is not None
+                        and fnmatch.fnmatchcase(k.decode("utf-8"), pattern)]
+                return [b"0", keys]
+        raise ValueError(f"unknown command {command!r}")
+
+
+def _encode(reply) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, RuntimeError):
+        return b"-ERR %s\r\n" % str(reply).encode("utf-8")
+    if isinstance(reply, str):
+        return b"+%s\r\n" % reply.encode("utf-8")
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+    return b"*%d\r\n" % len(reply) + b"".join(_encode(item) for item in reply)
+
+
+class FakeRedisServer:
+    """
+    用法：
+        with FakeRedisServer() as server:
+            backend = RedisCacheBackend(server.url)
+    """
+
+    def __init__(self):
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.store = _Store()
+        self._server.drop_replies = 0
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"redis://{host}:{port}/0"
+
+    def drop_next_replies(self, n: int = 1) -> None:
+        self._server.drop_replies = n
+
+    def start(self) -> "FakeRedisServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeRedisServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,85 @@
+"""岗位批量写入（二分失败隔离 / 瞬时错误重试）的测试"""
+import pytest
+
+from src.graph_builder import bulk_writer
+from src.graph_builder.bulk_writer import (
+    MERGE_REQUIRES_CYPHER, BisectingBatchWriter, is_transient_error, prepare_job_rows, write_job_batch,
+)
+from src.tests.fake_graph import FakeGraph, TransientError
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(bulk_writer.time, "sleep", lambda seconds: None)
+
+
+def job_rows(n: int):
+    jobs = [{"job_id": f"j{i}", "title": "Java开发", "city": "北京", "company": f"公司{i % 3}",
+             "skills": ["Java", "SQL"]} for i in range(n)]
+    rows, invalid, _ = prepare_job_rows(jobs, lambda s: s, {"Java", "SQL"})
+    assert not invalid
+    return rows
+
+
+def collect_writer(graph, **kwargs):
+    written = []
+    writer = BisectingBatchWriter(graph, on_success=lambda rows, _: written.extend(r["job_id"] for r in rows),
+                                  **kwargs)
+    return writer, written
+
+
+def test_clean_batch_is_one_transaction():
+    graph = FakeGraph()
+    writer, written = collect_writer(graph)
+    writer.write(job_rows(8))
+    assert writer.transactions == 1
+    assert sorted(written) == sorted(f"j{i}" for i in range(8))
+    assert not writer.failed
+
+
+def test_bad_row_is_isolated():
+    graph = FakeGraph()
+    graph.bad_ids = {"j5"}
+    writer, written = collect_writer(graph)
+    writer.write(job_rows(8))
+    assert [job_id for job_id, _ in writer.failed] == ["j5"]
+    assert sorted(written) == sorted(f"j{i}" for i in range(8) if i != 5)
+    assert set(graph.jobs) == set(written)
+    # 8 -> 4 -> 2 -> 1：整批 + 每层两半
+    assert writer.transactions == 7
+    assert writer.retried == 0
+
+
+def test_transient_error_retries_whole_batch():
+    graph = FakeGraph()
+    graph.transient_failures = 2
+    writer, written = collect_writer(graph, retries=3)
+    writer.write(job_rows(4))
+    assert writer.retried == 2
+    assert writer.transactions == 3
+    assert len(written) == 4
+    assert not writer.failed
+
+
+def test_transient_error_beyond_retries_falls_back_to_bisect():
+    graph = FakeGraph()
+    graph.transient_failures = 2
+    writer, written = collect_writer(graph, retries=1)
+    writer.write(job_rows(2))
+    assert writer.retried == 1
+    assert len(written) == 2  # 二分后的子批次不再遇到瞬时错误
+    assert not writer.failed
+
+
+def test_requires_rows_sorted_by_skill():
+    tx = FakeGraph().begin()
+    write_job_batch(tx, job_rows(3))
+    requires = next(params["rows"] for query, params in tx.statements if query == MERGE_REQUIRES_CYPHER)
+    keys = [(r["skill"], r["job_id"]) for r in requires]
+    assert keys == sorted(keys)
+
+
+def test_is_transient_error():
+    assert is_transient_error(TransientError("lock"))
+    assert is_transient_error(RuntimeError("Neo.TransientError.Transaction.DeadlockDetected"))
+    assert not is_transient_error(ValueError("constraint violation"))
@@ -0,0 +1,109 @@
+"""共享缓存后端（SQLite / Redis 协议）的测试：软过期、硬过期、命名锁"""
+import time
+
+import pytest
+
+from src.api.cache import ApiCache, CachedPayload, encode_payload
+from src.api.cache_backends import RedisCacheBackend, RespClient, SQLiteCacheBackend
+from src.tests.fake_redis import FakeRedisServer
+
+
+@pytest.fixture(scope="module")
+def redis_server():
+    with FakeRedisServer() as server:
+        yield server
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        cache = SQLiteCacheBackend(str(tmp_path / "cache.db"), touch_interval=0)
+    else:
+        server = request.getfixturevalue("redis_server")
+        cache = RedisCacheBackend(server.url, key_prefix=f"test:{tmp_path.name}:")
+    yield cache
+    cache.clear()
+
+
+def test_shared_backends_are_blocking():
+    assert SQLiteCacheBackend.blocking and RedisCacheBackend.blocking
+    assert not ApiCache.blocking
+
+
+def test_set_and_lookup_fresh(backend):
+    payload = encode_payload({"skills": ["Python", "SQL"]})
+    assert backend.set("search:g1:a", payload, ttl=60)
+    hit = backend.lookup("search:g1:a")
+    assert hit is not None
+    value, stale = hit
+    assert value == payload and isinstance(value, CachedPayload)
+    assert not stale
+    assert backend.lookup("search:g1:missing") is None
+    assert backend.stats()["hits"] == 1 and backend.stats()["misses"] == 1
+
+
+def test_stale_read_after_soft_ttl(backend):
+    payload = encode_payload([1, 2, 3])
+    backend.set("trend:g1", payload, ttl=0.1, stale_ttl=30)
+    time.sleep(0.2)
+    value, stale = backend.lookup("trend:g1")
+    assert value == payload
+    assert stale
+    assert backend.get("trend:g1") == payload
+
+
+def test_hard_expiry(backend):
+    backend.set("graph:g1", encode_payload({}), ttl=0.05, stale_ttl=0.05)
+    time.sleep(0.25)
+    assert backend.lookup("graph:g1") is None
+
+
+def test_delete_and_clear(backend):
+    backend.set("gap:g1:a", encode_payload(1), ttl=60)
+    backend.set("gap:g1:b", encode_payload(2), ttl=60)
+    backend.delete("gap:g1:a")
+    assert backend.lookup("gap:g1:a") is None
+    backend.clear()
+    assert backend.lookup("gap:g1:b") is None
+    assert len(backend) == 0
+
+
+def test_lock_exclusive_and_renewable(backend):
+    assert backend.try_acquire("leader", "w1", ttl=5)
+    assert not backend.try_acquire("leader", "w2", ttl=5)
+    assert backend.try_acquire("leader", "w1", ttl=5)  # 持有者续期
+    backend.release("leader", "w2")                   # 非持有者释放无效
+    assert not backend.try_acquire("leader", "w2", ttl=5)
+    backend.release("leader", "w1")
+    assert backend.try_acquire("leader", "w2", ttl=5)
+    backend.release("leader", "w2")
+
+
+def test_lock_expires(backend):
+    assert backend.try_acquire("refresh:trend", "w1", ttl=0.1)
+    assert not backend.try_acquire("refresh:trend", "w2", ttl=0.1)
+    time.sleep(0.2)
+    assert backend.try_acquire("refresh:trend", "w2", ttl=5)
+    backend.release("refresh:trend", "w2")
+
+
+def test_locks_are_not_cache_entries(backend):
+    backend.try_acquire("leader", "w1", ttl=5)
+    backend.set("search:g1:x", encode_payload(1), ttl=60)
+    assert len(backend) == 1
+    backend.release("leader", "w1")
+
+
+def test_resp_client_retries_only_reads(redis_server):
+    client = RespClient(redis_server.url)
+    try:
+        # 响应丢失时锁已在服务端生效，重发 SET NX 会返回 nil，因此不重试而是抛出
+        redis_server.drop_next_replies()
+        with pytest.raises((OSError, ConnectionError)):
+            client.execute("SET", "test:resp:lock", "w1", "NX", "PX", 5000)
+        # 只读命令重连后重发一次
+        redis_server.drop_next_replies()
+        assert client.execute("GET", "test:resp:lock") == b"w1"
+        assert client.execute("DEL", "test:resp:lock") == 1
+    finally:
+        client.close()
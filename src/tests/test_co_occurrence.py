@@ -0,0 +1,42 @@
+"""技能共现计数的测试"""
+from src.graph_builder.co_occurrence import JOB_SKILLS_BY_CITY_CYPHER, count_skill_pairs
+
+# 每行一个岗位：(城市, 技能列表)
+JOBS = [
+    ("北京", ["Python", "Java", "SQL"]),
+    ("北京", ["Python", "Java"]),
+    ("北京", ["Go"]),
+    ("上海", ["Python", "SQL", "SQL"]),
+    ("", ["Java", "Python"]),
+]
+
+
+def test_counts_pairs_per_job():
+    global_counts, city_counts = count_skill_pairs(JOBS)
+    assert global_counts == {
+        ("Java", "Python"): 3,
+        ("Java", "SQL"): 1,
+        ("Python", "SQL"): 2,
+    }
+    assert city_counts == {
+        ("北京", "Java", "Python"): 2,
+        ("北京", "Java", "SQL"): 1,
+        ("北京", "Python", "SQL"): 1,
+        ("上海", "Python", "SQL"): 1,
+    }
+
+
+def test_skills_only_in_same_city_do_not_co_occur():
+    """同城的不同岗位各自出现的技能不算共现"""
+    global_counts, city_counts = count_skill_pairs([("北京", ["Go"]), ("北京", ["Rust"])])
+    assert not global_counts
+    assert not city_counts
+
+
+def test_empty_input():
+    global_counts, city_counts = count_skill_pairs([])
+    assert not global_counts and not city_counts
+
+
+def test_scan_query_groups_by_job():
+    assert "WITH j, collect(s.name) AS skills" in JOB_SKILLS_BY_CITY_CYPHER
@@ -0,0 +1,29 @@
+"""数据版本标记文件路径解析与读写的测试"""
+from src.utils import data_version
+from src.utils.data_version import DEFAULT_MARKER_PATH, bump_generation, configured_marker_path, read_marker
+
+
+def test_configured_marker_path(tmp_path):
+    config = tmp_path / "config.yaml"
+    config.write_text('data_version:\n  marker_path: "data/custom_generation.json"\n', encoding="utf-8")
+    assert configured_marker_path(config) == data_version.project_root / "data" / "custom_generation.json"
+
+    absolute = tmp_path / "marker.json"
+    config.write_text(f'data_version:\n  marker_path: "{absolute.as_posix()}"\n', encoding="utf-8")
+    assert configured_marker_path(config) == absolute
+
+
+def test_configured_marker_path_falls_back_to_default(tmp_path):
+    assert configured_marker_path(tmp_path / "missing.yaml") == DEFAULT_MARKER_PATH
+    config = tmp_path / "config.yaml"
+    config.write_text("neo4j:\n  uri: bolt://localhost:7687\n", encoding="utf-8")
+    assert configured_marker_path(config) == DEFAULT_MARKER_PATH
+
+
+def test_bump_and_read_use_configured_path(tmp_path, monkeypatch):
+    marker = tmp_path / "generation.json"
+    monkeypatch.setattr(data_version, "configured_marker_path", lambda config_file=None: marker)
+    generation = bump_generation("test", labels=("Job",))
+    assert marker.exists()
+    assert read_marker() == generation
+    assert data_version.DataGenerationWatcher().marker_path == marker
@@ -0,0 +1,109 @@
+"""查询向量缓存（LRU / 持久化预热 / 磁盘命中提升到内存）的测试"""
+import importlib.util
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+# src.rag 包的 __init__ 会导入 chromadb，这里直接按文件加载，只测试缓存本身
+_spec = importlib.util.spec_from_file_location(
+    "embedding_cache", Path(__file__).resolve().parents[1] / "rag" / "embedding_cache.py")
+embedding_cache = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(embedding_cache)
+EmbeddingCache = embedding_cache.EmbeddingCache
+
+
+class CountingEncoder:
+    """记录每次被调用时的文本，向量取文本长度，便于断言"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+def test_hits_skip_the_encoder_and_normalize_text():
+    cache = EmbeddingCache("m3e", max_entries=10)
+    encoder = CountingEncoder()
+    first = cache.encode(["Python  后端", "Java"], encoder)
+    # 全角 / 多余空白规范化后命中同一条目；批内重复只编码一次
+    second = cache.encode(["Ｐｙｔｈｏｎ 后端", "Java", "Java"], encoder)
+    assert encoder.calls == [["Python 后端", "Java"]]
+    assert second == [first[0], first[1], first[1]]
+    stats = cache.stats()
+    assert stats["hits"] == 3 and stats["misses"] == 2 and stats["entries"] == 2
+
+
+def test_returned_vectors_are_copies():
+    cache = EmbeddingCache("m3e")
+    encoder = CountingEncoder()
+    cache.encode(["Python"], encoder)[0].append(99.0)
+    hit = cache.encode(["Python"], encoder)
+    hit[0][0] = -1.0
+    assert cache.encode(["Python"], encoder) == [[6.0, 1.0]]
+
+
+def test_lru_eviction():
+    cache = EmbeddingCache("m3e", max_entries=2)
+    encoder = CountingEncoder()
+    cache.encode(["a"], encoder)
+    cache.encode(["bb"], encoder)
+    cache.encode(["a"], encoder)      # a 变为最近使用
+    cache.encode(["ccc"], encoder)    # 淘汰 bb
+    cache.encode(["a", "bb"], encoder)
+    assert encoder.calls[-1] == ["bb"]
+    assert cache.stats()["evicted"] == 2
+
+
+def test_disk_hits_are_promoted_to_memory(tmp_path):
+    path = str(tmp_path / "embeddings.db")
+    writer = EmbeddingCache("m3e", max_entries=10, persist_path=path)
+    writer.encode(["Java"], CountingEncoder())
+    time.sleep(0.01)
+    writer.encode(["Python"], CountingEncoder())
+
+    # 内存只预热最近访问的 1 条（Python），Java 只在磁盘上
+    reader = EmbeddingCache("m3e", max_entries=1, persist_path=path, persist_max_entries=10)
+    assert reader.stats()["entries"] == 1
+    encoder = CountingEncoder()
+    assert reader.encode(["Java"], encoder) == [[4.0, 1.0]]
+    assert encoder.calls == [] and reader.stats()["disk_hits"] == 1
+
+    # 磁盘命中的条目已进入内存 LRU：再次读取是内存命中
+    assert reader.encode(["Java"], encoder) == [[4.0, 1.0]]
+    stats = reader.stats()
+    assert stats["hits"] == 1 and stats["disk_hits"] == 1 and stats["misses"] == 0
+    assert encoder.calls == []
+
+
+def test_other_model_does_not_share_vectors(tmp_path):
+    path = str(tmp_path / "embeddings.db")
+    EmbeddingCache("m3e", persist_path=path).encode(["Python"], CountingEncoder())
+    encoder = CountingEncoder()
+    EmbeddingCache("bge", persist_path=path).encode(["Python"], encoder)
+    assert encoder.calls == [["Python"]]
+
+
+def test_counters_are_consistent_under_concurrency(tmp_path):
+    cache = EmbeddingCache("m3e", max_entries=1000, persist_path=str(tmp_path / "embeddings.db"))
+    texts = [f"query {i % 20}" for i in range(50)]
+
+    def worker():
+        for text in texts:
+            cache.encode([text], CountingEncoder())
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    stats = cache.stats()
+    assert stats["hits"] + stats["disk_hits"] + stats["misses"] == 8 * len(texts)
+
+
+@pytest.mark.parametrize("config", [None, {"enabled": False}])
+def test_from_config_disabled(config):
+    assert EmbeddingCache.from_config(config, "m3e") is None
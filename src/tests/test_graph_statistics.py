@@ -0,0 +1,100 @@
+"""图谱统计分组归约与增量合并的测试"""
+import pytest
+
+from src.graph_builder.graph_statistics import (
+    aggregate_statistics, merge_company_statistics, merge_skill_statistics,
+)
+
+# (company_id, salary_min, salary_max, skills)
+JOBS = [
+    ("c1", 10, 20, ["Python", "SQL"]),
+    ("c1", None, None, ["Python"]),
+    ("c2", 7, 9, ["Python", "Java"]),
+    (None, 30, 40, ["Java"]),
+]
+
+
+def by_key(rows, key):
+    return {row[key]: row for row in rows}
+
+
+def apply_delta(skill_rows, company_rows, added=(), removed=()):
+    """模拟 apply_statistics_delta：在全量结果（节点上的已有值）上合并增量"""
+    jobs = list(added) + list(removed)
+    signs = [1] * len(added) + [-1] * len(removed)
+    skill_delta, company_delta = aggregate_statistics(jobs, top_n=None, signs=signs)
+    skills = by_key(skill_rows, "name")
+    companies = by_key(company_rows, "company_id")
+    return (by_key([merge_skill_statistics(d, skills.get(d["name"])) for d in skill_delta], "name"),
+            by_key([merge_company_statistics(d, companies.get(d["company_id"])) for d in company_delta],
+                   "company_id"))
+
+
+def test_aggregate_matches_naive_averages():
+    skills, companies = (by_key(rows, key) for rows, key in zip(aggregate_statistics(JOBS),
+                                                                 ("name", "company_id")))
+    python = skills["Python"]
+    assert python["demand_count"] == 3
+    assert python["avg_salary_min"] == pytest.approx(8.5)  # null 薪资不计入均值
+    assert python["salary_min_samples"] == 2
+    assert skills["Java"]["avg_salary_max"] == pytest.approx(24.5)
+
+    c1 = companies["c1"]
+    assert c1["job_count"] == 2
+    assert c1["avg_salary_min"] == pytest.approx(10.0)
+    assert c1["salary_min_samples"] == 1
+    assert c1["top_skills"] == ["Python", "SQL"]
+    assert c1["top_skill_counts"] == [2, 1]
+
+
+def test_incremental_removal_uses_salary_samples():
+    skill_rows, company_rows = aggregate_statistics(JOBS)
+    skills, companies = apply_delta(skill_rows, company_rows, removed=[JOBS[0]])
+
+    # Python 剩下 (None) 与 (7)：均值应为 7.0，而不是按岗位数加权得到的 7.75
+    assert skills["Python"]["demand_count"] == 2
+    assert skills["Python"]["avg_salary_min"] == pytest.approx(7.0)
+    assert skills["Python"]["salary_min_samples"] == 1
+
+    # c1 剩下的岗位没有薪资：均值应为 None
+    assert companies["c1"]["job_count"] == 1
+    assert companies["c1"]["avg_salary_min"] is None
+    assert companies["c1"]["salary_min_samples"] == 0
+    assert companies["c1"]["top_skills"] == ["Python"]
+
+
+def test_incremental_matches_full_recompute():
+    added = [("c2", 12, 15, ["Python", "Go"]), ("c3", None, 18, ["Go"])]
+    removed = [JOBS[2]]
+    skill_rows, company_rows = aggregate_statistics(JOBS)
+    skills, companies = apply_delta(skill_rows, company_rows, added=added, removed=removed)
+
+    expected_skills, expected_companies = aggregate_statistics([JOBS[0], JOBS[1], JOBS[3]] + added)
+    for name, expected in by_key(expected_skills, "name").items():
+        if name in skills:
+            for field in ("demand_count", "salary_min_samples", "salary_max_samples"):
+                assert skills[name][field] == expected[field]
+            for field in ("avg_salary_min", "avg_salary_max"):
+                assert skills[name][field] == pytest.approx(expected[field])
+    for company_id, expected in by_key(expected_companies, "company_id").items():
+        if company_id in companies:
+            assert companies[company_id]["job_count"] == expected["job_count"]
+            assert companies[company_id]["avg_salary_max"] == pytest.approx(expected["avg_salary_max"])
+
+
+def test_legacy_nodes_fall_back_to_job_count():
+    """没有样本数的旧节点以 demand_count 为权重"""
+    delta = {"name": "Python", "demand_count": 1, "salary_min_sum": 20.0, "salary_min_samples": 1,
+             "salary_max_sum": 30.0, "salary_max_samples": 1}
+    row = merge_skill_statistics(delta, {"demand_count": 1, "avg_salary_min": 10.0, "avg_salary_max": 20.0})
+    assert row["avg_salary_min"] == pytest.approx(15.0)
+    assert row["salary_min_samples"] == 2
+
+
+def test_new_nodes_start_from_zero_samples():
+    delta = {"name": "Go", "demand_count": 1, "salary_min_sum": 12.0, "salary_min_samples": 1,
+             "salary_max_sum": 0.0, "salary_max_samples": 0}
+    row = merge_skill_statistics(delta, {"demand_count": 0, "avg_salary_min": 0.0, "avg_salary_max": 0.0,
+                                         "salary_min_samples": 0, "salary_max_samples": 0})
+    assert row["avg_salary_min"] == pytest.approx(12.0)
+    assert row["avg_salary_max"] is None
@@ -0,0 +1,103 @@
+"""可断点续传导入（检查点保存 / 续传判定 / 从偏移继续读取）的测试"""
+import json
+import os
+
+import pytest
+
+from src.graph_builder.import_checkpoint import POST_IMPORT_STAGES, ImportCheckpoint, iter_job_batches
+
+
+def write_jobs(path, ids):
+    jobs = [{"job_id": job_id, "title": "后端开发"} for job_id in ids]
+    if path.suffix == ".jsonl":
+        path.write_text("\n".join(json.dumps(j, ensure_ascii=False) for j in jobs) + "\n\n", encoding="utf-8")
+    else:
+        path.write_text(json.dumps(jobs, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+@pytest.fixture
+def data_paths(tmp_path):
+    return [write_jobs(tmp_path / "a.json", [f"a{i}" for i in range(5)]),
+            write_jobs(tmp_path / "b.jsonl", [f"b{i}" for i in range(3)])]
+
+
+def run_import(checkpoint, path, batch_size, crash_after=None):
+    """按 neo4j_importer 的流程消费批次并落盘检查点；crash_after 个批次后模拟进程被杀"""
+    written = []
+    for n, (file_index, offset, batch) in enumerate(iter_job_batches(checkpoint, batch_size)):
+        if crash_after is not None and n == crash_after:
+            return written
+        written.extend(job["job_id"] for job in batch)
+        checkpoint.jobs_written += len(batch)
+        checkpoint.file_index, checkpoint.offset = file_index, offset
+        checkpoint.save(path)
+    return written
+
+
+def test_batches_cover_all_files(data_paths):
+    checkpoint = ImportCheckpoint.start(data_paths, generation=1)
+    batches = list(iter_job_batches(checkpoint, batch_size=2))
+    assert [(f, o, [j["job_id"] for j in b]) for f, o, b in batches] == [
+        (0, 2, ["a0", "a1"]), (0, 4, ["a2", "a3"]), (0, 5, ["a4"]), (1, 0, []),
+        (1, 2, ["b0", "b1"]), (1, 3, ["b2"]), (2, 0, []),
+    ]
+
+
+@pytest.mark.parametrize("crash_after", [1, 3, 5])
+def test_resume_after_crash_writes_each_job_once(tmp_path, data_paths, crash_after):
+    path = tmp_path / "checkpoint.json"
+    checkpoint = ImportCheckpoint.start(data_paths, generation=1)
+    checkpoint.save(path)
+    first = run_import(checkpoint, path, batch_size=2, crash_after=crash_after)
+
+    resumed = ImportCheckpoint.load(path)
+    assert resumed.resumable_for(data_paths, generation=1) == (True, "")
+    assert resumed.jobs_written == len(first)
+    second = run_import(resumed, path, batch_size=2)
+    assert first + second == [f"a{i}" for i in range(5)] + [f"b{i}" for i in range(3)]
+    assert "岗位已全部写入（8 个）" in ImportCheckpoint.load(path).describe()
+
+
+def test_changed_file_is_not_resumable(tmp_path, data_paths):
+    checkpoint = ImportCheckpoint.start(data_paths, generation=1)
+    write_jobs(data_paths[1], ["b0", "b1", "b2", "b3"])
+    assert checkpoint.resumable_for(data_paths, generation=1) == (False, "数据文件已变化")
+    os.unlink(data_paths[0])
+    usable, reason = checkpoint.resumable_for(data_paths, generation=1)
+    assert not usable and reason.startswith("数据文件不可读")
+
+
+def test_generation_change_blocks_resume_unless_only_bump_remains(data_paths):
+    checkpoint = ImportCheckpoint.start(data_paths, generation=1)
+    usable, reason = checkpoint.resumable_for(data_paths, generation=2)
+    assert not usable and "数据版本已变化" in reason
+
+    # 只差递增数据版本：版本可能已递增但检查点未落盘
+    checkpoint.stages_done = list(POST_IMPORT_STAGES[:-1])
+    assert checkpoint.resumable_for(data_paths, generation=2) == (True, "")
+
+    checkpoint.stages_done.append("generation")
+    assert checkpoint.finished
+    assert checkpoint.resumable_for(data_paths, generation=2) == (False, "上次导入已完成")
+
+
+def test_load_ignores_missing_or_corrupt_checkpoint(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    assert ImportCheckpoint.load(path) is None
+    path.write_text('{"files": [', encoding="utf-8")
+    assert ImportCheckpoint.load(path) is None
+    path.write_text('{"unknown_field": 1}', encoding="utf-8")
+    assert ImportCheckpoint.load(path) is None
+
+
+def test_save_is_atomic_and_clear_removes_file(tmp_path, data_paths):
+    path = tmp_path / "nested" / "checkpoint.json"
+    checkpoint = ImportCheckpoint.start(data_paths, generation=7)
+    checkpoint.stages_done = ["skill_relationships"]
+    checkpoint.save(path)
+    assert not path.with_suffix(".tmp").exists()
+    assert ImportCheckpoint.load(path) == checkpoint
+    ImportCheckpoint.clear(path)
+    ImportCheckpoint.clear(path)  # 不存在时不报错
+    assert not path.exists()
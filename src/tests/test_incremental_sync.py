@@ -0,0 +1,217 @@
+"""图谱增量同步（内容哈希分类 / 清单自举 / 增量应用）的测试"""
+import pytest
+
+from src.graph_builder.incremental_sync import (
+    DETACH_JOB_EDGES_CYPHER, IncrementalGraphSync, JobSnapshot, SyncManifest, content_hash,
+)
+from src.graph_builder.bulk_writer import prepare_job_rows
+from src.tests.fake_graph import FakeGraph
+
+SKILLS = ["Java", "Python", "SQL"]
+
+
+class FakeImporter:
+    """记录统计 / 共现增量调用的 Neo4jImporter 替身"""
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.statistics = []
+        self.co_occurrence = []
+
+    @staticmethod
+    def normalize_skill_name(name):
+        return name.strip()
+
+    def apply_statistics_delta(self, added, removed=()):
+        self.statistics.append((list(added), list(removed)))
+
+    def update_co_occurrence(self, job_skills=None, removed_job_skills=()):
+        self.co_occurrence.append((list(job_skills), list(removed_job_skills)))
+
+    def update_city_count(self):
+        pass
+
+
+def merged(calls):
+    """把按批次记录的增量调用合并为 (新增, 扣减)"""
+    return [row for added, _ in calls for row in added], [row for _, removed in calls for row in removed]
+
+
+def job(job_id, salary_max=20, skills=("Java", "SQL"), company="公司A", city="北京"):
+    return {"job_id": job_id, "title": "后端开发", "city": city, "company": company,
+            "salary_min": 10, "salary_max": salary_max, "skills": list(skills)}
+
+
+@pytest.fixture
+def graph():
+    return FakeGraph(skills=SKILLS)
+
+
+@pytest.fixture
+def manifest(tmp_path):
+    manifest = SyncManifest(tmp_path / "manifest.db")
+    yield manifest
+    manifest.close()
+
+
+@pytest.fixture
+def sync(graph, manifest):
+    return IncrementalGraphSync(FakeImporter(graph), manifest=manifest, batch_size=2)
+
+
+def test_content_hash_ignores_timestamps_and_skill_order():
+    rows, _, _ = prepare_job_rows([job("j1", skills=("Java", "SQL"))], str.strip, set(SKILLS))
+    row = rows[0]
+    same = dict(row, props=dict(row["props"], created_at="later"), extracted_at="later",
+                skills=list(reversed(row["skills"])))
+    assert content_hash(row) == content_hash(same)
+    changed = dict(row, props=dict(row["props"], salary_max=99))
+    assert content_hash(row) != content_hash(changed)
+
+
+def test_first_sync_writes_everything(sync, graph, manifest):
+    result = sync.sync([job("j1"), job("j2"), job("j3", skills=("Python",))])
+    assert result["new"] == 3 and result["written"] == 3 and result["failed"] == 0
+    assert set(graph.jobs) == {"j1", "j2", "j3"}
+    assert manifest.count() == 3
+
+    added, removed = merged(sync.importer.statistics)
+    assert len(added) == 3 and removed == []
+    assert ("company_公司a", 10, 20, ["Java", "SQL"]) in added
+
+
+def test_classifies_new_changed_unchanged_removed(sync, graph, manifest):
+    sync.sync([job("j1"), job("j2"), job("j3")])
+    sync.importer.statistics.clear()
+
+    plan = sync.plan([job("j1"), job("j2", salary_max=30), job("j4")], full_snapshot=True)
+    assert plan.summary() == {"new": 1, "changed": 1, "unchanged": 1, "removed": 1, "invalid": 0}
+    assert [row["job_id"] for row in plan.new] == ["j4"]
+    assert [row["job_id"] for row in plan.changed] == ["j2"]
+    assert plan.removed == ["j3"]
+    assert plan.previous["j2"].salary_max == 20
+
+    result = sync.apply(plan)
+    assert result["written"] == 2 and result["deleted"] == 1
+    assert "j3" not in graph.jobs and manifest.get_many(["j3"]) == {}
+    assert manifest.get_many(["j2"])["j2"].salary_max == 30
+
+    # 变更岗位重写前先删掉旧的出边
+    detached = [params["ids"] for tx in graph.committed for query, params in tx.statements
+                if query == DETACH_JOB_EDGES_CYPHER]
+    assert detached == [["j2"]]
+
+    # 新版本 +1，旧版本与删除 -1
+    added, removed = merged(sync.importer.statistics)
+    assert sorted(row[2] for row in added) == [20, 30]  # j4 与 j2 的新版本
+    assert sorted(row[2] for row in removed) == [20, 20]  # j2 的旧版本与 j3
+
+
+def test_without_full_snapshot_nothing_is_removed(sync):
+    sync.sync([job("j1"), job("j2")])
+    plan = sync.plan([job("j1")])
+    assert plan.removed == [] and plan.unchanged == 1 and plan.empty
+
+
+def test_unchanged_input_is_a_no_op(sync, graph):
+    sync.sync([job("j1"), job("j2")])
+    committed = len(graph.committed)
+    result = sync.sync([job("j1"), job("j2")])
+    assert result == {"new": 0, "changed": 0, "unchanged": 2, "removed": 0, "invalid": 0}
+    assert len(graph.committed) == committed
+
+
+def test_duplicate_ids_last_one_wins(sync, graph, manifest):
+    result = sync.sync([job("j1", salary_max=20), job("j1", salary_max=25)])
+    assert result["new"] == 1 and result["written"] == 1
+    assert manifest.get_many(["j1"])["j1"].salary_max == 25
+
+
+def test_invalid_jobs_are_reported(sync):
+    plan = sync.plan([job("j1"), {"title": "无 id 岗位"}])
+    assert plan.summary()["invalid"] == 1 and len(plan.new) == 1
+
+
+def test_bootstrap_records_unknown_hashes(graph, manifest):
+    graph.jobs = {
+        "j1": {"job_id": "j1", "company_id": "company_公司a", "city": "北京",
+               "salary_min": 10, "salary_max": 20, "skills": ["Java", "SQL"]},
+        "j2": {"job_id": "j2", "company_id": None, "city": "上海",
+               "salary_min": None, "salary_max": None, "skills": []},
+    }
+    sync = IncrementalGraphSync(FakeImporter(graph), manifest=manifest)
+    assert sync.bootstrap() == 2
+    assert manifest.count() == 2
+    assert sync.bootstrap() == 0  # 与图谱一致时不重建
+
+    # 哈希未知：即使内容相同也按变更重写一次，旧快照用于扣减统计
+    plan = sync.plan([job("j1")])
+    assert [row["job_id"] for row in plan.changed] == ["j1"]
+    assert plan.previous["j1"].content_hash is None
+    assert plan.previous["j1"].skills == ["Java", "SQL"]
+
+    sync.apply(plan)
+    assert sync.plan([job("j1")]).unchanged == 1
+
+
+def test_bootstrap_rebuilds_mismatched_manifest(graph, manifest):
+    manifest.upsert([JobSnapshot("stale", "h", None, "", None, None, [])])
+    graph.jobs = {job_id: {"job_id": job_id, "company_id": None, "city": "", "salary_min": None,
+                           "salary_max": None, "skills": []} for job_id in ("j1", "j2")}
+    sync = IncrementalGraphSync(FakeImporter(graph), manifest=manifest)
+    assert sync.bootstrap() == 2
+    assert sorted(manifest.all_ids()) == ["j1", "j2"]
+
+
+def test_bootstrap_rebuilds_after_graph_generation_changes(graph, manifest):
+    """全量重建后岗位数可能不变，只靠数据版本发现清单已过期"""
+    graph.generation = 3
+    sync = IncrementalGraphSync(FakeImporter(graph), manifest=manifest, batch_size=2)
+    sync.sync([job("j1"), job("j2")])
+    assert manifest.get_generation() == 3
+    sync.mark_synced(4)
+    graph.generation = 4
+    assert sync.bootstrap() == 0
+
+    graph.generation = 5  # 图谱被全量导入重建
+    assert sync.bootstrap() == 2
+    assert manifest.get_generation() == 5
+    assert [row["job_id"] for row in sync.plan([job("j1")]).changed] == ["j1"]
+
+
+def test_deltas_are_applied_before_manifest_writes(graph, manifest):
+    """增量合并失败的批次不记入清单，下次同步时仍会重新处理"""
+    class FailingImporter(FakeImporter):
+        fail_after = None
+
+        def apply_statistics_delta(self, added, removed=()):
+            if self.fail_after is not None and len(self.statistics) >= self.fail_after:
+                raise RuntimeError("neo4j unavailable")
+            super().apply_statistics_delta(added, removed)
+
+    importer = FailingImporter(graph)
+    importer.fail_after = 1
+    sync = IncrementalGraphSync(importer, manifest=manifest, batch_size=2)
+    with pytest.raises(RuntimeError):
+        sync.sync([job("j1"), job("j2"), job("j3")])
+    assert sorted(manifest.all_ids()) == ["j1", "j2"]
+
+    importer.fail_after = None
+    sync.sync([job("j1"), job("j2"), job("j3")])
+    assert sorted(manifest.all_ids()) == ["j1", "j2", "j3"]
+
+    importer.fail_after = len(importer.statistics)
+    with pytest.raises(RuntimeError):
+        sync.sync([], full_snapshot=True)
+    # 删除的增量未合并，清单仍保留这些岗位
+    assert sorted(manifest.all_ids()) == ["j1", "j2", "j3"]
+
+
+def test_failed_rows_are_not_recorded(sync, graph, manifest):
+    graph.bad_ids = {"j2"}
+    result = sync.sync([job("j1"), job("j2"), job("j3")])
+    assert result["failed"] == 1 and result["written"] == 2
+    assert set(manifest.all_ids()) == {"j1", "j3"}
+    # 下次同步时失败的岗位仍是新增
+    graph.bad_ids = set()
+    assert [row["job_id"] for row in sync.plan([job("j2")]).new] == ["j2"]
@@ -0,0 +1,52 @@
+"""排序结果分页游标（翻页 / 数据版本变化后失效）的测试"""
+import pytest
+
+from src.api.pagination import CursorError, decode_cursor, encode_cursor, paginate
+
+KEY = "search:g1:java后端:北京:500"
+HITS = [{"job_id": f"j{i}"} for i in range(45)]
+
+
+def test_pages_through_all_hits():
+    seen, cursor, pages = [], None, 0
+    while True:
+        page, cursor = paginate(HITS, KEY, cursor, page_size=20)
+        seen.extend(h["job_id"] for h in page)
+        pages += 1
+        if cursor is None:
+            break
+    assert pages == 3
+    assert seen == [h["job_id"] for h in HITS]
+
+
+def test_exact_last_page_has_no_next_cursor():
+    page, cursor = paginate(HITS[:20], KEY, None, page_size=20)
+    assert len(page) == 20 and cursor is None
+    assert paginate([], KEY, None, page_size=20) == ([], None)
+
+
+def test_cursor_invalidated_by_generation_change():
+    _, cursor = paginate(HITS, KEY, None, page_size=20)
+    assert decode_cursor(cursor, KEY) == 20
+    with pytest.raises(CursorError) as exc:
+        paginate(HITS, KEY.replace(":g1:", ":g2:"), cursor, page_size=20)
+    assert exc.value.stale
+
+
+def test_cursor_invalidated_by_other_query():
+    cursor = encode_cursor(KEY, 20)
+    with pytest.raises(CursorError) as exc:
+        decode_cursor(cursor, "search:g1:python:北京:500")
+    assert exc.value.stale
+
+
+@pytest.mark.parametrize("cursor", ["!!!", "bm90IGpzb24", encode_cursor(KEY, 0)[:-4]])
+def test_malformed_cursor(cursor):
+    with pytest.raises(CursorError) as exc:
+        decode_cursor(cursor, KEY)
+    assert not exc.value.stale
+
+
+def test_negative_offset_rejected():
+    with pytest.raises(CursorError):
+        decode_cursor(encode_cursor(KEY, -1), KEY)
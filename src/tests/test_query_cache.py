@@ -0,0 +1,89 @@
+"""Neo4j 查询结果缓存（按标签局部淘汰 / LRU / TTL / 写入期间不回填）的测试"""
+import time
+
+from src.graph_builder.query_cache import ANY_TAG, QueryResultCache, cypher_tags, is_write
+
+SKILL_QUERY = "MATCH (s:Skill) RETURN s.name AS name"
+JOB_QUERY = """
+    MATCH (j:Job)-[:REQUIRES]->(s:Skill {name: $skill})
+    RETURN j.job_id AS job_id
+"""
+COMPANY_QUERY = "MATCH (c:Company) RETURN c.name AS name"
+
+
+def cached(cache, query, params=None, rows=({"n": 1},)):
+    key = cache.make_key(query, params)
+    cache.put(key, list(rows), cypher_tags(query))
+    return key
+
+
+def test_cypher_tags_and_write_detection():
+    assert cypher_tags(JOB_QUERY) == {"Job", "REQUIRES", "Skill"}
+    assert cypher_tags("MATCH (`j`:`Job`) RETURN j") == {"Job"}
+    assert cypher_tags("CALL db.labels()") == {ANY_TAG}
+    assert is_write("MATCH (s:Skill) SET s.demand_count = 1")
+    assert not is_write(SKILL_QUERY)
+
+
+def test_key_ignores_whitespace_and_param_order():
+    cache = QueryResultCache()
+    assert cache.make_key(JOB_QUERY, {"skill": "Java", "limit": 5}) == \
+        cache.make_key(" ".join(JOB_QUERY.split()), {"limit": 5, "skill": "Java"})
+    assert cache.make_key(JOB_QUERY, {"skill": "Java"}) != cache.make_key(JOB_QUERY, {"skill": "Go"})
+
+
+def test_invalidate_only_entries_with_written_labels():
+    cache = QueryResultCache()
+    skill = cached(cache, SKILL_QUERY)
+    job = cached(cache, JOB_QUERY, {"skill": "Java"})
+    company = cached(cache, COMPANY_QUERY)
+    untagged = cached(cache, "CALL db.labels()")
+
+    assert cache.invalidate(["Company"]) == 2  # Company 查询 + 无法解析标签的查询
+    assert cache.get(company) is None and cache.get(untagged) is None
+    assert cache.get(skill) is not None and cache.get(job) is not None
+
+    assert cache.invalidate(["REQUIRES"]) == 1
+    assert cache.get(job) is None and cache.get(skill) is not None
+
+    assert cache.invalidate() == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_returned_rows_are_copies():
+    cache = QueryResultCache()
+    key = cached(cache, SKILL_QUERY, rows=[{"name": "Java"}])
+    cache.get(key)[0]["name"] = "changed"
+    assert cache.get(key) == [{"name": "Java"}]
+
+
+def test_lru_and_ttl():
+    cache = QueryResultCache(max_entries=2, ttl=0.05)
+    first = cached(cache, SKILL_QUERY)
+    second = cached(cache, COMPANY_QUERY)
+    cache.get(first)  # first 变为最近使用
+    third = cached(cache, JOB_QUERY)
+    assert cache.get(second) is None
+    assert cache.get(first) is not None and cache.get(third) is not None
+    assert cache.stats()["evicted"] == 1
+
+    time.sleep(0.1)
+    assert cache.get(first) is None
+    assert cache.stats()["entries"] == 1  # 过期条目在读取时删除
+
+
+def test_result_read_before_write_is_not_cached():
+    cache = QueryResultCache()
+    key = cache.make_key(SKILL_QUERY, None)
+    epoch = cache.epoch
+    cache.invalidate(["Skill"])  # 查询执行期间有写入
+    cache.put(key, [{"name": "Java"}], cypher_tags(SKILL_QUERY), epoch=epoch)
+    assert cache.get(key) is None
+    cache.put(key, [{"name": "Java"}], cypher_tags(SKILL_QUERY), epoch=cache.epoch)
+    assert cache.get(key) == [{"name": "Java"}]
+
+
+def test_from_config():
+    assert QueryResultCache.from_config(None) is None
+    cache = QueryResultCache.from_config({"enabled": True, "max_entries": 10, "ttl": 5})
+    assert cache.max_entries == 10 and cache.ttl == 5
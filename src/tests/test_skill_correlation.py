@@ -0,0 +1,90 @@
+"""技能关联度（RELATED_TO）进程内计算的测试"""
+import math
+
+import pytest
+
+from src.graph_builder.skill_correlation import (
+    JOB_SKILL_IDS_CYPHER, SkillMatrixBuilder, co_occurrence_pairs, related_skill_rows, score_pairs,
+)
+
+# N = 4：a 出现在 3 个岗位，b 在 2 个，c 在 1 个；最后一个岗位没有技能但计入 N
+JOBS = [
+    ["a", "b"],
+    ["a", "b", "c", "b"],  # 重复技能只计一次
+    ["a", ""],             # 空技能名忽略
+    [],
+]
+
+
+def build(jobs):
+    builder = SkillMatrixBuilder()
+    for skills in jobs:
+        builder.add(skills)
+    return builder
+
+
+def rows_by_pair(rows):
+    return {(r["s1"], r["s2"]): r for r in rows}
+
+
+def test_builder_matrix_shape_and_counts():
+    builder = build(JOBS)
+    X = builder.matrix()
+    assert builder.n_jobs == 4
+    assert builder.skills == ["a", "b", "c"]
+    assert X.shape == (4, 3)
+    assert X.sum(axis=0).tolist() == [[3, 2, 1]]
+
+
+def test_co_occurrence_pairs_upper_triangle():
+    i, j, co, counts = co_occurrence_pairs(build(JOBS).matrix())
+    pairs = {(int(a), int(b)): int(c) for a, b, c in zip(i, j, co)}
+    assert pairs == {(0, 1): 2, (0, 2): 1, (1, 2): 1}
+    assert counts.tolist() == [3, 2, 1]
+
+
+def test_related_skill_rows_scores():
+    builder = build(JOBS)
+    rows = rows_by_pair(related_skill_rows(builder.matrix(), builder.skills, min_co_occurrence=1))
+    assert set(rows) == {("a", "b"), ("a", "c"), ("b", "c")}
+
+    ab = rows[("a", "b")]
+    assert ab["co_occurrence"] == 2
+    assert ab["correlation"] == pytest.approx(2 / math.sqrt(3 * 2))
+    assert ab["lift"] == pytest.approx(2 * 4 / (3 * 2))
+    assert ab["pmi"] == pytest.approx(math.log(4 / 3))
+    assert ab["strength"] == pytest.approx(0.002)
+
+    bc = rows[("b", "c")]
+    assert bc["co_occurrence"] == 1
+    assert bc["correlation"] == pytest.approx(1 / math.sqrt(2))
+    assert bc["lift"] == pytest.approx(2.0)
+    assert bc["pmi"] == pytest.approx(math.log(2))
+
+
+def test_related_skill_rows_filters():
+    builder = build(JOBS)
+    X = builder.matrix()
+    assert set(rows_by_pair(related_skill_rows(X, builder.skills, min_co_occurrence=2))) == {("a", "b")}
+    by_lift = related_skill_rows(X, builder.skills, min_co_occurrence=1, metric="lift", min_score=1.5)
+    assert set(rows_by_pair(by_lift)) == {("b", "c")}
+    with pytest.raises(ValueError):
+        related_skill_rows(X, builder.skills, metric="jaccard")
+
+
+def test_related_skill_rows_orders_pair_ids():
+    builder = build([["z", "y"], ["y", "z"]])
+    rows = related_skill_rows(builder.matrix(), builder.skills, min_co_occurrence=1)
+    assert [(r["s1"], r["s2"], r["co_occurrence"]) for r in rows] == [("y", "z", 2)]
+
+
+def test_score_pairs_zero_counts():
+    scores = score_pairs([0], [0], [5], 10)
+    assert scores["correlation"].tolist() == [0.0]
+    assert scores["lift"].tolist() == [0.0]
+    assert scores["pmi"].tolist() == [0.0]
+
+
+def test_job_skill_query_groups_by_job():
+    """扫描语句必须每个岗位一行，否则整个图谱会被当成一个岗位（N = 1）"""
+    assert "WITH j, collect(s.skill_id) AS skills" in JOB_SKILL_IDS_CYPHER
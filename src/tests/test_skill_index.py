@@ -0,0 +1,79 @@
+"""技能倒排索引（命中计数 / 城市过滤 / top-k 排序）的测试"""
+import random
+
+from src.api.skill_index import SkillJobIndex
+
+SKILLS = ["Python", "Java", "SQL", "Go", "Docker", "Redis"]
+CITIES = ["北京", "上海", "深圳"]
+
+RECORDS = [
+    ("j1", "北京", 30, ["Python", "SQL"]),
+    ("j2", "北京", 20, ["Python", "SQL", "Docker"]),
+    ("j3", "上海", 50, ["Python"]),
+    ("j4", "上海", 10, ["Java", "SQL", "SQL"]),
+    ("j5", "", None, []),
+]
+
+
+def naive_match(records, skills, city=None, k=500):
+    """逐岗位计数并按 (命中数, 薪资上限) 降序排序的参照实现"""
+    wanted = set(skills)
+    rows = []
+    for ordinal, (job_id, job_city, salary_max, job_skills) in enumerate(records):
+        hits = wanted & set(job_skills)
+        if hits and (not city or job_city == city):
+            rows.append((len(hits), float(salary_max or 0), -ordinal, job_id))
+    rows.sort(reverse=True)
+    return [job_id for _, _, _, job_id in rows[:k]]
+
+
+def test_ranks_by_match_count_then_salary():
+    index = SkillJobIndex.from_records(RECORDS)
+    result = index.match(["Python", "SQL", "Docker"])
+    assert [r["job_id"] for r in result] == ["j2", "j1", "j3", "j4"]
+    assert result[0] == {"job_id": "j2", "matched_skills": ["Python", "SQL", "Docker"],
+                         "match_count": 3, "total_skills": 3}
+    # 技能重复只计一次
+    assert index.match(["SQL"])[-1] == {"job_id": "j4", "matched_skills": ["SQL"],
+                                         "match_count": 1, "total_skills": 2}
+
+
+def test_city_filter_and_limit():
+    index = SkillJobIndex.from_records(RECORDS)
+    assert [r["job_id"] for r in index.match(["Python", "SQL"], city="上海")] == ["j3", "j4"]
+    assert index.match(["Python"], city="广州") == []
+    assert [r["job_id"] for r in index.match(["Python", "SQL"], k=2)] == ["j1", "j2"]
+    assert index.match(["Python"], k=0) == []
+
+
+def test_unknown_and_duplicate_skills():
+    index = SkillJobIndex.from_records(RECORDS)
+    assert index.match(["Rust"]) == []
+    assert index.match([]) == []
+    result = index.match(["Python", "Python", "Rust"])
+    assert all(r["match_count"] == 1 and r["matched_skills"] == ["Python"] for r in result)
+
+
+def test_matches_naive_ranking_on_random_data():
+    rng = random.Random(7)
+    records = [
+        (f"j{i}", rng.choice(CITIES), rng.randint(5, 60), rng.sample(SKILLS, rng.randint(0, 4)))
+        for i in range(400)
+    ]
+    index = SkillJobIndex.from_records(records)
+    for _ in range(20):
+        query = rng.sample(SKILLS, rng.randint(1, 4))
+        city = rng.choice(CITIES + [None])
+        k = rng.choice([5, 50, 500])
+        expected = naive_match(records, query, city, k)
+        result = index.match(query, city=city, k=k)
+        # 同命中数同薪资时顺序不作保证，只比较 (命中数, 薪资) 序列与岗位集合
+        key = {job_id: (len(set(query) & set(skills)), salary) for job_id, _, salary, skills in records}
+        assert [key[r["job_id"]] for r in result] == [key[j] for j in expected]
+        if len(expected) < k:
+            assert {r["job_id"] for r in result} == set(expected)
+
+
+def test_stats():
+    stats = SkillJobIndex.from_records(RECORDS).stats()
+    assert stats["jobs"] == 5 and stats["skills"] == 4 and stats["cities"] == 3
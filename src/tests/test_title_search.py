@@ -0,0 +1,105 @@
+"""职位名称搜索（n-gram 倒排索引 / 全文索引不可用时的回退）的测试"""
+import asyncio
+import random
+
+from src.api.title_search import TITLE_LOAD_CYPHER, TitleNgramIndex, TitleSearch, lucene_query
+
+RECORDS = [
+    ("j1", "Java开发工程师", "北京", 30),
+    ("j2", "高级Java开发", "北京", 40),
+    ("j3", "Python 数据分析", "上海", 25),
+    ("j4", "数据开发（Java/Python）", "上海", 35),
+    ("j5", "前端开发", "", None),
+]
+
+
+class FakeNeo4j:
+    """AsyncNeo4jManager 替身：全文索引不存在，其余查询按语句内容返回"""
+
+    def __init__(self, records):
+        self.records = records
+        self.queries = []
+
+    async def execute_query(self, query, params=None, timeout=None):
+        self.queries.append(query)
+        if "db.index.fulltext.queryNodes" in query:
+            raise RuntimeError("There is no such fulltext schema index: job_title_fts")
+        if query == TITLE_LOAD_CYPHER:
+            return [{"job_id": j, "title": t, "city": c, "salary_max": s or 0} for j, t, c, s in self.records]
+        if "CONTAINS" in query:
+            return [{"job_id": "contains", "match_count": 1}]
+        raise AssertionError(f"unexpected query: {query}")
+
+
+def naive_search(records, keywords, city=None):
+    keywords = [kw.lower() for kw in keywords]
+    rows = []
+    for ordinal, (job_id, title, job_city, salary_max) in enumerate(records):
+        hits = sum(kw in title.replace(" ", "").lower() for kw in keywords)
+        if hits and (not city or job_city == city):
+            rows.append((hits, float(salary_max or 0), job_id))
+    rows.sort(reverse=True)
+    return [(hits, salary) for hits, salary, _ in rows]
+
+
+def test_ngram_search_ranks_by_hits_then_salary():
+    index = TitleNgramIndex.from_records(RECORDS)
+    result = index.search(["java", "开发"])
+    assert [r["job_id"] for r in result] == ["j2", "j4", "j1", "j5"]
+    assert [r["match_count"] for r in result] == [2, 2, 2, 1]
+    assert [r["job_id"] for r in index.search(["数据"], city="上海")] == ["j4", "j3"]
+    assert index.search(["数据"], city="广州") == []
+    assert [r["job_id"] for r in index.search(["开发"], k=2)] == ["j2", "j4"]
+
+
+def test_ngram_candidates_are_verified_as_substrings():
+    # "开发工程" 的二元组都出现在 "开发" + "工程" 中，但只有 j1 含完整子串
+    index = TitleNgramIndex.from_records(RECORDS + [("j6", "工程开发", "北京", 10)])
+    assert [r["job_id"] for r in index.search(["开发工程"])] == ["j1"]
+    # 单字关键词退化为一元组
+    assert {r["job_id"] for r in index.search(["据"])} == {"j3", "j4"}
+    assert index.search(["Go"]) == [] and index.search([" "]) == []
+
+
+def test_ngram_matches_naive_substring_search():
+    rng = random.Random(3)
+    words = ["Java", "Python", "开发", "数据", "算法", "工程师", "高级", "测试"]
+    records = [(f"j{i}", "".join(rng.sample(words, rng.randint(1, 3))), rng.choice(["北京", "上海"]),
+                rng.randint(5, 60)) for i in range(300)]
+    index = TitleNgramIndex.from_records(records)
+    for _ in range(20):
+        keywords = rng.sample(words, rng.randint(1, 3))
+        city = rng.choice(["北京", "上海", None])
+        result = index.search(keywords, city=city, k=1000)
+        salary = {job_id: float(s) for job_id, _, _, s in records}
+        assert [(r["match_count"], salary[r["job_id"]]) for r in result] == naive_search(records, keywords, city)
+
+
+def test_lucene_query_quotes_phrases():
+    assert lucene_query(["Java开发", 'a"b', " "]) == '"Java开发" OR "a\\"b"'
+
+
+def test_falls_back_to_ngram_index_when_fulltext_missing():
+    async def scenario():
+        neo4j = FakeNeo4j(RECORDS)
+        search = TitleSearch(neo4j)
+        # 全文索引不存在：本次用 CONTAINS 兜底，同时后台加载 n-gram 索引
+        assert await search.search(["java"]) == [{"job_id": "contains", "match_count": 1}]
+        assert search.fulltext_available is False
+        await search._ngram_task
+        assert search.ngram_index is not None and len(search.ngram_index) == len(RECORDS)
+
+        queries = len(neo4j.queries)
+        result = await search.search(["java"], city="北京")
+        assert [r["job_id"] for r in result] == ["j2", "j1"]
+        assert len(neo4j.queries) == queries  # n-gram 索引就绪后不再查库
+        assert search.stats()["queries"] == {"fulltext": 0, "ngram": 1, "contains": 1}
+
+        # 数据版本变化：后台重建，新索引就绪前旧索引继续服务
+        neo4j.records = RECORDS[:2]
+        search.invalidate()
+        assert len(await search.search(["开发"])) == 4
+        await search._ngram_task
+        assert len(search.ngram_index) == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,62 @@
+"""
+Cypher 查询模板注册表
+请求路径上的 Cypher 统一用 register_cypher 声明：名称、语句、代表性参数、期望使用的索引，
+scripts/profile_cypher.py 遍历注册表逐个执行 PROFILE，记录 db hits / 行数 / 执行计划算子并与基线比较，
+防止索引失效（如建了索引但查询没用上）之类的性能回退悄无声息地上线。
+
+代表性参数中以 @ 开头的字符串是占位符，由 profile 脚本在目标图谱上取样替换：
+    @job_id / @job_ids   已有岗位的 job_id（单个 / 100 个）
+    @skills / @skill     需求量最高的技能名（5 个 / 1 个）
+    @city                岗位最多的城市
+"""
+import importlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List
+
+# 声明了查询模板的模块（均不依赖 FastAPI / LangChain，profile 脚本可直接导入）
+TEMPLATE_MODULES = (
+    "src.api.queries",
+    "src.api.skill_index",
+    "src.api.title_search",
+    "src.graph_builder.position_profiles",
+    "src.utils.graph_stats",
+)
+
+
+@dataclass(frozen=True)
+class CypherTemplate:
+    """
+    一个查询模板
+
+    Attributes:
+        name: 模板名（基线文件中的 key）
+        query: Cypher 语句
+        params: 代表性参数（可含 @ 占位符）
+        expect: 执行计划中必须出现的片段，如 "Skill(name)" 表示必须走 Skill.name 索引
+        module: 声明模板的模块
+    """
+    name: str
+    query: str
+    params: Dict[str, Any] = field(default_factory=dict)
+    expect: tuple = ()
+    module: str = ""
+
+
+_REGISTRY: Dict[str, CypherTemplate] = {}
+
+
+def register_cypher(name: str, query: str, params: Dict[str, Any] = None,
+                    expect: Iterable[str] = (), module: str = "") -> str:
+    """登记查询模板并原样返回语句，便于直接赋值给模块常量"""
+    existing = _REGISTRY.get(name)
+    if existing is not None and existing.query != query:
+        raise ValueError(f"Cypher 模板重复注册: {name}")
+    _REGISTRY[name] = CypherTemplate(name, query, dict(params or {}), tuple(expect), module)
+    return query
+
+
+def load_templates(modules: Iterable[str] = TEMPLATE_MODULES) -> List[CypherTemplate]:
+    """导入声明模板的模块并返回全部已注册模板（按名称排序）"""
+    for module in modules:
+        importlib.import_module(module)
+    return [_REGISTRY[name] for name in sorted(_REGISTRY)]
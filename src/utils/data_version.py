@@ -0,0 +1,233 @@
+"""
+数据版本（generation）管理
+每次向 Neo4j / 向量库导入数据后递增一个单调的 generation 戳，
+API 把它拼进所有缓存 key，数据一更新旧缓存即不可达，无需依赖 TTL 保证正确性。
+
+generation 同时写入两处：
+- 标记文件 data/data_generation.json（同机部署时 API 只需 stat 一次即可感知变化）
+- Neo4j 中的 (:DataVersion {name: 'global'}) 节点（API 与导入脚本不在同一台机器时使用）
+
+导入可声明本次写入的图谱标签（labels），API 据此只淘汰 Neo4j 查询结果缓存中相关的条目；
+向量库导入声明空标签，不影响图谱查询缓存。
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+project_root = Path(__file__).parent.parent.parent
+DEFAULT_MARKER_PATH = project_root / 'data' / 'data_generation.json'
+# 标记文件保留最近若干次递增记录，API 两次轮询之间发生多次导入时合并各次的标签
+MARKER_HISTORY = 20
+
+READ_GENERATION_CYPHER = (
+    "MATCH (v:DataVersion {name: 'global'}) RETURN v.generation AS generation"
+)
+WRITE_GENERATION_CYPHER = """
+MERGE (v:DataVersion {name: 'global'})
+SET v.generation = CASE WHEN coalesce(v.generation, 0) > $generation
+                        THEN v.generation ELSE $generation END,
+    v.source = $source,
+    v.labels = $labels,
+    v.updated_at = $updated_at
+RETURN v.generation AS generation
+"""
+
+
+def configured_marker_path(config_file: Optional[Path] = None) -> Path:
+    """
+    config.yaml 中 data_version.marker_path 指定的标记文件（相对路径按项目根目录解析）
+
+    导入脚本与 API 必须读写同一个标记文件；配置缺失或不可读时使用 DEFAULT_MARKER_PATH
+    """
+    config_file = Path(config_file or project_root / 'config.yaml')
+    try:
+        import yaml
+        with open(config_file, 'r', encoding='utf-8') as f:
+            marker = ((yaml.safe_load(f) or {}).get('data_version') or {}).get('marker_path')
+    except Exception as e:
+        logger.debug(f"读取 data_version 配置失败，使用默认标记文件: {e}")
+        marker = None
+    if not marker:
+        return DEFAULT_MARKER_PATH
+    marker = Path(marker)
+    return marker if marker.is_absolute() else project_root / marker
+
+
+def _read_marker_state(path: Path) -> Dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        int(state.get('generation', 0))
+        return state
+    except (OSError, ValueError, TypeError, AttributeError):
+        return {}
+
+
+def read_marker(marker_path: Optional[Path] = None) -> int:
+    """读取标记文件中的 generation，文件不存在或损坏时返回 0"""
+    return int(_read_marker_state(Path(marker_path or configured_marker_path())).get('generation', 0))
+
+
+def changed_labels_since(state: Dict, generation: int) -> Optional[FrozenSet[str]]:
+    """
+    标记文件记录的、generation 之后各次导入声明的标签并集
+
+    Returns:
+        标签集合；任一次导入未声明标签或历史记录不足以覆盖时返回 None（影响范围未知）
+    """
+    history = state.get('history')
+    if not history:
+        return None
+    newer = [h for h in history if h.get('generation', 0) > generation]
+    if len(newer) == len(history) and len(history) >= MARKER_HISTORY:
+        return None  # 更早的记录已被截断
+    labels: set = set()
+    for entry in newer:
+        if entry.get('labels') is None:
+            return None
+        labels.update(entry['labels'])
+    return frozenset(labels)
+
+
+def bump_generation(source: str,
+                    graph_executor: Optional[Callable[[str, dict], List[dict]]] = None,
+                    marker_path: Optional[Path] = None,
+                    labels: Optional[Iterable[str]] = None) -> int:
+    """
+    递增 generation 并写入标记文件（以及 Neo4j，如果提供了执行器）
+
+    Args:
+        source: 触发来源，如 'neo4j_import' / 'vector_db'，仅用于排查
+        graph_executor: (cypher, params) -> rows，可传 Neo4jManager.execute_query
+                        或 lambda q, p: graph.run(q, **p).data()
+        marker_path: 标记文件路径，默认取 config.yaml 的 data_version.marker_path
+        labels: 本次写入的图谱标签 / 关系类型；None 表示未知（API 淘汰全部图谱查询缓存），
+                空集合表示未写图谱（如向量库导入）
+
+    Returns:
+        新的 generation
+    """
+    path = Path(marker_path or configured_marker_path())
+    state = _read_marker_state(path)
+    current = int(state.get('generation', 0))
+    labels = None if labels is None else sorted(set(labels))
+    if graph_executor is not None:
+        try:
+            rows = graph_executor(READ_GENERATION_CYPHER, {})
+            if rows and rows[0].get('generation') is not None:
+                current = max(current, int(rows[0]['generation']))
+        except Exception as e:
+            logger.warning(f"读取 Neo4j 数据版本失败: {e}")
+
+    # 毫秒时间戳保证跨机器、多次导入之间也单调递增
+    generation = max(current + 1, int(time.time() * 1000))
+    updated_at = datetime.now().isoformat()
+
+    history = (state.get('history') or [])[-(MARKER_HISTORY - 1):]
+    history.append({'generation': generation, 'labels': labels})
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'generation': generation, 'source': source, 'updated_at': updated_at,
+                   'labels': labels, 'history': history}, f)
+    os.replace(tmp_path, path)
+
+    if graph_executor is not None:
+        try:
+            graph_executor(WRITE_GENERATION_CYPHER, {
+                'generation': generation, 'source': source, 'updated_at': updated_at, 'labels': labels,
+            })
+        except Exception as e:
+            logger.warning(f"写入 Neo4j 数据版本失败: {e}")
+
+    logger.info(f"📌 数据版本已更新: generation={generation}（来源: {source}）")
+    return generation
+
+
+class DataGenerationWatcher:
+    """
+    API 侧的数据版本轮询
+
+    标记文件只在 mtime 变化时才重新读取；Neo4j 节点查询为单节点点查，开销可忽略
+    """
+
+    def __init__(self, marker_path: Optional[Path] = None, neo4j_query=None, interval: float = 10.0):
+        """
+        Args:
+            marker_path: 标记文件路径，默认取 config.yaml 的 data_version.marker_path
+            neo4j_query: 异步查询函数 (cypher, params) -> rows，None 表示只看标记文件
+            interval: 轮询间隔（秒）
+        """
+        self.marker_path = Path(marker_path or configured_marker_path())
+        self.neo4j_query = neo4j_query
+        self.interval = interval
+        self._marker_state = _read_marker_state(self.marker_path)
+        self.generation = int(self._marker_state.get('generation', 0))
+        # 最近一次变化涉及的图谱标签（None 表示未知），供回调按标签淘汰查询结果缓存
+        self.changed_labels: Optional[FrozenSet[str]] = None
+        self._marker_mtime = self._stat_mtime()
+        self._marker_generation = self.generation
+        self._callbacks: List[Callable[[int, int], None]] = []
+
+    def on_change(self, callback: Callable[[int, int], None]) -> None:
+        """注册 generation 变化回调 callback(old, new)"""
+        self._callbacks.append(callback)
+
+    async def refresh(self) -> int:
+        """检查一次最新 generation，变化时触发回调"""
+        mtime = self._stat_mtime()
+        if mtime != self._marker_mtime:
+            self._marker_mtime = mtime
+            self._marker_state = _read_marker_state(self.marker_path)
+            self._marker_generation = int(self._marker_state.get('generation', 0))
+        latest = self._marker_generation
+
+        if self.neo4j_query is not None:
+            try:
+                rows = await self.neo4j_query(READ_GENERATION_CYPHER, {})
+                if rows and rows[0].get('generation') is not None:
+                    latest = max(latest, int(rows[0]['generation']))
+            except Exception as e:
+                logger.debug(f"读取 Neo4j 数据版本失败: {e}")
+
+        if latest > self.generation:
+            # 只有标记文件覆盖到最新 generation 时才知道涉及哪些标签；仅 Neo4j 节点可见的变化按未知处理
+            self.changed_labels = (changed_labels_since(self._marker_state, self.generation)
+                                   if latest == self._marker_generation else None)
+            old, self.generation = self.generation, latest
+            logger.info(f"📌 检测到数据更新: generation {old} -> {latest}，旧缓存自动失效")
+            for callback in self._callbacks:
+                try:
+                    callback(old, latest)
+                except Exception as e:
+                    logger.warning(f"数据版本回调失败: {e}")
+        return self.generation
+
+    async def poll_loop(self):
+        """后台轮询任务"""
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"数据版本轮询失败: {e}")
+            await asyncio.sleep(self.interval)
+
+    def _stat_mtime(self) -> float:
+        try:
+            return self.marker_path.stat().st_mtime
+        except OSError:
+            return 0.0
+
+
+if __name__ == '__main__':
+    # 手动递增数据版本，相当于让所有 API 缓存失效
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    print(f"generation: {bump_generation('manual')}")
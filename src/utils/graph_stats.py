@@ -0,0 +1,48 @@
+"""
+图谱统计查询
+API（AsyncNeo4jManager）、脚本（Neo4jManager）与导入器（py2neo）共用的 Cypher 与结果格式
+"""
+from datetime import datetime
+from typing import Dict, Optional
+
+from src.utils.cypher_registry import register_cypher
+
+# 图谱统计（一次往返）：单标签节点数 / 单类型关系数 / 全部节点与关系数都由 count store 直接给出，不遍历数据；
+# 城市数无法从 count store 得到，由导入器预计算写入 (:GraphStats {name: 'global'}).city_count
+DATABASE_STATS_CYPHER = register_cypher("database_stats", """
+CALL { MATCH (n:Skill) RETURN count(n) AS skills }
+CALL { MATCH (n:Job) RETURN count(n) AS jobs }
+CALL { MATCH (n) RETURN count(n) AS total_nodes }
+CALL { MATCH ()-[r:REQUIRES]->() RETURN count(r) AS requires_relationships }
+CALL { MATCH ()-[r:RELATED_TO]->() RETURN count(r) AS related_relationships }
+CALL { MATCH ()-[r]->() RETURN count(r) AS total_relationships }
+OPTIONAL MATCH (g:GraphStats {name: 'global'})
+RETURN skills, jobs, g.city_count AS cities, total_nodes,
+       requires_relationships, related_relationships, total_relationships,
+       g.updated_at AS cities_updated_at
+""", module=__name__)
+
+# 重新计算城市数并写回 GraphStats 节点（导入后执行；走 job_city_idx 索引，不在请求路径上）
+REFRESH_CITY_COUNT_CYPHER = """
+MATCH (j:Job) WHERE j.city IS NOT NULL AND j.city <> ''
+WITH count(DISTINCT j.city) AS city_count
+MERGE (g:GraphStats {name: 'global'})
+SET g.city_count = city_count, g.updated_at = $updated_at
+RETURN city_count, g.updated_at AS updated_at
+"""
+
+
+def database_stats_from_row(row: Optional[Dict]) -> Dict:
+    """统计查询结果 -> get_database_stats 返回格式（附计算时间）"""
+    row = row or {}
+    return {
+        'skills': row.get('skills', 0),
+        'jobs': row.get('jobs', 0),
+        'cities': row.get('cities'),
+        'total_nodes': row.get('total_nodes', 0),
+        'requires_relationships': row.get('requires_relationships', 0),
+        'related_relationships': row.get('related_relationships', 0),
+        'total_relationships': row.get('total_relationships', 0),
+        'cities_updated_at': row.get('cities_updated_at'),
+        'computed_at': datetime.now().isoformat(),
+    }